@@ -6,6 +6,7 @@ Deploy this to any cloud platform (Railway, Render, Heroku, etc.)
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
 import os
@@ -16,7 +17,9 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from precision_agronomist.main import detect_diseases_api, chatbot_api, trends_api
+from precision_agronomist.main import detect_diseases_api, chatbot_api, chatbot_cache_stats_api, trends_api, trends_cache_stats_api, export_api, alerts_api, flush_alerts_api
+from precision_agronomist.alerts.dispatcher import alert_dispatcher
+from precision_agronomist.models.serving import model_server
 
 app = FastAPI(
     title="Precision Agronomist API",
@@ -38,6 +41,8 @@ class DetectionRequest(BaseModel):
     num_images: int = 5
     detection_threshold: float = 0.25
     preferred_language: str = "en"
+    farm_id: Optional[str] = None
+    field_id: Optional[str] = None
 
 class ChatbotRequest(BaseModel):
     question: str
@@ -45,6 +50,17 @@ class ChatbotRequest(BaseModel):
 
 class TrendsRequest(BaseModel):
     days: int = 30
+    farm_id: Optional[str] = None
+    field_id: Optional[str] = None
+    breakdown: bool = False
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    windows: Optional[str] = None
+
+class ExportRequest(BaseModel):
+    file_format: str = "parquet"
+    compression: Optional[str] = "default"
+    incremental: bool = False
 
 # Health check endpoint
 @app.get("/")
@@ -64,7 +80,9 @@ async def detect_diseases(request: DetectionRequest):
         result = detect_diseases_api(
             num_images=request.num_images,
             detection_threshold=request.detection_threshold,
-            preferred_language=request.preferred_language
+            preferred_language=request.preferred_language,
+            farm_id=request.farm_id,
+            field_id=request.field_id
         )
         return result
     except Exception as e:
@@ -83,16 +101,87 @@ async def chatbot(request: ChatbotRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Chatbot response cache metrics endpoint
+@app.get("/chatbot/cache")
+async def chatbot_cache():
+    """Get chatbot response cache hit/miss metrics"""
+    return chatbot_cache_stats_api()
+
 # Trends analysis endpoint
 @app.get("/trends")
-async def trends(days: int = 30):
-    """Get disease trend analysis"""
+async def trends(
+    days: int = 30,
+    farm_id: Optional[str] = None,
+    field_id: Optional[str] = None,
+    breakdown: bool = False,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    windows: Optional[str] = None
+):
+    """Get disease trend analysis, for all farms or one farm/field, over days or a date range plus extra windows"""
     try:
-        result = trends_api(days=days)
+        result = trends_api(
+            days=days,
+            farm_id=farm_id,
+            field_id=field_id,
+            breakdown=breakdown,
+            start_date=start_date,
+            end_date=end_date,
+            windows=windows
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Trend result cache metrics endpoint
+@app.get("/trends/cache")
+async def trends_cache():
+    """Get trend result cache hit/miss metrics"""
+    return trends_cache_stats_api()
+
+# Detection history export endpoint
+@app.post("/export")
+async def export(request: ExportRequest):
+    """Export detection history to a partitioned Parquet/Arrow dataset"""
+    try:
+        result = export_api(
+            file_format=request.file_format,
+            compression=request.compression,
+            incremental=request.incremental
+        )
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Alert queue endpoints
+@app.on_event("startup")
+async def start_alert_dispatcher():
+    """Deliver alerts left in the outbox by earlier runs, and new ones in the background"""
+    alert_dispatcher.wake()
+
+@app.get("/alerts")
+async def alerts(status: Optional[str] = None, limit: int = 20):
+    """Get queued alerts, recent outbox deliveries (optionally by status) and delivery metrics"""
+    return alerts_api(status=status, limit=limit)
+
+@app.post("/alerts/flush")
+async def flush_alerts(force: bool = True, retry_failed: bool = False):
+    """Send queued alerts as one digest per recipient without waiting for the digest period"""
+    return flush_alerts_api(force=force, retry_failed=retry_failed)
+
+# Model warm-up endpoints
+@app.on_event("startup")
+async def warm_models():
+    """Prefetch and load the models in the background so the first /detect does not pay for it"""
+    model_server.start()
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once every model is loaded and warmed up, 503 until then"""
+    readiness = model_server.readiness()
+    readiness["timestamp"] = datetime.now().isoformat()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
 # Additional endpoints
 @app.get("/health")
 async def health_check():
@@ -108,7 +197,13 @@ async def api_info():
         "endpoints": [
             "POST /detect - Disease detection",
             "POST /chatbot - Agricultural advisor",
+            "GET /chatbot/cache - Chatbot cache metrics",
             "GET /trends - Trend analysis",
+            "GET /trends/cache - Trend cache metrics",
+            "POST /export - Detection history export",
+            "GET /alerts - Alert queue, delivery status and metrics",
+            "POST /alerts/flush - Send queued alert digests",
+            "GET /ready - Model readiness (503 until models are warm)",
             "GET /health - Health check"
         ],
         "version": "1.0.0"
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark alert delivery through the deduplicating digest queue
+
+Simulates crew runs raising high/critical alerts about a handful of
+diseases for a few recipients, and delivers them to a local SMTP stand-in
+(a minimal in-process server, so no mail leaves the machine; aiosmtpd's
+Debugging handler works as well via --smtp-port). Compares the previous
+behaviour - one SMTP session and one email per alert per recipient - with
+AlertQueue: deduplication per recipient and disease, then one digest per
+recipient over a single session per flush.
+
+Usage: python benchmarks/bench_alert_delivery.py [--runs N] [--recipients N] [--handshake-ms MS]
+"""
+import argparse
+import os
+import random
+import smtplib
+import sys
+import tempfile
+import time
+from email.mime.text import MIMEText
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from precision_agronomist.alerts.mailer import SMTPMailer
+from precision_agronomist.alerts.queue import AlertQueue
+from smtp_stub import LocalSMTPServer
+
+DISEASES = ["Apple Scab Leaf", "Corn rust leaf", "grape leaf black rot", "Tomato leaf late blight", "Potato leaf early blight"]
+
+
+def simulate_alerts(runs, recipients, seed=0):
+    """(recipients, diseases, severity) per crew run that raised an alert"""
+    rng = random.Random(seed)
+    addresses = [f"farmer{i}@example.com" for i in range(recipients)]
+    return [
+        (addresses, rng.sample(DISEASES, rng.randint(1, 2)), rng.choice(["high", "high", "high", "critical"]))
+        for _ in range(runs)
+    ]
+
+
+def legacy_delivery(alerts, port):
+    """One connection and one email per alert per recipient, as EmailAlertTool did"""
+    for addresses, diseases, severity in alerts:
+        for address in addresses:
+            message = MIMEText(f"{severity} alert: {', '.join(diseases)}")
+            with smtplib.SMTP("127.0.0.1", port) as server:
+                server.sendmail("alerts@example.com", address, message.as_string())
+
+
+def queued_delivery(alerts, port, workdir, digest_minutes):
+    """Alerts through AlertQueue, one simulated run every 10 minutes, flushing after each"""
+    queue = AlertQueue(os.path.join(workdir, "alerts.db"), dedup_window=24 * 3600, digest_period=digest_minutes * 60)
+    mailer = SMTPMailer("127.0.0.1", port, "alerts@example.com", starttls=False)
+    start = time.time()
+    for i, (addresses, diseases, severity) in enumerate(alerts):
+        now = start + i * 600
+        queue.enqueue(addresses, diseases, severity, f"{severity} alert: {', '.join(diseases)}", 10, 3, now=now)
+        queue.flush(mailer, now=now)
+    queue.flush(mailer, force=True)
+    return queue.stats()
+
+
+def measure(name, fn, server):
+    sessions, messages = server.sessions, server.messages
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{name:>30}{server.sessions - sessions:>10,}{server.messages - messages:>10,}{elapsed:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=200, help='crew runs raising an alert')
+    parser.add_argument('--recipients', type=int, default=3)
+    parser.add_argument('--handshake-ms', type=float, default=50.0, help='simulated connect/TLS/login latency')
+    parser.add_argument('--digest-minutes', type=float, default=60.0)
+    parser.add_argument('--smtp-port', type=int, help='use an SMTP server already listening on localhost')
+    args = parser.parse_args()
+
+    server = LocalSMTPServer(handshake_delay=args.handshake_ms / 1000)
+    port = args.smtp_port or server.start()
+    alerts = simulate_alerts(args.runs, args.recipients)
+
+    print(f"{args.runs} alerting runs x {args.recipients} recipients, {args.handshake_ms:g} ms per SMTP session\n")
+    print(f"{'delivery':>30}{'sessions':>10}{'emails':>10}{'seconds':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        measure('one session per alert', lambda: legacy_delivery(alerts, port), server)
+        measure('dedup, send every run', lambda: queued_delivery(alerts, port, workdir + "/a", 0), server)
+        measure(f'dedup, {args.digest_minutes:g}-minute digests',
+                lambda: queued_delivery(alerts, port, workdir + "/b", args.digest_minutes), server)
+    if args.smtp_port:
+        print("\n(sessions and emails are only counted by the built-in stand-in)")
+
+
+if __name__ == '__main__':
+    main()
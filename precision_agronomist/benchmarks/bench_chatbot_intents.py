@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark question routing in FarmerChatbotTool
+
+Generates farmer questions from templates over every detection class and
+knowledge base alias, then measures questions per second for the indexed
+IntentMatcher, the full _generate_response (matching plus formatting), and
+the sequential keyword chain the tool used before, which only recognised
+two diseases. Also reports how many questions naming a disease each
+approach routed to disease-specific advice.
+
+Usage: python benchmarks/bench_chatbot_intents.py [--questions N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from precision_agronomist.chat.intents import IntentMatcher, load_class_names
+from precision_agronomist.tools.chatbot_tool import FarmerChatbotTool
+
+TEMPLATES = [
+    "How do I treat {name}?",
+    "What is the best way to cure {name} on my farm",
+    "How can I prevent {name} next season?",
+    "what is {name} and how do I recognize it",
+    "Any organic remedies for {name}?",
+    "Is spraying for {name} expensive?",
+    "When should I start spraying against {name}",
+    "My field has {name}, what do you recommend?",
+    "{name}",
+    "Hello, I saw some spots on the leaves yesterday. Could you help?",
+]
+
+
+def legacy_route(question_lower):
+    """The previous if/elif keyword chain, returning (intent, disease)"""
+    if any(word in question_lower for word in ['treat', 'cure', 'fix', 'remedy']):
+        if 'apple_scab' in question_lower or ('apple' in question_lower and 'scab' in question_lower):
+            return 'treatment', 'apple_scab'
+        elif 'grape' in question_lower and 'black' in question_lower:
+            return 'treatment', 'grape_black_rot'
+        return 'treatment', None
+    elif any(word in question_lower for word in ['prevent', 'avoid', 'stop', 'protect']):
+        if 'apple_scab' in question_lower:
+            return 'prevention', 'apple_scab'
+        elif 'grape' in question_lower:
+            return 'prevention', 'grape_black_rot'
+        return 'prevention', None
+    elif 'organic' in question_lower or 'natural' in question_lower:
+        return 'organic', None
+    elif any(word in question_lower for word in ['what is', 'identify', 'recognize']):
+        return 'identification', None
+    elif any(word in question_lower for word in ['best practice', 'advice', 'recommendation', 'suggest']):
+        return 'best_practices', None
+    elif any(word in question_lower for word in ['cost', 'price', 'expensive', 'cheap']):
+        return 'economic', None
+    elif any(word in question_lower for word in ['when', 'timing', 'season']):
+        return 'timing', None
+    return None, None
+
+
+def build_questions(count, seed=0):
+    """Questions naming detection classes, diseases and aliases, paired with the disease they name"""
+    tool = FarmerChatbotTool
+    names = [(name, disease) for name, disease in tool.MATCHER.class_diseases.items()]
+    for key, entry in tool.KNOWLEDGE_BASE.items():
+        if 'treatment' in entry:
+            names.append((key.replace('_', ' '), key))
+            names.extend((alias, key) for alias in entry.get('aliases', ()))
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        name, disease = rng.choice(names)
+        questions.append((template.format(name=name), disease if '{name}' in template else None))
+    return questions
+
+
+def throughput(fn, questions):
+    t0 = time.perf_counter()
+    for question, _ in questions:
+        fn(question.lower())
+    return len(questions) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--questions', type=int, default=100_000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    matcher = IntentMatcher(FarmerChatbotTool.KNOWLEDGE_BASE, load_class_names())
+    print(f"Index built in {(time.perf_counter() - t0) * 1000:.2f} ms ({len(matcher.class_diseases)} detection classes)")
+
+    questions = build_questions(args.questions)
+    tool = FarmerChatbotTool()
+    methods = {
+        'legacy keyword chain': legacy_route,
+        'IntentMatcher.match': matcher.match,
+        '_generate_response': lambda question: tool._generate_response(question, ""),
+    }
+
+    print(f"\n{'method':>22}{'questions/s':>14}")
+    for name, method in methods.items():
+        print(f"{name:>22}{throughput(method, questions):>14,.0f}")
+
+    naming = [(question, disease) for question, disease in questions if disease]
+    legacy_hits = sum(legacy_route(question.lower())[1] == disease for question, disease in naming)
+    matcher_hits = sum(disease in matcher.match(question).diseases for question, disease in naming)
+    print(f"\nQuestions naming a disease: {len(naming):,}")
+    print(f"{'legacy keyword chain':>22}{legacy_hits / len(naming):>14.1%} recognised")
+    print(f"{'IntentMatcher.match':>22}{matcher_hits / len(naming):>14.1%} recognised")
+
+
+if __name__ == '__main__':
+    main()
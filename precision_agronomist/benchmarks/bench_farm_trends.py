@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-farm and per-field trend queries on a many-farm history
+
+Builds a synthetic SQLite history (default 50M detections spread over 1,000
+farms with 5 fields each, two years long) and times, for a sample of farms,
+the full trend aggregate set scoped to the farm, scoped to one of its
+fields, and the farm's per-field breakdown. Scoped aggregates read the
+farm-first rollups (daily_field_class_stats, daily_field_image_stats) and
+are also timed on raw rows through the (farm_id, timestamp) index for
+comparison; breakdowns read daily_field_stats. The fleet-wide per-farm
+breakdown is timed too.
+
+Detections arrive as scouting sessions: each session covers one field of
+one farm and stores 50 images with 4 detections each, so a farm sees a
+session every few days at the default scale.
+
+The history is bulk-loaded with the rollup triggers and secondary indexes
+dropped, then init_database recreates them and backfills the rollups, which
+is much faster than maintaining them row by row. Boxes are left empty so the
+R*Tree stays small.
+
+Usage: python benchmarks/bench_farm_trends.py [--rows N] [--farms N] [--fields N] [--sample N] [--workdir DIR]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_trend_backends import CLASSES
+
+from precision_agronomist.analytics.trends import query_field_breakdown, query_trend_aggregates
+from precision_agronomist.storage.backends import open_backend
+from precision_agronomist.storage.database import connect, init_database
+
+# Synthetic sessions: detections per scouting session and per image
+SESSION_DETECTIONS = 200
+IMAGE_DETECTIONS = 4
+
+
+def build_farm_history(db_path: Path, rows: int, farms: int, fields: int, days: int = 730):
+    """Fill a fresh detection database with synthetic rows spread over farms and fields"""
+    if db_path.exists():
+        db_path.unlink()
+    init_database(db_path)
+
+    conn = connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -1000000")
+
+    # Drop everything derived from detections; init_database rebuilds it afterwards
+    derived = conn.execute("""
+        SELECT type, name FROM sqlite_master
+        WHERE (type = 'trigger' AND tbl_name = 'detections')
+           OR (type = 'index' AND tbl_name = 'detections' AND sql IS NOT NULL)
+           OR (type = 'table' AND (name LIKE 'daily_%_stats' OR name = 'detection_boxes'))
+    """).fetchall()
+    for kind, name in derived:
+        conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+
+    start = datetime.now() - timedelta(days=days)
+    class_list = ", ".join(f"('{c}')" for c in CLASSES)
+    conn.execute("CREATE TEMP TABLE classes(name TEXT)")
+    conn.execute(f"INSERT INTO classes VALUES {class_list}")
+    conn.execute(f"""
+        INSERT INTO detections (
+            session_id, timestamp, image_path, disease_class,
+            confidence, severity, farm_id, field_id
+        )
+        WITH RECURSIVE seq(n) AS (
+            SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?
+        ),
+        raw AS (
+            SELECT
+                n,
+                n / {SESSION_DETECTIONS} AS session,
+                abs(random() % 1000) / 1000.0 AS conf,
+                strftime('%Y-%m-%dT%H:%M:%S', ?, '+' || (n * {days * 86400} / ?) || ' seconds') AS ts
+            FROM seq
+        ),
+        placed AS (
+            -- Consecutive sessions go to different farms (7919 is prime)
+            SELECT *, (session * 7919) % {farms} AS farm, (session / {farms}) % {fields} AS field
+            FROM raw
+        )
+        SELECT
+            'session_' || session,
+            ts,
+            'data/farm_' || farm || '/session_' || session || '/img_' || (n / {IMAGE_DETECTIONS}) || '.jpg',
+            classes.name,
+            conf,
+            CASE WHEN conf >= 0.9 THEN 'high' WHEN conf >= 0.7 THEN 'moderate' ELSE 'low' END,
+            'farm-' || farm,
+            'field-' || field
+        FROM placed
+        JOIN classes ON classes.rowid = (placed.n % {len(CLASSES)}) + 1
+    """, (rows, start.isoformat(), rows))
+    conn.commit()
+    conn.close()
+
+    init_database(db_path)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def summary(samples):
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{p50:>9.1f}{p95:>9.1f}{samples[-1]:>9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50_000_000)
+    parser.add_argument('--farms', type=int, default=1_000)
+    parser.add_argument('--fields', type=int, default=5)
+    parser.add_argument('--sample', type=int, default=100, help='Farms timed per query')
+    parser.add_argument('--workdir', default='bench_data')
+    parser.add_argument('--reuse', action='store_true', help='Reuse an existing database in the workdir')
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / 'farm_trends_bench.db'
+
+    if not (args.reuse and db_path.exists()):
+        t0 = time.perf_counter()
+        build_farm_history(db_path, args.rows, args.farms, args.fields)
+        print(f"Built {args.rows:,} detections over {args.farms:,} farms in {time.perf_counter() - t0:.1f}s")
+
+    farms = random.Random(0).sample(range(args.farms), min(args.sample, args.farms))
+    print(f"\nms per query over {len(farms)} farms")
+    print(f"{'query':>28}{'window':>8}{'p50':>9}{'p95':>9}{'max':>9}")
+    with open_backend('sqlite', db_path) as backend:
+        for days in (30, 365):
+            start_ts = (datetime.now() - timedelta(days=days)).isoformat()
+            queries = {
+                'farm trend aggregates': lambda farm: query_trend_aggregates(
+                    backend, start_ts, farm_id=f'farm-{farm}'),
+                'field trend aggregates': lambda farm: query_trend_aggregates(
+                    backend, start_ts, farm_id=f'farm-{farm}', field_id='field-0'),
+                'farm trend aggregates (raw)': lambda farm: query_trend_aggregates(
+                    backend, start_ts, use_rollups=False, farm_id=f'farm-{farm}'),
+                'farm field breakdown': lambda farm: query_field_breakdown(
+                    backend, start_ts, f'farm-{farm}'),
+            }
+            for name, query in queries.items():
+                samples = [timed(lambda: query(farm)) for farm in farms]
+                print(f"{name:>28}{days:>7}d{summary(samples)}")
+            fleet = [timed(lambda: query_field_breakdown(backend, start_ts)) for _ in range(3)]
+            print(f"{'all farms breakdown':>28}{days:>7}d{summary(fleet)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark the chatbot's BM25 knowledge index
+
+Writes a synthetic knowledge directory (default 2,000 Markdown documents
+assembled from agronomy sentences), then times a full index build, loading
+the persisted index, an incremental refresh after one document changes,
+and top-3 searches.
+
+Usage: python benchmarks/bench_knowledge_retrieval.py [--documents N] [--queries N] [--workdir DIR]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from precision_agronomist.chat.retrieval import KnowledgeIndex
+from precision_agronomist.tools.chatbot_tool import FarmerChatbotTool
+
+SENTENCES = [
+    "{crop} growers should scout for {disease} weekly once temperatures pass 15 degrees.",
+    "Protectant sprays of {product} must be on the leaves before rain to stop {disease}.",
+    "Rotate {product} with a fungicide from another FRAC group to slow resistance.",
+    "Remove infected {crop} residue after harvest because {disease} overwinters on it.",
+    "Drip irrigation keeps {crop} foliage dry and reduces {disease} pressure.",
+    "Resistant {crop} varieties are the cheapest long-term defence against {disease}.",
+    "Apply {product} at the label rate; reduced rates select for resistant strains.",
+    "Excess nitrogen makes {crop} canopies dense and humid, which favours {disease}.",
+]
+CROPS = ["apple", "grape", "corn", "pepper", "cherry", "blueberry", "tomato", "potato", "wheat", "soybean"]
+DISEASES = ["scab", "black rot", "rust", "leaf spot", "blight", "powdery mildew", "downy mildew", "anthracnose"]
+PRODUCTS = ["captan", "mancozeb", "copper", "sulfur", "myclobutanil", "azoxystrobin", "neem oil", "chlorothalonil"]
+
+
+def write_document(path: Path, rng: random.Random):
+    sections = []
+    for section in range(rng.randint(2, 5)):
+        crop, disease = rng.choice(CROPS), rng.choice(DISEASES)
+        sentences = [
+            rng.choice(SENTENCES).format(crop=crop, disease=disease, product=rng.choice(PRODUCTS))
+            for _ in range(rng.randint(3, 12))
+        ]
+        sections.append(f"## {crop.title()} {disease} notes {section}\n\n" + " ".join(sentences))
+    path.write_text("\n\n".join(sections))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, default=2_000)
+    parser.add_argument('--queries', type=int, default=5_000)
+    parser.add_argument('--workdir', default='bench_data')
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    knowledge_dir = workdir / 'knowledge'
+    index_dir = workdir / 'knowledge_index'
+    shutil.rmtree(knowledge_dir, ignore_errors=True)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    knowledge_dir.mkdir(parents=True)
+
+    rng = random.Random(0)
+    for i in range(args.documents):
+        write_document(knowledge_dir / f'doc_{i:05d}.md', rng)
+    knowledge_base = FarmerChatbotTool.KNOWLEDGE_BASE
+
+    t0 = time.perf_counter()
+    index = KnowledgeIndex(knowledge_dir, index_dir, knowledge_base, refresh_seconds=0)
+    index.refresh()
+    build = time.perf_counter() - t0
+    stats = index.stats()
+    print(f"Full build: {build * 1000:.0f} ms for {stats['documents']:,} documents, "
+          f"{stats['passages']:,} passages, {stats['terms']:,} terms, {stats['nonzeros']:,} nonzeros")
+
+    t0 = time.perf_counter()
+    reloaded = KnowledgeIndex(knowledge_dir, index_dir, knowledge_base, refresh_seconds=0)
+    changed = reloaded.refresh()
+    print(f"Load persisted index and check files: {(time.perf_counter() - t0) * 1000:.0f} ms (rebuilt: {changed})")
+
+    write_document(knowledge_dir / 'doc_00000.md', random.Random(1))
+    t0 = time.perf_counter()
+    reloaded.refresh()
+    print(f"Incremental refresh after one document changed: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    queries = [
+        f"how do I stop {rng.choice(DISEASES)} on my {rng.choice(CROPS)} with {rng.choice(PRODUCTS)}"
+        for _ in range(args.queries)
+    ]
+    reloaded.refresh_seconds = 3600
+    t0 = time.perf_counter()
+    for query in queries:
+        reloaded.search(query, k=3)
+    elapsed = time.perf_counter() - t0
+    print(f"Top-3 search: {len(queries) / elapsed:,.0f} queries/s ({elapsed / len(queries) * 1e6:.0f} us each)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark model fetching through the content-addressed artifact cache
+
+Serves a random "model" from a local HTTP stand-in that supports range
+requests, throttles bandwidth and can drop connections part-way, then
+times ModelDownloaderTool's cache: the first download (resuming after the
+drops), a repeat run with the model in place, and a restore after the
+destination was deleted. The previous behaviour downloaded the whole file
+on every run, so its cost is the full transfer each time.
+
+Usage: python benchmarks/bench_model_cache.py [--size-mb N] [--mbps N] [--drops N]
+"""
+import argparse
+import hashlib
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from precision_agronomist.models.artifacts import ArtifactCache
+
+
+class RangeServer(http.server.ThreadingHTTPServer):
+    """Serves one payload with Range/ETag support, a bandwidth cap and a number of dropped connections"""
+
+    daemon_threads = True
+
+    def __init__(self, payload, bytes_per_second, drops):
+        super().__init__(("127.0.0.1", 0), _RangeHandler)
+        self.payload = payload
+        self.bytes_per_second = bytes_per_second
+        self.drops = drops
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server_address[1]}/best.pt"
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        payload = server.payload
+        start = 0
+        if self.headers.get("Range") and self.headers.get("If-Range", '"v1"') == '"v1"':
+            start = int(self.headers["Range"].split("=")[1].split("-")[0])
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(payload) - start))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+
+        # Drop this connection half-way through what is left
+        stop = len(payload) - (len(payload) - start) // 2 if server.drops > 0 else len(payload)
+        server.drops -= 1
+        chunk = 64 * 1024
+        for offset in range(start, stop, chunk):
+            piece = payload[offset:min(offset + chunk, stop)]
+            self.wfile.write(piece)
+            server.bytes_sent += len(piece)
+            time.sleep(len(piece) / server.bytes_per_second)
+        if stop < len(payload):
+            self.connection.shutdown(2)
+
+
+def measure(name, fn, server):
+    requests, sent = server.requests, server.bytes_sent
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{name:>28}{result['source']:>11}{server.requests - requests:>10}{(server.bytes_sent - sent) / 2**20:>12.1f}{elapsed:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=float, default=50.0)
+    parser.add_argument('--mbps', type=float, default=200.0, help='stand-in bandwidth in megabits per second')
+    parser.add_argument('--drops', type=int, default=2, help='connections dropped during the first download')
+    args = parser.parse_args()
+
+    payload = os.urandom(int(args.size_mb * 2**20))
+    digest = hashlib.sha256(payload).hexdigest()
+    server = RangeServer(payload, args.mbps * 1e6 / 8, args.drops)
+    url = server.start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = ArtifactCache(os.path.join(workdir, "cache"), attempts=args.drops + 2, retry_delay=0)
+        destination = os.path.join(workdir, "weights", "best.pt")
+
+        print(f"{args.size_mb:g} MB model at {args.mbps:g} Mbit/s, {args.drops} dropped connection(s)\n")
+        print(f"{'run':>28}{'source':>11}{'requests':>10}{'MB sent':>12}{'seconds':>10}")
+        measure('first run (with drops)', lambda: cache.fetch(url, destination, sha256=digest), server)
+        measure('repeat run', lambda: cache.fetch(url, destination), server)
+        os.remove(destination)
+        measure('destination deleted', lambda: cache.fetch(url, destination), server)
+        print(f"\nPreviously every run re-downloaded {args.size_mb:g} MB "
+              f"(~{args.size_mb * 8 / args.mbps:.2f} s at {args.mbps:g} Mbit/s), and a drop left a truncated file.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark trend aggregates on the SQLite and DuckDB analytics backends
+
+Builds a synthetic detection history (default 10M rows over two years),
+exports it to a date/class partitioned Parquet archive and to unpartitioned
+Parquet files, and times the 30- and 365-day trend queries on each backend.
+DuckDB reading the SQLite file directly needs its sqlite extension; that
+column is skipped if the extension cannot be loaded.
+
+Usage: python benchmarks/bench_trend_backends.py [--rows N] [--workdir DIR]
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from precision_agronomist.analytics.trends import query_trend_aggregates
+from precision_agronomist.storage.backends import open_backend
+from precision_agronomist.storage.database import connect, init_database
+from precision_agronomist.storage.export import export_detections
+
+
+CLASSES = [
+    'Apple Scab Leaf', 'Apple leaf', 'Apple rust leaf', 'Bell_pepper leaf spot',
+    'Bell_pepper leaf', 'Blueberry leaf', 'Cherry leaf', 'Corn Gray leaf spot',
+    'Corn leaf blight', 'Corn rust leaf', 'grape leaf black rot'
+]
+
+
+def build_history(db_path: Path, rows: int, days: int = 730):
+    """Fill a fresh detection database with synthetic rows using a recursive CTE"""
+    if db_path.exists():
+        db_path.unlink()
+    init_database(db_path)
+
+    start = datetime.now() - timedelta(days=days)
+    conn = connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    class_list = ", ".join(f"('{c}')" for c in CLASSES)
+    conn.execute("CREATE TEMP TABLE classes(name TEXT)")
+    conn.execute(f"INSERT INTO classes VALUES {class_list}")
+    conn.execute(f"""
+        INSERT INTO detections (
+            session_id, timestamp, image_path, disease_class,
+            confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2, severity
+        )
+        WITH RECURSIVE seq(n) AS (
+            SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?
+        ),
+        raw AS (
+            SELECT
+                n,
+                abs(random() % 1000) / 1000.0 AS conf,
+                strftime('%Y-%m-%dT%H:%M:%S', ?, '+' || (n * {days * 86400} / ?) || ' seconds') AS ts
+            FROM seq
+        )
+        SELECT
+            'session_' || (n / 50),
+            ts,
+            'data/test/img_' || (n % 5000) || '.jpg',
+            classes.name,
+            conf,
+            10.0, 10.0, 100.0, 100.0,
+            CASE WHEN conf >= 0.9 THEN 'high' WHEN conf >= 0.7 THEN 'moderate' ELSE 'low' END
+        FROM raw
+        JOIN classes ON classes.rowid = (raw.n % {len(CLASSES)}) + 1
+    """, (rows, start.isoformat(), rows))
+    conn.commit()
+    conn.close()
+
+
+def time_backend(name: str, source: Path, days: int, repeats: int = 3) -> float:
+    """Best-of-N wall time of one full trend aggregate run (NaN if the backend can't open)"""
+    start_ts = (datetime.now() - timedelta(days=days)).isoformat()
+    best = float('inf')
+    try:
+        backend = open_backend(name, source)
+    except Exception:
+        return float('nan')
+    with backend:
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            query_trend_aggregates(backend, start_ts)
+            best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--workdir', default='bench_data')
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / 'trend_bench.db'
+    parquet_dir = workdir / 'trend_bench_parquet'
+    flat_dir = workdir / 'trend_bench_parquet_flat'
+
+    t0 = time.perf_counter()
+    build_history(db_path, args.rows)
+    print(f"Built {args.rows:,} synthetic detections in {time.perf_counter() - t0:.1f}s")
+
+    for target, partition_by in ((parquet_dir, ('detection_date', 'disease_class')), (flat_dir, ())):
+        shutil.rmtree(target, ignore_errors=True)
+        t0 = time.perf_counter()
+        export_detections(
+            db_path, target, compression='zstd', chunk_size=200_000, partition_by=partition_by
+        )
+        print(f"Exported {target.name} in {time.perf_counter() - t0:.1f}s")
+
+    columns = [
+        ('sqlite', 'sqlite', db_path),
+        ('duckdb/sqlite', 'duckdb', db_path),
+        ('duckdb/partitioned', 'duckdb', parquet_dir),
+        ('duckdb/flat', 'duckdb', flat_dir),
+    ]
+    print("\n" + f"{'window':>8}" + "".join(f"{label:>20}" for label, _, _ in columns))
+    for days in (30, 365):
+        timings = [time_backend(name, source, days) * 1000 for _, name, source in columns]
+        print(f"{days:>7}d" + "".join(f"{ms:>18.0f}ms" for ms in timings))
+
+
+if __name__ == '__main__':
+    main()
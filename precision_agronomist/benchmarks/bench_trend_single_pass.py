@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass trend computation against the four-query version
+
+The four-query version scans the window once per aggregate (overall stats,
+per-class frequency, daily trends, severity distribution); compute_trend_stats
+reads the window once and builds all four in one statement. Both read raw
+detections (the daily rollups are bypassed) on SQLite, and on DuckDB over a
+Parquet export when duckdb is installed. Results are checked to agree before
+timing.
+
+Usage: python benchmarks/bench_trend_single_pass.py [--rows N] [--workdir DIR]
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_trend_backends import build_history
+
+from precision_agronomist.analytics.trends import IMAGE_KEY, compute_trend_stats
+from precision_agronomist.storage.backends import open_backend
+from precision_agronomist.storage.export import export_detections
+
+
+# The per-aggregate queries compute_trend_stats replaced
+FOUR_QUERIES = {
+    "overall_stats": f"""
+        SELECT COUNT(*), COUNT(DISTINCT session_id), COUNT(DISTINCT {IMAGE_KEY}), COUNT(DISTINCT disease_class)
+        FROM {{detections}} WHERE {{window}}
+    """,
+    "disease_frequency": """
+        SELECT disease_class, COUNT(*) as frequency, AVG(confidence),
+               COUNT(CASE WHEN severity = 'high' THEN 1 END)
+        FROM {detections} WHERE {window}
+        GROUP BY disease_class ORDER BY frequency DESC
+    """,
+    "daily_trends": """
+        SELECT substr(timestamp, 1, 10) as detection_date, COUNT(*), COUNT(DISTINCT disease_class)
+        FROM {detections} WHERE {window}
+        GROUP BY substr(timestamp, 1, 10) ORDER BY detection_date
+    """,
+    "severity_distribution": """
+        SELECT severity, COUNT(*) FROM {detections} WHERE {window} GROUP BY severity
+    """,
+}
+
+
+def four_queries(backend, start_ts):
+    results = {
+        name: backend.query(sql, backend.window_params(start_ts))
+        for name, sql in FOUR_QUERIES.items()
+    }
+    results["overall_stats"] = results["overall_stats"][0]
+    return results
+
+
+def normalized(results):
+    """Order-insensitive, float-rounded view of a result set for comparison"""
+    def row(values):
+        return tuple(round(v, 6) if isinstance(v, float) else v for v in values)
+    return {
+        name: row(rows) if name == "overall_stats" else sorted((row(r) for r in rows), key=repr)
+        for name, rows in results.items()
+    }
+
+
+def best_of(fn, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workdir', default='bench_data')
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / 'single_pass_bench.db'
+    flat_dir = workdir / 'single_pass_bench_parquet'
+
+    t0 = time.perf_counter()
+    build_history(db_path, args.rows)
+    print(f"Built {args.rows:,} synthetic detections in {time.perf_counter() - t0:.1f}s")
+
+    sources = [('sqlite', db_path)]
+    try:
+        import duckdb  # noqa: F401
+        shutil.rmtree(flat_dir, ignore_errors=True)
+        export_detections(db_path, flat_dir, compression='zstd', chunk_size=200_000, partition_by=())
+        sources.append(('duckdb', flat_dir))
+    except ImportError:
+        print("duckdb not installed; timing SQLite only")
+
+    print(f"\n{'backend':>8}{'window':>8}{'four queries':>16}{'single pass':>16}{'speedup':>10}")
+    for name, source in sources:
+        with open_backend(name, source) as backend:
+            for days in (30, 365):
+                start_ts = (datetime.now() - timedelta(days=days)).isoformat()
+                assert normalized(four_queries(backend, start_ts)) == normalized(compute_trend_stats(backend, start_ts))
+                old = best_of(lambda: four_queries(backend, start_ts))
+                new = best_of(lambda: compute_trend_stats(backend, start_ts))
+                print(f"{name:>8}{days:>7}d{old * 1000:>14.0f}ms{new * 1000:>14.0f}ms{old / new:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
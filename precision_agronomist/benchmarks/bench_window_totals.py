@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-class window totals from running totals against range scans
+
+A dashboard asking for 7/14/30/90/365-day windows plus a custom range is
+answered three ways: from daily_class_prefix_stats (two lookups per class and
+window), by summing the daily_class_stats rollup over each window, and by
+grouping raw detections. Results are checked to agree before timing.
+
+Usage: python benchmarks/bench_window_totals.py [--rows N] [--workdir DIR]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_trend_backends import build_history
+
+from precision_agronomist.analytics.trends import query_window_totals
+from precision_agronomist.storage.backends import open_backend
+
+
+# Window totals summed from the per-day rollup, for comparison
+DAILY_ROLLUP_QUERY = """
+    SELECT
+        disease_class,
+        SUM(detection_count),
+        SUM(sum_confidence),
+        SUM(CASE WHEN severity = 'high' THEN detection_count ELSE 0 END),
+        SUM(CASE WHEN severity = 'moderate' THEN detection_count ELSE 0 END),
+        SUM(CASE WHEN severity = 'low' THEN detection_count ELSE 0 END)
+    FROM daily_class_stats
+    WHERE detection_date >= ? AND detection_date <= ?
+    GROUP BY disease_class
+"""
+
+
+def daily_rollup_totals(backend, windows):
+    return [backend.query(DAILY_ROLLUP_QUERY, window) for window in windows]
+
+
+def raw_totals(backend, windows):
+    backend.has_rollups = False
+    try:
+        return query_window_totals(backend, windows)
+    finally:
+        backend.has_rollups = True
+
+
+def normalized(results):
+    return [sorted((r[0], r[1], round(r[2], 4), r[3], r[4], r[5]) for r in rows if r[1]) for rows in results]
+
+
+def best_of(fn, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workdir', default='bench_data')
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / 'window_totals_bench.db'
+
+    t0 = time.perf_counter()
+    build_history(db_path, args.rows)
+    print(f"Built {args.rows:,} synthetic detections in {time.perf_counter() - t0:.1f}s")
+
+    today = date.today()
+    dashboard = [((today - timedelta(days=days - 1)).isoformat(), today.isoformat()) for days in (7, 14, 30, 90, 365)]
+    dashboard.append(((today - timedelta(days=500)).isoformat(), (today - timedelta(days=200)).isoformat()))
+
+    methods = {
+        'running totals': lambda backend, windows: query_window_totals(backend, windows),
+        'daily rollup sums': daily_rollup_totals,
+        'raw group by': raw_totals,
+    }
+
+    with open_backend('sqlite', db_path) as backend:
+        reference = normalized(query_window_totals(backend, dashboard))
+        for name, method in methods.items():
+            assert normalized(method(backend, dashboard)) == reference, name
+
+        labels = [f"{(date.fromisoformat(last) - date.fromisoformat(first)).days + 1}d" for first, last in dashboard]
+        print("\nms per call; 'all' answers every window in one call")
+        print(f"{'method':>20}" + "".join(f"{label:>9}" for label in labels) + f"{'all':>9}")
+        for name, method in methods.items():
+            per_window = [best_of(lambda: method(backend, [window])) * 1000 for window in dashboard]
+            together = best_of(lambda: method(backend, dashboard)) * 1000
+            print(f"{name:>20}" + "".join(f"{ms:>9.2f}" for ms in per_window) + f"{together:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
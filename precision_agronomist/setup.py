@@ -13,7 +13,6 @@ setup(
         "crewai[tools]>=0.203.0,<1.0.0",
         "pandas>=2.2.0,<3.0.0",
         "numpy>=1.26.0,<2.0.0",
-        "gdown>=4.7.0",
         "pillow>=10.0.0",
         "deep-translator>=1.11.4",
         "fastapi>=0.104.0",
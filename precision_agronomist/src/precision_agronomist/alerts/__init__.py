@@ -0,0 +1,18 @@
+from precision_agronomist.alerts.dispatcher import AlertDispatcher, alert_dispatcher
+from precision_agronomist.alerts.mailer import (
+    SEVERITY_RANK, ConsoleMailer, SMTPMailer, build_digest, mailer_from_env
+)
+from precision_agronomist.alerts.queue import DEFAULT_ALERT_DB, AlertQueue, alert_queue
+
+__all__ = [
+    'AlertDispatcher',
+    'alert_dispatcher',
+    'SEVERITY_RANK',
+    'ConsoleMailer',
+    'SMTPMailer',
+    'build_digest',
+    'mailer_from_env',
+    'DEFAULT_ALERT_DB',
+    'AlertQueue',
+    'alert_queue'
+]
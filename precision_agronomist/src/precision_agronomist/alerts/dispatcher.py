@@ -0,0 +1,109 @@
+from typing import Callable, Optional
+import atexit
+import os
+import threading
+import time
+
+from precision_agronomist.alerts.mailer import mailer_from_env
+from precision_agronomist.alerts.queue import AlertQueue, alert_queue
+
+
+class AlertDispatcher:
+    """
+    Background thread delivering the alert outbox
+
+    Each pass composes due digests and sends due outbox messages, then
+    sleeps until the next digest or retry is due (at most ``poll_interval``
+    seconds, so alerts queued by other processes are picked up too).
+    ``wake`` starts the thread on first use and triggers a pass right away,
+    so callers return as soon as their alert is queued. On interpreter exit
+    a last pass sends whatever is due; anything else stays in the outbox for
+    the next dispatcher.
+    """
+
+    def __init__(
+        self,
+        queue: AlertQueue,
+        mailer_factory: Callable = mailer_from_env,
+        poll_interval: float = 30.0
+    ):
+        """
+        Args:
+            queue: Alert queue and outbox to deliver
+            mailer_factory: Returns the mailer for a pass (read from the environment by default)
+            poll_interval: Longest sleep between passes, in seconds
+        """
+        self.queue = queue
+        self.mailer_factory = mailer_factory
+        self.poll_interval = poll_interval
+        self.passes = 0
+        self.last_error: Optional[str] = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    def start(self):
+        """Start the dispatcher thread if it is not running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Run a delivery pass now (starting the thread if needed)"""
+        self.start()
+        self._wake.set()
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self, force: bool = False) -> dict:
+        """One synchronous pass: compose due digests and deliver due messages"""
+        result = self.queue.flush(self.mailer_factory(), force=force)
+        self.passes += 1
+        return result
+
+    def close(self, timeout: float = 30.0):
+        """Make a last delivery pass and stop the thread (safe to call more than once)"""
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._stopping:
+                return
+            self._stopping = True
+        self._wake.set()
+        thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            # Clear before the pass: a wake arriving while it runs triggers another one
+            self._wake.clear()
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Warning: alert dispatch failed: {e}")
+            if self._stopping:
+                return
+            next_wake = self.queue.next_wake_at()
+            delay = self.poll_interval if next_wake is None else min(self.poll_interval, next_wake - time.time())
+            self._wake.wait(max(0.0, delay))
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running(),
+            "passes": self.passes,
+            "last_error": self.last_error,
+            "poll_interval_seconds": self.poll_interval
+        }
+
+
+# Dispatcher for the shared alert queue; started by the first alert (or the API on startup)
+alert_dispatcher = AlertDispatcher(
+    alert_queue,
+    poll_interval=float(os.getenv('ALERT_DISPATCH_INTERVAL', '30'))
+)
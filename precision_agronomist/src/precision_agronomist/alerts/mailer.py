@@ -0,0 +1,243 @@
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Sequence, Tuple
+import html
+import os
+import smtplib
+
+
+SEVERITY_RANK = {"low": 0, "moderate": 1, "high": 2, "critical": 3}
+SEVERITY_COLORS = {"critical": "red", "high": "orange"}
+
+
+class SMTPMailer:
+    """
+    Sends a batch of messages over one SMTP session
+
+    The connection, STARTTLS handshake and login happen once per ``send``
+    call, however many messages are in the batch. A message the server
+    refuses does not stop the rest of the batch; a connection failure fails
+    every message not sent yet.
+    """
+
+    def __init__(self, server: str, port: int, sender: str, password: str = "", starttls: bool = True, timeout: float = 30.0):
+        """
+        Args:
+            server: SMTP host
+            port: SMTP port
+            sender: From address (also the login user)
+            password: Login password (no login when empty, e.g. for a local relay)
+            starttls: Upgrade the connection with STARTTLS before logging in
+            timeout: Socket timeout in seconds
+        """
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.sessions = 0
+
+    def send(self, messages: Sequence[Tuple[str, MIMEMultipart]]) -> Tuple[List[int], Dict[int, str]]:
+        """
+        Send (recipient, message) pairs
+
+        Returns:
+            (indexes of the messages sent, index -> error for the ones refused)
+        """
+        sent: List[int] = []
+        errors: Dict[int, str] = {}
+        if not messages:
+            return sent, errors
+        try:
+            with smtplib.SMTP(self.server, self.port, timeout=self.timeout) as server:
+                self.sessions += 1
+                if self.starttls:
+                    server.starttls()
+                if self.password:
+                    server.login(self.sender, self.password)
+                for index, (recipient, message) in enumerate(messages):
+                    try:
+                        server.sendmail(self.sender, recipient, message.as_string())
+                        sent.append(index)
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                        errors[index] = str(e)
+        except (OSError, smtplib.SMTPException) as e:
+            # Session lost (or never opened): whatever was not sent yet failed with it
+            for index in range(len(messages)):
+                if index not in errors and index not in sent:
+                    errors[index] = str(e)
+        return sent, errors
+
+
+class ConsoleMailer:
+    """Demo mode stand-in for SMTPMailer that prints the plain-text part of each message"""
+
+    def __init__(self, sender: str):
+        self.sender = sender
+        self.sessions = 0
+
+    def send(self, messages):
+        self.sessions += 1
+        for recipient, message in messages:
+            text = next(
+                part.get_payload(decode=True).decode("utf-8")
+                for part in message.walk() if part.get_content_type() == "text/plain"
+            )
+            print("\n" + "="*60)
+            print(f"📧 EMAIL ALERT (Demo Mode - No credentials configured) - To: {recipient}")
+            print("="*60)
+            print(text)
+            print("="*60 + "\n")
+        return list(range(len(messages))), {}
+
+
+def mailer_from_env():
+    """
+    Mailer configured from the environment
+
+    Uses ALERT_SENDER_EMAIL, ALERT_SENDER_PASSWORD, SMTP_SERVER, SMTP_PORT
+    and SMTP_STARTTLS. Without a password, alerts are only printed (demo
+    mode) unless SMTP_SERVER is set explicitly, in which case they go to that
+    server without logging in - a local relay or test SMTP server.
+    """
+    sender = os.getenv('ALERT_SENDER_EMAIL', 'precision.agronomist@example.com')
+    password = os.getenv('ALERT_SENDER_PASSWORD', '')
+    if not password and not os.getenv('SMTP_SERVER'):
+        return ConsoleMailer(sender)
+    return SMTPMailer(
+        server=os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+        port=int(os.getenv('SMTP_PORT', '587')),
+        sender=sender,
+        password=password,
+        starttls=os.getenv('SMTP_STARTTLS', 'true').lower() == 'true'
+    )
+
+
+def build_digest(sender: str, recipient: str, alerts: Sequence[dict]) -> MIMEMultipart:
+    """
+    One email covering every queued alert for a recipient
+
+    Args:
+        sender: From address
+        recipient: To address
+        alerts: Queued alerts (severity, diseases, summary, num_detections,
+            affected_images, created_at), oldest first
+
+    Returns:
+        multipart/alternative message with plain-text and HTML parts
+    """
+    severity = max((alert["severity"] for alert in alerts), key=lambda level: SEVERITY_RANK.get(level, 0))
+    if len(alerts) == 1:
+        subject = f"🚨 URGENT: {severity.upper()} Severity Plant Disease Alert"
+    else:
+        subject = f"🚨 URGENT: {len(alerts)} Plant Disease Alerts ({severity.upper()} severity)"
+
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = recipient
+    message.attach(MIMEText(format_digest_text(alerts), "plain", "utf-8"))
+    message.attach(MIMEText(format_digest_html(alerts, severity), "html", "utf-8"))
+    return message
+
+
+def _timestamp(alert: dict) -> str:
+    return datetime.fromtimestamp(alert["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def format_digest_text(alerts: Sequence[dict]) -> str:
+    """Plain-text body of a digest"""
+    sections = []
+    for alert in alerts:
+        sections.append(f"""
+🚨 PLANT DISEASE ALERT - {alert["severity"].upper()} SEVERITY
+
+Timestamp: {_timestamp(alert)}
+Diseases: {", ".join(alert["diseases"])}
+Affected Images: {alert["affected_images"]}
+Total Detections: {alert["num_detections"]}
+
+Disease Summary:
+{alert["summary"]}
+""")
+    return "\n".join(sections) + """
+⚠️ IMMEDIATE ACTION REQUIRED
+This alert requires urgent attention to prevent crop loss.
+
+Recommended Actions:
+1. Inspect affected areas immediately
+2. Isolate infected plants if possible
+3. Apply appropriate treatments
+4. Monitor spread closely
+
+View full report: plant_disease_report.md
+View annotated images: artifacts/yolo_detection/predictions/crew_results/
+"""
+
+
+def format_digest_html(alerts: Sequence[dict], severity: str) -> str:
+    """HTML body of a digest"""
+    severity_color = SEVERITY_COLORS.get(severity.lower(), "orange")
+    blocks = "".join(f"""
+        <div class="stats">
+            <h3>{html.escape(alert["severity"].upper())} - {html.escape(", ".join(alert["diseases"]))}</h3>
+            <p><strong>Timestamp:</strong> {_timestamp(alert)}</p>
+            <p><strong>Affected Images:</strong> {alert["affected_images"]}</p>
+            <p><strong>Total Detections:</strong> {alert["num_detections"]}</p>
+            <hr>
+            <p><strong>Diseases Found:</strong></p>
+            <p>{html.escape(alert["summary"])}</p>
+        </div>
+        """ for alert in alerts)
+
+    return f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .header {{ background-color: {severity_color}; color: white; padding: 20px; text-align: center; }}
+        .content {{ padding: 20px; }}
+        .alert-box {{ background-color: #fff3cd; border-left: 4px solid {severity_color}; padding: 15px; margin: 20px 0; }}
+        .stats {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0; }}
+        .actions {{ background-color: #e7f3ff; padding: 15px; border-radius: 5px; margin: 20px 0; }}
+        ul {{ padding-left: 20px; }}
+        .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>🚨 PLANT DISEASE ALERT</h1>
+        <h2>{severity.upper()} SEVERITY</h2>
+    </div>
+
+    <div class="content">
+        <div class="alert-box">
+            <strong>⚠️ Immediate Action Required</strong><br>
+            High-severity plant diseases have been detected in your crops.
+        </div>
+        {blocks}
+        <div class="actions">
+            <h3>🎯 Recommended Actions</h3>
+            <ul>
+                <li>Inspect affected areas immediately</li>
+                <li>Isolate infected plants if possible</li>
+                <li>Apply appropriate fungicides or treatments</li>
+                <li>Monitor disease spread closely over next 48-72 hours</li>
+                <li>Consider consulting with a plant pathologist</li>
+            </ul>
+        </div>
+
+        <p><strong>📊 Full Report:</strong> Check plant_disease_report.md for detailed analysis</p>
+        <p><strong>🖼️ Visual Evidence:</strong> Review annotated images in predictions folder</p>
+    </div>
+
+    <div class="footer">
+        <p>Precision Agronomist AI System</p>
+        <p>Automated Plant Disease Detection & Monitoring</p>
+    </div>
+</body>
+</html>
+"""
@@ -0,0 +1,431 @@
+from contextlib import contextmanager
+from email import message_from_string
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from precision_agronomist.alerts.mailer import SEVERITY_RANK, build_digest
+
+
+# Default location of the alert queue, in the project directory whatever the working directory
+DEFAULT_ALERT_DB = Path(__file__).parents[3] / "alerts.db"
+
+# Seconds a claimed outbox message may stay 'sending' before another dispatcher takes it over
+SEND_LEASE = 300
+
+# Digests claimed per delivery pass (all sent over one SMTP session)
+DELIVERY_BATCH = 50
+
+
+class AlertQueue:
+    """
+    Pending disease alerts, deduplicated and sent as per-recipient digests
+
+    ``enqueue`` drops the diseases a recipient was already alerted about
+    within the dedup window (unless the severity went up) and queues the
+    rest. Once the oldest queued alert has waited the digest period - or
+    straight away for a critical alert - ``compose_digests`` turns the queue
+    into one email per recipient in the ``alert_outbox`` table, and
+    ``deliver`` sends due outbox messages over a single SMTP session, so a
+    busy day costs as many emails as there are recipients rather than one
+    per detection run.
+
+    The outbox tracks every message's delivery status. A message that fails
+    is retried with exponential backoff (retry_base, doubling up to
+    retry_max) and marked failed after max_attempts; its dedup history is
+    then dropped, so the next alert about those diseases is not suppressed. Queue, dedup history
+    and outbox live in SQLite, so they hold across crew runs and processes;
+    dispatchers in several processes claim messages under a lease, so each
+    is sent once.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_ALERT_DB,
+        dedup_window: float = 24 * 3600,
+        digest_period: float = 0.0,
+        max_attempts: int = 6,
+        retry_base: float = 30.0,
+        retry_max: float = 3600.0,
+        retention: float = 30 * 24 * 3600
+    ):
+        """
+        Args:
+            db_path: SQLite file holding the queue (created on first use)
+            dedup_window: Seconds during which a recipient is not re-alerted about a disease
+            digest_period: Seconds alerts wait to be batched into one digest (0 sends on every flush)
+            max_attempts: Delivery attempts before a message is marked failed
+            retry_base: Seconds before the first retry
+            retry_max: Longest wait between retries
+            retention: Seconds sent messages are kept in the outbox
+        """
+        self.db_path = Path(db_path)
+        self.dedup_window = dedup_window
+        self.digest_period = digest_period
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.retention = retention
+        self.queued = 0
+        self.suppressed = 0
+        self.digests_sent = 0
+        self.alerts_sent = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS alert_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    severity TEXT NOT NULL,
+                    diseases TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    num_detections INTEGER NOT NULL,
+                    affected_images INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS alert_history (
+                    recipient TEXT NOT NULL,
+                    disease TEXT NOT NULL,
+                    severity_rank INTEGER NOT NULL,
+                    alerted_at REAL NOT NULL,
+                    PRIMARY KEY (recipient, disease)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS alert_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    alert_count INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    sent_at REAL,
+                    diseases TEXT
+                )
+            """)
+            outbox_columns = {row[1] for row in conn.execute("PRAGMA table_info(alert_outbox)")}
+            if "diseases" not in outbox_columns:
+                conn.execute("ALTER TABLE alert_outbox ADD COLUMN diseases TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_alert_outbox_due ON alert_outbox (status, next_attempt_at)")
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _immediate(self):
+        """Write transaction taken up front, so concurrent processes serialize (caller holds the lock)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(
+        self,
+        recipients: Sequence[str],
+        diseases: Sequence[str],
+        severity: str,
+        summary: str,
+        num_detections: int,
+        affected_images: int,
+        now: float = None
+    ) -> Dict[str, List[str]]:
+        """
+        Queue an alert for each recipient not recently alerted about these diseases
+
+        Args:
+            recipients: Email addresses
+            diseases: Disease keys the alert is about (the dedup key with the recipient)
+            severity: Severity level
+            summary: Disease summary for the email
+            num_detections: Total detections
+            affected_images: Number of affected images
+            now: Current time (defaults to time.time())
+
+        Returns:
+            {"queued": recipients queued for, "suppressed": recipients skipped as duplicates}
+        """
+        now = time.time() if now is None else now
+        rank = SEVERITY_RANK.get(severity.lower(), 0)
+        diseases = list(dict.fromkeys(disease.strip().lower() for disease in diseases if disease.strip()))
+        if not diseases:
+            raise ValueError("An alert needs at least one disease to deduplicate on")
+        outcome: Dict[str, List[str]] = {"queued": [], "suppressed": []}
+
+        with self._lock, self._immediate() as conn:
+            for recipient in dict.fromkeys(recipients):
+                recent = {
+                    disease: alerted_rank for disease, alerted_rank in conn.execute(f"""
+                        SELECT disease, severity_rank FROM alert_history
+                        WHERE recipient = ? AND alerted_at > ?
+                          AND disease IN ({", ".join("?" * len(diseases))})
+                    """, (recipient, now - self.dedup_window, *diseases))
+                }
+                new = [disease for disease in diseases if recent.get(disease, -1) < rank]
+                if not new:
+                    outcome["suppressed"].append(recipient)
+                    continue
+                conn.execute(
+                    "INSERT INTO alert_queue (recipient, severity, diseases, summary, num_detections, affected_images, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (recipient, severity.lower(), json.dumps(new), summary, num_detections, affected_images, now)
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO alert_history VALUES (?, ?, ?, ?)",
+                    [(recipient, disease, rank, now) for disease in new]
+                )
+                outcome["queued"].append(recipient)
+            self.queued += len(outcome["queued"])
+            self.suppressed += len(outcome["suppressed"])
+        return outcome
+
+    def _due(self, conn: sqlite3.Connection, now: float) -> bool:
+        oldest, critical = conn.execute(
+            "SELECT MIN(created_at), MAX(severity = 'critical') FROM alert_queue"
+        ).fetchone()
+        return oldest is not None and (bool(critical) or oldest + self.digest_period <= now)
+
+    def due(self, now: float = None) -> bool:
+        """Whether queued alerts are ready to be composed into digests"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._due(self._connection(), now)
+
+    def next_digest_at(self) -> Optional[float]:
+        """When the queued alerts will be due, None if nothing is queued"""
+        with self._lock:
+            oldest = self._connection().execute("SELECT MIN(created_at) FROM alert_queue").fetchone()[0]
+        return None if oldest is None else oldest + self.digest_period
+
+    def next_wake_at(self) -> Optional[float]:
+        """Earliest time there is something to compose or deliver, None if nothing is waiting"""
+        with self._lock:
+            next_attempt = self._connection().execute(
+                "SELECT MIN(next_attempt_at) FROM alert_outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()[0]
+        times = [moment for moment in (self.next_digest_at(), next_attempt) if moment is not None]
+        return min(times) if times else None
+
+    def compose_digests(self, sender: str, force: bool = False, now: float = None) -> int:
+        """
+        Move the queued alerts into the outbox as one digest per recipient
+
+        Args:
+            sender: From address of the digests
+            force: Compose even if the digest period has not elapsed
+            now: Current time (defaults to time.time())
+
+        Returns:
+            Number of digests added to the outbox
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._immediate() as conn:
+            conn.execute(
+                "DELETE FROM alert_outbox WHERE status = 'sent' AND sent_at < ?", (now - self.retention,)
+            )
+            if not force and not self._due(conn, now):
+                return 0
+            rows = conn.execute("""
+                SELECT id, recipient, severity, diseases, summary, num_detections, affected_images, created_at
+                FROM alert_queue ORDER BY recipient, id
+            """).fetchall()
+            by_recipient: Dict[str, List[dict]] = {}
+            for row in rows:
+                by_recipient.setdefault(row[1], []).append({
+                    "severity": row[2],
+                    "diseases": json.loads(row[3]),
+                    "summary": row[4],
+                    "num_detections": row[5],
+                    "affected_images": row[6],
+                    "created_at": row[7]
+                })
+            for recipient, alerts in by_recipient.items():
+                message = build_digest(sender, recipient, alerts)
+                diseases = sorted({disease for alert in alerts for disease in alert["diseases"]})
+                conn.execute(
+                    "INSERT INTO alert_outbox (recipient, subject, message, alert_count, next_attempt_at, created_at, diseases) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (recipient, message["Subject"], message.as_string(), len(alerts), now, now, json.dumps(diseases))
+                )
+            conn.executemany("DELETE FROM alert_queue WHERE id = ?", [(row[0],) for row in rows])
+        return len(by_recipient)
+
+    def deliver(self, mailer, now: float = None) -> dict:
+        """
+        Send the outbox messages that are due, over one mailer session
+
+        Messages are claimed first (status 'sending' under a SEND_LEASE), so
+        another dispatcher does not send them too; a claim left behind by a
+        crashed process expires with its lease.
+
+        Args:
+            mailer: SMTPMailer (or ConsoleMailer)
+            now: Current time (defaults to time.time())
+
+        Returns:
+            Dict with digests and alerts sent, recipient -> error for messages
+            that failed this attempt, and how many will be retried
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._immediate() as conn:
+            claimed = conn.execute("""
+                SELECT id, recipient, message, alert_count, attempts, diseases, created_at FROM alert_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id LIMIT ?
+            """, (now, DELIVERY_BATCH)).fetchall()
+            conn.executemany(
+                "UPDATE alert_outbox SET status = 'sending', next_attempt_at = ? WHERE id = ?",
+                [(now + SEND_LEASE, row[0]) for row in claimed]
+            )
+
+        result = {"digests_sent": 0, "alerts_sent": 0, "failed": {}, "retrying": 0}
+        if not claimed:
+            return result
+        try:
+            sent, errors = mailer.send([(row[1], message_from_string(row[2])) for row in claimed])
+        except Exception as e:
+            sent, errors = [], {index: str(e) for index in range(len(claimed))}
+
+        finished = time.time()
+        updates = []
+        forget = []
+        for index in sent:
+            updates.append(("sent", claimed[index][4] + 1, None, finished, None, claimed[index][0]))
+        for index, error in errors.items():
+            attempts = claimed[index][4] + 1
+            if attempts >= self.max_attempts:
+                updates.append(("failed", attempts, None, None, error, claimed[index][0]))
+                # The recipient was never told; let the next alert about these diseases through
+                recipient, diseases, created_at = claimed[index][1], claimed[index][5], claimed[index][6]
+                forget.extend((recipient, disease, created_at) for disease in json.loads(diseases or "[]"))
+            else:
+                delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+                updates.append(("pending", attempts, finished + delay, None, error, claimed[index][0]))
+                result["retrying"] += 1
+            result["failed"][claimed[index][1]] = error
+
+        with self._lock, self._immediate() as conn:
+            conn.executemany("""
+                UPDATE alert_outbox SET status = ?, attempts = ?,
+                    next_attempt_at = COALESCE(?, next_attempt_at), sent_at = ?, last_error = ?
+                WHERE id = ?
+            """, updates)
+            # History written after the digest was composed belongs to a later alert; keep it
+            conn.executemany(
+                "DELETE FROM alert_history WHERE recipient = ? AND disease = ? AND alerted_at <= ?", forget
+            )
+            result["digests_sent"] = len(sent)
+            result["alerts_sent"] = sum(claimed[index][3] for index in sent)
+            self.digests_sent += result["digests_sent"]
+            self.alerts_sent += result["alerts_sent"]
+            self.retries += result["retrying"]
+            self.failures += len(errors) - result["retrying"]
+        return result
+
+    def flush(self, mailer, force: bool = False, now: float = None) -> dict:
+        """
+        Compose due digests and deliver everything due, synchronously
+
+        Args:
+            mailer: SMTPMailer (or ConsoleMailer) sending the whole batch in one session
+            force: Compose even if the digest period has not elapsed
+            now: Current time (defaults to time.time())
+
+        Returns:
+            deliver() result plus the alerts still queued
+        """
+        self.compose_digests(mailer.sender, force=force, now=now)
+        result = self.deliver(mailer, now=now)
+        result["pending"] = self.pending_count()
+        return result
+
+    def requeue_failed(self) -> int:
+        """Give messages marked failed a fresh set of delivery attempts"""
+        with self._lock, self._immediate() as conn:
+            return conn.execute("""
+                UPDATE alert_outbox SET status = 'pending', attempts = 0, next_attempt_at = ?
+                WHERE status = 'failed'
+            """, (time.time(),)).rowcount
+
+    def deliveries(self, status: str = None, limit: int = 50) -> List[dict]:
+        """Most recent outbox messages with their delivery status"""
+        query = """
+            SELECT id, recipient, subject, alert_count, status, attempts,
+                   next_attempt_at, last_error, created_at, sent_at
+            FROM alert_outbox
+        """
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY id DESC LIMIT ?"
+        columns = (
+            "id", "recipient", "subject", "alert_count", "status", "attempts",
+            "next_attempt_at", "last_error", "created_at", "sent_at"
+        )
+        with self._lock:
+            rows = self._connection().execute(query, (*params, limit)).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def pending_count(self) -> int:
+        """Alerts queued and not yet composed into a digest"""
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM alert_queue").fetchone()[0]
+
+    def outbox_counts(self) -> Dict[str, int]:
+        """Outbox messages per delivery status"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM alert_outbox GROUP BY status"
+            ).fetchall()
+        counts = {"pending": 0, "sending": 0, "sent": 0, "failed": 0}
+        counts.update(rows)
+        return counts
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending_count(),
+            "next_digest_at": self.next_digest_at(),
+            "outbox": self.outbox_counts(),
+            "queued": self.queued,
+            "suppressed": self.suppressed,
+            "digests_sent": self.digests_sent,
+            "alerts_sent": self.alerts_sent,
+            "retries": self.retries,
+            "failures": self.failures,
+            "dedup_window_hours": self.dedup_window / 3600,
+            "digest_period_minutes": self.digest_period / 60,
+            "db_path": str(self.db_path)
+        }
+
+
+# Alert queue shared by every EmailAlertTool in the process
+alert_queue = AlertQueue(
+    db_path=os.getenv('ALERT_DB', str(DEFAULT_ALERT_DB)),
+    dedup_window=float(os.getenv('ALERT_DEDUP_HOURS', '24')) * 3600,
+    digest_period=float(os.getenv('ALERT_DIGEST_MINUTES', '0')) * 60,
+    max_attempts=int(os.getenv('ALERT_MAX_ATTEMPTS', '6')),
+    retry_base=float(os.getenv('ALERT_RETRY_SECONDS', '30'))
+)
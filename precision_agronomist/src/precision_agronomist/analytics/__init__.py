@@ -0,0 +1,40 @@
+from precision_agronomist.analytics.cache import DataVersionTracker, TrendCache, data_versions, trend_cache
+from precision_agronomist.analytics.trends import (
+    FARM_ROLLUP_QUERIES, ROLLUP_QUERIES, TREND_SCAN_QUERY, compute_trend_stats, query_daily_class_counts, query_field_breakdown,
+    query_trend_aggregates, query_window_totals, scope_filter
+)
+from precision_agronomist.analytics.forecast import ForecastState, forecast_outbreaks
+from precision_agronomist.analytics.outbreak import (
+    OutbreakDetector, email_alert_sink, get_detector, webhook_sink
+)
+from precision_agronomist.analytics.timeseries import (
+    TREND_STATS_DTYPE, class_trend_statistics, daily_matrix, rolling_mean, rolling_zscore, week_over_week
+)
+
+__all__ = [
+    'DataVersionTracker',
+    'TrendCache',
+    'data_versions',
+    'trend_cache',
+    'FARM_ROLLUP_QUERIES',
+    'ROLLUP_QUERIES',
+    'TREND_SCAN_QUERY',
+    'compute_trend_stats',
+    'query_daily_class_counts',
+    'query_field_breakdown',
+    'query_trend_aggregates',
+    'query_window_totals',
+    'scope_filter',
+    'ForecastState',
+    'forecast_outbreaks',
+    'OutbreakDetector',
+    'email_alert_sink',
+    'get_detector',
+    'webhook_sink',
+    'TREND_STATS_DTYPE',
+    'class_trend_statistics',
+    'daily_matrix',
+    'rolling_mean',
+    'rolling_zscore',
+    'week_over_week'
+]
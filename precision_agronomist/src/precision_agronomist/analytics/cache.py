@@ -0,0 +1,117 @@
+from pathlib import Path
+from typing import Dict, Hashable, Optional
+import os
+import sqlite3
+import threading
+
+
+class DataVersionTracker:
+    """
+    Cheap change detection for detection stores
+
+    For SQLite databases a read-only connection is kept open per file and
+    ``PRAGMA data_version`` is read on each check; SQLite bumps it whenever
+    another connection commits, so the check never scans data. Other sources
+    (Parquet archives) fall back to the modification time of their export
+    watermark or directory.
+    """
+
+    def __init__(self):
+        self._connections: Dict[Path, tuple] = {}
+        self._lock = threading.Lock()
+
+    def version(self, source) -> Optional[tuple]:
+        """Opaque version of a source that changes whenever its data does (None if missing)"""
+        source = Path(source)
+        try:
+            stat = source.stat()
+        except OSError:
+            return None
+
+        if source.is_dir():
+            watermark = source / "_watermark.json"
+            marker = watermark.stat() if watermark.exists() else stat
+            return ("mtime", marker.st_mtime_ns)
+
+        key = source.resolve()
+        with self._lock:
+            entry = self._connections.get(key)
+            if entry is None or entry[0] != stat.st_ino:
+                # New file or replaced on disk: (re)open the tracking connection
+                if entry is not None:
+                    entry[1].close()
+                conn = sqlite3.connect(f"{key.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+                entry = (stat.st_ino, conn)
+                self._connections[key] = entry
+            try:
+                data_version = entry[1].execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.DatabaseError:
+                # Not an SQLite file (e.g. a single Parquet file)
+                return ("mtime", stat.st_mtime_ns)
+        return (stat.st_ino, data_version)
+
+    def close(self):
+        with self._lock:
+            for _, conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+
+class TrendCache:
+    """
+    In-process cache of trend results, invalidated by data version
+
+    Entries are stored with the data version they were computed from; a
+    lookup with a different version is a miss and evicts the stale entry.
+    Repeated polling with no new detections is a dictionary lookup plus one
+    ``PRAGMA data_version`` read.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version) -> Optional[str]:
+        """Cached result for key if it was computed at this data version"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, version, result: str):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                # Drop the oldest entry (dicts keep insertion order)
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (version, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Shared by every TrendAnalysisTool in the process (API handlers and crew runs)
+trend_cache = TrendCache(max_entries=int(os.getenv('TREND_CACHE_SIZE', '256')))
+data_versions = DataVersionTracker()
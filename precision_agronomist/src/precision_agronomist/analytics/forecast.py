@@ -0,0 +1,285 @@
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+import json
+import threading
+
+import numpy as np
+
+from precision_agronomist.analytics.timeseries import daily_matrix
+from precision_agronomist.analytics.trends import query_daily_class_counts, query_detection_total
+from precision_agronomist.storage.backends import AnalyticsBackend
+from precision_agronomist.utils.files import replace_file
+
+
+# Additive Holt-Winters smoothing constants with a weekly season
+FORECAST_PARAMS = {
+    "alpha": 0.3,       # level
+    "beta": 0.05,       # trend
+    "gamma": 0.15,      # weekly season
+    "variance_decay": 0.05,
+    "season_length": 7,
+}
+
+# Days of history folded into a fresh state before the first forecast
+FORECAST_HISTORY_DAYS = 365
+
+# Normal quantile of the reported forecast intervals (95%)
+INTERVAL_Z = 1.96
+
+
+class ForecastState:
+    """
+    Holt-Winters state for every disease class, advanced one day at a time
+
+    All classes share the same calendar, so the state is a set of arrays
+    with one row per class and each day of new data updates every class in a
+    single vectorized step. ``last_date`` is the last day folded in; feeding
+    only the days after it keeps updates incremental. ``folded_total`` is the
+    number of detections folded in since ``first_date``, so a store whose
+    total for those days has since changed (back-dated or deleted rows) can
+    be detected and refitted.
+    """
+
+    def __init__(self, last_date: date, params: Optional[dict] = None):
+        self.params = dict(FORECAST_PARAMS, **(params or {}))
+        self.last_date = last_date
+        self.first_date = last_date + timedelta(days=1)
+        self.folded_total = 0.0
+        self.classes = np.array([], dtype=object)
+        season_length = self.params["season_length"]
+        self.level = np.zeros(0)
+        self.trend = np.zeros(0)
+        self.season = np.zeros((0, season_length))
+        # Exponentially weighted variance of the one-step-ahead errors
+        self.variance = np.zeros(0)
+        self.observations = 0
+
+    def _align(self, classes: np.ndarray) -> np.ndarray:
+        """Add rows for unseen classes (all-zero history) and return row indexes of classes"""
+        index = {name: i for i, name in enumerate(self.classes)}
+        new = [name for name in classes if name not in index]
+        if new:
+            count = len(new)
+            self.classes = np.concatenate([self.classes, np.array(new, dtype=object)])
+            self.level = np.concatenate([self.level, np.zeros(count)])
+            self.trend = np.concatenate([self.trend, np.zeros(count)])
+            self.season = np.vstack([self.season, np.zeros((count, self.season.shape[1]))])
+            self.variance = np.concatenate([self.variance, np.zeros(count)])
+            index.update({name: len(index) + i for i, name in enumerate(new)})
+        return np.array([index[name] for name in classes], dtype=np.int64)
+
+    def update(self, classes: np.ndarray, counts: np.ndarray, first_date: date):
+        """
+        Fold consecutive days of counts into the state
+
+        Args:
+            classes: Class names, one per row of counts
+            counts: (classes, days) daily counts; classes absent from it count as zero
+            first_date: Calendar day of the first column, which must follow last_date
+        """
+        if first_date != self.last_date + timedelta(days=1):
+            raise ValueError(f"Expected data starting {self.last_date + timedelta(days=1)}, got {first_date}")
+
+        rows = self._align(classes)
+        days = np.zeros((len(self.classes), counts.shape[1]))
+        days[rows] = counts
+
+        alpha, beta, gamma = self.params["alpha"], self.params["beta"], self.params["gamma"]
+        decay = self.params["variance_decay"]
+        season_length = self.season.shape[1]
+        ordinal = first_date.toordinal()
+
+        for offset in range(days.shape[1]):
+            y = days[:, offset]
+            slot = (ordinal + offset) % season_length
+            error = y - (self.level + self.trend + self.season[:, slot])
+            self.variance = (1 - decay) * self.variance + decay * error ** 2
+
+            level = alpha * (y - self.season[:, slot]) + (1 - alpha) * (self.level + self.trend)
+            self.trend = beta * (level - self.level) + (1 - beta) * self.trend
+            self.season[:, slot] = gamma * (y - level) + (1 - gamma) * self.season[:, slot]
+            self.level = level
+
+        self.last_date = first_date + timedelta(days=days.shape[1] - 1)
+        self.observations += days.shape[1]
+        self.folded_total += float(days.sum())
+
+    def forecast(self, horizon: int = 14) -> Dict[str, np.ndarray]:
+        """
+        Daily forecasts for the days after last_date
+
+        Args:
+            horizon: Number of days ahead
+
+        Returns:
+            'mean' and 'variance' arrays of shape (classes, horizon), plus
+            'cumulative_variance' where column h - 1 is the variance of the
+            total over the first h days; means are clipped at zero since
+            counts cannot be negative
+        """
+        alpha, beta, gamma = self.params["alpha"], self.params["beta"], self.params["gamma"]
+        season_length = self.season.shape[1]
+        steps = np.arange(1, horizon + 1)
+        slots = (self.last_date.toordinal() + steps) % season_length
+
+        mean = self.level[:, None] + steps * self.trend[:, None] + self.season[:, slots]
+
+        # Additive Holt-Winters in innovations form: the error h steps ahead is
+        # e_h = eps_h + sum_{j<h} c_j eps_{h-j}, with c_j = alpha (1 + j beta) + gamma (1 - alpha) [j = 0 mod m]
+        # (the season here is smoothed against the new level, hence gamma (1 - alpha))
+        lags = np.arange(1, horizon)
+        weights = alpha * (1 + lags * beta) + gamma * (1 - alpha) * (lags % season_length == 0)
+        multipliers = 1 + np.concatenate([[0.0], np.cumsum(weights ** 2)])
+        variance = self.variance[:, None] * multipliers
+
+        # The h daily errors share innovations, so the total's variance is not their sum:
+        # eps_k enters every later day, with weight 1 + c_1 + ... + c_{h-k} in the total
+        reach = 1 + np.concatenate([[0.0], np.cumsum(weights)])
+        cumulative_variance = self.variance[:, None] * np.cumsum(reach ** 2)
+
+        return {
+            "mean": np.clip(mean, 0, None),
+            "variance": variance,
+            "cumulative_variance": cumulative_variance
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "params": self.params,
+            "last_date": self.last_date.isoformat(),
+            "first_date": self.first_date.isoformat(),
+            "folded_total": self.folded_total,
+            "observations": self.observations,
+            "classes": list(self.classes),
+            "level": self.level.tolist(),
+            "trend": self.trend.tolist(),
+            "season": self.season.tolist(),
+            "variance": self.variance.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ForecastState":
+        state = cls(date.fromisoformat(data["last_date"]), data["params"])
+        state.first_date = date.fromisoformat(data["first_date"])
+        state.folded_total = float(data["folded_total"])
+        state.observations = data["observations"]
+        state.classes = np.array(data["classes"], dtype=object)
+        state.level = np.array(data["level"], dtype=np.float64)
+        state.trend = np.array(data["trend"], dtype=np.float64)
+        state.season = np.array(data["season"], dtype=np.float64).reshape(len(state.classes), -1)
+        state.variance = np.array(data["variance"], dtype=np.float64)
+        return state
+
+
+_states: Dict[str, ForecastState] = {}
+_states_lock = threading.Lock()
+# Serializes read-update-save of a state so concurrent runs don't fold the same days twice
+_update_lock = threading.Lock()
+
+
+def forecast_state_path(source) -> Path:
+    """Sidecar file holding the fitted state for a detection store"""
+    source = Path(source)
+    if source.is_dir():
+        return source / "_forecast_state.json"
+    return source.with_name(source.name + ".forecast.json")
+
+
+def load_forecast_state(source) -> Optional[ForecastState]:
+    """Fitted state for a source: in-process copy first, then the sidecar file"""
+    key = str(Path(source).resolve())
+    with _states_lock:
+        if key in _states:
+            return _states[key]
+
+    path = forecast_state_path(source)
+    if not path.exists():
+        return None
+    try:
+        state = ForecastState.from_dict(json.loads(path.read_text()))
+    except (ValueError, KeyError):
+        # Unreadable or from an older layout: start over
+        return None
+    if state.params != FORECAST_PARAMS:
+        return None
+
+    with _states_lock:
+        _states[key] = state
+    return state
+
+
+def save_forecast_state(source, state: ForecastState):
+    key = str(Path(source).resolve())
+    with _states_lock:
+        _states[key] = state
+    payload = json.dumps(state.to_dict()).encode("utf-8")
+    replace_file(forecast_state_path(source), lambda f: f.write(payload))
+
+
+def forecast_outbreaks(
+    backend: AnalyticsBackend,
+    source,
+    today: date,
+    horizons: Sequence[int] = (7, 14),
+    history_days: int = FORECAST_HISTORY_DAYS,
+    refit: bool = False
+) -> list:
+    """
+    Forecast detections per disease class for the coming days
+
+    The fitted state is cached (in process and next to the source) and only
+    the complete days since it was last updated are read and folded in;
+    today's partial day is left out until it is over. The first call, or
+    refit=True, folds in history_days of history instead, as does a call
+    after rows were back-dated into (or deleted from) days already folded.
+
+    Args:
+        backend: Open analytics backend on the source
+        source: Path of the detection store the backend reads
+        today: Current day; forecasts cover the days from today on
+        horizons: Forecast lengths in days (each reported as a total with interval)
+        history_days: Days of history for a fresh fit
+        refit: Discard the cached state and fit again
+
+    Returns:
+        One entry per class, sorted by expected detections over the longest
+        horizon, with expected totals and 95% intervals per horizon
+    """
+    yesterday = today - timedelta(days=1)
+    with _update_lock:
+        state = None if refit else load_forecast_state(source)
+        if state is not None and state.last_date >= state.first_date:
+            folded = query_detection_total(backend, state.first_date.isoformat(), state.last_date.isoformat())
+            if folded != state.folded_total:
+                # Days already folded in have changed since; the recursion cannot be rewound
+                state = None
+        if state is None:
+            state = ForecastState(yesterday - timedelta(days=history_days))
+
+        if state.last_date < yesterday:
+            first_date = state.last_date + timedelta(days=1)
+            rows = query_daily_class_counts(backend, first_date.isoformat())
+            _, classes, counts = daily_matrix(rows, first_date, yesterday)
+            state.update(classes, counts, first_date)
+            save_forecast_state(source, state)
+
+        # The state ends yesterday, so today is step 1
+        daily = state.forecast(max(horizons))
+        classes = list(state.classes)
+    results = []
+    for row, disease in enumerate(classes):
+        entry = {"disease": disease}
+        for horizon in horizons:
+            expected = float(daily["mean"][row, :horizon].sum())
+            spread = INTERVAL_Z * float(np.sqrt(daily["cumulative_variance"][row, horizon - 1]))
+            entry[f"next_{horizon}_days"] = {
+                "expected": round(expected, 2),
+                "lower": round(max(expected - spread, 0.0), 2),
+                "upper": round(expected + spread, 2)
+            }
+        results.append(entry)
+
+    longest = f"next_{max(horizons)}_days"
+    results.sort(key=lambda entry: -entry[longest]["expected"])
+    return results
@@ -0,0 +1,317 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import calendar
+import json
+import math
+import os
+import queue
+import threading
+import urllib.request
+
+from precision_agronomist.storage.database import DEFAULT_DB_PATH, DETECTION_COLUMNS, connect
+
+
+# Groupings monitored by the detector, as tuples of detection columns; rows
+# missing any column of a scope (e.g. stored without a farm) skip that scope
+DEFAULT_SCOPES: Tuple[Tuple[str, ...], ...] = (("disease_class",), ("farm_id", "disease_class"))
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _bucket_of(timestamp: str, bucket_seconds: int) -> int:
+    """Bucket index of an ISO timestamp (naive times are read as UTC, as SQLite's strftime('%s') does)"""
+    moment = datetime.fromisoformat(timestamp)
+    return calendar.timegm(moment.utctimetuple()) // bucket_seconds
+
+
+class _SeriesState:
+    """CUSUM and EWMA baseline of one monitored series"""
+
+    __slots__ = ("bucket", "count", "mean", "variance", "cusum", "buckets_seen", "alerted_bucket")
+
+    def __init__(self, bucket: int):
+        self.bucket = bucket
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+        self.cusum = 0.0
+        self.buckets_seen = 0
+        self.alerted_bucket = None
+
+
+class OutbreakDetector:
+    """
+    Online change-point detector over detection counts, updated at ingest
+
+    Detections are counted per time bucket (hourly by default) for every
+    monitored series, e.g. each disease class. Completed buckets feed an
+    EWMA baseline (mean and variance) and a one-sided CUSUM statistic.
+    The bucket still in progress is checked on every batch, so an outbreak is
+    reported as soon as the excess count crosses the threshold, without
+    waiting for the bucket to close. Each batch costs O(1) per series it
+    touches; runs of empty buckets are applied in closed form.
+
+    Events are passed to the registered sinks (callables taking the event
+    dict) on a background thread, so slow webhooks never block ingest.
+    """
+
+    def __init__(
+        self,
+        bucket_minutes: int = 60,
+        slack: float = 0.5,
+        threshold: float = 5.0,
+        smoothing: float = 0.1,
+        warmup_buckets: int = 24,
+        scopes: Sequence[Tuple[str, ...]] = DEFAULT_SCOPES,
+        sinks: Optional[List[Callable[[dict], None]]] = None
+    ):
+        """
+        Args:
+            bucket_minutes: Width of a counting bucket
+            slack: CUSUM allowance k, in baseline standard deviations
+            threshold: CUSUM decision interval h, in baseline standard deviations
+            smoothing: EWMA weight of the newest completed bucket
+            warmup_buckets: Buckets of baseline required before alerting
+            scopes: Detection column groups to monitor, one series per distinct value
+            sinks: Event consumers
+        """
+        self.bucket_seconds = bucket_minutes * 60
+        self.slack = slack
+        self.threshold = threshold
+        self.smoothing = smoothing
+        self.warmup_buckets = warmup_buckets
+        self.scopes = tuple(tuple(scope) for scope in scopes)
+        self.sinks: List[Callable[[dict], None]] = list(sinks or [])
+        self.events_emitted = 0
+
+        self._series: Dict[tuple, _SeriesState] = {}
+        self._lock = threading.Lock()
+        self._indexes = [tuple(DETECTION_COLUMNS.index(column) for column in scope) for scope in self.scopes]
+        self._class_idx = DETECTION_COLUMNS.index("disease_class")
+        self._timestamp_idx = DETECTION_COLUMNS.index("timestamp")
+        self._events: queue.Queue = queue.Queue()
+        self._dispatcher: Optional[threading.Thread] = None
+
+    def add_sink(self, sink: Callable[[dict], None]):
+        self.sinks.append(sink)
+
+    def observe(self, rows: Iterable[Sequence]) -> List[dict]:
+        """
+        Update the detector with a batch of stored detections
+
+        Args:
+            rows: Tuples ordered as DETECTION_COLUMNS
+
+        Returns:
+            Outbreak events raised by this batch (also sent to the sinks)
+        """
+        counts: Dict[tuple, int] = {}
+        for row in rows:
+            if 'healthy' in str(row[self._class_idx]).lower():
+                continue
+            bucket = _bucket_of(row[self._timestamp_idx], self.bucket_seconds)
+            for scope, indexes in zip(self.scopes, self._indexes):
+                values = tuple(row[i] for i in indexes)
+                if None in values:
+                    continue
+                key = (scope, values, bucket)
+                counts[key] = counts.get(key, 0) + 1
+
+        events = []
+        with self._lock:
+            # Oldest buckets first so a batch spanning buckets closes them in order
+            for (scope, values, bucket), count in sorted(counts.items(), key=lambda item: item[0][2]):
+                event = self._add(scope, values, bucket, count)
+                if event is not None:
+                    events.append(event)
+
+        for event in events:
+            self._emit(event)
+        return events
+
+    def warm_start(self, db_path=DEFAULT_DB_PATH, now: Optional[datetime] = None):
+        """Seed the baselines from recent history so alerting works right after a restart"""
+        if not Path(db_path).exists():
+            return
+        now = now or datetime.now()
+        since = (now - timedelta(seconds=self.bucket_seconds * self.warmup_buckets * 2)).isoformat()
+
+        conn = connect(db_path)
+        try:
+            for scope in self.scopes:
+                columns = ", ".join(scope)
+                present = "".join(f" AND {column} IS NOT NULL" for column in scope)
+                rows = conn.execute(f"""
+                    SELECT {columns},
+                           CAST(strftime('%s', timestamp) AS INTEGER) / ? AS bucket,
+                           COUNT(*)
+                    FROM detections
+                    WHERE timestamp >= ? AND lower(disease_class) NOT LIKE '%healthy%'{present}
+                    GROUP BY {columns}, bucket
+                    ORDER BY bucket
+                """, (self.bucket_seconds, since)).fetchall()
+                with self._lock:
+                    for row in rows:
+                        self._add(scope, tuple(row[:len(scope)]), row[-2], row[-1], alert=False)
+        finally:
+            conn.close()
+
+    def _add(self, scope: tuple, values: tuple, bucket: int, count: int, alert: bool = True) -> Optional[dict]:
+        key = (scope, values)
+        state = self._series.get(key)
+        if state is None:
+            state = self._series[key] = _SeriesState(bucket)
+        elif bucket < state.bucket:
+            # Late rows for a bucket that is already closed; the baseline has moved on
+            return None
+        elif bucket > state.bucket:
+            self._close_bucket(state)
+            self._skip_empty(state, bucket - state.bucket - 1)
+            state.bucket = bucket
+            state.count = 0
+
+        state.count += count
+        if not alert or state.buckets_seen < self.warmup_buckets or state.alerted_bucket == bucket:
+            return None
+
+        sd = self._sd(state)
+        statistic = state.cusum + state.count - state.mean - self.slack * sd
+        if statistic <= self.threshold * sd:
+            return None
+
+        state.alerted_bucket = bucket
+        bucket_start = _EPOCH + timedelta(seconds=bucket * self.bucket_seconds)
+        return {
+            "type": "outbreak",
+            "scope": dict(zip(scope, values)),
+            "disease_class": dict(zip(scope, values)).get("disease_class"),
+            "bucket_start": bucket_start.isoformat(),
+            "bucket_minutes": self.bucket_seconds // 60,
+            "observed": state.count,
+            "expected": round(state.mean, 2),
+            "cusum": round(statistic, 2),
+            "threshold": round(self.threshold * sd, 2),
+            "detected_at": datetime.now().isoformat()
+        }
+
+    def _sd(self, state: _SeriesState) -> float:
+        # Counts are at least Poisson-noisy; the floor keeps quiet series from alerting on a single detection
+        return max(math.sqrt(state.variance), math.sqrt(state.mean), 1.0)
+
+    def _close_bucket(self, state: _SeriesState):
+        value = state.count
+        if state.buckets_seen >= self.warmup_buckets:
+            state.cusum = max(0.0, state.cusum + value - state.mean - self.slack * self._sd(state))
+            if state.alerted_bucket == state.bucket:
+                # Signalled already; restart accumulation instead of re-alerting on the same excess
+                state.cusum = 0.0
+        diff = value - state.mean
+        state.mean += self.smoothing * diff
+        state.variance = (1 - self.smoothing) * (state.variance + self.smoothing * diff * diff)
+        state.buckets_seen += 1
+
+    def _skip_empty(self, state: _SeriesState, gap: int):
+        """Apply a run of empty buckets in one step"""
+        if gap <= 0:
+            return
+        if state.buckets_seen >= self.warmup_buckets:
+            state.cusum = max(0.0, state.cusum - gap * (state.mean + self.slack * self._sd(state)))
+        keep = (1 - self.smoothing) ** gap
+        # Mixing gap zeros into the EWMA: the mean decays, its square spreads into the variance
+        state.variance = keep * state.variance + keep * (1 - keep) * state.mean * state.mean
+        state.mean *= keep
+        state.buckets_seen += gap
+
+    def _emit(self, event: dict):
+        self.events_emitted += 1
+        if not self.sinks:
+            return
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name="outbreak-events", daemon=True
+            )
+            self._dispatcher.start()
+        self._events.put(event)
+
+    def _dispatch_loop(self):
+        while True:
+            event = self._events.get()
+            for sink in list(self.sinks):
+                try:
+                    sink(event)
+                except Exception as e:
+                    print(f"Warning: outbreak event sink failed: {e}")
+            self._events.task_done()
+
+    def drain(self):
+        """Block until every emitted event has been handed to the sinks"""
+        self._events.join()
+
+
+def describe_event(event: dict) -> str:
+    scope = ", ".join(f"{column}={value}" for column, value in event["scope"].items())
+    return (
+        f"Outbreak signal for {scope}: {event['observed']} detection(s) in the "
+        f"{event['bucket_minutes']}-minute bucket starting {event['bucket_start']} "
+        f"(expected about {event['expected']})"
+    )
+
+
+def webhook_sink(url: str, timeout: float = 5.0) -> Callable[[dict], None]:
+    """Event sink POSTing each event as JSON to a URL"""
+    def send(event: dict):
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(event).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+    return send
+
+
+def email_alert_sink() -> Callable[[dict], None]:
+    """Event sink sending each event through EmailAlertTool"""
+    from precision_agronomist.tools.email_alert_tool import EmailAlertTool
+
+    tool = EmailAlertTool()
+
+    def send(event: dict):
+        print(tool._run(
+            disease_summary=describe_event(event),
+            severity_level="high",
+            num_detections=event["observed"],
+            affected_images=event["observed"],
+            diseases=event["scope"].get("disease_class", "")
+        ))
+    return send
+
+
+_detectors: Dict[Path, OutbreakDetector] = {}
+_detectors_lock = threading.Lock()
+
+
+def get_detector(db_path=DEFAULT_DB_PATH) -> OutbreakDetector:
+    """
+    Shared detector for a detection database, created and warm-started on first use
+
+    Sinks come from the environment: OUTBREAK_WEBHOOK_URL posts events to a
+    webhook, OUTBREAK_EMAIL_ALERTS=true sends them through EmailAlertTool.
+    """
+    key = Path(db_path).resolve()
+    with _detectors_lock:
+        detector = _detectors.get(key)
+        if detector is None:
+            detector = OutbreakDetector(
+                bucket_minutes=int(os.getenv('OUTBREAK_BUCKET_MINUTES', '60')),
+                threshold=float(os.getenv('OUTBREAK_THRESHOLD', '5.0'))
+            )
+            if os.getenv('OUTBREAK_WEBHOOK_URL'):
+                detector.add_sink(webhook_sink(os.getenv('OUTBREAK_WEBHOOK_URL')))
+            if os.getenv('OUTBREAK_EMAIL_ALERTS', 'false').lower() == 'true':
+                detector.add_sink(email_alert_sink())
+            detector.warm_start(db_path)
+            _detectors[key] = detector
+        return detector
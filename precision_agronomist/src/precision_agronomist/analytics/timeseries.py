@@ -0,0 +1,170 @@
+from datetime import date
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+# Per-class trend statistics returned by class_trend_statistics
+TREND_STATS_DTYPE = np.dtype([
+    ("disease_class", object),
+    ("total", np.int64),
+    ("recent_mean", np.float64),
+    ("previous_mean", np.float64),
+    ("delta", np.float64),
+    ("change_percent", np.float64),
+    ("zscore", np.float64),
+])
+
+
+def daily_matrix(
+    rows: Iterable[Sequence],
+    start_date: date,
+    end_date: date
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build a dense class x day count matrix from sparse (date, class, count) rows
+
+    Every calendar day between start_date and end_date gets a column, so days
+    without detections are zeros instead of missing entries.
+
+    Args:
+        rows: (YYYY-MM-DD, disease_class, count) tuples, e.g. daily_class_trends
+        start_date: First day of the calendar (inclusive)
+        end_date: Last day of the calendar (inclusive)
+
+    Returns:
+        (dates, classes, counts): datetime64[D] days, sorted class names, and a
+        float64 array of shape (len(classes), len(dates))
+    """
+    first = np.datetime64(start_date, "D")
+    dates = np.arange(first, np.datetime64(end_date, "D") + 1, dtype="datetime64[D]")
+
+    rows = list(rows)
+    if not rows:
+        return dates, np.array([], dtype=object), np.zeros((0, len(dates)))
+
+    days, classes, values = zip(*rows)
+    day_index = (np.array(days, dtype="datetime64[D]") - first).astype(np.int64)
+    class_names = sorted(set(classes))
+    lookup = {name: i for i, name in enumerate(class_names)}
+    class_index = np.fromiter((lookup[name] for name in classes), dtype=np.int64, count=len(classes))
+    class_names = np.array(class_names, dtype=object)
+
+    counts = np.zeros((len(class_names), len(dates)))
+    in_range = (day_index >= 0) & (day_index < len(dates))
+    np.add.at(
+        counts,
+        (class_index[in_range], day_index[in_range]),
+        np.asarray(values, dtype=np.float64)[in_range]
+    )
+    return dates, class_names, counts
+
+
+def rolling_mean(counts: np.ndarray, window: int = 7) -> np.ndarray:
+    """
+    Trailing moving average along the last axis
+
+    Args:
+        counts: Daily counts, 1-D or (classes, days)
+        window: Number of days averaged
+
+    Returns:
+        Array of the same shape; the first window - 1 days are NaN
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    means = np.full(counts.shape, np.nan)
+    if counts.shape[-1] < window:
+        return means
+
+    cumulative = np.cumsum(counts, axis=-1)
+    sums = cumulative[..., window - 1:].copy()
+    sums[..., 1:] -= cumulative[..., :-window]
+    means[..., window - 1:] = sums / window
+    return means
+
+
+def week_over_week(counts: np.ndarray, window: int = 7) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compare the mean of the last window days with the window before it
+
+    Args:
+        counts: Daily counts, 1-D or (classes, days)
+        window: Days per period (7 for week over week)
+
+    Returns:
+        (recent_mean, previous_mean, delta, change_percent) along the last
+        axis; NaN when fewer than 2 * window days are available. change_percent
+        is 0 when the previous period had no detections.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    shape = counts.shape[:-1]
+    if counts.shape[-1] < 2 * window:
+        nan = np.full(shape, np.nan)
+        return nan, nan.copy(), nan.copy(), nan.copy()
+
+    recent = counts[..., -window:].mean(axis=-1)
+    previous = counts[..., -2 * window:-window].mean(axis=-1)
+    delta = recent - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(previous > 0, delta / previous * 100, 0.0)
+    return recent, previous, delta, change
+
+
+def rolling_zscore(counts: np.ndarray, window: int = 7) -> np.ndarray:
+    """
+    How unusual the latest moving average is within the window
+
+    The latest window-day mean is compared with the mean and standard
+    deviation of every window-day mean in the series.
+
+    Args:
+        counts: Daily counts, 1-D or (classes, days)
+        window: Days per moving average
+
+    Returns:
+        Z-scores along the last axis; 0 for flat series, NaN when the series is
+        shorter than window days
+    """
+    means = rolling_mean(counts, window)
+    if means.shape[-1] < window:
+        return np.full(means.shape[:-1], np.nan)
+
+    valid = means[..., window - 1:]
+    center = valid.mean(axis=-1)
+    spread = valid.std(axis=-1)
+    # Cumulative-sum rounding leaves a tiny spread on flat series; treat it as flat
+    flat = spread <= 1e-9 * (np.abs(center) + 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(flat, 0.0, (valid[..., -1] - center) / spread)
+
+
+def class_trend_statistics(
+    rows: Iterable[Sequence],
+    start_date: date,
+    end_date: date,
+    window: int = 7
+) -> np.ndarray:
+    """
+    Moving-average trend statistics for every disease class at once
+
+    Args:
+        rows: (YYYY-MM-DD, disease_class, count) tuples, e.g. daily_class_trends
+        start_date: First day of the calendar (inclusive)
+        end_date: Last day of the calendar (inclusive)
+        window: Days per period for the moving averages and comparison
+
+    Returns:
+        Structured array of TREND_STATS_DTYPE with one record per class
+    """
+    _, classes, counts = daily_matrix(rows, start_date, end_date)
+    recent, previous, delta, change = week_over_week(counts, window)
+
+    stats = np.empty(len(classes), dtype=TREND_STATS_DTYPE)
+    stats["disease_class"] = classes
+    stats["total"] = counts.sum(axis=-1)
+    stats["recent_mean"] = recent
+    stats["previous_mean"] = previous
+    stats["delta"] = delta
+    stats["change_percent"] = change
+    stats["zscore"] = rolling_zscore(counts, window)
+    return stats
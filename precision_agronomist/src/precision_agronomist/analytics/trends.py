@@ -0,0 +1,665 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from precision_agronomist.storage.backends import AnalyticsBackend
+
+
+# Images are identified by content hash; rows stored before hashing fall back to the path
+IMAGE_KEY = "COALESCE(image_hash, image_path)"
+
+# Exclusive end date of the rollup queries when a window runs up to now
+OPEN_END_DATE = "9999-12-31"
+
+COUNT_EXPRESSIONS = {
+    False: {
+        "count": "COUNT(*)",
+        "high_count": "COUNT(CASE WHEN severity = 'high' THEN 1 END)",
+    },
+    True: {
+        "count": "COUNT(DISTINCT image_key)",
+        "high_count": "COUNT(DISTINCT CASE WHEN severity = 'high' THEN image_key END)",
+    },
+}
+
+# Every trend aggregate in one statement, in SQL that both SQLite and DuckDB
+# accept. The window is read from {detections} once into a materialized CTE and
+# each aggregate is a UNION ALL branch over it, tagged with its name. Integer
+# results go in n1..n4 and the average confidence in its own column so both
+# engines keep the column types; class_key is only set for per-day, per-class rows. {count} and {high_count} switch between
+# counting raw detections and distinct images; {scope} narrows the window to a
+# farm or field. {materialized} is the MATERIALIZED hint where the engine supports it.
+TREND_SCAN_QUERY = f"""
+    WITH window_rows AS {{materialized}}(
+        SELECT
+            substr(timestamp, 1, 10) AS detection_date,
+            disease_class,
+            severity,
+            session_id,
+            {IMAGE_KEY} AS image_key,
+            confidence
+        FROM {{detections}}
+        WHERE {{window}}{{scope}}
+    )
+    SELECT 'overall_stats' AS aggregate, NULL AS group_key, NULL AS class_key,
+           {{count}} AS n1, COUNT(DISTINCT session_id) AS n2,
+           COUNT(DISTINCT image_key) AS n3, COUNT(DISTINCT disease_class) AS n4,
+           NULL AS avg_confidence
+    FROM window_rows
+    UNION ALL
+    SELECT 'disease_frequency', disease_class, NULL, {{count}}, {{high_count}}, NULL, NULL, AVG(confidence)
+    FROM window_rows
+    GROUP BY disease_class
+    UNION ALL
+    SELECT 'daily_trends', detection_date, NULL, {{count}}, COUNT(DISTINCT disease_class), NULL, NULL, NULL
+    FROM window_rows
+    GROUP BY detection_date
+    UNION ALL
+    SELECT 'daily_class_trends', detection_date, disease_class, {{count}}, NULL, NULL, NULL, NULL
+    FROM window_rows
+    GROUP BY detection_date, disease_class
+    UNION ALL
+    SELECT 'severity_distribution', severity, NULL, {{count}}, NULL, NULL, NULL, NULL
+    FROM window_rows
+    GROUP BY severity
+"""
+
+
+def scope_filter(
+    farm_id: Optional[str] = None,
+    field_id: Optional[str] = None,
+    end_timestamp: Optional[str] = None
+) -> Tuple[str, tuple]:
+    """
+    Predicate (appended to the window) and parameters restricting detections to a farm, field or end time
+
+    Args:
+        farm_id: Farm to keep, or None for every farm
+        field_id: Field to keep, or None for every field
+        end_timestamp: Exclusive ISO end of the window, or None to run up to now
+
+    Returns:
+        (sql, params); an empty predicate when none is given
+    """
+    sql, params = "", ()
+    if end_timestamp is not None:
+        sql += " AND timestamp < ?"
+        params += (end_timestamp,)
+    if farm_id is not None:
+        sql += " AND farm_id = ?"
+        params += (farm_id,)
+    if field_id is not None:
+        sql += " AND field_id = ?"
+        params += (field_id,)
+    return sql, params
+
+
+def compute_trend_stats(
+    backend: AnalyticsBackend,
+    start_timestamp: str,
+    distinct_images: bool = False,
+    farm_id: Optional[str] = None,
+    field_id: Optional[str] = None,
+    end_timestamp: Optional[str] = None
+) -> Dict[str, List[tuple]]:
+    """
+    Build every trend aggregate from a single scan of raw detections
+
+    Overall stats, per-class frequency, daily trends (overall and per class)
+    and the severity distribution come back from one statement that reads the
+    window once, instead of one scan of the window per aggregate.
+
+    Args:
+        backend: Open analytics backend (SQLite or DuckDB)
+        start_timestamp: ISO timestamp marking the start of the window
+        distinct_images: Count distinct images instead of raw detection rows
+        farm_id: Only count detections of this farm
+        field_id: Only count detections of this field
+        end_timestamp: Exclusive ISO end of the window (default: open-ended)
+
+    Returns:
+        Mapping of aggregate name to result rows; overall_stats is a single row
+    """
+    scope, scope_params = scope_filter(farm_id, field_id, end_timestamp)
+    rows = backend.query(
+        TREND_SCAN_QUERY,
+        backend.window_params(start_timestamp) + scope_params,
+        scope=scope,
+        materialized="MATERIALIZED " if backend.materialized_cte else "",
+        **COUNT_EXPRESSIONS[bool(distinct_images)]
+    )
+
+    results = {
+        "overall_stats": (0, 0, 0, 0),
+        "disease_frequency": [],
+        "daily_trends": [],
+        "daily_class_trends": [],
+        "severity_distribution": [],
+    }
+    for aggregate, key, class_key, n1, n2, n3, n4, avg_confidence in rows:
+        if aggregate == "overall_stats":
+            results[aggregate] = (n1, n2, n3, n4)
+        elif aggregate == "disease_frequency":
+            results[aggregate].append((key, n1, avg_confidence, n2))
+        elif aggregate == "daily_trends":
+            results[aggregate].append((key, n1, n2))
+        elif aggregate == "daily_class_trends":
+            results[aggregate].append((key, class_key, n1))
+        else:
+            results[aggregate].append((key, n1))
+
+    results["disease_frequency"].sort(key=lambda row: -row[1])
+    results["daily_trends"].sort(key=lambda row: row[0])
+    results["daily_class_trends"].sort(key=lambda row: row[:2])
+    return results
+
+
+# The same aggregates read from the daily rollup tables (SQLite only), keyed by
+# distinct_images. ?1 is the first date of the window (YYYY-MM-DD) and ?2 the
+# day after its last; cost grows
+# with the number of days (or, for distinct counts, images) in the window
+# instead of the number of detections.
+ROLLUP_QUERIES: Dict[bool, Dict[str, str]] = {
+    False: {
+        "overall_stats": """
+            SELECT
+                COALESCE(SUM(detection_count), 0) as total_detections,
+                (SELECT COUNT(DISTINCT session_id) FROM daily_session_stats WHERE detection_date >= ?1 AND detection_date < ?2) as total_sessions,
+                (SELECT COUNT(DISTINCT image_key) FROM daily_image_stats WHERE detection_date >= ?1 AND detection_date < ?2) as total_images,
+                COUNT(DISTINCT disease_class) as unique_diseases
+            FROM daily_class_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+        """,
+        "disease_frequency": """
+            SELECT
+                disease_class,
+                SUM(detection_count) as frequency,
+                SUM(sum_confidence) / SUM(detection_count) as avg_confidence,
+                SUM(CASE WHEN severity = 'high' THEN detection_count ELSE 0 END) as high_severity_count
+            FROM daily_class_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+            GROUP BY disease_class
+            ORDER BY frequency DESC
+        """,
+        "daily_trends": """
+            SELECT
+                detection_date,
+                SUM(detection_count) as daily_detections,
+                COUNT(DISTINCT disease_class) as diseases_per_day
+            FROM daily_class_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+            GROUP BY detection_date
+            ORDER BY detection_date
+        """,
+        "daily_class_trends": """
+            SELECT
+                detection_date,
+                disease_class,
+                SUM(detection_count) as daily_detections
+            FROM daily_class_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+            GROUP BY detection_date, disease_class
+            ORDER BY detection_date, disease_class
+        """,
+        "severity_distribution": """
+            SELECT
+                NULLIF(severity, '') as severity,
+                SUM(detection_count) as count
+            FROM daily_class_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+            GROUP BY severity
+        """,
+    },
+    True: {
+        "overall_stats": """
+            SELECT
+                COUNT(DISTINCT image_key) as total_detections,
+                (SELECT COUNT(DISTINCT session_id) FROM daily_session_stats WHERE detection_date >= ?1 AND detection_date < ?2) as total_sessions,
+                COUNT(DISTINCT image_key) as total_images,
+                COUNT(DISTINCT disease_class) as unique_diseases
+            FROM daily_image_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+        """,
+        "disease_frequency": """
+            SELECT
+                i.disease_class,
+                COUNT(DISTINCT i.image_key) as frequency,
+                (
+                    SELECT SUM(c.sum_confidence) / SUM(c.detection_count)
+                    FROM daily_class_stats c
+                    WHERE c.disease_class = i.disease_class AND c.detection_date >= ?1 AND detection_date < ?2
+                ) as avg_confidence,
+                COUNT(DISTINCT CASE WHEN i.severity = 'high' THEN i.image_key END) as high_severity_count
+            FROM daily_image_stats i
+            WHERE i.detection_date >= ?1 AND detection_date < ?2
+            GROUP BY i.disease_class
+            ORDER BY frequency DESC
+        """,
+        "daily_trends": """
+            SELECT
+                detection_date,
+                COUNT(DISTINCT image_key) as daily_detections,
+                COUNT(DISTINCT disease_class) as diseases_per_day
+            FROM daily_image_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+            GROUP BY detection_date
+            ORDER BY detection_date
+        """,
+        "daily_class_trends": """
+            SELECT
+                detection_date,
+                disease_class,
+                COUNT(DISTINCT image_key) as daily_detections
+            FROM daily_image_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+            GROUP BY detection_date, disease_class
+            ORDER BY detection_date, disease_class
+        """,
+        "severity_distribution": """
+            SELECT
+                NULLIF(severity, '') as severity,
+                COUNT(DISTINCT image_key) as count
+            FROM daily_image_stats
+            WHERE detection_date >= ?1 AND detection_date < ?2
+            GROUP BY severity
+        """,
+    },
+}
+
+
+# The detection-count aggregates of one farm from its farm-first rollups. ?1
+# and ?2 bound the window as in ROLLUP_QUERIES, ?3 is the farm and {field}
+# optionally narrows it to the field in ?4; each query reads one contiguous
+# key range per farm.
+FARM_ROLLUP_QUERIES: Dict[str, str] = {
+    "overall_stats": """
+        SELECT
+            COALESCE(SUM(detection_count), 0) as total_detections,
+            (
+                SELECT COUNT(DISTINCT session_id) FROM daily_field_image_stats
+                WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date < ?2{field}
+            ) as total_sessions,
+            (
+                SELECT COUNT(DISTINCT image_key) FROM daily_field_image_stats
+                WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date < ?2{field}
+            ) as total_images,
+            COUNT(DISTINCT disease_class) as unique_diseases
+        FROM daily_field_class_stats
+        WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date < ?2{field}
+    """,
+    "disease_frequency": """
+        SELECT
+            disease_class,
+            SUM(detection_count) as frequency,
+            SUM(sum_confidence) / SUM(detection_count) as avg_confidence,
+            SUM(CASE WHEN severity = 'high' THEN detection_count ELSE 0 END) as high_severity_count
+        FROM daily_field_class_stats
+        WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date < ?2{field}
+        GROUP BY disease_class
+        ORDER BY frequency DESC
+    """,
+    "daily_trends": """
+        SELECT
+            detection_date,
+            SUM(detection_count) as daily_detections,
+            COUNT(DISTINCT disease_class) as diseases_per_day
+        FROM daily_field_class_stats
+        WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date < ?2{field}
+        GROUP BY detection_date
+        ORDER BY detection_date
+    """,
+    "daily_class_trends": """
+        SELECT
+            detection_date,
+            disease_class,
+            SUM(detection_count) as daily_detections
+        FROM daily_field_class_stats
+        WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date < ?2{field}
+        GROUP BY detection_date, disease_class
+        ORDER BY detection_date, disease_class
+    """,
+    "severity_distribution": """
+        SELECT
+            NULLIF(severity, '') as severity,
+            SUM(detection_count) as count
+        FROM daily_field_class_stats
+        WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date < ?2{field}
+        GROUP BY severity
+    """,
+}
+
+
+# Rollup tables read by ROLLUP_QUERIES and FARM_ROLLUP_QUERIES
+ROLLUP_GLOBAL_TABLES = ("daily_class_stats", "daily_image_stats", "daily_session_stats")
+ROLLUP_SCOPED_TABLES = ("daily_field_class_stats", "daily_field_image_stats")
+
+
+def query_trend_aggregates(
+    backend: AnalyticsBackend,
+    start_timestamp: str,
+    distinct_images: bool = False,
+    use_rollups: Optional[bool] = None,
+    farm_id: Optional[str] = None,
+    field_id: Optional[str] = None,
+    end_timestamp: Optional[str] = None
+) -> Dict[str, List[tuple]]:
+    """
+    Run every trend aggregate over detections from start_timestamp on
+
+    When the backend has the daily rollup tables they are read instead of raw
+    detections; the window then starts at the beginning of start_timestamp's
+    day and ends at the beginning of end_timestamp's.
+    Otherwise the raw rows are scanned once by compute_trend_stats. A farm
+    (optionally narrowed to a field) reads the farm-first rollups instead, so
+    its cost does not depend on other farms; distinct-image counts and a field
+    without a farm scan the raw rows, through the (farm_id, timestamp) index
+    on SQLite.
+
+    Args:
+        backend: Open analytics backend (SQLite or DuckDB)
+        start_timestamp: ISO timestamp marking the start of the window
+        distinct_images: Count distinct images instead of raw detection rows, so
+            the same image stored in several sessions is only counted once
+        use_rollups: Force (True) or bypass (False) the rollup tables; by default
+            they are used whenever the backend has them and they cover the scope
+        farm_id: Only count detections of this farm
+        field_id: Only count detections of this field
+        end_timestamp: Exclusive ISO end of the window (default: open-ended)
+
+    Returns:
+        Mapping of aggregate name to result rows; overall_stats is a single row
+    """
+    bounds = (start_timestamp[:10], end_timestamp[:10] if end_timestamp else OPEN_END_DATE)
+    scoped = farm_id is not None or field_id is not None
+    covered = not scoped or (farm_id is not None and not distinct_images)
+    needed = ROLLUP_SCOPED_TABLES if scoped else ROLLUP_GLOBAL_TABLES
+    if use_rollups is None:
+        use_rollups = backend.has_rollup(*needed) and covered
+    elif use_rollups and not backend.has_rollup(*needed):
+        raise ValueError(f"The {backend.name} backend lacks the rollup tables {', '.join(needed)}")
+    elif use_rollups and not covered:
+        raise ValueError("The farm rollups need a farm_id and count detections, not distinct images")
+
+    if use_rollups and scoped:
+        params = bounds + (farm_id,) + (() if field_id is None else (field_id,))
+        field = "" if field_id is None else " AND field_id = ?4"
+        results = {
+            name: backend.query(sql, params, field=field)
+            for name, sql in FARM_ROLLUP_QUERIES.items()
+        }
+        results["overall_stats"] = results["overall_stats"][0]
+        return results
+
+    if use_rollups:
+        results = {
+            name: backend.query(sql, bounds)
+            for name, sql in ROLLUP_QUERIES[bool(distinct_images)].items()
+        }
+        results["overall_stats"] = results["overall_stats"][0]
+        return results
+
+    return compute_trend_stats(backend, start_timestamp, distinct_images, farm_id, field_id, end_timestamp)
+
+
+# Detections per day and class since a start date, from raw rows or the rollups
+DAILY_CLASS_COUNT_QUERIES = {
+    "raw": """
+        SELECT substr(timestamp, 1, 10) as detection_date, disease_class, COUNT(*) as detections
+        FROM {detections}
+        WHERE {window}
+        GROUP BY 1, 2
+    """,
+    "rollup": """
+        SELECT detection_date, disease_class, SUM(detection_count) as detections
+        FROM daily_class_stats
+        WHERE detection_date >= ?
+        GROUP BY detection_date, disease_class
+    """,
+}
+
+
+def query_daily_class_counts(backend: AnalyticsBackend, start_date: str) -> List[tuple]:
+    """
+    Detection counts per (day, class) from start_date on
+
+    Args:
+        backend: Open analytics backend (SQLite or DuckDB)
+        start_date: First day (YYYY-MM-DD)
+
+    Returns:
+        (detection_date, disease_class, count) rows
+    """
+    if backend.has_rollup("daily_class_stats"):
+        return backend.query(DAILY_CLASS_COUNT_QUERIES["rollup"], (start_date[:10],))
+    return backend.query(DAILY_CLASS_COUNT_QUERIES["raw"], backend.window_params(start_date))
+
+
+# Detections over an inclusive range of days, from raw rows or the rollups
+DETECTION_TOTAL_QUERIES = {
+    "raw": """
+        SELECT COUNT(*) FROM {detections}
+        WHERE {window} AND substr(timestamp, 1, 10) <= ?
+    """,
+    "rollup": """
+        SELECT COALESCE(SUM(detection_count), 0) FROM daily_class_stats
+        WHERE detection_date >= ? AND detection_date <= ?
+    """,
+}
+
+
+def query_detection_total(backend: AnalyticsBackend, first_day: str, last_day: str) -> int:
+    """
+    Number of detections stored for the days first_day to last_day (inclusive)
+
+    Args:
+        backend: Open analytics backend (SQLite or DuckDB)
+        first_day: First day (YYYY-MM-DD)
+        last_day: Last day (YYYY-MM-DD)
+    """
+    if backend.has_rollup("daily_class_stats"):
+        return backend.query(DETECTION_TOTAL_QUERIES["rollup"], (first_day, last_day))[0][0]
+    return backend.query(DETECTION_TOTAL_QUERIES["raw"], backend.window_params(first_day) + (last_day,))[0][0]
+
+
+# Detections per farm (or, within one farm, per field) in a window. In the
+# rollup query ?1 and ?2 bound the window as in ROLLUP_QUERIES and ?3 is the
+# farm; farm and field come back as NULL for detections stored without them.
+FIELD_BREAKDOWN_QUERIES = {
+    "raw": """
+        SELECT
+            farm_id,
+            {field} as field_id,
+            COUNT(*) as detections,
+            COUNT(CASE WHEN severity = 'high' THEN 1 END) as high_severity_count,
+            AVG(confidence) as avg_confidence,
+            COUNT(DISTINCT substr(timestamp, 1, 10)) as active_days
+        FROM {detections}
+        WHERE {window}{scope}
+        GROUP BY 1, 2
+        ORDER BY detections DESC
+    """,
+    "rollup": """
+        SELECT
+            NULLIF(farm_id, '') as farm_id,
+            {field} as field_id,
+            SUM(detection_count) as detections,
+            SUM(high_severity_count) as high_severity_count,
+            SUM(sum_confidence) / SUM(detection_count) as avg_confidence,
+            COUNT(DISTINCT detection_date) as active_days
+        FROM daily_field_stats
+        WHERE detection_date >= ?1 AND detection_date < ?2{scope}
+        GROUP BY 1, 2
+        ORDER BY detections DESC
+    """,
+}
+
+
+def query_field_breakdown(
+    backend: AnalyticsBackend,
+    start_timestamp: str,
+    farm_id: Optional[str] = None,
+    end_timestamp: Optional[str] = None
+) -> List[tuple]:
+    """
+    Group a window's detections by farm, or by field within a farm
+
+    On SQLite the daily_field_stats rollup is read, so the cost grows with the
+    number of farm-field-days in the window rather than with detections; a
+    single farm is looked up through its index.
+
+    Args:
+        backend: Open analytics backend (SQLite or DuckDB)
+        start_timestamp: ISO timestamp marking the start of the window
+        farm_id: Break this farm down by field; by default every farm is listed
+        end_timestamp: Exclusive ISO end of the window (default: open-ended)
+
+    Returns:
+        (farm_id, field_id, detections, high_severity_count, avg_confidence,
+        active_days) rows, busiest first; field_id is None when grouping by farm
+    """
+    if backend.has_rollup("daily_field_stats"):
+        field = "NULL" if farm_id is None else "NULLIF(field_id, '')"
+        scope, params = ("", ()) if farm_id is None else (" AND farm_id = ?3", (farm_id,))
+        bounds = (start_timestamp[:10], end_timestamp[:10] if end_timestamp else OPEN_END_DATE)
+        return backend.query(
+            FIELD_BREAKDOWN_QUERIES["rollup"], bounds + params, field=field, scope=scope
+        )
+
+    field = "NULL" if farm_id is None else "field_id"
+    scope, params = scope_filter(farm_id, end_timestamp=end_timestamp)
+    return backend.query(
+        FIELD_BREAKDOWN_QUERIES["raw"], backend.window_params(start_timestamp) + params, field=field, scope=scope
+    )
+
+
+# Totals per class over any window from the running totals: for each class, the
+# last row on or before the window's last day minus the last row before its
+# first day. Classes are walked with an index skip-scan, so the cost is two
+# index seeks per class whatever the window length. ?1 is the first day and
+# ?2 the last (inclusive).
+WINDOW_TOTALS_QUERIES = {
+    "prefix": """
+        WITH RECURSIVE classes(name) AS (
+            SELECT MIN(disease_class) FROM daily_class_prefix_stats
+            UNION ALL
+            SELECT (SELECT MIN(disease_class) FROM daily_class_prefix_stats WHERE disease_class > name)
+            FROM classes WHERE name IS NOT NULL
+        ),
+        bounds AS (
+            SELECT
+                name,
+                (
+                    SELECT detection_date FROM daily_class_prefix_stats
+                    WHERE disease_class = name AND detection_date <= ?2
+                    ORDER BY detection_date DESC LIMIT 1
+                ) as last_day,
+                (
+                    SELECT detection_date FROM daily_class_prefix_stats
+                    WHERE disease_class = name AND detection_date < ?1
+                    ORDER BY detection_date DESC LIMIT 1
+                ) as day_before
+            FROM classes
+            WHERE name IS NOT NULL
+        )
+        SELECT
+            b.name,
+            COALESCE(e.cum_count, 0) - COALESCE(s.cum_count, 0) as detections,
+            COALESCE(e.cum_confidence, 0) - COALESCE(s.cum_confidence, 0) as sum_confidence,
+            COALESCE(e.cum_high, 0) - COALESCE(s.cum_high, 0) as high,
+            COALESCE(e.cum_moderate, 0) - COALESCE(s.cum_moderate, 0) as moderate,
+            COALESCE(e.cum_low, 0) - COALESCE(s.cum_low, 0) as low
+        FROM bounds b
+        LEFT JOIN daily_class_prefix_stats e ON e.disease_class = b.name AND e.detection_date = b.last_day
+        LEFT JOIN daily_class_prefix_stats s ON s.disease_class = b.name AND s.detection_date = b.day_before
+    """,
+    # One farm's window from its farm-first rollup: a key range of the farm's days
+    "farm": """
+        SELECT
+            disease_class,
+            SUM(detection_count) as detections,
+            SUM(sum_confidence) as sum_confidence,
+            SUM(CASE WHEN severity = 'high' THEN detection_count ELSE 0 END) as high,
+            SUM(CASE WHEN severity = 'moderate' THEN detection_count ELSE 0 END) as moderate,
+            SUM(CASE WHEN severity = 'low' THEN detection_count ELSE 0 END) as low
+        FROM daily_field_class_stats
+        WHERE farm_id = ?3 AND detection_date >= ?1 AND detection_date <= ?2{field}
+        GROUP BY disease_class
+    """,
+    "raw": """
+        SELECT
+            disease_class,
+            COUNT(*) as detections,
+            SUM(confidence) as sum_confidence,
+            COUNT(CASE WHEN severity = 'high' THEN 1 END) as high,
+            COUNT(CASE WHEN severity = 'moderate' THEN 1 END) as moderate,
+            COUNT(CASE WHEN severity = 'low' THEN 1 END) as low
+        FROM {detections}
+        WHERE {window}{scope}
+        GROUP BY disease_class
+    """,
+    # Distinct images are not additive over days, so they always come from raw rows;
+    # sum_confidence is scaled so that sum_confidence / detections is still the mean confidence
+    "raw_distinct": f"""
+        SELECT
+            disease_class,
+            COUNT(DISTINCT {IMAGE_KEY}) as detections,
+            AVG(confidence) * COUNT(DISTINCT {IMAGE_KEY}) as sum_confidence,
+            COUNT(DISTINCT CASE WHEN severity = 'high' THEN {IMAGE_KEY} END) as high,
+            COUNT(DISTINCT CASE WHEN severity = 'moderate' THEN {IMAGE_KEY} END) as moderate,
+            COUNT(DISTINCT CASE WHEN severity = 'low' THEN {IMAGE_KEY} END) as low
+        FROM {{detections}}
+        WHERE {{window}}{{scope}}
+        GROUP BY disease_class
+    """,
+}
+
+
+def query_window_totals(
+    backend: AnalyticsBackend,
+    windows: Sequence[Tuple[str, str]],
+    farm_id: Optional[str] = None,
+    field_id: Optional[str] = None,
+    distinct_images: bool = False
+) -> List[List[tuple]]:
+    """
+    Per-class totals for several windows at once
+
+    With the rollups (SQLite) every window is answered from the running
+    totals in daily_class_prefix_stats, two lookups per class, so overlapping
+    dashboard windows (7/14/30/90 days, custom ranges) cost the same whatever
+    their length. A farm (optionally narrowed to a field) sums its days in
+    the farm-first rollup. Otherwise, a field without a farm, or distinct
+    image counts (which cannot be added up across days), each window is a
+    scan of raw rows.
+
+    Args:
+        backend: Open analytics backend (SQLite or DuckDB)
+        windows: (first_day, last_day) pairs, YYYY-MM-DD and inclusive
+        farm_id: Only count detections of this farm
+        field_id: Only count detections of this field
+        distinct_images: Count distinct images instead of raw detection rows
+
+    Returns:
+        One list per window of (disease_class, detections, sum_confidence,
+        high, moderate, low) rows for the classes detected in it, busiest first
+    """
+    results = []
+    for first_day, last_day in windows:
+        if distinct_images:
+            rows = None
+        elif farm_id is None and field_id is None and backend.has_rollup("daily_class_prefix_stats"):
+            rows = backend.query(WINDOW_TOTALS_QUERIES["prefix"], (first_day, last_day))
+        elif farm_id is not None and backend.has_rollup("daily_field_class_stats"):
+            field = "" if field_id is None else " AND field_id = ?4"
+            params = (first_day, last_day, farm_id) + (() if field_id is None else (field_id,))
+            rows = backend.query(WINDOW_TOTALS_QUERIES["farm"], params, field=field)
+        else:
+            rows = None
+        if rows is None:
+            day_after = (date.fromisoformat(last_day) + timedelta(days=1)).isoformat()
+            scope, params = scope_filter(farm_id, field_id, day_after)
+            rows = backend.query(
+                WINDOW_TOTALS_QUERIES["raw_distinct" if distinct_images else "raw"],
+                backend.window_params(first_day) + params, scope=scope
+            )
+        results.append(sorted((row for row in rows if row[1] > 0), key=lambda row: -row[1]))
+    return results
@@ -0,0 +1,24 @@
+from precision_agronomist.chat.cache import ResponseCache, normalize_question, response_cache
+from precision_agronomist.chat.intents import (
+    DEFAULT_CLASS_NAMES, INTENT_PHRASES, IntentMatcher, QueryMatch, disease_class_names, load_class_names, tokenize
+)
+from precision_agronomist.chat.knowledge_base import KNOWLEDGE_BASE, disease_keys
+from precision_agronomist.chat.retrieval import KnowledgeIndex, chunk_text, get_knowledge_index
+
+__all__ = [
+    'ResponseCache',
+    'normalize_question',
+    'response_cache',
+    'DEFAULT_CLASS_NAMES',
+    'INTENT_PHRASES',
+    'IntentMatcher',
+    'QueryMatch',
+    'disease_class_names',
+    'load_class_names',
+    'tokenize',
+    'KNOWLEDGE_BASE',
+    'disease_keys',
+    'KnowledgeIndex',
+    'chunk_text',
+    'get_knowledge_index'
+]
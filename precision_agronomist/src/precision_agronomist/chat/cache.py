@@ -0,0 +1,159 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from precision_agronomist.chat.intents import tokenize
+
+
+def normalize_question(question: str) -> str:
+    """Question reduced to what the answer depends on: lowercase words, no punctuation"""
+    return " ".join(tokenize(question))
+
+
+class ResponseCache:
+    """
+    Cache of chatbot answers keyed by normalized question, language and context
+
+    A bounded in-process LRU sits in front of an optional SQLite table that
+    every API worker pointed at the same file shares. Entries are stored with
+    the knowledge version they were generated from (knowledge base plus the
+    retrieval index's sources); a lookup with a different version is a miss
+    and drops the stale entry from both tiers.
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path=None):
+        """
+        Args:
+            max_entries: Answers kept in process
+            db_path: SQLite file for the shared tier (None disables it)
+        """
+        self.max_entries = max_entries
+        self.db_path = Path(db_path) if db_path else None
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def key(question: str, language: str = "en", context: str = "") -> str:
+        context_digest = hashlib.sha1(context.encode("utf-8")).hexdigest() if context else ""
+        raw = "\x1f".join((normalize_question(question), language.lower(), context_digest))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _shared(self) -> Optional[sqlite3.Connection]:
+        """Connection to the shared tier, opened on first use (caller holds the lock)"""
+        if self.db_path is None:
+            return None
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chatbot_responses (
+                    cache_key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, version: str) -> Optional[str]:
+        """Cached answer for key if it was generated at this knowledge version"""
+        with self._lock:
+            stale = False
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._entries[key]
+                stale = True
+
+            conn = self._shared()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT version, answer FROM chatbot_responses WHERE cache_key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and row[0] == version:
+                        self._remember(key, version, row[1])
+                        self.shared_hits += 1
+                        return row[1]
+                    if row is not None:
+                        conn.execute(
+                            "DELETE FROM chatbot_responses WHERE cache_key = ? AND version = ?", (key, row[0])
+                        )
+                        conn.commit()
+                        stale = True
+                except sqlite3.Error as e:
+                    # The shared tier is an optimization; answer from scratch instead
+                    print(f"Warning: chatbot response cache unavailable: {e}")
+
+            if stale:
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, version: str, answer: str):
+        with self._lock:
+            self._remember(key, version, answer)
+            conn = self._shared()
+            if conn is not None:
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO chatbot_responses VALUES (?, ?, ?, ?)",
+                        (key, version, answer, time.time())
+                    )
+                    conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Warning: chatbot response cache unavailable: {e}")
+
+    def _remember(self, key: str, version: str, answer: str):
+        self._entries[key] = (version, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            conn = self._shared()
+            if conn is not None:
+                conn.execute("DELETE FROM chatbot_responses")
+                conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss metrics per tier"""
+        with self._lock:
+            hits = self.memory_hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "shared_tier": str(self.db_path) if self.db_path else None,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Shared by every FarmerChatbotTool in the process; CHATBOT_CACHE_DB enables the cross-worker tier
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('CHATBOT_CACHE_SIZE', '1024')),
+    db_path=os.getenv('CHATBOT_CACHE_DB') or None
+)
@@ -0,0 +1,218 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import json
+import os
+import re
+
+
+# Intents in the order they take precedence when a question matches several;
+# multi-word phrases must appear contiguously
+INTENT_PHRASES: Dict[str, Tuple[str, ...]] = {
+    "treatment": ("treat", "cure", "fix", "remedy"),
+    "prevention": ("prevent", "avoid", "stop", "protect"),
+    "organic": ("organic", "natural"),
+    "identification": ("what is", "what are", "identify", "identification", "recognize", "recognise", "symptom"),
+    "best_practices": ("best practice", "advice", "recommendation", "recommend", "suggest"),
+    "economic": ("cost", "price", "expensive", "cheap", "budget"),
+    "timing": ("when", "timing", "season"),
+}
+
+# Detection classes of the YOLO model, used when no class names file is present
+DEFAULT_CLASS_NAMES: Tuple[str, ...] = (
+    "Apple Scab Leaf", "Apple leaf", "Apple rust leaf", "Bell_pepper leaf spot",
+    "Bell_pepper leaf", "Blueberry leaf", "Cherry leaf", "Corn Gray leaf spot",
+    "Corn leaf blight", "Corn rust leaf", "grape leaf black rot"
+)
+
+# Class names written by the model trainer
+CLASS_NAMES_PATH = Path(__file__).parents[4] / "artifacts" / "model_training" / "class_names.json"
+
+# Words that carry no meaning for telling entities apart
+ENTITY_STOPWORDS = frozenset({"leaf", "leave", "plant", "of", "on", "the"})
+
+# Inflection endings tried when a word has no exact match, with their replacements
+_SUFFIXES = (
+    ("ments", ""), ("ment", ""), ("ions", ""), ("ion", ""), ("ing", ""), ("ies", "y"),
+    ("ves", "f"), ("ed", ""), ("ed", "e"), ("es", ""), ("ly", ""), ("al", ""), ("s", "")
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class QueryMatch(NamedTuple):
+    """Everything recognised in one question"""
+    intent: Optional[str]           # highest-precedence intent, None if none matched
+    intents: Tuple[str, ...]        # every intent matched, by precedence
+    diseases: Tuple[str, ...]       # knowledge base keys, in order of first mention
+    classes: Tuple[str, ...]        # detection class names mentioned, in order of first mention
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text; underscores and punctuation separate words"""
+    return _WORD.findall(text.lower())
+
+
+@lru_cache(maxsize=65536)
+def word_forms(word: str) -> Tuple[str, ...]:
+    """A word followed by its candidate stems ('treatments' -> 'treatment', 'treat', ...)"""
+    forms = [word]
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            forms.append(word[:-len(suffix)] + replacement)
+    return tuple(forms)
+
+
+def load_class_names(path=None) -> Tuple[str, ...]:
+    """
+    Detection class names from the trainer's class names file
+
+    Args:
+        path: JSON list of class names (defaults to the CLASS_NAMES_PATH env var or CLASS_NAMES_PATH)
+
+    Returns:
+        The names in the file, or DEFAULT_CLASS_NAMES if it is missing or unreadable
+    """
+    path = Path(path or os.getenv("CLASS_NAMES_PATH", CLASS_NAMES_PATH))
+    try:
+        names = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return DEFAULT_CLASS_NAMES
+    if not isinstance(names, list) or not names:
+        return DEFAULT_CLASS_NAMES
+    return tuple(str(name) for name in names)
+
+
+def disease_class_names(class_names: Sequence[str] = DEFAULT_CLASS_NAMES) -> Tuple[str, ...]:
+    """
+    Detection classes naming a disease rather than a healthy or generic leaf
+
+    A class is generic when it mentions "healthy", names nothing but the crop
+    ("Cherry leaf"), or its words are all part of another class's name
+    ("Apple leaf" inside "Apple Scab Leaf").
+    """
+    signatures = {name: frozenset(tokenize(name)) - ENTITY_STOPWORDS for name in class_names}
+    return tuple(
+        name for name, signature in signatures.items()
+        if "healthy" not in signature
+        and len(signature) > 1
+        and not any(signature < other for other in signatures.values())
+    )
+
+
+class IntentMatcher:
+    """
+    Precompiled index of intents and disease mentions
+
+    Intents are matched as contiguous phrases. Diseases and detection classes
+    are matched as token sets, so "scab on my apples" finds apple scab just
+    like "apple scab" does. A set inside a larger matched set that names a
+    different disease is dropped, so "apple scab" reports the scab and not
+    the healthy "Apple leaf" class as well.
+
+    Every keyword sits in one dict keyed by its first word, and a question is
+    matched in a single pass over its words, trying each word's inflected forms.
+    """
+
+    def __init__(
+        self,
+        knowledge_base: Dict[str, dict],
+        class_names: Sequence[str] = DEFAULT_CLASS_NAMES,
+        intent_phrases: Dict[str, Tuple[str, ...]] = INTENT_PHRASES
+    ):
+        """
+        Args:
+            knowledge_base: Disease entries keyed by name; an entry's 'aliases' add
+                other names for it. Entries without a 'treatment' list are not diseases.
+            class_names: Detection class names, mapped to knowledge base keys by their words
+            intent_phrases: Keyword phrases per intent, in order of precedence
+        """
+        self.intent_order = {intent: rank for rank, intent in enumerate(intent_phrases)}
+
+        # first word -> [(following words, intent)]
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for intent, phrases in intent_phrases.items():
+            for phrase in phrases:
+                words = tuple(tokenize(phrase))
+                self._phrases.setdefault(words[0], []).append((words[1:], intent))
+
+        # Token-set signatures: word -> signature ids; per id its words, disease key and class name
+        self._postings: Dict[str, List[int]] = {}
+        self._signatures: List[Tuple[frozenset, Optional[str], Optional[str]]] = []
+
+        diseases = {}
+        for key, entry in knowledge_base.items():
+            if not isinstance(entry, dict) or "treatment" not in entry:
+                continue
+            for name in (key, *entry.get("aliases", ())):
+                diseases.setdefault(self._signature(name), key)
+        for signature, key in diseases.items():
+            self._add_signature(signature, key, None)
+
+        self.class_diseases: Dict[str, Optional[str]] = {}
+        for name in class_names:
+            signature = self._signature(name)
+            # The most specific disease whose words all appear in the class name
+            candidates = [(len(sig), key) for sig, key in diseases.items() if sig <= signature]
+            disease = max(candidates)[1] if candidates else None
+            self.class_diseases[name] = disease
+            self._add_signature(signature, disease, name)
+
+    @staticmethod
+    def _signature(name: str) -> frozenset:
+        return frozenset(tokenize(name)) - ENTITY_STOPWORDS
+
+    def _add_signature(self, signature: frozenset, disease: Optional[str], class_name: Optional[str]):
+        if not signature:
+            return
+        index = len(self._signatures)
+        self._signatures.append((signature, disease, class_name))
+        for word in signature:
+            self._postings.setdefault(word, []).append(index)
+
+    def match(self, question: str) -> QueryMatch:
+        """Intents, diseases and detection classes mentioned in a question"""
+        forms = [word_forms(word) for word in tokenize(question)]
+        intents = set()
+        hits: Dict[int, set] = {}
+        first_seen: Dict[int, int] = {}
+
+        for position, candidates in enumerate(forms):
+            for word in candidates:
+                for rest, intent in self._phrases.get(word, ()):
+                    end = position + 1 + len(rest)
+                    if end <= len(forms) and all(
+                        expected in forms[position + 1 + i] for i, expected in enumerate(rest)
+                    ):
+                        intents.add(intent)
+                for index in self._postings.get(word, ()):
+                    hits.setdefault(index, set()).add(word)
+                    first_seen.setdefault(index, position)
+
+        matched = [
+            index for index, words in hits.items()
+            if len(words) == len(self._signatures[index][0])
+        ]
+        # Drop sets contained in a larger match that names something else ("apple" inside "apple scab")
+        matched = [
+            index for index in matched
+            if not any(
+                self._signatures[index][0] < self._signatures[other][0]
+                and self._signatures[index][1] != self._signatures[other][1]
+                for other in matched
+            )
+        ]
+        matched.sort(key=lambda index: first_seen[index])
+
+        diseases = _unique(self._signatures[index][1] for index in matched)
+        classes = _unique(self._signatures[index][2] for index in matched)
+        ordered = tuple(sorted(intents, key=self.intent_order.__getitem__))
+        return QueryMatch(ordered[0] if ordered else None, ordered, diseases, classes)
+
+
+def _unique(values: Iterable[Optional[str]]) -> Tuple[str, ...]:
+    seen = []
+    for value in values:
+        if value is not None and value not in seen:
+            seen.append(value)
+    return tuple(seen)
@@ -0,0 +1,136 @@
+from typing import Any, Dict, List
+
+
+# Disease entries answered by the chatbot and protected from translation. An
+# entry is a disease when it has a 'treatment' list; 'aliases' add other names.
+KNOWLEDGE_BASE: Dict[str, Any] = {
+    "apple_scab": {
+        "description": "Fungal disease causing dark, scabby spots on leaves and fruit",
+        "treatment": [
+            "Apply fungicides (captan or mancozeb) during early season",
+            "Remove and destroy infected leaves and fruit",
+            "Prune trees to improve air circulation",
+            "Choose resistant apple varieties"
+        ],
+        "prevention": [
+            "Apply dormant oil spray in spring",
+            "Rake and remove fallen leaves",
+            "Maintain proper tree spacing",
+            "Monitor weather conditions (wet weather favors disease)"
+        ],
+        "aliases": ["scab"]
+    },
+    "apple_rust": {
+        "description": "Fungal disease (cedar apple rust) causing bright orange-yellow spots on leaves; it alternates between apple and juniper hosts",
+        "treatment": [
+            "Apply fungicides (myclobutanil or mancozeb) from pink bud through petal fall",
+            "Repeat applications every 7-10 days during wet spring weather",
+            "Remove heavily infected leaves and fruit",
+            "Keep trees vigorous with balanced fertilization"
+        ],
+        "prevention": [
+            "Remove galls from nearby junipers and eastern red cedars",
+            "Plant rust-resistant apple varieties",
+            "Start protective sprays before orange galls release spores in spring",
+            "Avoid planting apples close to cedar windbreaks"
+        ],
+        "aliases": ["cedar apple rust", "cedar rust"]
+    },
+    "grape_black_rot": {
+        "description": "Fungal disease causing rotted grapes and leaf spots",
+        "treatment": [
+            "Apply fungicides (mancozeb, myclobutanil) at first sign",
+            "Remove infected berries and mummified fruit",
+            "Prune out infected canes",
+            "Improve vineyard sanitation"
+        ],
+        "prevention": [
+            "Remove mummified berries from vines and ground",
+            "Prune for better air circulation",
+            "Apply protective fungicides before rain",
+            "Use resistant grape varieties"
+        ],
+        "aliases": ["black rot", "grape rot"]
+    },
+    "bell_pepper_leaf_spot": {
+        "description": "Bacterial disease causing small water-soaked spots that turn brown on pepper leaves and fruit",
+        "treatment": [
+            "Spray copper-based bactericides, alone or mixed with mancozeb",
+            "Remove and destroy badly infected plants",
+            "Avoid working among plants while foliage is wet",
+            "Switch to drip irrigation to keep leaves dry"
+        ],
+        "prevention": [
+            "Use certified disease-free or hot-water treated seed",
+            "Plant varieties resistant to bacterial spot",
+            "Rotate away from peppers and tomatoes for 2-3 years",
+            "Remove volunteer plants and crop debris after harvest"
+        ],
+        "aliases": ["bacterial spot", "bacterial leaf spot", "pepper leaf spot"]
+    },
+    "corn_gray_leaf_spot": {
+        "description": "Fungal disease causing narrow rectangular gray to tan lesions bounded by leaf veins",
+        "treatment": [
+            "Apply a foliar fungicide (strobilurin or triazole) around tasseling if lesions reach the upper leaves",
+            "Scout fields weekly from mid-season in warm, humid weather",
+            "Prioritize susceptible hybrids and fields with corn residue for spraying"
+        ],
+        "prevention": [
+            "Plant hybrids with gray leaf spot resistance",
+            "Rotate to a non-host crop for at least one year",
+            "Bury or break down infected residue with tillage",
+            "Avoid dense plantings in low, humid fields"
+        ],
+        "aliases": ["gray leaf spot", "grey leaf spot", "cercospora"]
+    },
+    "corn_leaf_blight": {
+        "description": "Fungal disease (northern corn leaf blight) causing long, cigar-shaped gray-green to tan lesions",
+        "treatment": [
+            "Apply a foliar fungicide between tasseling and silking if lesions appear on the upper leaves",
+            "Scout fields during cool, wet weather",
+            "Harvest badly affected fields early to limit stalk lodging"
+        ],
+        "prevention": [
+            "Plant resistant hybrids",
+            "Rotate crops to reduce inoculum in residue",
+            "Manage corn residue with tillage where erosion allows",
+            "Maintain balanced fertility"
+        ],
+        "aliases": ["northern corn leaf blight", "northern leaf blight", "turcicum"]
+    },
+    "corn_rust": {
+        "description": "Fungal disease (common rust) causing small cinnamon-brown pustules on both leaf surfaces",
+        "treatment": [
+            "Apply a fungicide when pustules appear early on susceptible hybrids",
+            "Scout the upper leaves during cool, humid periods",
+            "Spraying is rarely economic after the dough stage"
+        ],
+        "prevention": [
+            "Plant hybrids with rust resistance",
+            "Plant early so the crop matures before spores build up",
+            "Monitor regional rust reports during the season"
+        ],
+        "aliases": ["common rust"]
+    },
+    "general": {
+        "best_practices": [
+            "Regular monitoring and early detection",
+            "Proper irrigation management",
+            "Crop rotation when applicable",
+            "Maintain good soil health",
+            "Use disease-resistant varieties",
+            "Practice integrated pest management (IPM)"
+        ],
+        "organic_options": [
+            "Neem oil for fungal diseases",
+            "Copper-based fungicides",
+            "Biological controls (beneficial microbes)",
+            "Cultural practices (spacing, pruning, sanitation)"
+        ]
+    }
+}
+
+
+def disease_keys(knowledge_base: Dict[str, dict] = KNOWLEDGE_BASE) -> List[str]:
+    """Keys of the disease entries (those with a 'treatment' list)"""
+    return [key for key, entry in knowledge_base.items() if isinstance(entry, dict) and "treatment" in entry]
@@ -0,0 +1,369 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from precision_agronomist.chat.intents import tokenize
+from precision_agronomist.utils.files import replace_file
+
+
+# Project directories, independent of the working directory the crew or API runs from
+DEFAULT_KNOWLEDGE_DIR = Path(__file__).parents[3] / "knowledge"
+DEFAULT_INDEX_DIR = Path(__file__).parents[3] / "knowledge_index"
+
+# Files indexed from the knowledge directory
+KNOWLEDGE_SUFFIXES = (".md", ".txt")
+
+# BM25 parameters and chunk size; a persisted index built with other values is rebuilt
+INDEX_PARAMS = {
+    "k1": 1.5,
+    "b": 0.75,
+    "chunk_words": 120,
+    "version": 1,
+}
+
+STOPWORDS = frozenset("""
+    a about after all also am an and any are as at be been before but by can could did do does for from
+    had has have how i if in into is it its me my no not of on or our should so than that the their them
+    then there these they this to too up us was we were what when where which while who why will with
+    would you your
+""".split())
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_HEADING = re.compile(r"^#+\s*(.+?)\s*#*$")
+
+
+def index_terms(text: str) -> List[str]:
+    """Terms of a text as indexed: lowercase words without stopwords, plural 's' removed"""
+    terms = []
+    for word in tokenize(text):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def chunk_text(text: str, title: str, chunk_words: int = INDEX_PARAMS["chunk_words"]) -> List[Tuple[str, str]]:
+    """
+    Split a document into passages of about chunk_words words
+
+    Paragraphs are packed together up to the limit and never cross a
+    Markdown heading; the heading becomes the passage title. Paragraphs
+    longer than the limit are split between sentences.
+
+    Args:
+        text: Document text
+        title: Title of passages before the first heading
+        chunk_words: Target passage length in words
+
+    Returns:
+        (title, passage) pairs
+    """
+    chunks = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append((title, " ".join(current)))
+        current, size = [], 0
+
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        heading = _HEADING.match(paragraph)
+        if heading:
+            flush()
+            title = heading.group(1)
+            continue
+
+        pieces = [paragraph]
+        if len(paragraph.split()) > chunk_words:
+            pieces = _SENTENCE.split(paragraph)
+        for piece in pieces:
+            words = len(piece.split())
+            if size and size + words > chunk_words:
+                flush()
+            current.append(piece)
+            size += words
+    flush()
+    return chunks
+
+
+def knowledge_base_passages(knowledge_base: Dict[str, dict]) -> List[Tuple[str, str]]:
+    """One (title, passage) per section of each knowledge base entry"""
+    passages = []
+    for key, entry in knowledge_base.items():
+        name = key.replace("_", " ").title()
+        for section, value in entry.items():
+            if section == "aliases":
+                continue
+            if isinstance(value, list):
+                value = ". ".join(item.rstrip(".") for item in value) + "."
+            passages.append((f"{name}: {section.replace('_', ' ')}", f"{name} {section.replace('_', ' ')}: {value}"))
+    return passages
+
+
+class KnowledgeIndex:
+    """
+    BM25 passage index over the knowledge directory and the chatbot knowledge base
+
+    Passages are scored against a query as one sparse matrix-vector product.
+    The matrix is stored term-major (CSC-style ``indptr``/``chunk_ids``/
+    ``weights`` arrays holding final BM25 weights), so scoring gathers the
+    columns of the query terms and sums them per passage with np.bincount.
+
+    The index is persisted to ``index_dir``. Files are fingerprinted by size
+    and modification time: on refresh only new or changed files are read and
+    chunked again, and the weights are recomputed from the stored per-passage
+    term counts.
+    """
+
+    def __init__(
+        self,
+        knowledge_dir=DEFAULT_KNOWLEDGE_DIR,
+        index_dir=DEFAULT_INDEX_DIR,
+        knowledge_base: Optional[Dict[str, dict]] = None,
+        refresh_seconds: float = 5.0
+    ):
+        """
+        Args:
+            knowledge_dir: Directory of .md/.txt documents (searched recursively)
+            index_dir: Where the index is persisted
+            knowledge_base: Structured entries indexed alongside the documents
+            refresh_seconds: Minimum time between checks of the knowledge directory
+        """
+        self.knowledge_dir = Path(knowledge_dir)
+        self.index_dir = Path(index_dir)
+        self.knowledge_base = knowledge_base or {}
+        self.refresh_seconds = refresh_seconds
+
+        # source -> {"fingerprint": [...], "chunks": [{"title", "text", "terms": {term: tf}}]}
+        self._documents: Dict[str, dict] = {}
+        self._chunks: List[dict] = []
+        self._term_ids: Dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._chunk_ids = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._checked_at = 0.0
+        self._version = ""
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+        self._load()
+
+    def _sources(self) -> Dict[str, list]:
+        """Current fingerprint of every indexed source"""
+        sources = {}
+        if self.knowledge_base:
+            digest = hashlib.sha1(json.dumps(self.knowledge_base, sort_keys=True).encode("utf-8")).hexdigest()
+            sources["knowledge_base"] = ["sha1", digest]
+        if self.knowledge_dir.is_dir():
+            for path in sorted(self.knowledge_dir.rglob("*")):
+                if path.suffix.lower() in KNOWLEDGE_SUFFIXES and path.is_file():
+                    stat = path.stat()
+                    sources[path.relative_to(self.knowledge_dir).as_posix()] = [stat.st_mtime_ns, stat.st_size]
+        return sources
+
+    def _read_chunks(self, source: str) -> List[dict]:
+        if source == "knowledge_base":
+            passages = knowledge_base_passages(self.knowledge_base)
+        else:
+            path = self.knowledge_dir / source
+            text = path.read_text(encoding="utf-8", errors="replace")
+            passages = chunk_text(text, path.stem.replace("_", " ").title(), INDEX_PARAMS["chunk_words"])
+
+        chunks = []
+        for title, passage in passages:
+            terms: Dict[str, int] = {}
+            for term in index_terms(f"{title} {passage}"):
+                terms[term] = terms.get(term, 0) + 1
+            chunks.append({"title": title, "text": passage, "terms": terms})
+        return chunks
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the index up to date with the knowledge directory
+
+        Args:
+            force: Check now even if refresh_seconds have not passed
+
+        Returns:
+            True if any source changed and the index was rebuilt
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.refresh_seconds:
+                return False
+            self._checked_at = now
+
+            sources = self._sources()
+            known = {source: document["fingerprint"] for source, document in self._documents.items()}
+            if sources == known:
+                return False
+
+            documents = {}
+            for source, fingerprint in sources.items():
+                document = self._documents.get(source)
+                if document is None or document["fingerprint"] != fingerprint:
+                    document = {"fingerprint": fingerprint, "chunks": self._read_chunks(source)}
+                documents[source] = document
+            self._documents = documents
+            self._build_matrix()
+            self._save()
+            self._version = self._digest()
+            self.rebuilds += 1
+            return True
+
+    def version(self) -> str:
+        """Digest of the indexed sources' fingerprints; changes whenever any source does"""
+        self.refresh()
+        with self._lock:
+            return self._version
+
+    def _digest(self) -> str:
+        fingerprints = {source: document["fingerprint"] for source, document in self._documents.items()}
+        return hashlib.sha1(json.dumps(fingerprints, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _build_matrix(self):
+        """BM25 weights of every (passage, term) pair from the stored term counts"""
+        self._chunks = [
+            dict(chunk, source=source)
+            for source, document in self._documents.items()
+            for chunk in document["chunks"]
+        ]
+        vocabulary = sorted({term for chunk in self._chunks for term in chunk["terms"]})
+        self._term_ids = {term: i for i, term in enumerate(vocabulary)}
+
+        rows, cols, counts = [], [], []
+        for row, chunk in enumerate(self._chunks):
+            for term, count in chunk["terms"].items():
+                rows.append(row)
+                cols.append(self._term_ids[term])
+                counts.append(count)
+        rows = np.array(rows, dtype=np.int32)
+        cols = np.array(cols, dtype=np.int64)
+        tf = np.array(counts, dtype=np.float64)
+
+        n_chunks = len(self._chunks)
+        k1, b = INDEX_PARAMS["k1"], INDEX_PARAMS["b"]
+        lengths = np.bincount(rows, weights=tf, minlength=n_chunks)
+        avg_length = lengths.mean() if n_chunks else 1.0
+        df = np.bincount(cols, minlength=len(vocabulary))
+        idf = np.log1p((n_chunks - df + 0.5) / (df + 0.5))
+        weights = idf[cols] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[rows] / avg_length))
+
+        order = np.argsort(cols, kind="stable")
+        self._indptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        self._chunk_ids = rows[order]
+        self._weights = weights[order].astype(np.float32)
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0) -> List[dict]:
+        """
+        Passages best matching a query
+
+        Args:
+            query: Free text question
+            k: Number of passages to return
+            min_score: Drop passages scoring below this
+
+        Returns:
+            Up to k dicts with score, source, title and text, best first
+        """
+        self.refresh()
+        with self._lock:
+            ids = sorted({self._term_ids[term] for term in index_terms(query) if term in self._term_ids})
+            if not ids or not self._chunks:
+                return []
+            selected = np.concatenate([np.arange(self._indptr[i], self._indptr[i + 1]) for i in ids])
+            scores = np.bincount(
+                self._chunk_ids[selected], weights=self._weights[selected], minlength=len(self._chunks)
+            )
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                {
+                    "score": round(float(scores[i]), 3),
+                    "source": self._chunks[i]["source"],
+                    "title": self._chunks[i]["title"],
+                    "text": self._chunks[i]["text"]
+                }
+                for i in top if scores[i] > 0 and scores[i] >= min_score
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "passages": len(self._chunks),
+                "terms": len(self._term_ids),
+                "nonzeros": int(len(self._weights)),
+                "rebuilds": self.rebuilds
+            }
+
+    def _save(self):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        replace_file(self.index_dir / "matrix.npz", lambda f: np.savez(
+            f, indptr=self._indptr, chunk_ids=self._chunk_ids, weights=self._weights
+        ))
+
+        # Written last: it names the matrix's terms, and a stale matrix is detected by its size
+        meta = json.dumps({
+            "params": INDEX_PARAMS,
+            "documents": self._documents,
+            "terms": sorted(self._term_ids, key=self._term_ids.__getitem__),
+            "nonzeros": int(len(self._weights))
+        })
+        replace_file(self.index_dir / "index.json", lambda f: f.write(meta.encode("utf-8")))
+
+    def _load(self):
+        """Restore a persisted index; anything unreadable or stale is rebuilt on the next refresh"""
+        try:
+            meta = json.loads((self.index_dir / "index.json").read_text())
+            with np.load(self.index_dir / "matrix.npz") as matrix:
+                indptr, chunk_ids, weights = matrix["indptr"], matrix["chunk_ids"], matrix["weights"]
+        except (OSError, ValueError, KeyError):
+            return
+        if meta.get("params") != INDEX_PARAMS or meta.get("nonzeros") != len(weights):
+            return
+        self._documents = meta["documents"]
+        self._chunks = [
+            dict(chunk, source=source)
+            for source, document in self._documents.items()
+            for chunk in document["chunks"]
+        ]
+        self._term_ids = {term: i for i, term in enumerate(meta["terms"])}
+        self._indptr, self._chunk_ids, self._weights = indptr, chunk_ids, weights
+        self._version = self._digest()
+
+
+_indexes: Dict[Tuple[str, str], KnowledgeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_knowledge_index(knowledge_base: Optional[Dict[str, dict]] = None) -> KnowledgeIndex:
+    """
+    Shared index for the configured knowledge directory, created on first use
+
+    KNOWLEDGE_DIR and KNOWLEDGE_INDEX_DIR override the default locations.
+    """
+    key = (os.getenv("KNOWLEDGE_DIR", str(DEFAULT_KNOWLEDGE_DIR)), os.getenv("KNOWLEDGE_INDEX_DIR", str(DEFAULT_INDEX_DIR)))
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = KnowledgeIndex(key[0], key[1], knowledge_base)
+        return index
@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import os
 import sys
 import warnings
 from datetime import datetime
@@ -11,6 +12,27 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
+def location_inputs(farm_id=None, field_id=None) -> dict:
+    """
+    Task inputs naming where the images were taken
+
+    Only identifiers the caller supplied are named; without them detections are
+    stored unscoped and trends cover every farm, so nothing lands under a made-up farm.
+    """
+    if farm_id and field_id:
+        location = f"farm {farm_id}, field {field_id}"
+    elif farm_id:
+        location = f"farm {farm_id} (no field given; leave field_id empty)"
+    elif field_id:
+        location = f"field {field_id} (no farm given; leave farm_id empty)"
+    else:
+        location = "an unspecified farm and field (leave farm_id and field_id empty)"
+    return {
+        'location': location,
+        'trend_scope': f"farm {farm_id}, with a breakdown per field" if farm_id else "all farms, with a breakdown per farm"
+    }
+
+
 def run():
     """
     Run the plant disease detection crew.
@@ -24,6 +46,9 @@ def run():
         'num_images': 5,  # Number of test images to analyze
         'detection_threshold': 0.25,  # YOLO confidence threshold (0-1)
         
+        # Where the images were taken (detections and trends are tracked per farm and field)
+        **location_inputs(os.getenv('FARM_ID'), os.getenv('FIELD_ID')),
+        
         # Trend analysis
         'trend_analysis_days': 30,  # Days of historical data to analyze
         
@@ -69,6 +94,7 @@ def train():
         'yolo_model_url': 'None',
         'num_images': 3,
         'detection_threshold': 0.25,
+        **location_inputs(os.getenv('FARM_ID'), os.getenv('FIELD_ID')),
         'trend_analysis_days': 30,
         'farmer_question_context': 'recent disease detections',
         'preferred_language': 'en',
@@ -98,6 +124,7 @@ def test():
         'yolo_model_url': 'None',
         'num_images': 2,
         'detection_threshold': 0.25,
+        **location_inputs(os.getenv('FARM_ID'), os.getenv('FIELD_ID')),
         'trend_analysis_days': 30,
         'farmer_question_context': 'recent disease detections',
         'preferred_language': 'en',
@@ -110,14 +137,65 @@ def test():
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
 
+def export():
+    """
+    Export detection history to a partitioned Parquet/Arrow dataset.
+    Usage: export [output_dir] [parquet|arrow] [compression|none] [--incremental]
+    """
+    from precision_agronomist.storage.export import export_detections, DEFAULT_EXPORT_DIR
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    output_dir = args[0] if len(args) > 0 else DEFAULT_EXPORT_DIR
+    file_format = args[1] if len(args) > 1 else 'parquet'
+    compression = args[2] if len(args) > 2 else 'default'
+    if compression.lower() == 'none':
+        compression = None
+
+    try:
+        summary = export_detections(
+            output_dir=output_dir,
+            file_format=file_format,
+            compression=compression,
+            incremental='--incremental' in sys.argv
+        )
+        print(f"✓ Exported {summary['rows_exported']} detection(s) to {summary['output_dir']}")
+        return summary
+
+    except Exception as e:
+        raise Exception(f"An error occurred while exporting detections: {e}")
+
+def rebuild_rollups():
+    """
+    Regenerate the daily trend rollup tables from raw detections.
+    Usage: rebuild_rollups [db_path]
+    """
+    from precision_agronomist.storage.database import rebuild_rollups as rebuild, DEFAULT_DB_PATH
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+
+    try:
+        counts = rebuild(db_path)
+        print(f"✓ Rebuilt rollups in {db_path}: " + ", ".join(f"{table}={rows}" for table, rows in counts.items()))
+        return counts
+
+    except Exception as e:
+        raise Exception(f"An error occurred while rebuilding rollups: {e}")
+
 
 # AMP API Endpoints
-def detect_diseases_api(num_images: int = 5, detection_threshold: float = 0.25, preferred_language: str = "en"):
+def detect_diseases_api(
+    num_images: int = 5,
+    detection_threshold: float = 0.25,
+    preferred_language: str = "en",
+    farm_id: str = None,
+    field_id: str = None
+):
     """API endpoint for disease detection"""
     inputs = {
         'yolo_model_url': 'None',
         'num_images': num_images,
         'detection_threshold': detection_threshold,
+        **location_inputs(farm_id, field_id),
         'trend_analysis_days': 30,
         'farmer_question_context': 'recent disease detections',
         'preferred_language': preferred_language,
@@ -164,17 +242,120 @@ def chatbot_api(question: str, language: str = "en"):
         }
 
 
-def trends_api(days: int = 30):
-    """API endpoint for trend analysis"""
+def trends_api(
+    days: int = 30,
+    farm_id: str = None,
+    field_id: str = None,
+    breakdown: bool = False,
+    start_date: str = None,
+    end_date: str = None,
+    windows: str = None
+):
+    """API endpoint for trend analysis, optionally scoped to a farm or field and to explicit dates"""
     from precision_agronomist.tools.trend_analysis_tool import TrendAnalysisTool
     
     try:
         analyzer = TrendAnalysisTool()
-        trends = analyzer._run(time_period_days=days)
+        trends = analyzer._run(
+            time_period_days=days,
+            farm_id=farm_id,
+            field_id=field_id,
+            breakdown=breakdown,
+            start_date=start_date,
+            end_date=end_date,
+            windows=windows
+        )
         return {
             "status": "success",
             "trends": trends,
             "period_days": days,
+            "start_date": start_date,
+            "end_date": end_date,
+            "windows": windows,
+            "farm_id": farm_id,
+            "field_id": field_id,
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+
+def chatbot_cache_stats_api():
+    """API endpoint for chatbot response cache metrics"""
+    from precision_agronomist.chat.cache import response_cache
+    
+    return {
+        "status": "success",
+        "cache": response_cache.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def trends_cache_stats_api():
+    """API endpoint for trend result cache metrics"""
+    from precision_agronomist.analytics.cache import trend_cache
+    
+    return {
+        "status": "success",
+        "cache": trend_cache.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def export_api(file_format: str = "parquet", compression: str = "default", incremental: bool = False):
+    """API endpoint for detection history export (always into DEFAULT_EXPORT_DIR; clients never pick server paths)"""
+    from precision_agronomist.storage.export import export_detections, DEFAULT_EXPORT_DIR
+    
+    try:
+        summary = export_detections(
+            output_dir=DEFAULT_EXPORT_DIR,
+            file_format=file_format,
+            compression=compression,
+            incremental=incremental
+        )
+        return {
+            "status": "success",
+            "export": summary,
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+
+def alerts_api(status: str = None, limit: int = 20):
+    """API endpoint for alert queue state, outbox delivery status and metrics"""
+    from precision_agronomist.alerts.dispatcher import alert_dispatcher
+    from precision_agronomist.alerts.queue import alert_queue
+    
+    return {
+        "status": "success",
+        "alerts": alert_queue.stats(),
+        "dispatcher": alert_dispatcher.stats(),
+        "deliveries": alert_queue.deliveries(status=status, limit=limit),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def flush_alerts_api(force: bool = True, retry_failed: bool = False):
+    """API endpoint composing queued alerts into digests and delivering the outbox now"""
+    from precision_agronomist.alerts.dispatcher import alert_dispatcher
+    from precision_agronomist.alerts.queue import alert_queue
+    
+    try:
+        requeued = alert_queue.requeue_failed() if retry_failed else 0
+        result = alert_dispatcher.run_once(force=force)
+        result["requeued"] = requeued
+        return {
+            "status": "success",
+            "flush": result,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -0,0 +1,16 @@
+from precision_agronomist.models.artifacts import (
+    DEFAULT_CACHE_DIR, ArtifactCache, artifact_cache, file_sha256, resolve_download_url
+)
+from precision_agronomist.models.serving import MODEL_SPECS, ModelServer, ModelWorker, model_server
+
+__all__ = [
+    'DEFAULT_CACHE_DIR',
+    'ArtifactCache',
+    'artifact_cache',
+    'file_sha256',
+    'resolve_download_url',
+    'MODEL_SPECS',
+    'ModelServer',
+    'ModelWorker',
+    'model_server'
+]
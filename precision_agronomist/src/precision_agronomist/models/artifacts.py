@@ -0,0 +1,332 @@
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import hashlib
+import http.client
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+# Model cache under the project's artifacts directory
+DEFAULT_CACHE_DIR = Path(__file__).parents[4] / "artifacts" / "model_cache"
+
+# Bytes read or written per chunk while downloading and hashing
+CHUNK_SIZE = 1 << 20
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+_UNSATISFIED_RANGE = re.compile(r"bytes \*/(\d+)")
+
+
+def file_sha256(path) -> str:
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolve_download_url(source: str) -> str:
+    """
+    Direct download URL for a Google Drive link or file ID
+
+    Plain http(s) URLs are returned unchanged, so the cache can be pointed
+    at any server (a mirror, or a local stand-in in tests). Drive files are
+    fetched from the usercontent endpoint, which skips the virus-scan page
+    and honours range requests.
+    """
+    if 'drive.google.com' in source:
+        if '/d/' in source:
+            file_id = source.split('/d/')[-1].split('/')[0]
+        elif 'id=' in source:
+            file_id = source.split('id=')[-1].split('&')[0]
+        else:
+            file_id = source
+    elif source.startswith(('http://', 'https://')):
+        return source
+    else:
+        # Assume it's already a file ID
+        file_id = source
+    return f"https://drive.usercontent.google.com/download?id={file_id}&export=download&confirm=t"
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of downloaded model files
+
+    Files are kept under ``sha256/<first two hex digits>/<digest>``, with an
+    index mapping each source URL to the digest it served and each installed
+    destination to the digest, size and mtime it was installed with. A
+    repeat ``fetch`` of a known URL whose destination is unchanged returns
+    without touching the network or rehashing; a missing or modified
+    destination is restored from the store.
+
+    Downloads go to a ``.part`` file and resume with HTTP range requests
+    (guarded by If-Range on the server's ETag) after a dropped connection,
+    across attempts and across runs. The size and SHA-256 are verified
+    before the file enters the store, and destinations are replaced
+    atomically, so an interrupted download never leaves a truncated model
+    in place.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, attempts: int = 5, timeout: float = 60.0, retry_delay: float = 1.0):
+        """
+        Args:
+            cache_dir: Directory holding the store, the index and partial downloads
+            attempts: Download attempts (each resuming the previous one) before giving up
+            timeout: Socket timeout in seconds
+            retry_delay: Seconds before the first retry, doubling after each failure
+        """
+        self.cache_dir = Path(cache_dir)
+        self.attempts = attempts
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.index_path = self.cache_dir / "index.json"
+        self._lock = threading.Lock()
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.cache_dir / "sha256" / sha256[:2] / sha256
+
+    def _load_index(self) -> dict:
+        if self.index_path.exists():
+            try:
+                index = json.loads(self.index_path.read_text(encoding="utf-8"))
+                index.setdefault("sources", {})
+                index.setdefault("files", {})
+                return index
+            except (OSError, json.JSONDecodeError):
+                pass
+        return {"sources": {}, "files": {}}
+
+    def _save_index(self, index: dict):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(index, indent=2), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def fetch(self, url: str, destination, sha256: str = None, size: int = None, refresh: bool = False) -> Dict:
+        """
+        Make destination hold the file served at url
+
+        Args:
+            url: Source URL (see resolve_download_url for Google Drive links)
+            destination: Path the model is used from
+            sha256: Expected SHA-256 (verified when given; pins the content)
+            size: Expected size in bytes (verified when given)
+            refresh: Ask the server again even if the URL was fetched before
+
+        Returns:
+            Dict with path, sha256, size, source ('installed' - destination
+            already current, 'cache' - restored from the store, 'download'),
+            bytes downloaded and how many requests resumed a partial download
+        """
+        destination = Path(destination)
+        sha256 = sha256.lower() if sha256 else None
+        with self._lock:
+            index = self._load_index()
+            known = index["sources"].get(url)
+            digest = sha256 or (known["sha256"] if known and not refresh else None)
+
+            if digest:
+                installed = index["files"].get(str(destination))
+                stat = destination.stat() if destination.exists() else None
+                if (
+                    installed and stat and installed["sha256"] == digest
+                    and installed["size"] == stat.st_size and installed["mtime_ns"] == stat.st_mtime_ns
+                ):
+                    return self._result(destination, digest, stat.st_size, "installed")
+                blob = self.blob_path(digest)
+                if not blob.exists() and stat and file_sha256(destination) == digest:
+                    # Pre-existing copy of the right file: adopt it into the store
+                    self._store(destination, digest, copy=True)
+                if blob.exists() and (size is None or blob.stat().st_size == size):
+                    self._install(index, blob, destination, digest)
+                    if sha256 and url not in index["sources"]:
+                        index["sources"][url] = {"sha256": digest, "size": blob.stat().st_size, "fetched_at": time.time()}
+                    self._save_index(index)
+                    return self._result(destination, digest, blob.stat().st_size, "cache")
+
+            digest, total, downloaded, resumes = self._download(url, sha256, size)
+            index["sources"][url] = {"sha256": digest, "size": total, "fetched_at": time.time()}
+            self._install(index, self.blob_path(digest), destination, digest)
+            self._save_index(index)
+            return self._result(destination, digest, total, "download", downloaded, resumes)
+
+    @staticmethod
+    def _result(destination, digest, size, source, downloaded=0, resumes=0) -> Dict:
+        return {
+            "path": str(destination),
+            "sha256": digest,
+            "size": size,
+            "source": source,
+            "downloaded_bytes": downloaded,
+            "resumes": resumes
+        }
+
+    def _store(self, path: Path, digest: str, copy: bool = False):
+        """Move (or copy) a verified file into the store under its digest"""
+        blob = self.blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if copy:
+            tmp = blob.with_name(f"{blob.name}.{os.getpid()}.tmp")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+        else:
+            os.replace(path, blob)
+
+    def _install(self, index: dict, blob: Path, destination: Path, digest: str):
+        """Copy a stored file to destination through a temporary file and an atomic rename"""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+        shutil.copyfile(blob, tmp)
+        os.replace(tmp, destination)
+        stat = destination.stat()
+        index["files"][str(destination)] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _download(self, url: str, sha256: Optional[str], size: Optional[int]):
+        """Download url into the store, resuming across attempts; returns (digest, size, downloaded, resumes)"""
+        partial_dir = self.cache_dir / "partial"
+        partial_dir.mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        part = partial_dir / f"{key}.part"
+        meta_path = partial_dir / f"{key}.json"
+        meta = {}
+        if part.exists() and meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                meta = {}
+        if meta.get("url") != url:
+            part.unlink(missing_ok=True)
+            meta = {"url": url}
+
+        downloaded = 0
+        resumes = 0
+        error = None
+        for attempt in range(self.attempts):
+            try:
+                received, resumed = self._download_attempt(url, part, meta, meta_path, sha256)
+                downloaded += received
+                resumes += resumed
+                error = None
+                break
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                error = e
+                if isinstance(e, urllib.error.HTTPError) and e.code < 500 and e.code not in (408, 429):
+                    break
+                if attempt + 1 < self.attempts:
+                    time.sleep(min(30.0, self.retry_delay * 2 ** attempt))
+        if error is not None:
+            raise RuntimeError(
+                f"Download of {url} failed after {attempt + 1} attempt(s): {error}; "
+                f"{part.stat().st_size if part.exists() else 0} bytes kept for resuming"
+            ) from error
+
+        total = part.stat().st_size
+        if meta.get("total") is not None and total != meta["total"]:
+            raise RuntimeError(f"Download of {url} is incomplete: {total} of {meta['total']} bytes")
+        if size is not None and total != size:
+            part.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            raise ValueError(f"Downloaded file is {total} bytes, expected {size}")
+        digest = file_sha256(part)
+        if sha256 and digest != sha256:
+            part.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            raise ValueError(f"Checksum mismatch for {url}: got {digest}, expected {sha256}")
+
+        self._store(part, digest)
+        meta_path.unlink(missing_ok=True)
+        return digest, total, downloaded, resumes
+
+    def _download_attempt(self, url: str, part: Path, meta: dict, meta_path: Path, sha256: Optional[str] = None) -> Tuple[int, bool]:
+        """One request, continuing part if the server honours the range; returns (bytes received, resumed)"""
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"User-Agent": "precision-agronomist"}
+        if offset:
+            if meta.get("total") == offset:
+                return 0, False
+            headers["Range"] = f"bytes={offset}-"
+            if meta.get("validator"):
+                headers["If-Range"] = meta["validator"]
+
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 416 or not offset:
+                raise
+            self._check_complete_part(url, part, meta, meta_path, sha256, e)
+            return 0, False
+        with response:
+            content_range = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if response.status == 206 and content_range and int(content_range.group(1)) == offset:
+                mode = "ab"
+                total = content_range.group(3)
+                meta["total"] = int(total) if total != "*" else None
+            else:
+                # Full response: the server ignored the range or the file changed
+                mode = "wb"
+                length = response.headers.get("Content-Length")
+                meta["total"] = int(length) if length else None
+                if "drive.usercontent.google.com" in url and response.headers.get_content_type() == "text/html":
+                    raise ValueError("Google Drive returned a web page instead of the file; check the link is shared publicly")
+            meta["validator"] = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+            received = 0
+            with open(part, mode) as f:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    f.write(chunk)
+                    received += len(chunk)
+            if meta["total"] is not None and part.stat().st_size < meta["total"]:
+                raise ConnectionError(f"Connection closed after {part.stat().st_size} of {meta['total']} bytes")
+            return received, mode == "ab"
+
+    def _check_complete_part(self, url: str, part: Path, meta: dict, meta_path: Path, sha256: Optional[str], error):
+        """
+        Handle a 416 for a resume range starting at the end of part
+
+        Without a Content-Length on the first response the total is unknown,
+        so a part holding the whole file still asks for more. It is accepted
+        if it matches the expected checksum, or the size the server reports
+        in the 416's Content-Range; otherwise it is discarded and the next
+        attempt starts over.
+        """
+        offset = part.stat().st_size
+        served = _UNSATISFIED_RANGE.match(error.headers.get("Content-Range", "") if error.headers else "")
+        served_total = int(served.group(1)) if served else None
+        if served_total is None or served_total == offset:
+            if sha256:
+                complete = file_sha256(part) == sha256
+            else:
+                complete = served_total == offset
+            if complete:
+                meta["total"] = offset
+                meta_path.write_text(json.dumps(meta), encoding="utf-8")
+                return
+        part.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+        meta.clear()
+        meta["url"] = url
+        raise ConnectionError(f"Partial download of {url} could not be verified ({offset} bytes); restarting")
+
+    def stats(self) -> dict:
+        index = self._load_index()
+        blobs = list((self.cache_dir / "sha256").glob("*/*"))
+        return {
+            "cache_dir": str(self.cache_dir),
+            "sources": len(index["sources"]),
+            "installed_files": len(index["files"]),
+            "artifacts": len(blobs),
+            "bytes": sum(blob.stat().st_size for blob in blobs)
+        }
+
+
+# Model cache shared by every ModelDownloaderTool in the process
+artifact_cache = ArtifactCache(os.getenv('MODEL_CACHE_DIR', str(DEFAULT_CACHE_DIR)))
@@ -0,0 +1,305 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import atexit
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+from precision_agronomist.models.artifacts import artifact_cache, resolve_download_url
+
+
+PROJECT_ROOT = Path(__file__).parents[4]
+
+# Models the API can keep loaded: prediction script, weights, and the env vars naming a download URL / checksum
+MODEL_SPECS = {
+    "yolo": {
+        "script": "predict_yolo.py",
+        "weights": "artifacts/yolo_detection/plant_disease_run1/weights/best.pt",
+        "url_env": "YOLO_MODEL_URL",
+        "sha256_env": "YOLO_MODEL_SHA256",
+    },
+    "classifier": {
+        "script": "predict_classification.py",
+        "weights": "artifacts/model_training/model.h5",
+        "class_names": "artifacts/model_training/class_names.json",
+        "url_env": "CLASSIFIER_MODEL_URL",
+        "sha256_env": "CLASSIFIER_MODEL_SHA256",
+    },
+}
+
+
+def ml_python(project_root: Path = PROJECT_ROOT) -> Path:
+    """Python of the ML environment (TensorFlow/YOLO compatible), falling back to this interpreter"""
+    for candidate in (project_root / "ml_env" / "Scripts" / "python.exe", project_root / "ml_env" / "bin" / "python"):
+        if candidate.exists():
+            return candidate
+    return Path(sys.executable)
+
+
+class ModelWorker:
+    """
+    Long-lived prediction process keeping one model loaded
+
+    Runs a prediction script in ``--serve`` mode: the script loads the
+    weights, makes a dummy forward pass and reports ready, then answers one
+    JSON request per line. Requests are serialized per worker. ``exited`` is
+    set once the process is gone, for whatever reason (crash, kill after a
+    timeout, stop).
+    """
+
+    def __init__(self, name: str, command: Sequence[str], cwd: Path = PROJECT_ROOT):
+        self.name = name
+        self.command = [str(part) for part in command]
+        self.cwd = cwd
+        self.state = "stopped"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.requests = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.exited = threading.Event()
+
+    def start(self, timeout: float = 600.0) -> bool:
+        """Spawn the process and block until it reports ready (or fails); returns whether it is ready"""
+        self.state = "loading"
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            cwd=str(self.cwd)
+        )
+        threading.Thread(target=self._read, name=f"{self.name}-worker-reader", daemon=True).start()
+        try:
+            message = self._next_message(timeout)
+        except (TimeoutError, RuntimeError) as e:
+            return self._fail(str(e))
+        if message.get("event") != "ready":
+            return self._fail(message.get("error", f"unexpected message {message}"))
+        self.load_seconds = message.get("load_seconds")
+        self.warmup_seconds = message.get("warmup_seconds")
+        self.state = "ready"
+        return True
+
+    def _read(self):
+        for line in self._process.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+        self.exited.set()
+
+    def _next_message(self, timeout: float) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise TimeoutError(f"{self.name} worker did not answer within {timeout:g} seconds")
+            if line is None:
+                raise RuntimeError(f"{self.name} worker exited with code {self._process.wait()}")
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                # Stray output in the protocol stream: later replies can no longer be matched up
+                raise RuntimeError(f"{self.name} worker wrote a non-protocol line: {line.strip()[:200]!r}")
+            return message
+
+    def _fail(self, error: str) -> bool:
+        self.state = "failed"
+        self.error = error
+        self.stop()
+        return False
+
+    def predict(self, request: dict, timeout: float = 60.0) -> dict:
+        """Send one request and wait for its result"""
+        with self._lock:
+            if self.state != "ready":
+                raise RuntimeError(f"{self.name} worker is {self.state}")
+            request_id = next(self._ids)
+            try:
+                self._process.stdin.write(json.dumps({**request, "id": request_id}) + "\n")
+                self._process.stdin.flush()
+                message = self._next_message(timeout)
+            except (OSError, TimeoutError, RuntimeError) as e:
+                # A stuck or dead worker cannot be trusted with the next request
+                self._fail(str(e))
+                raise
+            if message.get("id") != request_id:
+                self._fail(f"out-of-order response {message.get('id')} for request {request_id}")
+                raise RuntimeError(self.error)
+            self.requests += 1
+            return message["result"]
+
+    def stop(self):
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+            process.wait()
+        if self.state == "ready":
+            self.state = "stopped"
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "pid": self._process.pid if self._process is not None and self._process.poll() is None else None,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "requests": self.requests,
+            "error": self.error
+        }
+
+
+class ModelServer:
+    """
+    Prefetches model weights and keeps warm workers for the API
+
+    ``start`` returns immediately; a background thread per model fetches
+    the weights through the artifact cache when a download URL is
+    configured (a no-op once cached), then starts a ModelWorker that loads
+    them and runs a dummy forward pass at ``image_size``. The prediction
+    tools use a worker once it is ready and fall back to a one-off
+    subprocess otherwise. ``readiness`` reports whether every model is warm.
+
+    The same thread supervises the worker: when it dies or is killed after a
+    stuck request, a new one is started after a backoff (restart_backoff,
+    doubling up to restart_backoff_max, reset once a worker is ready), so a
+    single slow request only makes the model unready while it reloads.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[str],
+        image_size: int = 640,
+        project_root: Path = PROJECT_ROOT,
+        restart_backoff: float = 1.0,
+        restart_backoff_max: float = 60.0
+    ):
+        """
+        Args:
+            models: MODEL_SPECS names to keep warm
+            image_size: Inference size for YOLO warm-up and requests
+            project_root: Directory the weights paths are relative to
+            restart_backoff: Seconds before restarting a failed worker the first time
+            restart_backoff_max: Longest wait between restarts
+        """
+        unknown = [name for name in models if name not in MODEL_SPECS]
+        if unknown:
+            raise ValueError(f"Unknown model(s) {', '.join(unknown)}. Choose from: {', '.join(MODEL_SPECS)}")
+        self.models = list(models)
+        self.image_size = image_size
+        self.project_root = project_root
+        self.restart_backoff = restart_backoff
+        self.restart_backoff_max = restart_backoff_max
+        self.started_at: Optional[float] = None
+        self._stopping = threading.Event()
+        self._states: Dict[str, dict] = {name: {"state": "pending"} for name in self.models}
+        self._workers: Dict[str, ModelWorker] = {}
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def start(self):
+        """Begin prefetching and warming every model in the background (idempotent)"""
+        with self._lock:
+            if self.started_at is not None:
+                return
+            self.started_at = time.time()
+            for name in self.models:
+                thread = threading.Thread(target=self._prepare, args=(name,), name=f"{name}-warmup", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _prepare(self, name: str):
+        spec = MODEL_SPECS[name]
+        state = self._states[name]
+        weights = self.project_root / spec["weights"]
+        try:
+            url = os.getenv(spec["url_env"])
+            if url and url != "None":
+                state["state"] = "prefetching"
+                fetched = artifact_cache.fetch(
+                    resolve_download_url(url), weights, sha256=os.getenv(spec["sha256_env"]) or None
+                )
+                state["prefetch"] = fetched["source"]
+            if not weights.exists():
+                state.update(state="unavailable", error=f"Weights not found: {weights} (set {spec['url_env']} to download them)")
+                return
+
+            command = [ml_python(self.project_root), self.project_root / spec["script"], "--serve", weights]
+            command.append(self.project_root / spec["class_names"] if "class_names" in spec else self.image_size)
+            self._supervise(name, command)
+        except Exception as e:
+            state.update(state="failed", error=str(e))
+
+    def _supervise(self, name: str, command: list):
+        """Keep a worker for the model running, restarting it with backoff whenever it dies"""
+        state = self._states[name]
+        state.setdefault("restarts", 0)
+        failures = 0
+        while not self._stopping.is_set():
+            worker = ModelWorker(name, command, cwd=self.project_root)
+            state["state"] = "loading"
+            with self._lock:
+                self._workers[name] = worker
+            if worker.start():
+                failures = 0
+                worker.exited.wait()
+                if self._stopping.is_set():
+                    return
+                error = worker.error or f"{name} worker exited unexpectedly"
+            else:
+                error = worker.error
+            worker.stop()
+
+            failures += 1
+            delay = min(self.restart_backoff_max, self.restart_backoff * 2 ** (failures - 1))
+            with self._lock:
+                self._workers.pop(name, None)
+            state.update(
+                state="restarting", error=error, restarts=state["restarts"] + 1,
+                next_restart_at=time.time() + delay
+            )
+            self._stopping.wait(delay)
+
+    def worker(self, name: str) -> Optional[ModelWorker]:
+        """The warm worker for a model, None if it is not ready"""
+        worker = self._workers.get(name)
+        return worker if worker is not None and worker.state == "ready" else None
+
+    def readiness(self) -> dict:
+        """Per-model load state, and whether every model is warm"""
+        models = {}
+        for name in self.models:
+            worker = self._workers.get(name)
+            models[name] = {**self._states[name], **worker.status()} if worker is not None else dict(self._states[name])
+        return {
+            "ready": self.started_at is not None and all(model["state"] == "ready" for model in models.values()),
+            "started_at": self.started_at,
+            "image_size": self.image_size,
+            "models": models
+        }
+
+    def stop(self):
+        """Kill every worker process and stop restarting them"""
+        self._stopping.set()
+        for worker in list(self._workers.values()):
+            worker.stop()
+
+
+# Warm models for the API, started at application startup
+model_server = ModelServer(
+    models=[name.strip() for name in os.getenv('WARMUP_MODELS', 'yolo').split(',') if name.strip()],
+    image_size=int(os.getenv('YOLO_IMAGE_SIZE', '640'))
+)
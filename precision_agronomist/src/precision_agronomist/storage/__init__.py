@@ -0,0 +1,43 @@
+from precision_agronomist.storage.database import (
+    DEFAULT_DB_PATH, DETECTION_COLUMNS, DUPLICATE_POLICIES, ROLLUP_TABLES,
+    connect, init_database, insert_detections, rebuild_rollups
+)
+from precision_agronomist.storage.hashing import file_content_hash, image_content_hash
+from precision_agronomist.storage.backends import (
+    AnalyticsBackend, SQLiteBackend, DuckDBBackend, open_backend
+)
+from precision_agronomist.storage.spatial import find_overlapping, density_grid
+from precision_agronomist.storage.write_behind import WriteBehindWriter, get_writer, release_writer, close_all
+
+__all__ = [
+    'DEFAULT_DB_PATH',
+    'DETECTION_COLUMNS',
+    'DUPLICATE_POLICIES',
+    'ROLLUP_TABLES',
+    'connect',
+    'init_database',
+    'insert_detections',
+    'rebuild_rollups',
+    'file_content_hash',
+    'image_content_hash',
+    'AnalyticsBackend',
+    'SQLiteBackend',
+    'DuckDBBackend',
+    'open_backend',
+    'export_detections',
+    'read_watermark',
+    'find_overlapping',
+    'density_grid',
+    'WriteBehindWriter',
+    'get_writer',
+    'release_writer',
+    'close_all'
+]
+
+
+def __getattr__(name):
+    # The export helpers need pyarrow; only import it when they are actually used
+    if name in ('export_detections', 'read_watermark'):
+        from precision_agronomist.storage import export
+        return getattr(export, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,149 @@
+from pathlib import Path
+from typing import FrozenSet, List, Sequence
+import sqlite3
+
+from precision_agronomist.storage.database import DEFAULT_DB_PATH, ROLLUP_TABLES, connect
+
+
+class AnalyticsBackend:
+    """
+    Read-only query interface used by the trend analytics
+
+    Queries are written once against ``{detections}`` and ``{window}``
+    placeholders; each backend substitutes the relation that holds detection
+    rows in its store and the predicate selecting a time window. Only SQL
+    understood by both SQLite and DuckDB should be used.
+    """
+
+    name: str = "base"
+    detections_relation: str = "detections"
+    window_predicate: str = "timestamp >= ?"
+    # Whether the store holds the daily rollup tables maintained by init_database
+    has_rollups: bool = False
+    # Which of the ROLLUP_TABLES exist (a database from an older layout has only some)
+    rollup_tables: FrozenSet[str] = frozenset()
+    # Whether "WITH name AS MATERIALIZED (...)" is understood
+    materialized_cte: bool = True
+
+    def query(self, sql: str, params: Sequence = (), **fields) -> List[tuple]:
+        """Run a query template and return all rows (fields fill extra placeholders)"""
+        raise NotImplementedError
+
+    def has_rollup(self, *tables: str) -> bool:
+        """Whether rollups are in use and every named rollup table is present"""
+        return self.has_rollups and set(tables) <= self.rollup_tables
+
+    def render(self, sql: str, **fields) -> str:
+        """Fill in the detections relation, window predicate and any extra fields"""
+        return sql.format(detections=self.detections_relation, window=self.window_predicate, **fields)
+
+    def window_params(self, start_timestamp: str) -> tuple:
+        """Parameters bound to the window predicate"""
+        return (start_timestamp,)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SQLiteBackend(AnalyticsBackend):
+    """Row-store backend reading the live SQLite detection database"""
+
+    name = "sqlite"
+    # AS MATERIALIZED arrived in SQLite 3.35; older libraries reject it as a syntax error
+    materialized_cte = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self._conn = connect(self.db_path)
+        self.rollup_tables = frozenset(
+            row[0] for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'daily_%_stats'"
+            )
+            if row[0] in ROLLUP_TABLES
+        )
+        self.has_rollups = "daily_class_stats" in self.rollup_tables
+
+    def query(self, sql: str, params: Sequence = (), **fields) -> List[tuple]:
+        return self._conn.execute(self.render(sql, **fields), tuple(params)).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+
+class DuckDBBackend(AnalyticsBackend):
+    """
+    Embedded columnar backend for long, multi-season histories
+
+    The source can be either the SQLite database (attached read-only through
+    DuckDB's sqlite extension) or a Parquet archive written by
+    ``export_detections`` (a directory of hive-partitioned files, or a single
+    ``.parquet`` file).
+    """
+
+    name = "duckdb"
+
+    def __init__(self, source=DEFAULT_DB_PATH, threads: int = None):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError(
+                "The DuckDB trend backend requires the 'duckdb' package. "
+                "Install it with: pip install 'precision-agronomist[analytics]'"
+            ) from e
+
+        self.source = Path(source)
+        self._conn = duckdb.connect(database=":memory:")
+        self._conn.execute("SET enable_progress_bar = false")
+        if threads:
+            self._conn.execute(f"SET threads = {int(threads)}")
+
+        if self.source.is_dir() or self.source.suffix == ".parquet":
+            pattern = str(self.source / "**" / "*.parquet") if self.source.is_dir() else str(self.source)
+            pattern = pattern.replace("'", "''")
+            self.detections_relation = f"read_parquet('{pattern}', hive_partitioning = true)"
+            # Filtering on the partition column lets DuckDB skip whole date directories
+            self.window_predicate = "detection_date >= ? AND timestamp >= ?"
+        else:
+            db_file = str(self.source).replace("'", "''")
+            self._conn.execute(f"ATTACH '{db_file}' AS history (TYPE sqlite, READ_ONLY)")
+            self.detections_relation = "history.detections"
+
+    def query(self, sql: str, params: Sequence = (), **fields) -> List[tuple]:
+        return self._conn.execute(self.render(sql, **fields), list(params)).fetchall()
+
+    def window_params(self, start_timestamp: str) -> tuple:
+        if "detection_date" in self.window_predicate:
+            return (start_timestamp[:10], start_timestamp)
+        return (start_timestamp,)
+
+    def close(self):
+        self._conn.close()
+
+
+BACKENDS = {
+    SQLiteBackend.name: SQLiteBackend,
+    DuckDBBackend.name: DuckDBBackend,
+}
+
+
+def open_backend(name: str = "sqlite", source=DEFAULT_DB_PATH) -> AnalyticsBackend:
+    """
+    Create an analytics backend by name
+
+    Args:
+        name: 'sqlite' or 'duckdb'
+        source: SQLite database path, or (duckdb only) a Parquet archive
+
+    Returns:
+        An open AnalyticsBackend
+    """
+    backend_cls = BACKENDS.get(name.lower())
+    if backend_cls is None:
+        raise ValueError(f"Unknown analytics backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return backend_cls(source)
@@ -0,0 +1,713 @@
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+import sqlite3
+
+
+# Default location of the detection history database (relative to the working directory)
+DEFAULT_DB_PATH = Path("precision_agronomist/disease_tracking.db")
+
+# Column order of the row tuples accepted by insert_detections
+DETECTION_COLUMNS = (
+    "session_id", "timestamp", "image_path", "disease_class",
+    "confidence", "bbox_x1", "bbox_y1", "bbox_x2", "bbox_y2", "severity",
+    "image_hash", "farm_id", "field_id"
+)
+
+# What to do when an image (by content hash) is stored again within the same session
+DUPLICATE_POLICIES = ("skip", "upsert")
+
+
+def connect(db_path=DEFAULT_DB_PATH, **kwargs) -> sqlite3.Connection:
+    """
+    Open a connection to the detection history database
+
+    Args:
+        db_path: Path to the SQLite database file
+        **kwargs: Extra keyword arguments passed to sqlite3.connect
+
+    Returns:
+        An open sqlite3 connection
+    """
+    return sqlite3.connect(str(db_path), **kwargs)
+
+
+def init_database(db_path=DEFAULT_DB_PATH):
+    """Create the detection history tables and indexes if they don't exist"""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = connect(db_path)
+    cursor = conn.cursor()
+
+    # Create detections table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS detections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            image_path TEXT NOT NULL,
+            disease_class TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            bbox_x1 REAL,
+            bbox_y1 REAL,
+            bbox_x2 REAL,
+            bbox_y2 REAL,
+            severity TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            image_hash TEXT,
+            farm_id TEXT,
+            field_id TEXT
+        )
+    """)
+    _add_missing_columns(cursor, "detections", {
+        "image_hash": "TEXT",
+        "farm_id": "TEXT",
+        "field_id": "TEXT"
+    })
+
+    # Create sessions table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE NOT NULL,
+            timestamp TEXT NOT NULL,
+            total_images INTEGER,
+            total_detections INTEGER,
+            unique_diseases INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create index for faster queries
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_timestamp
+        ON detections(timestamp)
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_disease_class
+        ON detections(disease_class)
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_image_path
+        ON detections(image_path)
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_session_image_hash
+        ON detections(session_id, image_hash)
+    """)
+
+    # Per-farm windows: the field in the key filters a field without visiting the rows
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_farm_timestamp
+        ON detections(farm_id, timestamp, field_id)
+    """)
+
+    # Known image files: content hash cache keyed by path + size + mtime
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            image_path TEXT UNIQUE NOT NULL,
+            content_hash TEXT,
+            file_size INTEGER,
+            mtime_ns INTEGER
+        )
+    """)
+    _add_missing_columns(cursor, "images", {
+        "content_hash": "TEXT",
+        "file_size": "INTEGER",
+        "mtime_ns": "INTEGER"
+    })
+
+    # One row per image analysis per session; the unique key drives skip/upsert
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analyzed_images (
+            session_id TEXT NOT NULL,
+            image_hash TEXT NOT NULL,
+            image_path TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            UNIQUE (session_id, image_hash)
+        )
+    """)
+
+    # Upserts delete rows and insert replacements under new ids; incremental
+    # exports check this log for replaced rows they had already written
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS detection_replacements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            max_replaced_id INTEGER NOT NULL,
+            replaced_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    _create_spatial_index(cursor)
+    _create_rollups(cursor)
+
+    conn.commit()
+    conn.close()
+
+
+def _create_spatial_index(cursor: sqlite3.Cursor):
+    """
+    Create the R*Tree over detection bounding boxes and the triggers that keep it in sync
+
+    Box coordinates are pixels within a single image, so the tree has a third
+    dimension holding the image id; region queries for one image then only
+    visit that image's boxes. R*Tree coordinates are stored as float32, which
+    cannot represent ids above 2^24 exactly, so the exact id is also kept in
+    the auxiliary image_id column for joins. Skipped if SQLite was built
+    without R*Tree.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detection_boxes'"
+    ).fetchone()
+    if exists:
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(detection_boxes)")}
+        if "image_id" in columns:
+            return
+        # Tree built before image_id existed; rebuild it (and its triggers) from detections
+        for trigger in ("insert", "delete", "update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_detection_boxes_{trigger}")
+        cursor.execute("DROP TABLE detection_boxes")
+
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE detection_boxes USING rtree(
+                id,
+                min_image, max_image,
+                min_x, max_x,
+                min_y, max_y,
+                +disease_class,
+                +image_id
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite compiled without the R*Tree module; spatial queries are unavailable
+        return
+
+    box_values = """
+        NEW.id,
+        (SELECT id FROM images WHERE image_path = NEW.image_path),
+        (SELECT id FROM images WHERE image_path = NEW.image_path),
+        min(NEW.bbox_x1, NEW.bbox_x2), max(NEW.bbox_x1, NEW.bbox_x2),
+        min(NEW.bbox_y1, NEW.bbox_y2), max(NEW.bbox_y1, NEW.bbox_y2),
+        NEW.disease_class,
+        (SELECT id FROM images WHERE image_path = NEW.image_path)
+    """
+    has_box = """
+        NEW.bbox_x1 IS NOT NULL AND NEW.bbox_y1 IS NOT NULL
+        AND NEW.bbox_x2 IS NOT NULL AND NEW.bbox_y2 IS NOT NULL
+    """
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_detection_boxes_insert
+        AFTER INSERT ON detections
+        WHEN {has_box}
+        BEGIN
+            INSERT OR IGNORE INTO images (image_path) VALUES (NEW.image_path);
+            INSERT INTO detection_boxes VALUES ({box_values});
+        END
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_detection_boxes_delete
+        AFTER DELETE ON detections
+        BEGIN
+            DELETE FROM detection_boxes WHERE id = OLD.id;
+        END
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_detection_boxes_update
+        AFTER UPDATE OF bbox_x1, bbox_y1, bbox_x2, bbox_y2, image_path, disease_class ON detections
+        BEGIN
+            DELETE FROM detection_boxes WHERE id = OLD.id;
+            INSERT OR IGNORE INTO images (image_path) SELECT NEW.image_path WHERE {has_box};
+            INSERT INTO detection_boxes SELECT {box_values} WHERE {has_box};
+        END
+    """)
+
+    # Backfill boxes stored before the index existed
+    cursor.execute("""
+        INSERT OR IGNORE INTO images (image_path)
+        SELECT DISTINCT image_path FROM detections
+    """)
+    cursor.execute("""
+        INSERT INTO detection_boxes
+        SELECT
+            d.id, i.id, i.id,
+            min(d.bbox_x1, d.bbox_x2), max(d.bbox_x1, d.bbox_x2),
+            min(d.bbox_y1, d.bbox_y2), max(d.bbox_y1, d.bbox_y2),
+            d.disease_class, i.id
+        FROM detections d
+        JOIN images i ON i.image_path = d.image_path
+        WHERE d.bbox_x1 IS NOT NULL AND d.bbox_y1 IS NOT NULL
+          AND d.bbox_x2 IS NOT NULL AND d.bbox_y2 IS NOT NULL
+    """)
+
+
+# Daily rollups read by the trend analytics, keyed by detection date (YYYY-MM-DD).
+# Severity, farm and field are stored as '' when missing so they can take part
+# in the primary key.
+ROLLUP_TABLES = {
+    # Per day, class and severity: detection count, confidence sum and distinct images
+    "daily_class_stats": """
+        CREATE TABLE IF NOT EXISTS daily_class_stats (
+            detection_date TEXT NOT NULL,
+            disease_class TEXT NOT NULL,
+            severity TEXT NOT NULL DEFAULT '',
+            detection_count INTEGER NOT NULL,
+            sum_confidence REAL NOT NULL,
+            image_count INTEGER NOT NULL,
+            PRIMARY KEY (detection_date, disease_class, severity)
+        ) WITHOUT ROWID
+    """,
+    # Detections per image within a daily_class_stats row; backs the distinct image counts
+    "daily_image_stats": """
+        CREATE TABLE IF NOT EXISTS daily_image_stats (
+            detection_date TEXT NOT NULL,
+            disease_class TEXT NOT NULL,
+            severity TEXT NOT NULL DEFAULT '',
+            image_key TEXT NOT NULL,
+            detections INTEGER NOT NULL,
+            PRIMARY KEY (detection_date, disease_class, severity, image_key)
+        ) WITHOUT ROWID
+    """,
+    # Detections per session and day; backs the distinct session count of a window
+    "daily_session_stats": """
+        CREATE TABLE IF NOT EXISTS daily_session_stats (
+            detection_date TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            detections INTEGER NOT NULL,
+            PRIMARY KEY (detection_date, session_id)
+        ) WITHOUT ROWID
+    """,
+    # Per day, farm and field; backs the farm and field breakdowns
+    "daily_field_stats": """
+        CREATE TABLE IF NOT EXISTS daily_field_stats (
+            detection_date TEXT NOT NULL,
+            farm_id TEXT NOT NULL DEFAULT '',
+            field_id TEXT NOT NULL DEFAULT '',
+            detection_count INTEGER NOT NULL,
+            high_severity_count INTEGER NOT NULL,
+            sum_confidence REAL NOT NULL,
+            PRIMARY KEY (detection_date, farm_id, field_id)
+        ) WITHOUT ROWID
+    """,
+    # daily_class_stats per farm and field, keyed farm first so one farm's window is a single range
+    "daily_field_class_stats": """
+        CREATE TABLE IF NOT EXISTS daily_field_class_stats (
+            farm_id TEXT NOT NULL DEFAULT '',
+            detection_date TEXT NOT NULL,
+            field_id TEXT NOT NULL DEFAULT '',
+            disease_class TEXT NOT NULL,
+            severity TEXT NOT NULL DEFAULT '',
+            detection_count INTEGER NOT NULL,
+            sum_confidence REAL NOT NULL,
+            PRIMARY KEY (farm_id, detection_date, field_id, disease_class, severity)
+        ) WITHOUT ROWID
+    """,
+    # Detections per farm, day, field, session and image; backs a farm's distinct session and image counts
+    "daily_field_image_stats": """
+        CREATE TABLE IF NOT EXISTS daily_field_image_stats (
+            farm_id TEXT NOT NULL DEFAULT '',
+            detection_date TEXT NOT NULL,
+            field_id TEXT NOT NULL DEFAULT '',
+            session_id TEXT NOT NULL,
+            image_key TEXT NOT NULL,
+            detections INTEGER NOT NULL,
+            PRIMARY KEY (farm_id, detection_date, field_id, session_id, image_key)
+        ) WITHOUT ROWID
+    """,
+    # Running totals per class over every day up to and including detection_date,
+    # with a row for each day the class was detected; any window is the
+    # difference of two rows. Live ingest touches only the newest row, but a
+    # back-dated detection updates every later row of its class, O(days)
+    "daily_class_prefix_stats": """
+        CREATE TABLE IF NOT EXISTS daily_class_prefix_stats (
+            disease_class TEXT NOT NULL,
+            detection_date TEXT NOT NULL,
+            cum_count INTEGER NOT NULL,
+            cum_confidence REAL NOT NULL,
+            cum_high INTEGER NOT NULL,
+            cum_moderate INTEGER NOT NULL,
+            cum_low INTEGER NOT NULL,
+            PRIMARY KEY (disease_class, detection_date)
+        ) WITHOUT ROWID
+    """,
+}
+
+# Rollup key expressions of a detection row, with {row} standing for NEW or OLD
+_ROLLUP_KEYS = {
+    "date": "substr({row}.timestamp, 1, 10)",
+    "severity": "COALESCE({row}.severity, '')",
+    "image": "COALESCE({row}.image_hash, {row}.image_path)",
+    "farm": "COALESCE({row}.farm_id, '')",
+    "field": "COALESCE({row}.field_id, '')",
+    "high": "(COALESCE({row}.severity, '') = 'high')",
+}
+
+
+def _rollup_add(row: str) -> str:
+    """Trigger statements adding one detection ({row} = NEW) to the rollups"""
+    date, severity, image, farm, field, high = (expr.format(row=row) for expr in _ROLLUP_KEYS.values())
+    return f"""
+        INSERT INTO daily_image_stats (detection_date, disease_class, severity, image_key, detections)
+        VALUES ({date}, {row}.disease_class, {severity}, {image}, 1)
+        ON CONFLICT (detection_date, disease_class, severity, image_key)
+        DO UPDATE SET detections = detections + 1;
+
+        INSERT INTO daily_class_stats (detection_date, disease_class, severity, detection_count, sum_confidence, image_count)
+        VALUES ({date}, {row}.disease_class, {severity}, 1, {row}.confidence, 1)
+        ON CONFLICT (detection_date, disease_class, severity)
+        DO UPDATE SET
+            detection_count = detection_count + 1,
+            sum_confidence = sum_confidence + excluded.sum_confidence,
+            image_count = image_count + (
+                SELECT detections = 1 FROM daily_image_stats
+                WHERE detection_date = {date} AND disease_class = {row}.disease_class
+                  AND severity = {severity} AND image_key = {image}
+            );
+
+        INSERT OR IGNORE INTO daily_class_prefix_stats
+            (disease_class, detection_date, cum_count, cum_confidence, cum_high, cum_moderate, cum_low)
+        SELECT
+            {row}.disease_class, {date},
+            COALESCE(p.cum_count, 0), COALESCE(p.cum_confidence, 0), COALESCE(p.cum_high, 0),
+            COALESCE(p.cum_moderate, 0), COALESCE(p.cum_low, 0)
+        FROM (SELECT 1) LEFT JOIN (
+            SELECT * FROM daily_class_prefix_stats
+            WHERE disease_class = {row}.disease_class AND detection_date < {date}
+            ORDER BY detection_date DESC LIMIT 1
+        ) p ON 1;
+
+        -- Only today's row for live ingest; back-dated rows also shift the later days
+        UPDATE daily_class_prefix_stats SET
+            cum_count = cum_count + 1,
+            cum_confidence = cum_confidence + {row}.confidence,
+            cum_high = cum_high + ({severity} = 'high'),
+            cum_moderate = cum_moderate + ({severity} = 'moderate'),
+            cum_low = cum_low + ({severity} = 'low')
+        WHERE disease_class = {row}.disease_class AND detection_date >= {date};
+
+        INSERT INTO daily_session_stats (detection_date, session_id, detections)
+        VALUES ({date}, {row}.session_id, 1)
+        ON CONFLICT (detection_date, session_id)
+        DO UPDATE SET detections = detections + 1;
+
+        INSERT INTO daily_field_stats (detection_date, farm_id, field_id, detection_count, high_severity_count, sum_confidence)
+        VALUES ({date}, {farm}, {field}, 1, {high}, {row}.confidence)
+        ON CONFLICT (detection_date, farm_id, field_id)
+        DO UPDATE SET
+            detection_count = detection_count + 1,
+            high_severity_count = high_severity_count + excluded.high_severity_count,
+            sum_confidence = sum_confidence + excluded.sum_confidence;
+
+        INSERT INTO daily_field_class_stats (farm_id, detection_date, field_id, disease_class, severity, detection_count, sum_confidence)
+        VALUES ({farm}, {date}, {field}, {row}.disease_class, {severity}, 1, {row}.confidence)
+        ON CONFLICT (farm_id, detection_date, field_id, disease_class, severity)
+        DO UPDATE SET
+            detection_count = detection_count + 1,
+            sum_confidence = sum_confidence + excluded.sum_confidence;
+
+        INSERT INTO daily_field_image_stats (farm_id, detection_date, field_id, session_id, image_key, detections)
+        VALUES ({farm}, {date}, {field}, {row}.session_id, {image}, 1)
+        ON CONFLICT (farm_id, detection_date, field_id, session_id, image_key)
+        DO UPDATE SET detections = detections + 1;
+    """
+
+
+def _rollup_remove(row: str) -> str:
+    """Trigger statements removing one detection ({row} = OLD) from the rollups"""
+    date, severity, image, farm, field, high = (expr.format(row=row) for expr in _ROLLUP_KEYS.values())
+    image_key = f"""
+        detection_date = {date} AND disease_class = {row}.disease_class
+        AND severity = {severity} AND image_key = {image}
+    """
+    class_key = f"detection_date = {date} AND disease_class = {row}.disease_class AND severity = {severity}"
+    session_key = f"detection_date = {date} AND session_id = {row}.session_id"
+    field_key = f"detection_date = {date} AND farm_id = {farm} AND field_id = {field}"
+    field_class_key = f"{field_key} AND disease_class = {row}.disease_class AND severity = {severity}"
+    field_image_key = f"{field_key} AND session_id = {row}.session_id AND image_key = {image}"
+    return f"""
+        UPDATE daily_image_stats SET detections = detections - 1 WHERE {image_key};
+
+        UPDATE daily_class_stats SET
+            detection_count = detection_count - 1,
+            sum_confidence = sum_confidence - {row}.confidence,
+            image_count = image_count - COALESCE(
+                (SELECT detections <= 0 FROM daily_image_stats WHERE {image_key}), 0
+            )
+        WHERE {class_key};
+
+        UPDATE daily_session_stats SET detections = detections - 1 WHERE {session_key};
+
+        UPDATE daily_class_prefix_stats SET
+            cum_count = cum_count - 1,
+            cum_confidence = cum_confidence - {row}.confidence,
+            cum_high = cum_high - ({severity} = 'high'),
+            cum_moderate = cum_moderate - ({severity} = 'moderate'),
+            cum_low = cum_low - ({severity} = 'low')
+        WHERE disease_class = {row}.disease_class AND detection_date >= {date};
+
+        UPDATE daily_field_stats SET
+            detection_count = detection_count - 1,
+            high_severity_count = high_severity_count - {high},
+            sum_confidence = sum_confidence - {row}.confidence
+        WHERE {field_key};
+
+        UPDATE daily_field_class_stats SET
+            detection_count = detection_count - 1,
+            sum_confidence = sum_confidence - {row}.confidence
+        WHERE {field_class_key};
+
+        UPDATE daily_field_image_stats SET detections = detections - 1 WHERE {field_image_key};
+
+        DELETE FROM daily_image_stats WHERE {image_key} AND detections <= 0;
+        DELETE FROM daily_class_stats WHERE {class_key} AND detection_count <= 0;
+        DELETE FROM daily_class_prefix_stats
+        WHERE disease_class = {row}.disease_class AND detection_date = {date}
+          AND NOT EXISTS (
+              SELECT 1 FROM daily_class_stats WHERE detection_date = {date} AND disease_class = {row}.disease_class
+          );
+        DELETE FROM daily_session_stats WHERE {session_key} AND detections <= 0;
+        DELETE FROM daily_field_stats WHERE {field_key} AND detection_count <= 0;
+        DELETE FROM daily_field_class_stats WHERE {field_class_key} AND detection_count <= 0;
+        DELETE FROM daily_field_image_stats WHERE {field_image_key} AND detections <= 0;
+    """
+
+
+def _create_rollups(cursor: sqlite3.Cursor):
+    """
+    Create the daily rollup tables and the triggers that maintain them
+
+    Triggers on detections apply every insert, delete and update to the
+    rollups inside the same transaction, so the rollups never lag behind the
+    raw rows regardless of which code path wrote them. Tables created for an
+    existing database are backfilled from its detections.
+    """
+    existing = {
+        row[0] for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'daily_%_stats'"
+        )
+    }
+    for ddl in ROLLUP_TABLES.values():
+        cursor.execute(ddl)
+    # One farm's days without walking every farm's
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_daily_field_farm
+        ON daily_field_stats(farm_id, detection_date)
+    """)
+
+    if existing != set(ROLLUP_TABLES):
+        # Triggers from an older layout don't maintain the new tables
+        for event in ("insert", "delete", "update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_rollups_{event}")
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_insert
+        AFTER INSERT ON detections
+        BEGIN
+            {_rollup_add("NEW")}
+        END
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_delete
+        AFTER DELETE ON detections
+        BEGIN
+            {_rollup_remove("OLD")}
+        END
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_update
+        AFTER UPDATE OF session_id, timestamp, image_path, disease_class, confidence, severity, image_hash,
+            farm_id, field_id
+        ON detections
+        BEGIN
+            {_rollup_remove("OLD")}
+            {_rollup_add("NEW")}
+        END
+    """)
+
+    if existing != set(ROLLUP_TABLES):
+        _populate_rollups(cursor)
+
+
+def _populate_rollups(cursor: sqlite3.Cursor):
+    """Replace the rollup contents with aggregates computed from raw detections"""
+    date, severity, image, farm, field, high = (expr.format(row="d") for expr in _ROLLUP_KEYS.values())
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+
+    cursor.execute(f"""
+        INSERT INTO daily_image_stats (detection_date, disease_class, severity, image_key, detections)
+        SELECT {date}, d.disease_class, {severity}, {image}, COUNT(*)
+        FROM detections d
+        GROUP BY 1, 2, 3, 4
+    """)
+    cursor.execute(f"""
+        INSERT INTO daily_class_stats (detection_date, disease_class, severity, detection_count, sum_confidence, image_count)
+        SELECT {date}, d.disease_class, {severity}, COUNT(*), SUM(d.confidence), COUNT(DISTINCT {image})
+        FROM detections d
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute("""
+        INSERT INTO daily_class_prefix_stats
+            (disease_class, detection_date, cum_count, cum_confidence, cum_high, cum_moderate, cum_low)
+        SELECT
+            disease_class, detection_date,
+            SUM(detections) OVER running, SUM(confidence) OVER running, SUM(high) OVER running,
+            SUM(moderate) OVER running, SUM(low) OVER running
+        FROM (
+            SELECT
+                disease_class, detection_date,
+                SUM(detection_count) as detections,
+                SUM(sum_confidence) as confidence,
+                SUM(CASE WHEN severity = 'high' THEN detection_count ELSE 0 END) as high,
+                SUM(CASE WHEN severity = 'moderate' THEN detection_count ELSE 0 END) as moderate,
+                SUM(CASE WHEN severity = 'low' THEN detection_count ELSE 0 END) as low
+            FROM daily_class_stats
+            GROUP BY disease_class, detection_date
+        )
+        WINDOW running AS (PARTITION BY disease_class ORDER BY detection_date)
+    """)
+    cursor.execute(f"""
+        INSERT INTO daily_session_stats (detection_date, session_id, detections)
+        SELECT {date}, d.session_id, COUNT(*)
+        FROM detections d
+        GROUP BY 1, 2
+    """)
+    cursor.execute(f"""
+        INSERT INTO daily_field_stats (detection_date, farm_id, field_id, detection_count, high_severity_count, sum_confidence)
+        SELECT {date}, {farm}, {field}, COUNT(*), SUM({high}), SUM(d.confidence)
+        FROM detections d
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute(f"""
+        INSERT INTO daily_field_class_stats (farm_id, detection_date, field_id, disease_class, severity, detection_count, sum_confidence)
+        SELECT {farm}, {date}, {field}, d.disease_class, {severity}, COUNT(*), SUM(d.confidence)
+        FROM detections d
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+    cursor.execute(f"""
+        INSERT INTO daily_field_image_stats (farm_id, detection_date, field_id, session_id, image_key, detections)
+        SELECT {farm}, {date}, {field}, d.session_id, {image}, COUNT(*)
+        FROM detections d
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+def rebuild_rollups(db_path=DEFAULT_DB_PATH) -> dict:
+    """
+    Regenerate the daily rollup tables from raw detections
+
+    Args:
+        db_path: Path to the SQLite detection database
+
+    Returns:
+        Row count of each rollup table after the rebuild
+    """
+    init_database(db_path)
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            _populate_rollups(conn.cursor())
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ROLLUP_TABLES
+        }
+    finally:
+        conn.close()
+
+
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: dict):
+    """Add columns introduced after a database was first created"""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for column, declaration in columns.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def insert_detections(
+    conn: sqlite3.Connection,
+    rows: Iterable[Sequence],
+    on_duplicate: str = "skip",
+    new_rows: Optional[list] = None
+) -> int:
+    """
+    Insert detection rows on an open connection (the caller owns the transaction)
+
+    Rows sharing a session and image hash are treated as one analysis of that
+    image. If the session already holds an analysis of the same image, it is
+    either kept and the new rows dropped ('skip') or replaced ('upsert').
+    Replacements get new ids and are logged in detection_replacements.
+    Rows without an image hash are always inserted.
+
+    Args:
+        conn: Open connection to the detection database
+        rows: Tuples ordered as DETECTION_COLUMNS; missing trailing columns are stored as NULL
+        on_duplicate: 'skip' or 'upsert'
+        new_rows: If given, extended with the inserted rows that are not
+            replacements of an analysis stored earlier
+
+    Returns:
+        Number of rows inserted
+    """
+    if on_duplicate not in DUPLICATE_POLICIES:
+        raise ValueError(f"on_duplicate must be one of {DUPLICATE_POLICIES}, got '{on_duplicate}'")
+
+    session_idx = DETECTION_COLUMNS.index("session_id")
+    hash_idx = DETECTION_COLUMNS.index("image_hash")
+    path_idx = DETECTION_COLUMNS.index("image_path")
+    timestamp_idx = DETECTION_COLUMNS.index("timestamp")
+
+    # Group rows per (session, image) analysis, preserving arrival order
+    analyses = {}
+    for row in rows:
+        if len(row) < len(DETECTION_COLUMNS):
+            # Rows built for an older column layout (e.g. replayed from a spill file)
+            row = tuple(row) + (None,) * (len(DETECTION_COLUMNS) - len(row))
+        key = (row[session_idx], row[hash_idx]) if row[hash_idx] else None
+        analyses.setdefault(key, []).append(row)
+
+    to_insert = list(analyses.pop(None, []))
+    fresh = list(to_insert)
+    for (session_id, image_hash), image_rows in analyses.items():
+        claimed = conn.execute("""
+            INSERT INTO analyzed_images (session_id, image_hash, image_path, timestamp)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id, image_hash) DO NOTHING
+        """, (session_id, image_hash, image_rows[0][path_idx], image_rows[0][timestamp_idx])).rowcount
+
+        if not claimed:
+            if on_duplicate == "skip":
+                continue
+            conn.execute("""
+                INSERT INTO detection_replacements (max_replaced_id)
+                SELECT MAX(id) FROM detections WHERE session_id = ? AND image_hash = ?
+                HAVING MAX(id) IS NOT NULL
+            """, (session_id, image_hash))
+            conn.execute(
+                "DELETE FROM detections WHERE session_id = ? AND image_hash = ?",
+                (session_id, image_hash)
+            )
+            conn.execute(
+                "UPDATE analyzed_images SET image_path = ?, timestamp = ? WHERE session_id = ? AND image_hash = ?",
+                (image_rows[0][path_idx], image_rows[0][timestamp_idx], session_id, image_hash)
+            )
+        else:
+            fresh.extend(image_rows)
+        to_insert.extend(image_rows)
+
+    conn.executemany(f"""
+        INSERT INTO detections ({', '.join(DETECTION_COLUMNS)})
+        VALUES ({', '.join('?' for _ in DETECTION_COLUMNS)})
+    """, to_insert)
+    if new_rows is not None:
+        new_rows.extend(fresh)
+    return len(to_insert)
@@ -0,0 +1,261 @@
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Sequence
+import json
+import shutil
+import sqlite3
+import uuid
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from precision_agronomist.storage.database import DEFAULT_DB_PATH, connect
+from precision_agronomist.utils.files import replace_file
+
+
+DEFAULT_EXPORT_DIR = Path("precision_agronomist/exports")
+WATERMARK_FILE = "_watermark.json"
+
+# Codecs accepted by each output format (None disables compression)
+SUPPORTED_COMPRESSION: Dict[str, tuple] = {
+    "parquet": ("snappy", "gzip", "brotli", "zstd", "lz4", None),
+    "arrow": ("zstd", "lz4", None),
+}
+
+# Codec used when the caller asks for the format's default
+DEFAULT_COMPRESSION: Dict[str, Optional[str]] = {
+    "parquet": "snappy",
+    "arrow": "zstd",
+}
+
+# Partition columns, in directory order: <date>/<disease_class>/part-*.parquet
+PARTITION_COLUMNS = ["detection_date", "disease_class"]
+
+# A single chunk of a multi-season history can span thousands of date/class partitions
+MAX_PARTITIONS = 100_000
+
+EXPORT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("session_id", pa.string()),
+    ("timestamp", pa.string()),
+    ("image_path", pa.string()),
+    ("confidence", pa.float64()),
+    ("bbox_x1", pa.float64()),
+    ("bbox_y1", pa.float64()),
+    ("bbox_x2", pa.float64()),
+    ("bbox_y2", pa.float64()),
+    ("severity", pa.string()),
+    ("created_at", pa.string()),
+    ("image_hash", pa.string()),
+    ("farm_id", pa.string()),
+    ("field_id", pa.string()),
+    ("detection_date", pa.string()),
+    ("disease_class", pa.string()),
+])
+
+# Columns added by later migrations; databases that predate them export NULLs
+OPTIONAL_COLUMNS = ("created_at", "image_hash", "farm_id", "field_id")
+
+
+def _export_query(conn) -> str:
+    """SELECT matching EXPORT_SCHEMA for the detections table as it is, without migrating it"""
+    present = {row[1] for row in conn.execute("PRAGMA table_info(detections)")}
+    columns = []
+    for field in EXPORT_SCHEMA:
+        if field.name == "detection_date":
+            columns.append("substr(timestamp, 1, 10) AS detection_date")
+        elif field.name in OPTIONAL_COLUMNS and field.name not in present:
+            columns.append(f"NULL AS {field.name}")
+        else:
+            columns.append(field.name)
+    return f"""
+        SELECT {", ".join(columns)}
+        FROM detections
+        WHERE id > ?
+        ORDER BY id
+    """
+
+
+def _read_watermark_state(output_dir) -> dict:
+    watermark_path = Path(output_dir) / WATERMARK_FILE
+    if not watermark_path.exists():
+        return {}
+    with open(watermark_path) as f:
+        return json.load(f)
+
+
+def read_watermark(output_dir=DEFAULT_EXPORT_DIR) -> int:
+    """Return the last exported detection id for an export directory (0 if none)"""
+    return int(_read_watermark_state(output_dir).get("last_id", 0))
+
+
+def _write_watermark(output_dir: Path, last_id: int, rows: int, replacement_seq: int):
+    """Atomically record the highest exported detection id and replacement log position"""
+    payload = json.dumps({
+        "last_id": last_id,
+        "replacement_seq": replacement_seq,
+        "rows_exported": rows,
+        "exported_at": datetime.now().isoformat()
+    }, indent=2).encode("utf-8")
+    replace_file(output_dir / WATERMARK_FILE, lambda f: f.write(payload))
+
+
+def _replacement_seq(conn) -> int:
+    """Position of the newest upsert in detection_replacements (0 if none, or no log yet)"""
+    try:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM detection_replacements").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def _check_no_replacements(conn, state: dict):
+    """Refuse an incremental export when rows it already wrote were replaced since"""
+    last_id = int(state.get("last_id", 0))
+    try:
+        replaced = conn.execute(
+            "SELECT COUNT(*) FROM detection_replacements WHERE id > ? AND max_replaced_id <= ?",
+            (int(state.get("replacement_seq", 0)), last_id)
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return
+    if replaced:
+        raise ValueError(
+            f"{replaced} analysis(es) exported earlier were replaced by upserts since the last export; "
+            "an incremental export would keep the stale rows. Run a full export instead."
+        )
+
+
+def _clear_dataset(output_dir: Path):
+    """Remove the files of a previous export (partition directories, part files, watermark)"""
+    for entry in output_dir.iterdir():
+        if entry.is_dir() and "=" in entry.name:
+            shutil.rmtree(entry)
+        elif entry.is_file() and (entry.name.startswith("part-") or entry.name == WATERMARK_FILE):
+            entry.unlink()
+
+
+def _iter_batches(cursor, chunk_size: int, progress: dict) -> Iterator[pa.RecordBatch]:
+    """Yield Arrow record batches of at most chunk_size rows from an executed cursor"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(col, type=field.type) for col, field in zip(columns, EXPORT_SCHEMA)],
+            schema=EXPORT_SCHEMA
+        )
+        progress["rows"] += len(rows)
+        progress["last_id"] = rows[-1][0]
+        yield batch
+
+
+def export_detections(
+    db_path=DEFAULT_DB_PATH,
+    output_dir=DEFAULT_EXPORT_DIR,
+    file_format: str = "parquet",
+    compression: Optional[str] = "default",
+    chunk_size: int = 50_000,
+    incremental: bool = False,
+    partition_by: Sequence[str] = tuple(PARTITION_COLUMNS)
+) -> dict:
+    """
+    Stream the detections table into a dataset partitioned by date and disease class
+
+    Rows are read with ``fetchmany`` and handed to the Arrow dataset writer one
+    batch at a time, so memory use is bounded by ``chunk_size`` regardless of
+    the size of the history.
+
+    Args:
+        db_path: Path to the SQLite detection database
+        output_dir: Root directory of the exported dataset
+        file_format: 'parquet' or 'arrow' (Arrow IPC files)
+        compression: Codec name, None to disable compression, or 'default'
+            for the format's DEFAULT_COMPRESSION
+        chunk_size: Number of rows fetched from SQLite per batch
+        incremental: Only export rows added since the last export's watermark;
+            otherwise the previous export in output_dir is replaced. Refused
+            (ValueError) when upserts replaced rows the archive already holds
+        partition_by: Hive partition columns (a subset of PARTITION_COLUMNS, or
+            empty for unpartitioned files better suited to long columnar scans)
+
+    Returns:
+        Export summary with row count, id range and output location
+    """
+    if file_format not in SUPPORTED_COMPRESSION:
+        raise ValueError(f"Unsupported export format '{file_format}'. Use 'parquet' or 'arrow'.")
+    if compression == "default":
+        compression = DEFAULT_COMPRESSION[file_format]
+    if compression not in SUPPORTED_COMPRESSION[file_format]:
+        raise ValueError(
+            f"Unsupported compression '{compression}' for {file_format}. "
+            f"Choose from: {SUPPORTED_COMPRESSION[file_format]}"
+        )
+
+    unknown_columns = set(partition_by) - set(PARTITION_COLUMNS)
+    if unknown_columns:
+        raise ValueError(f"Cannot partition by {sorted(unknown_columns)}. Use any of: {PARTITION_COLUMNS}")
+
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"Detection database not found: {db_path}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    dataset_format = ds.ParquetFileFormat() if file_format == "parquet" else ds.IpcFileFormat()
+    write_options = dataset_format.make_write_options(compression=compression)
+
+    # Read-only: exporting never migrates or backfills the database. The Arrow
+    # writer pulls batches from its own thread; the cursor is only ever
+    # consumed by that one reader, so cross-thread use is safe here.
+    conn = connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        replacement_seq = _replacement_seq(conn)
+        if incremental:
+            state = _read_watermark_state(output_dir)
+            _check_no_replacements(conn, state)
+            start_after = int(state.get("last_id", 0))
+        else:
+            # A full export rewrites every row; appending it next to the old parts would duplicate them
+            _clear_dataset(output_dir)
+            start_after = 0
+        progress = {"rows": 0, "last_id": start_after}
+
+        cursor = conn.cursor()
+        cursor.execute(_export_query(conn), (start_after,))
+        reader = pa.RecordBatchReader.from_batches(
+            EXPORT_SCHEMA, _iter_batches(cursor, chunk_size, progress)
+        )
+
+        # Unique file names so incremental exports never overwrite earlier parts
+        export_id = uuid.uuid4().hex[:8]
+        extension = "parquet" if file_format == "parquet" else "arrow"
+        ds.write_dataset(
+            reader,
+            base_dir=str(output_dir),
+            format=dataset_format,
+            file_options=write_options,
+            partitioning=ds.partitioning(
+                pa.schema([EXPORT_SCHEMA.field(name) for name in partition_by]),
+                flavor="hive"
+            ) if partition_by else None,
+            basename_template=f"part-{export_id}-{{i}}.{extension}",
+            max_partitions=MAX_PARTITIONS,
+            existing_data_behavior="overwrite_or_ignore"
+        )
+    finally:
+        conn.close()
+
+    if progress["rows"] > 0 or not incremental:
+        _write_watermark(output_dir, progress["last_id"], progress["rows"], replacement_seq)
+
+    return {
+        "status": "success",
+        "rows_exported": progress["rows"],
+        "previous_watermark": start_after,
+        "last_id": progress["last_id"],
+        "format": file_format,
+        "compression": compression,
+        "output_dir": str(output_dir)
+    }
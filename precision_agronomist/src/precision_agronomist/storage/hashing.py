@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import hashlib
+import sqlite3
+import threading
+
+from precision_agronomist.storage.database import DEFAULT_DB_PATH, connect
+
+
+HASH_CHUNK_SIZE = 1 << 20
+HASH_CACHE_SIZE = 65536
+
+# (resolved path, size, mtime_ns) -> hex digest, least recently used first
+_hash_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_hash_cache_lock = threading.Lock()
+
+
+def file_content_hash(path) -> str:
+    """SHA-256 of a file, read in fixed-size chunks so large images never load whole"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_content_hash(image_path: str, db_path=DEFAULT_DB_PATH) -> Optional[str]:
+    """
+    Content hash identifying an image independently of its path
+
+    Hashes are cached by path + size + mtime: in process, and in the images
+    table of the detection database so later runs skip re-reading unchanged
+    files.
+
+    Args:
+        image_path: Path of the analyzed image, as stored in detections
+        db_path: Path to the SQLite detection database holding the hash cache
+
+    Returns:
+        Hex SHA-256 digest, or None if the image file cannot be read
+    """
+    path = Path(image_path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if not path.is_file():
+        return None
+
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    with _hash_cache_lock:
+        if key in _hash_cache:
+            _hash_cache.move_to_end(key)
+            return _hash_cache[key]
+
+    conn = connect(db_path) if Path(db_path).exists() else None
+    try:
+        content_hash = None
+        if conn is not None:
+            content_hash = _lookup_in_database(conn, image_path, stat.st_size, stat.st_mtime_ns)
+
+        if content_hash is None:
+            content_hash = file_content_hash(path)
+            if conn is not None:
+                _store_in_database(conn, image_path, content_hash, stat.st_size, stat.st_mtime_ns)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    with _hash_cache_lock:
+        _hash_cache[key] = content_hash
+        if len(_hash_cache) > HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    return content_hash
+
+
+def _lookup_in_database(conn: sqlite3.Connection, image_path: str, size: int, mtime_ns: int) -> Optional[str]:
+    try:
+        row = conn.execute(
+            "SELECT content_hash FROM images WHERE image_path = ? AND file_size = ? AND mtime_ns = ?",
+            (image_path, size, mtime_ns)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Database was not initialized with the hash cache columns
+        return None
+    return row[0] if row else None
+
+
+def _store_in_database(conn: sqlite3.Connection, image_path: str, content_hash: str, size: int, mtime_ns: int):
+    try:
+        with conn:
+            conn.execute("""
+                INSERT INTO images (image_path, content_hash, file_size, mtime_ns)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(image_path) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    file_size = excluded.file_size,
+                    mtime_ns = excluded.mtime_ns
+            """, (image_path, content_hash, size, mtime_ns))
+    except sqlite3.OperationalError:
+        # Cache write is best effort (e.g. database busy); the hash is still returned
+        pass
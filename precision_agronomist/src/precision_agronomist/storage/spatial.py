@@ -0,0 +1,166 @@
+from typing import List, Optional, Sequence
+import sqlite3
+
+from precision_agronomist.storage.database import DEFAULT_DB_PATH, connect
+
+
+def _image_filter(conn: sqlite3.Connection, image_path: Optional[str]) -> tuple:
+    """R*Tree predicate (and params) restricting boxes to one image, or to all images
+
+    The min/max_image range lets the tree prune other images; since those
+    coordinates are float32 the exact image_id check removes neighbouring ids
+    that round to the same value.
+    """
+    if image_path is None:
+        return "", ()
+    row = conn.execute("SELECT id FROM images WHERE image_path = ?", (image_path,)).fetchone()
+    image_id = row[0] if row else -1
+    return (
+        " AND b.min_image <= ? AND b.max_image >= ? AND b.image_id = ?",
+        (image_id, image_id, image_id)
+    )
+
+
+def _require_spatial_index(conn: sqlite3.Connection):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detection_boxes'"
+    ).fetchone()
+    if not exists:
+        raise RuntimeError(
+            "Spatial index not available: this SQLite build has no R*Tree support "
+            "or the database was not initialized with init_database()"
+        )
+
+
+def find_overlapping(
+    region: Sequence[float],
+    db_path=DEFAULT_DB_PATH,
+    image_path: Optional[str] = None,
+    disease_class: Optional[str] = None
+) -> List[dict]:
+    """
+    Find detections whose bounding box overlaps a rectangular region
+
+    Args:
+        region: (x1, y1, x2, y2) in image pixel coordinates
+        db_path: Path to the SQLite detection database
+        image_path: Restrict to one image (otherwise boxes from every image match)
+        disease_class: Restrict to one disease class
+
+    Returns:
+        Matching detections with their bounding boxes
+    """
+    x1, y1, x2, y2 = region
+    conn = connect(db_path)
+    try:
+        _require_spatial_index(conn)
+        image_sql, image_params = _image_filter(conn, image_path)
+        class_sql = " AND b.disease_class = ?" if disease_class else ""
+
+        rows = conn.execute(f"""
+            SELECT
+                d.id, d.image_path, d.disease_class, d.confidence, d.severity, d.timestamp,
+                d.bbox_x1, d.bbox_y1, d.bbox_x2, d.bbox_y2
+            FROM detection_boxes b
+            JOIN detections d ON d.id = b.id
+            WHERE b.min_x <= ? AND b.max_x >= ?
+              AND b.min_y <= ? AND b.max_y >= ?
+              {image_sql}{class_sql}
+            ORDER BY d.id
+        """, (
+            max(x1, x2), min(x1, x2), max(y1, y2), min(y1, y2),
+            *image_params, *((disease_class,) if disease_class else ())
+        )).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "id": row[0],
+            "image_path": row[1],
+            "disease_class": row[2],
+            "confidence": row[3],
+            "severity": row[4],
+            "timestamp": row[5],
+            "bbox": {"x1": row[6], "y1": row[7], "x2": row[8], "y2": row[9]}
+        }
+        for row in rows
+    ]
+
+
+def density_grid(
+    cell_size: float = 64.0,
+    db_path=DEFAULT_DB_PATH,
+    image_path: Optional[str] = None,
+    disease_class: Optional[str] = None,
+    region: Optional[Sequence[float]] = None
+) -> List[dict]:
+    """
+    Count lesions per grid cell, per image and per disease class
+
+    Each box is assigned to the cell containing its centre. Alongside the
+    count, the summed box area gives how much of the cell is covered by
+    lesions, and density is expressed as lesions per megapixel of cell area.
+
+    Args:
+        cell_size: Grid cell edge length in pixels
+        db_path: Path to the SQLite detection database
+        image_path: Restrict to one image
+        disease_class: Restrict to one disease class
+        region: Optional (x1, y1, x2, y2) window; only boxes overlapping it are counted
+
+    Returns:
+        One entry per (image, class, cell) with count, lesion_area and density
+    """
+    if cell_size <= 0:
+        raise ValueError("cell_size must be positive")
+
+    conn = connect(db_path)
+    try:
+        _require_spatial_index(conn)
+        image_sql, image_params = _image_filter(conn, image_path)
+        class_sql = " AND b.disease_class = ?" if disease_class else ""
+        class_params = (disease_class,) if disease_class else ()
+        if region is not None:
+            x1, y1, x2, y2 = region
+            region_sql = " AND b.min_x <= ? AND b.max_x >= ? AND b.min_y <= ? AND b.max_y >= ?"
+            region_params = (max(x1, x2), min(x1, x2), max(y1, y2), min(y1, y2))
+        else:
+            region_sql, region_params = "", ()
+
+        rows = conn.execute(f"""
+            SELECT
+                i.image_path,
+                b.disease_class,
+                CAST((b.min_x + b.max_x) / 2 / ? AS INTEGER) AS cell_x,
+                CAST((b.min_y + b.max_y) / 2 / ? AS INTEGER) AS cell_y,
+                COUNT(*) AS lesion_count,
+                SUM((b.max_x - b.min_x) * (b.max_y - b.min_y)) AS lesion_area
+            FROM detection_boxes b
+            JOIN images i ON i.id = b.image_id
+            WHERE 1 = 1 {image_sql}{class_sql}{region_sql}
+            GROUP BY i.image_path, b.disease_class, cell_x, cell_y
+            ORDER BY i.image_path, b.disease_class, cell_y, cell_x
+        """, (cell_size, cell_size, *image_params, *class_params, *region_params)).fetchall()
+    finally:
+        conn.close()
+
+    cell_megapixels = cell_size * cell_size / 1_000_000
+    return [
+        {
+            "image_path": row[0],
+            "disease_class": row[1],
+            "cell": {
+                "col": row[2],
+                "row": row[3],
+                "x1": row[2] * cell_size,
+                "y1": row[3] * cell_size,
+                "x2": (row[2] + 1) * cell_size,
+                "y2": (row[3] + 1) * cell_size
+            },
+            "lesion_count": row[4],
+            "lesion_area": round(row[5], 2),
+            "density_per_megapixel": round(row[4] / cell_megapixels, 2)
+        }
+        for row in rows
+    ]
@@ -0,0 +1,374 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from precision_agronomist.storage.database import (
+    DEFAULT_DB_PATH, DETECTION_COLUMNS, connect, init_database, insert_detections
+)
+
+
+# Queue message kinds handled by the writer thread
+_ROWS = "rows"
+_FLUSH = "flush"
+_STOP = "stop"
+
+# Leading DETECTION_COLUMNS stored NOT NULL
+_REQUIRED_COLUMNS = 5
+
+
+def _validate_rows(rows: List[list]):
+    """Reject rows insert_detections could never store, before they reach the spill file"""
+    for row in rows:
+        if not _REQUIRED_COLUMNS <= len(row) <= len(DETECTION_COLUMNS):
+            raise ValueError(
+                f"Detection row has {len(row)} values, expected "
+                f"{_REQUIRED_COLUMNS} to {len(DETECTION_COLUMNS)} ordered as DETECTION_COLUMNS"
+            )
+        for position, (name, value) in enumerate(zip(DETECTION_COLUMNS, row)):
+            if value is None and position < _REQUIRED_COLUMNS:
+                raise ValueError(f"Detection row is missing required column '{name}'")
+            if value is not None and not isinstance(value, (str, int, float)):
+                raise ValueError(f"Detection column '{name}' must be a string or number, got {type(value).__name__}")
+
+
+class WriteBehindWriter:
+    """
+    Buffers detection rows in memory and writes them from a single background thread
+
+    Rows are committed in batched transactions once ``batch_size`` rows are
+    pending or ``flush_interval_ms`` has passed since the oldest pending row,
+    whichever comes first. Every submitted batch is first appended to a spill
+    file; on startup any spilled batch that never reached the database is
+    replayed, so a crash between submit and commit does not lose rows. The
+    highest committed spill sequence number is stored in the database in the
+    same transaction as the rows, which keeps the replay exactly-once.
+
+    Each submitted batch is inserted as its own unit, so duplicate-image
+    handling (``on_duplicate``) behaves exactly as in a synchronous insert.
+    Commit listeners are called on the writer thread with the newly stored
+    rows once their transaction commits; rows replacing an analysis stored
+    earlier (``on_duplicate='upsert'``) are left out, so listeners count each
+    analysis once.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_DB_PATH,
+        batch_size: int = 500,
+        flush_interval_ms: int = 250,
+        spill_path=None,
+        fsync_spill: bool = False,
+        on_duplicate: str = "skip"
+    ):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.spill_path = Path(spill_path) if spill_path else self.db_path.with_name(self.db_path.name + ".spill")
+        self.fsync_spill = fsync_spill
+        self.on_duplicate = on_duplicate
+
+        self.rows_written = 0
+        self.batches_written = 0
+        self.last_error: Optional[str] = None
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._seq = 0
+        self._committed_seq = 0
+        self._listeners: List[Callable[[list], object]] = []
+
+        init_database(self.db_path)
+        self._recover_spill()
+
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="detection-write-behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add_commit_listener(self, listener: Callable[[list], object]):
+        """Register a callable receiving the rows of each committed batch (registered once)"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def submit(self, rows: Iterable[Sequence]) -> int:
+        """
+        Queue detection rows for a batched write
+
+        Args:
+            rows: Tuples ordered as DETECTION_COLUMNS
+
+        Returns:
+            Number of rows queued
+
+        Raises:
+            ValueError: A row has the wrong length, a missing required column or
+                a value SQLite cannot store; nothing is queued
+        """
+        rows = [list(row) for row in rows]
+        if not rows:
+            return 0
+        _validate_rows(rows)
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write-behind writer is closed")
+            self._seq += 1
+            self._spill.write(json.dumps({"seq": self._seq, "rows": rows}) + "\n")
+            self._spill.flush()
+            if self.fsync_spill:
+                os.fsync(self._spill.fileno())
+            self._queue.put((_ROWS, (self._seq, rows)))
+
+        return len(rows)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every row submitted so far has been committed"""
+        with self._lock:
+            if self._closed:
+                return
+            target_seq = self._seq
+            done = threading.Event()
+            self._queue.put((_FLUSH, done))
+
+        if not done.wait(timeout):
+            raise TimeoutError("Timed out waiting for write-behind flush")
+        if self._committed_seq < target_seq:
+            raise RuntimeError(f"Write-behind flush failed: {self.last_error}")
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """
+        Flush pending rows and stop the writer thread (safe to call more than once)
+
+        Args:
+            timeout: Seconds to wait for the final commit; rows still pending
+                afterwards stay in the spill file for the next start
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            done = threading.Event()
+            self._queue.put((_STOP, done))
+
+        stopped = done.wait(timeout)
+        self._thread.join(timeout)
+        if not stopped or self._thread.is_alive():
+            self.last_error = f"Write-behind writer did not stop within {timeout}s"
+        with self._lock:
+            self._spill.close()
+
+        if self._committed_seq == self._seq:
+            self.spill_path.unlink(missing_ok=True)
+        else:
+            print(
+                f"Warning: {self.last_error}. Uncommitted detections kept in "
+                f"{self.spill_path} and will be replayed on next start."
+            )
+
+    @property
+    def closed(self) -> bool:
+        """True once close() has been called; a closed writer accepts no more rows"""
+        return self._closed
+
+    def pending(self) -> int:
+        """Number of submitted batches not yet committed"""
+        return self._seq - self._committed_seq
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _ensure_state_table(self, conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS write_behind_state (
+                spill_file TEXT PRIMARY KEY,
+                last_seq INTEGER NOT NULL
+            )
+        """)
+
+    def _record_seq(self, conn: sqlite3.Connection, seq: int):
+        conn.execute("""
+            INSERT INTO write_behind_state (spill_file, last_seq) VALUES (?, ?)
+            ON CONFLICT(spill_file) DO UPDATE SET last_seq = excluded.last_seq
+        """, (self.spill_path.name, seq))
+
+    def _recover_spill(self):
+        """Replay spilled batches that were never committed, then start a fresh spill file"""
+        conn = connect(self.db_path)
+        try:
+            with conn:
+                self._ensure_state_table(conn)
+            row = conn.execute(
+                "SELECT last_seq FROM write_behind_state WHERE spill_file = ?",
+                (self.spill_path.name,)
+            ).fetchone()
+            last_committed = row[0] if row else 0
+
+            replay_units = []
+            max_seq = last_committed
+            if self.spill_path.exists():
+                with open(self.spill_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Torn final line from a crash mid-write; the batch never got acknowledged
+                            break
+                        if entry["seq"] > last_committed:
+                            try:
+                                _validate_rows(entry["rows"])
+                            except ValueError as e:
+                                print(f"Warning: skipping spilled batch {entry['seq']} in {self.spill_path}: {e}")
+                                continue
+                            replay_units.append(entry["rows"])
+                        max_seq = max(max_seq, entry["seq"])
+
+            if replay_units:
+                with conn:
+                    recovered = sum(
+                        insert_detections(conn, unit, self.on_duplicate) for unit in replay_units
+                    )
+                    self._record_seq(conn, max_seq)
+                print(f"Recovered {recovered} detection(s) from {self.spill_path}")
+        finally:
+            conn.close()
+
+        self._seq = self._committed_seq = max_seq
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        open(self.spill_path, "w").close()
+
+    def _writer_loop(self):
+        conn = connect(self.db_path, timeout=30)
+        pending = []
+        pending_rows = 0
+        pending_seq = 0
+        deadline = 0.0
+
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic()) if pending else None
+                try:
+                    kind, payload = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    kind, payload = None, None
+
+                if kind == _ROWS:
+                    seq, rows = payload
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.append(rows)
+                    pending_rows += len(rows)
+                    pending_seq = seq
+                    if pending_rows < self.batch_size:
+                        continue
+
+                if pending:
+                    if self._commit(conn, pending, pending_seq):
+                        pending = []
+                        pending_rows = 0
+                    else:
+                        deadline = time.monotonic() + self.flush_interval
+
+                if kind in (_FLUSH, _STOP):
+                    payload.set()
+                if kind == _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, units: list, seq: int) -> bool:
+        """Write the pending batches and their spill sequence number in a single transaction"""
+        written = 0
+        stored_rows = []
+        try:
+            with conn:
+                for unit in units:
+                    written += insert_detections(conn, unit, self.on_duplicate, stored_rows)
+                self._record_seq(conn, seq)
+        except Exception as e:
+            # Anything but a commit leaves the batches pending, and the writer running
+            self.last_error = f"Failed to write {len(units)} buffered batch(es): {e}"
+            return False
+
+        self.rows_written += written
+        self.batches_written += 1
+        self._committed_seq = seq
+
+        # Everything spilled so far is durable in the database; start the spill file over
+        with self._lock:
+            if self._committed_seq == self._seq and not self._spill.closed:
+                self._spill.seek(0)
+                self._spill.truncate()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            if not stored_rows:
+                break
+            try:
+                listener(stored_rows)
+            except Exception as e:
+                # Listeners are advisory; a failing one must not stop the writer
+                print(f"Warning: write-behind commit listener failed: {e}")
+        return True
+
+
+_writers: Dict[Path, WriteBehindWriter] = {}
+_writer_refs: Dict[Path, int] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path=DEFAULT_DB_PATH, **kwargs) -> WriteBehindWriter:
+    """
+    Acquire the shared write-behind writer for a database, starting it if needed
+
+    Every call takes a reference; pair it with release_writer() so the writer
+    is closed once its last user is done with it.
+    """
+    key = Path(db_path).resolve()
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.closed:
+            writer = WriteBehindWriter(db_path, **kwargs)
+            _writers[key] = writer
+            _writer_refs[key] = 0
+        _writer_refs[key] += 1
+        return writer
+
+
+def release_writer(writer: WriteBehindWriter):
+    """Drop a reference taken by get_writer(), closing the writer when it was the last one"""
+    key = writer.db_path.resolve()
+    with _writers_lock:
+        if _writers.get(key) is not writer:
+            # Not (or no longer) shared; the caller owns it outright
+            last = True
+        else:
+            _writer_refs[key] -= 1
+            last = _writer_refs[key] <= 0
+            if last:
+                del _writers[key]
+                del _writer_refs[key]
+    if last:
+        writer.close()
+
+
+def close_all():
+    """Flush and stop every shared write-behind writer"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+        _writer_refs.clear()
+    for writer in writers:
+        writer.close()
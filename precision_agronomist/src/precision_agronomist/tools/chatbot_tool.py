@@ -1,8 +1,14 @@
 from crewai.tools import BaseTool
 from typing import Type, ClassVar, Dict, Any
 from pydantic import BaseModel, Field
+import hashlib
 import json
 
+from precision_agronomist.chat.cache import response_cache
+from precision_agronomist.chat.intents import IntentMatcher, load_class_names
+from precision_agronomist.chat.knowledge_base import KNOWLEDGE_BASE
+from precision_agronomist.chat.retrieval import get_knowledge_index
+
 
 class ChatbotInput(BaseModel):
     """Input schema for farmer chatbot."""
@@ -22,54 +28,16 @@ class FarmerChatbotTool(BaseTool):
     args_schema: Type[BaseModel] = ChatbotInput
     
     # Knowledge base for common questions (ClassVar to prevent Pydantic field creation)
-    KNOWLEDGE_BASE: ClassVar[Dict[str, Any]] = {
-        "apple_scab": {
-            "description": "Fungal disease causing dark, scabby spots on leaves and fruit",
-            "treatment": [
-                "Apply fungicides (captan or mancozeb) during early season",
-                "Remove and destroy infected leaves and fruit",
-                "Prune trees to improve air circulation",
-                "Choose resistant apple varieties"
-            ],
-            "prevention": [
-                "Apply dormant oil spray in spring",
-                "Rake and remove fallen leaves",
-                "Maintain proper tree spacing",
-                "Monitor weather conditions (wet weather favors disease)"
-            ]
-        },
-        "grape_black_rot": {
-            "description": "Fungal disease causing rotted grapes and leaf spots",
-            "treatment": [
-                "Apply fungicides (mancozeb, myclobutanil) at first sign",
-                "Remove infected berries and mummified fruit",
-                "Prune out infected canes",
-                "Improve vineyard sanitation"
-            ],
-            "prevention": [
-                "Remove mummified berries from vines and ground",
-                "Prune for better air circulation",
-                "Apply protective fungicides before rain",
-                "Use resistant grape varieties"
-            ]
-        },
-        "general": {
-            "best_practices": [
-                "Regular monitoring and early detection",
-                "Proper irrigation management",
-                "Crop rotation when applicable",
-                "Maintain good soil health",
-                "Use disease-resistant varieties",
-                "Practice integrated pest management (IPM)"
-            ],
-            "organic_options": [
-                "Neem oil for fungal diseases",
-                "Copper-based fungicides",
-                "Biological controls (beneficial microbes)",
-                "Cultural practices (spacing, pruning, sanitation)"
-            ]
-        }
-    }
+    KNOWLEDGE_BASE: ClassVar[Dict[str, Any]] = KNOWLEDGE_BASE
+
+    # Intent and disease index over KNOWLEDGE_BASE and the detection class names, built once
+    MATCHER: ClassVar[IntentMatcher] = IntentMatcher(KNOWLEDGE_BASE, load_class_names())
+
+    # BM25 score a retrieved passage needs to be shown
+    RETRIEVAL_MIN_SCORE: ClassVar[float] = 2.0
+
+    # Cache version of the knowledge base alone, used if the retrieval index is unavailable
+    KNOWLEDGE_DIGEST: ClassVar[str] = hashlib.sha1(json.dumps(KNOWLEDGE_BASE, sort_keys=True).encode("utf-8")).hexdigest()
 
     def _run(
         self, 
@@ -92,8 +60,13 @@ class FarmerChatbotTool(BaseTool):
             # Normalize question
             question_lower = farmer_question.lower()
             
-            # Determine response based on question content
-            response = self._generate_response(question_lower, context)
+            # Determine response based on question content, reusing answers to the same question
+            cache_key = response_cache.key(farmer_question, language, context)
+            version = self._knowledge_version()
+            response = response_cache.get(cache_key, version)
+            if response is None:
+                response = self._generate_response(question_lower, context)
+                response_cache.put(cache_key, version, response)
             
             # Format response
             formatted_response = {
@@ -119,51 +92,96 @@ class FarmerChatbotTool(BaseTool):
     
     def _generate_response(self, question_lower, context):
         """Generate appropriate response based on question"""
-        
+        match = self.MATCHER.match(question_lower)
+        diseases = match.diseases
+
         # Treatment questions
-        if any(word in question_lower for word in ['treat', 'cure', 'fix', 'remedy']):
-            if 'apple_scab' in question_lower or ('apple' in question_lower and 'scab' in question_lower):
-                return self._format_treatment_advice('apple_scab')
-            elif 'grape' in question_lower and 'black' in question_lower:
-                return self._format_treatment_advice('grape_black_rot')
-            else:
-                return self._format_general_treatment_advice()
-        
+        if match.intent == 'treatment':
+            if diseases:
+                return "\n\n".join(self._format_treatment_advice(disease) for disease in diseases)
+            return self._format_general_treatment_advice() + self._format_retrieved_passages(question_lower)
+
         # Prevention questions
-        elif any(word in question_lower for word in ['prevent', 'avoid', 'stop', 'protect']):
-            if 'apple_scab' in question_lower:
-                return self._format_prevention_advice('apple_scab')
-            elif 'grape' in question_lower:
-                return self._format_prevention_advice('grape_black_rot')
-            else:
-                return self._format_general_prevention_advice()
-        
+        elif match.intent == 'prevention':
+            if diseases:
+                return "\n\n".join(self._format_prevention_advice(disease) for disease in diseases)
+            return self._format_general_prevention_advice() + self._format_retrieved_passages(question_lower)
+
         # Organic farming questions
-        elif 'organic' in question_lower or 'natural' in question_lower:
+        elif match.intent == 'organic':
             return self._format_organic_advice()
-        
+
         # Identification questions
-        elif any(word in question_lower for word in ['what is', 'identify', 'recognize']):
+        elif match.intent == 'identification':
+            if diseases:
+                return "\n\n".join(self._format_disease_overview(disease) for disease in diseases)
             if context:
                 return f"Based on recent detections: {context}\n\nUse the YOLO detection system to automatically identify diseases in your crop images."
+            passages = self._format_retrieved_passages(question_lower)
+            if passages:
+                return passages.lstrip()
             else:
                 return "I can help identify diseases! Upload images of your plants and I'll use AI to detect diseases with high accuracy."
-        
+
         # General advice
-        elif any(word in question_lower for word in ['best practice', 'advice', 'recommendation', 'suggest']):
+        elif match.intent == 'best_practices':
             return self._format_best_practices()
-        
+
         # Cost/economic questions
-        elif any(word in question_lower for word in ['cost', 'price', 'expensive', 'cheap']):
+        elif match.intent == 'economic':
             return self._format_economic_advice()
-        
+
         # Timing questions
-        elif any(word in question_lower for word in ['when', 'timing', 'season']):
+        elif match.intent == 'timing':
             return self._format_timing_advice()
-        
-        # Default response
+
+        # A disease named without a recognised question
+        elif diseases:
+            return "\n\n".join(self._format_disease_overview(disease) for disease in diseases)
+
+        # Default response, unless the knowledge base has something on it
         else:
+            passages = self._format_retrieved_passages(question_lower)
+            if passages:
+                return passages.lstrip()
             return self._format_default_response(question_lower)
+
+    def _knowledge_version(self):
+        """Version of everything answers are built from; cached answers from another version are discarded"""
+        try:
+            return get_knowledge_index(self.KNOWLEDGE_BASE).version()
+        except Exception:
+            return self.KNOWLEDGE_DIGEST
+
+    def _format_retrieved_passages(self, question, k=3):
+        """Best matching knowledge passages, or an empty string if nothing relevant was found"""
+        try:
+            hits = get_knowledge_index(self.KNOWLEDGE_BASE).search(question, k=k, min_score=self.RETRIEVAL_MIN_SCORE)
+        except Exception as e:
+            print(f"Warning: knowledge retrieval failed: {e}")
+            return ""
+        if not hits:
+            return ""
+
+        response = "\n\n**From the knowledge base:**\n"
+        for i, hit in enumerate(hits, 1):
+            response += f"{i}. *{hit['title']}* — {hit['text']}\n"
+        return response
+
+    def _format_disease_overview(self, disease):
+        """Description with treatment and prevention for a specific disease"""
+        info = self.KNOWLEDGE_BASE.get(disease, {})
+
+        response = f"**{disease.replace('_', ' ').title()}:**\n\n"
+        response += f"*Description:* {info.get('description', 'Plant disease')}\n\n"
+        response += "**Treatment:**\n"
+        for i, treatment in enumerate(info.get('treatment', []), 1):
+            response += f"{i}. {treatment}\n"
+        response += "\n**Prevention:**\n"
+        for i, tip in enumerate(info.get('prevention', []), 1):
+            response += f"{i}. {tip}\n"
+
+        return response
     
     def _format_treatment_advice(self, disease):
         """Format treatment advice for specific disease"""
@@ -1,11 +1,17 @@
 from crewai.tools import BaseTool
-from typing import Type, List, Dict
+from typing import Type, List, Dict, Optional
 from pydantic import BaseModel, Field, PrivateAttr
 import json
+import os
 from pathlib import Path
 from datetime import datetime
 import sqlite3
 
+from precision_agronomist.analytics.outbreak import OutbreakDetector, describe_event, get_detector
+from precision_agronomist.storage.database import DEFAULT_DB_PATH, init_database, insert_detections
+from precision_agronomist.storage.hashing import image_content_hash
+from precision_agronomist.storage.write_behind import WriteBehindWriter, get_writer, release_writer
+
 
 class DetectionStorageInput(BaseModel):
     """Input schema for storing detection results."""
@@ -13,6 +19,8 @@ class DetectionStorageInput(BaseModel):
     image_path: str = Field(..., description="Path to the analyzed image")
     detections: str = Field(..., description="JSON string of detection results")
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat(), description="Detection timestamp")
+    farm_id: Optional[str] = Field(default=None, description="Farm the image was taken on")
+    field_id: Optional[str] = Field(default=None, description="Field (or plot) within the farm")
 
 
 class DatabaseStorageTool(BaseTool):
@@ -24,72 +32,47 @@ class DatabaseStorageTool(BaseTool):
     )
     args_schema: Type[BaseModel] = DetectionStorageInput
     
+    # Write-behind mode: queue detections and commit them in batches from a background thread
+    write_behind: bool = Field(
+        default_factory=lambda: os.getenv('DETECTION_WRITE_BEHIND', 'false').lower() == 'true'
+    )
+    write_batch_size: int = 500
+    write_flush_interval_ms: int = 250
+    
+    # Re-analysis of the same image (by content hash) within a session: 'skip' or 'upsert'
+    duplicate_policy: str = 'skip'
+    
+    # Run the streaming outbreak detector on every stored batch
+    detect_outbreaks: bool = Field(
+        default_factory=lambda: os.getenv('OUTBREAK_DETECTION', 'true').lower() == 'true'
+    )
+    
     # Use PrivateAttr for instance attributes that aren't model fields
     _db_path: Path = PrivateAttr(default=None)
+    _writer: WriteBehindWriter = PrivateAttr(default=None)
+    _detector: OutbreakDetector = PrivateAttr(default=None)
     
-    def __init__(self, **kwargs):
+    def __init__(self, db_path=DEFAULT_DB_PATH, **kwargs):
         super().__init__(**kwargs)
-        self._db_path = Path("precision_agronomist/disease_tracking.db")
+        self._db_path = Path(db_path)
         self._init_database()
+        if self.detect_outbreaks:
+            # Warm-start from history now, before this tool inserts anything, so
+            # no batch is counted both in the baseline and by observe()
+            self._detector = get_detector(self._db_path)
     
     def _init_database(self):
         """Initialize SQLite database with required tables"""
-        self._db_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        conn = sqlite3.connect(self._db_path)
-        cursor = conn.cursor()
-        
-        # Create detections table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS detections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                image_path TEXT NOT NULL,
-                disease_class TEXT NOT NULL,
-                confidence REAL NOT NULL,
-                bbox_x1 REAL,
-                bbox_y1 REAL,
-                bbox_x2 REAL,
-                bbox_y2 REAL,
-                severity TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create sessions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT UNIQUE NOT NULL,
-                timestamp TEXT NOT NULL,
-                total_images INTEGER,
-                total_detections INTEGER,
-                unique_diseases INTEGER,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create index for faster queries
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_timestamp 
-            ON detections(timestamp)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_disease_class 
-            ON detections(disease_class)
-        """)
-        
-        conn.commit()
-        conn.close()
+        init_database(self._db_path)
 
     def _run(
         self, 
         session_id: str,
         image_path: str,
         detections: str,
-        timestamp: str = None
+        timestamp: str = None,
+        farm_id: Optional[str] = None,
+        field_id: Optional[str] = None
     ) -> str:
         """
         Store detection results in database
@@ -99,6 +82,8 @@ class DatabaseStorageTool(BaseTool):
             image_path: Path to analyzed image
             detections: JSON string with detection results
             timestamp: Detection timestamp (auto-generated if not provided)
+            farm_id: Farm identifier, for per-farm trends
+            field_id: Field identifier within the farm
             
         Returns:
             Status message with storage confirmation
@@ -110,11 +95,10 @@ class DatabaseStorageTool(BaseTool):
             # Parse detections JSON
             detection_data = json.loads(detections)
             
-            conn = sqlite3.connect(self._db_path)
-            cursor = conn.cursor()
+            # Identify the image by content so re-analyzed copies can be deduplicated
+            image_hash = image_content_hash(image_path, self._db_path)
             
-            # Store each detection
-            stored_count = 0
+            rows = []
             for detection in detection_data.get('detections', []):
                 # Determine severity based on confidence and disease type
                 severity = self._calculate_severity(
@@ -122,12 +106,7 @@ class DatabaseStorageTool(BaseTool):
                     detection['confidence']
                 )
                 
-                cursor.execute("""
-                    INSERT INTO detections (
-                        session_id, timestamp, image_path, disease_class,
-                        confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2, severity
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+                rows.append((
                     session_id,
                     timestamp,
                     image_path,
@@ -137,23 +116,86 @@ class DatabaseStorageTool(BaseTool):
                     detection['bbox'].get('y1'),
                     detection['bbox'].get('x2'),
                     detection['bbox'].get('y2'),
-                    severity
+                    severity,
+                    image_hash,
+                    farm_id,
+                    field_id
                 ))
-                stored_count += 1
             
+            if self.write_behind:
+                # Outbreak checks run from the writer's commit listener once rows are stored
+                queued_count = self._get_writer().submit(rows)
+                return (
+                    f"✅ Queued {queued_count} detection(s) for batched storage\n"
+                    f"📊 Session: {session_id}\n"
+                    f"🖼️ Image: {Path(image_path).name}\n"
+                    f"💾 Database: {self._db_path}"
+                )
+            
+            conn = sqlite3.connect(self._db_path)
+            new_rows = []
+            stored_count = insert_detections(conn, rows, self.duplicate_policy, new_rows)
             conn.commit()
             conn.close()
             
+            if rows and stored_count == 0:
+                return (
+                    f"ℹ️ Skipped {len(rows)} detection(s): image already analyzed in this session\n"
+                    f"📊 Session: {session_id}\n"
+                    f"🖼️ Image: {Path(image_path).name}"
+                )
+            
             return (
                 f"✅ Stored {stored_count} detection(s) in database\n"
                 f"📊 Session: {session_id}\n"
                 f"🖼️ Image: {Path(image_path).name}\n"
                 f"💾 Database: {self._db_path}"
-            )
+            ) + self._check_outbreaks(new_rows)
             
         except Exception as e:
             return f"⚠️ Failed to store detections: {str(e)}"
     
+    def _check_outbreaks(self, rows) -> str:
+        """Feed newly stored rows (not upsert replacements) to the outbreak detector and describe any signal raised"""
+        if self._detector is None or not rows:
+            return ""
+        try:
+            events = self._detector.observe(rows)
+        except Exception as e:
+            # Detection is advisory; never fail the storage call over it
+            return f"\n⚠️ Outbreak check failed: {e}"
+        return "".join(f"\n🚨 {describe_event(event)}" for event in events)
+    
+    def flush(self):
+        """Block until all queued detections are committed (no-op without write-behind)"""
+        if self._writer is not None:
+            self._writer.flush()
+    
+    def close(self):
+        """Flush queued detections and release the shared writer (stopped when no other tool uses it)"""
+        if self._writer is not None:
+            self._writer.flush()
+            release_writer(self._writer)
+            self._writer = None
+    
+    def _get_writer(self) -> WriteBehindWriter:
+        """Shared write-behind writer for this tool's database"""
+        if self._writer is not None and self._writer.closed:
+            # Closed underneath us (close_all at shutdown); drop our stale reference
+            release_writer(self._writer)
+            self._writer = None
+        if self._writer is None:
+            self._writer = get_writer(
+                self._db_path,
+                batch_size=self.write_batch_size,
+                flush_interval_ms=self.write_flush_interval_ms,
+                on_duplicate=self.duplicate_policy
+            )
+            if self._detector is not None:
+                # Events go to the detector's sinks; the writer thread has no caller to report to
+                self._writer.add_commit_listener(self._detector.observe)
+        return self._writer
+    
     def _calculate_severity(self, disease_class: str, confidence: float) -> str:
         """Calculate severity based on disease type and confidence"""
         # Diseases get severity, healthy plants are low
@@ -1,11 +1,22 @@
 from crewai.tools import BaseTool
-from typing import Type
+from typing import Type, List
 from pydantic import BaseModel, Field
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from functools import lru_cache
+import hashlib
 import os
+import time
+
+from precision_agronomist.alerts.dispatcher import alert_dispatcher
+from precision_agronomist.alerts.queue import alert_queue
+from precision_agronomist.chat.intents import IntentMatcher, load_class_names
+from precision_agronomist.chat.knowledge_base import KNOWLEDGE_BASE
+
+
+@lru_cache(maxsize=1)
+def _disease_matcher() -> IntentMatcher:
+    """Index of disease and detection class names, for naming the diseases in a summary"""
+    return IntentMatcher(KNOWLEDGE_BASE, load_class_names())
 
 
 class EmailAlertInput(BaseModel):
@@ -14,6 +25,10 @@ class EmailAlertInput(BaseModel):
     severity_level: str = Field(..., description="Severity level: low, moderate, high, critical")
     num_detections: int = Field(..., description="Total number of disease detections")
     affected_images: int = Field(..., description="Number of images with diseases")
+    diseases: str = Field(
+        default="",
+        description="Comma-separated disease class names the alert is about (read from the summary if empty)"
+    )
 
 
 class EmailAlertTool(BaseTool):
@@ -21,7 +36,9 @@ class EmailAlertTool(BaseTool):
     description: str = (
         "Sends email alerts to farmers/agronomists when high-severity plant diseases "
         "are detected. Only sends alerts for 'high' or 'critical' severity levels. "
-        "Includes disease summary, affected image count, and urgency level."
+        "Includes disease summary, affected image count, and urgency level. "
+        "Repeat alerts about the same disease are suppressed for a while and "
+        "queued alerts are sent together as one digest email."
     )
     args_schema: Type[BaseModel] = EmailAlertInput
 
@@ -30,16 +47,26 @@ class EmailAlertTool(BaseTool):
         disease_summary: str, 
         severity_level: str,
         num_detections: int,
-        affected_images: int
+        affected_images: int,
+        diseases: str = ""
     ) -> str:
         """
-        Send email alert for high-severity disease detections
+        Queue an email alert for high-severity disease detections
+
+        Recipients (FARMER_EMAIL, comma-separated) already alerted about the
+        same diseases within ALERT_DEDUP_HOURS are skipped unless severity
+        went up. Returns as soon as the alert is queued: the background
+        dispatcher sends it once ALERT_DIGEST_MINUTES have passed since the
+        oldest queued alert (critical alerts go out immediately), one digest
+        per recipient over a single SMTP session, retrying failed deliveries
+        with exponential backoff. Delivery status is in GET /alerts.
         
         Args:
             disease_summary: Summary of detected diseases
             severity_level: Severity (low, moderate, high, critical)
             num_detections: Total detections
             affected_images: Number of affected images
+            diseases: Comma-separated disease names (taken from the summary if empty)
             
         Returns:
             Status message
@@ -51,149 +78,49 @@ class EmailAlertTool(BaseTool):
             
             # Get email configuration from environment variables
             # In production, set these in your environment or .env file
-            sender_email = os.getenv('ALERT_SENDER_EMAIL', 'precision.agronomist@example.com')
-            sender_password = os.getenv('ALERT_SENDER_PASSWORD', '')
-            recipient_email = os.getenv('FARMER_EMAIL', 'farmer@example.com')
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', '587'))
+            recipients = [
+                email.strip() for email in os.getenv('FARMER_EMAIL', 'farmer@example.com').split(',') if email.strip()
+            ]
+            disease_keys = self._disease_keys(diseases, disease_summary)
             
-            # For demo purposes, if no credentials, just log the alert
-            if not sender_password:
-                alert_message = self._format_alert_message(
-                    disease_summary, severity_level, num_detections, affected_images
-                )
-                print("\n" + "="*60)
-                print("📧 EMAIL ALERT (Demo Mode - No credentials configured)")
-                print("="*60)
-                print(alert_message)
-                print("="*60 + "\n")
-                
+            outcome = alert_queue.enqueue(
+                recipients, disease_keys, severity_level, disease_summary, num_detections, affected_images
+            )
+            if not outcome["queued"]:
                 return (
-                    f"✅ Alert generated for {severity_level} severity!\n"
-                    f"📧 To: {recipient_email}\n"
-                    f"📝 Detections: {num_detections} diseases in {affected_images} images\n"
-                    f"⚙️ Configure ALERT_SENDER_EMAIL and ALERT_SENDER_PASSWORD environment variables to send real emails"
+                    f"ℹ️ Alert suppressed: {', '.join(recipients)} already alerted about "
+                    f"{', '.join(disease_keys)} in the last {alert_queue.dedup_window / 3600:g} hours"
                 )
             
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["Subject"] = f"🚨 URGENT: {severity_level.upper()} Severity Plant Disease Alert"
-            message["From"] = sender_email
-            message["To"] = recipient_email
+            # Delivery happens in the background; the crew does not wait on the mail server
+            alert_dispatcher.wake()
             
-            # Create email body
-            email_body = self._format_email_html(
-                disease_summary, severity_level, num_detections, affected_images
-            )
-            
-            html_part = MIMEText(email_body, "html")
-            message.attach(html_part)
-            
-            # Send email
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.sendmail(sender_email, recipient_email, message.as_string())
-            
-            return (
-                f"✅ Email alert sent successfully!\n"
-                f"📧 To: {recipient_email}\n"
+            status = (
+                f"✅ Email alert queued for delivery!\n"
+                f"📧 To: {', '.join(outcome['queued'])}\n"
                 f"🚨 Severity: {severity_level.upper()}\n"
                 f"📝 {num_detections} diseases detected in {affected_images} images"
             )
+            next_digest = alert_queue.next_digest_at()
+            if severity_level.lower() != 'critical' and next_digest and next_digest > time.time():
+                status += f"\n📬 Sent with the next digest ({datetime.fromtimestamp(next_digest).strftime('%Y-%m-%d %H:%M')})"
+            if outcome["suppressed"]:
+                status += f"\nℹ️ Not re-alerted (recently notified): {', '.join(outcome['suppressed'])}"
+            if not os.getenv('ALERT_SENDER_PASSWORD') and not os.getenv('SMTP_SERVER'):
+                status += "\n⚙️ Configure ALERT_SENDER_EMAIL and ALERT_SENDER_PASSWORD environment variables to send real emails"
+            return status
             
         except Exception as e:
-            return f"⚠️ Failed to send email alert: {str(e)}\n(Alert logged locally for manual review)"
+            return f"⚠️ Failed to queue email alert: {str(e)}"
     
-    def _format_alert_message(self, disease_summary, severity_level, num_detections, affected_images):
-        """Format alert message for console/log"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        return f"""
-🚨 PLANT DISEASE ALERT - {severity_level.upper()} SEVERITY
-
-Timestamp: {timestamp}
-Affected Images: {affected_images}
-Total Detections: {num_detections}
-
-Disease Summary:
-{disease_summary}
-
-⚠️ IMMEDIATE ACTION REQUIRED
-This alert requires urgent attention to prevent crop loss.
-
-Recommended Actions:
-1. Inspect affected areas immediately
-2. Isolate infected plants if possible
-3. Apply appropriate treatments
-4. Monitor spread closely
-
-View full report: plant_disease_report.md
-View annotated images: artifacts/yolo_detection/predictions/crew_results/
-"""
-    
-    def _format_email_html(self, disease_summary, severity_level, num_detections, affected_images):
-        """Format HTML email body"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        severity_color = "red" if severity_level.lower() == "critical" else "orange"
-        
-        return f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .header {{ background-color: {severity_color}; color: white; padding: 20px; text-align: center; }}
-        .content {{ padding: 20px; }}
-        .alert-box {{ background-color: #fff3cd; border-left: 4px solid {severity_color}; padding: 15px; margin: 20px 0; }}
-        .stats {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-        .actions {{ background-color: #e7f3ff; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-        ul {{ padding-left: 20px; }}
-        .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🚨 PLANT DISEASE ALERT</h1>
-        <h2>{severity_level.upper()} SEVERITY</h2>
-    </div>
-    
-    <div class="content">
-        <div class="alert-box">
-            <strong>⚠️ Immediate Action Required</strong><br>
-            High-severity plant diseases have been detected in your crops.
-        </div>
-        
-        <div class="stats">
-            <h3>Detection Summary</h3>
-            <p><strong>Timestamp:</strong> {timestamp}</p>
-            <p><strong>Affected Images:</strong> {affected_images}</p>
-            <p><strong>Total Detections:</strong> {num_detections}</p>
-            <hr>
-            <p><strong>Diseases Found:</strong></p>
-            <p>{disease_summary}</p>
-        </div>
-        
-        <div class="actions">
-            <h3>🎯 Recommended Actions</h3>
-            <ul>
-                <li>Inspect affected areas immediately</li>
-                <li>Isolate infected plants if possible</li>
-                <li>Apply appropriate fungicides or treatments</li>
-                <li>Monitor disease spread closely over next 48-72 hours</li>
-                <li>Consider consulting with a plant pathologist</li>
-            </ul>
-        </div>
-        
-        <p><strong>📊 Full Report:</strong> Check plant_disease_report.md for detailed analysis</p>
-        <p><strong>🖼️ Visual Evidence:</strong> Review annotated images in predictions folder</p>
-    </div>
-    
-    <div class="footer">
-        <p>Precision Agronomist AI System</p>
-        <p>Automated Plant Disease Detection & Monitoring</p>
-    </div>
-</body>
-</html>
-"""
-
+    @staticmethod
+    def _disease_keys(diseases: str, disease_summary: str) -> List[str]:
+        """Dedup keys: the given diseases, else those named in the summary, else the summary itself"""
+        keys = [disease.strip() for disease in diseases.split(',') if disease.strip()]
+        if keys:
+            return keys
+        match = _disease_matcher().match(disease_summary)
+        keys = list(match.classes or match.diseases)
+        if keys:
+            return keys
+        return ["summary:" + hashlib.sha1(" ".join(disease_summary.lower().split()).encode("utf-8")).hexdigest()[:16]]
@@ -5,6 +5,8 @@ import subprocess
 import json
 from pathlib import Path
 
+from precision_agronomist.models.serving import model_server
+
 class ImageClassifierInput(BaseModel):
     """Input schema for ImageClassifier."""
     image_path: str = Field(..., description="Absolute path to the image to classify")
@@ -21,7 +23,11 @@ class ImageClassifierTool(BaseTool):
 
     def _run(self, image_path: str) -> str:
         """
-        Classify plant disease using ResNet50 via subprocess
+        Classify plant disease using ResNet50 via the warm model worker, or a subprocess
+        
+        The API keeps the model loaded in a worker process once it is
+        warm (see models.serving); until then, or if the worker fails,
+        each call runs the prediction script in its own process.
         
         Args:
             image_path: Path to input image (absolute path)
@@ -62,6 +68,13 @@ class ImageClassifierTool(BaseTool):
                     "status": "failed"
                 })
             
+            worker = model_server.worker("classifier")
+            if worker is not None:
+                try:
+                    return json.dumps(worker.predict({"image": image_path}), indent=2)
+                except Exception as e:
+                    print(f"Warning: warm classifier worker failed ({e}), running a one-off subprocess")
+            
             # Run classification in subprocess using ML environment Python
             # Use ml_env with Python 3.12 (TensorFlow compatible)
             ml_python = project_root / "ml_env" / "Scripts" / "python.exe"
@@ -1,5 +1,5 @@
 from crewai.tools import BaseTool
-from typing import Type
+from typing import Optional, Type
 from pydantic import BaseModel, Field
 from pathlib import Path
 import random
@@ -20,6 +20,14 @@ class ImageLoaderInput(BaseModel):
         default=True,
         description="Randomly select images or use first N"
     )
+    farm_id: Optional[str] = Field(
+        default=None,
+        description="Farm the images come from, passed on to storage"
+    )
+    field_id: Optional[str] = Field(
+        default=None,
+        description="Field (or plot) within the farm, passed on to storage"
+    )
 
 
 class ImageLoaderTool(BaseTool):
@@ -34,7 +42,9 @@ class ImageLoaderTool(BaseTool):
         self, 
         test_dir: str = "data/test", 
         num_images: int = 5,
-        random_selection: bool = True
+        random_selection: bool = True,
+        farm_id: Optional[str] = None,
+        field_id: Optional[str] = None
     ) -> str:
         """
         Load test images for prediction
@@ -43,6 +53,8 @@ class ImageLoaderTool(BaseTool):
             test_dir: Directory with test images (relative to project root)
             num_images: How many images to load
             random_selection: Random or sequential selection
+            farm_id: Farm identifier echoed in the result
+            field_id: Field identifier echoed in the result
             
         Returns:
             List of image paths as JSON string
@@ -85,7 +97,9 @@ class ImageLoaderTool(BaseTool):
                 "test_directory": str(test_path),
                 "total_images_available": len(all_images),
                 "selected_count": len(selected_images),
-                "selected_images": selected_images
+                "selected_images": selected_images,
+                "farm_id": farm_id,
+                "field_id": field_id
             }
             
             return json.dumps(result, indent=2)
@@ -1,15 +1,16 @@
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-import gdown
-import os
 from pathlib import Path
 
+from precision_agronomist.models.artifacts import artifact_cache, resolve_download_url
+
 
 class ModelDownloaderInput(BaseModel):
     """Input schema for ModelDownloader."""
-    google_drive_url: str = Field(..., description="Google Drive URL or file ID for the model file")
+    google_drive_url: str = Field(..., description="Google Drive URL or file ID for the model file (or a plain https URL)")
     destination_path: str = Field(..., description="Local path to save the downloaded model")
+    sha256: str = Field(default="", description="Expected SHA-256 of the model file, verified after download (optional)")
 
 
 class ModelDownloaderTool(BaseTool):
@@ -17,18 +18,25 @@ class ModelDownloaderTool(BaseTool):
     description: str = (
         "Downloads trained model artifacts from Google Drive. "
         "Use this to download ResNet50 classification models and YOLOv8 detection models "
-        "before running predictions. Provide either full Google Drive URL or just the file ID."
+        "before running predictions. Provide either full Google Drive URL or just the file ID. "
+        "Models already downloaded are reused from the local model cache without network access."
     )
     args_schema: Type[BaseModel] = ModelDownloaderInput
 
-    def _run(self, google_drive_url: str, destination_path: str) -> str:
+    def _run(self, google_drive_url: str, destination_path: str, sha256: str = "") -> str:
         """
-        Download model from Google Drive
-        
+        Download model from Google Drive through the model artifact cache
+
+        Files are stored by SHA-256 in the model cache (MODEL_CACHE_DIR);
+        a repeat request for the same URL reuses the cached file, and an
+        interrupted download resumes where it stopped. The destination is
+        only replaced once the whole file is verified.
+
         Args:
             google_drive_url: Full Google Drive URL or file ID
             destination_path: Where to save the file (relative to project root)
-        
+            sha256: Expected SHA-256 of the file (optional)
+
         Returns:
             Success message with file path
         """
@@ -36,33 +44,18 @@ class ModelDownloaderTool(BaseTool):
             # Get absolute path relative to project root
             project_root = Path(__file__).parent.parent.parent.parent.parent
             dest_path = project_root / destination_path
-            
-            # Create destination directory if it doesn't exist
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Extract file ID from URL if full URL provided
-            if 'drive.google.com' in google_drive_url:
-                if '/d/' in google_drive_url:
-                    file_id = google_drive_url.split('/d/')[-1].split('/')[0]
-                elif 'id=' in google_drive_url:
-                    file_id = google_drive_url.split('id=')[-1].split('&')[0]
-                else:
-                    file_id = google_drive_url
-                url = f'https://drive.google.com/uc?id={file_id}'
-            else:
-                # Assume it's already a file ID
-                url = f'https://drive.google.com/uc?id={google_drive_url}'
-            
-            # Download the file
-            print(f"Downloading from Google Drive to {dest_path}...")
-            gdown.download(url, str(dest_path), quiet=False, fuzzy=True)
-            
-            if dest_path.exists():
-                size_mb = dest_path.stat().st_size / (1024 * 1024)
-                return f"✓ Successfully downloaded model to {dest_path} ({size_mb:.2f} MB)"
-            else:
-                return f"✗ Failed to download model to {dest_path}"
-                
+
+            url = resolve_download_url(google_drive_url.strip())
+            print(f"Fetching model to {dest_path}...")
+            result = artifact_cache.fetch(url, dest_path, sha256=sha256.strip() or None)
+
+            size_mb = result["size"] / (1024 * 1024)
+            if result["source"] == "installed":
+                return f"✓ Model already up to date at {dest_path} ({size_mb:.2f} MB, sha256 {result['sha256'][:12]}) - no download needed"
+            if result["source"] == "cache":
+                return f"✓ Restored model to {dest_path} from the local model cache ({size_mb:.2f} MB, sha256 {result['sha256'][:12]})"
+            resumed = f", resumed {result['resumes']} time(s)" if result["resumes"] else ""
+            return f"✓ Successfully downloaded model to {dest_path} ({size_mb:.2f} MB, sha256 {result['sha256'][:12]}{resumed})"
+
         except Exception as e:
             return f"✗ Error downloading model: {str(e)}"
-
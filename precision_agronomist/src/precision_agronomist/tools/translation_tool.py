@@ -1,15 +1,26 @@
 from crewai.tools import BaseTool
-from typing import Type, ClassVar, Dict
+from typing import Type, ClassVar, Dict, Optional
 from pydantic import BaseModel, Field
-from deep_translator import GoogleTranslator
 import json
 
+from precision_agronomist.translation.backends import get_translation_backend
+from precision_agronomist.translation.glossary import Glossary, default_glossary
+from precision_agronomist.translation.pipeline import translate_document
+
 
 class TranslationInput(BaseModel):
     """Input schema for translation."""
     text: str = Field(..., description="Text to translate")
     target_language: str = Field(..., description="Target language code (e.g., 'es' for Spanish, 'hi' for Hindi, 'fr' for French)")
     source_language: str = Field(default='auto', description="Source language code (default: auto-detect)")
+    backend: Optional[str] = Field(
+        default=None,
+        description="Translation backend: 'google' (online), 'offline' (local phrasebook) or 'marian' (local model); defaults to the TRANSLATION_BACKEND setting"
+    )
+    protected_terms: str = Field(
+        default="",
+        description="Comma-separated extra terms to keep untranslated; disease names are always kept"
+    )
 
 
 class TranslationTool(BaseTool):
@@ -49,15 +60,27 @@ class TranslationTool(BaseTool):
         self, 
         text: str,
         target_language: str,
-        source_language: str = 'auto'
+        source_language: str = 'auto',
+        backend: Optional[str] = None,
+        protected_terms: str = ""
     ) -> str:
         """
-        Translate text to target language using deep-translator
+        Translate text to target language with the configured backend
+
+        Text is translated segment by segment (sentences and table cells,
+        without Markdown markers; code blocks stay as they are). Disease names
+        and protected_terms are masked so they come back unchanged. Segments in
+        the translation memory are reused and the rest are sent to the
+        translator concurrently, so a long report takes about as long as its
+        slowest segment. Segments that keep failing, or that the backend has
+        no translation for, stay untranslated and the status is "partial".
         
         Args:
             text: Text to translate
             target_language: Target language code
             source_language: Source language (auto-detect if not specified)
+            backend: Translation backend name (TRANSLATION_BACKEND, then 'google', if not specified)
+            protected_terms: Comma-separated terms to keep as written, besides the disease names
             
         Returns:
             Translated text as JSON with metadata
@@ -67,9 +90,19 @@ class TranslationTool(BaseTool):
             if target_language.lower() in ['zh-cn', 'zh_cn']:
                 target_language = 'zh-CN'
             
-            # Perform translation using GoogleTranslator from deep-translator
-            translator = GoogleTranslator(source=source_language, target=target_language)
-            translated_text = translator.translate(text)
+            translator = get_translation_backend(backend)
+            glossary = default_glossary()
+            extra_terms = [term for term in protected_terms.split(",") if term.strip()]
+            if extra_terms:
+                glossary = Glossary(glossary.terms + extra_terms)
+
+            # Translate segment by segment: memory first, then the backend
+            # concurrently for the segments never seen before
+            outcome = translate_document(text, translator, source_language, target_language, glossary=glossary)
+            segments = outcome["segments"]
+            if segments["failed"] and not segments["translated"] and not segments["from_memory"]:
+                raise RuntimeError(outcome["error"])
+            translated_text = outcome["translated_text"]
             
             # Get language names
             target_lang_name = self.SUPPORTED_LANGUAGES.get(
@@ -78,11 +111,13 @@ class TranslationTool(BaseTool):
             )
             
             result = {
-                "status": "success",
+                "status": "partial" if segments["failed"] or segments["untranslated"] else "success",
                 "original_text": text[:100] + "..." if len(text) > 100 else text,
                 "translated_text": translated_text,
                 "source_language": source_language if source_language != 'auto' else 'auto-detected',
                 "target_language": target_lang_name,
+                "backend": translator.name,
+                "segments": segments,
                 "confidence": "high"
             }
             
@@ -93,7 +128,7 @@ class TranslationTool(BaseTool):
                 "status": "error",
                 "message": f"Translation failed: {str(e)}",
                 "original_text": text[:100] + "..." if len(text) > 100 else text,
-                "suggestion": "Check target language code or internet connection. Supported codes: es, hi, fr, pt, zh-CN, ar, bn, de, ja, etc."
+                "suggestion": "Check target language code or internet connection (TRANSLATION_BACKEND=offline works without one). Supported codes: es, hi, fr, pt, zh-CN, ar, bn, de, ja, etc."
             }
             return json.dumps(error_result, indent=2)
     
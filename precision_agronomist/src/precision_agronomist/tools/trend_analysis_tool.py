@@ -1,16 +1,57 @@
 from crewai.tools import BaseTool
-from typing import Type
-from pydantic import BaseModel, Field
-import sqlite3
+from typing import Optional, Type
+from pydantic import BaseModel, Field, PrivateAttr
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
+import os
+import numpy as np
+
+from precision_agronomist.analytics.cache import data_versions, trend_cache
+from precision_agronomist.analytics.forecast import forecast_outbreaks
+from precision_agronomist.analytics.timeseries import class_trend_statistics, daily_matrix, week_over_week
+from precision_agronomist.analytics.trends import query_field_breakdown, query_trend_aggregates, query_window_totals
+from precision_agronomist.storage.backends import open_backend
+from precision_agronomist.storage.database import DEFAULT_DB_PATH, init_database
+
+
+# Z-score of a class's latest 7-day average above which it is reported as spiking
+SPIKE_ZSCORE = 2.0
 
 
 class TrendAnalysisInput(BaseModel):
     """Input schema for trend analysis."""
     time_period_days: int = Field(default=30, description="Number of days to analyze (default: 30)")
     disease_focus: str = Field(default="all", description="Specific disease to focus on, or 'all' for overall trends")
+    distinct_images: bool = Field(
+        default=False,
+        description="Count distinct images instead of raw detections (ignores the same image stored in several sessions)"
+    )
+    forecast: bool = Field(
+        default=False,
+        description="Also forecast detections per disease for the next 7 and 14 days, with 95% intervals (covers every farm)"
+    )
+    farm_id: Optional[str] = Field(default=None, description="Only analyze detections from this farm")
+    field_id: Optional[str] = Field(default=None, description="Only analyze detections from this field")
+    breakdown: bool = Field(
+        default=False,
+        description="Also list detections per farm, or per field when farm_id is given"
+    )
+    start_date: Optional[str] = Field(
+        default=None,
+        description="First day to analyze (YYYY-MM-DD); overrides time_period_days"
+    )
+    end_date: Optional[str] = Field(
+        default=None,
+        description="Last day to analyze (YYYY-MM-DD, inclusive; default: today)"
+    )
+    windows: Optional[str] = Field(
+        default=None,
+        description=(
+            "Extra windows to total per disease, comma-separated: a number of days ending at "
+            "end_date (e.g. '7,14,30,90') or a range 'YYYY-MM-DD..YYYY-MM-DD'"
+        )
+    )
 
 
 class TrendAnalysisTool(BaseTool):
@@ -22,10 +63,43 @@ class TrendAnalysisTool(BaseTool):
     )
     args_schema: Type[BaseModel] = TrendAnalysisInput
     
+    # Analytics backend: 'sqlite' (default) or 'duckdb' for columnar scans over long histories
+    backend: str = Field(default_factory=lambda: os.getenv('TREND_BACKEND', 'sqlite'))
+    
+    # Reuse results until the detection data changes (shared process-wide cache)
+    use_cache: bool = Field(
+        default_factory=lambda: os.getenv('TREND_CACHE', 'true').lower() == 'true'
+    )
+    
+    # SQLite database, or (duckdb only) a Parquet archive produced by export_detections
+    _db_path: Path = PrivateAttr(default=None)
+    _schema_checked: bool = PrivateAttr(default=False)
+    
+    def __init__(self, db_path=DEFAULT_DB_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self._db_path = Path(db_path)
+    
+    def _migrate_database(self):
+        """Bring a database from an older layout up to date (farm columns, rollups) once per tool"""
+        if self._schema_checked:
+            return
+        # A Parquet archive (duckdb backend) has no schema to migrate
+        if self._db_path.is_file() and self._db_path.suffix != ".parquet":
+            init_database(self._db_path)
+        self._schema_checked = True
+    
     def _run(
         self, 
         time_period_days: int = 30,
-        disease_focus: str = "all"
+        disease_focus: str = "all",
+        distinct_images: bool = False,
+        forecast: bool = False,
+        farm_id: Optional[str] = None,
+        field_id: Optional[str] = None,
+        breakdown: bool = False,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        windows: Optional[str] = None
     ) -> str:
         """
         Analyze disease trends over specified time period
@@ -33,93 +107,131 @@ class TrendAnalysisTool(BaseTool):
         Args:
             time_period_days: Number of days to analyze
             disease_focus: Specific disease or 'all'
+            distinct_images: Count distinct images rather than raw detection rows
+            forecast: Add per-disease 7- and 14-day forecasts
+            farm_id: Restrict the analysis to one farm
+            field_id: Restrict the analysis to one field
+            breakdown: Add detections grouped by farm (or by field within farm_id)
+            start_date: First day of the window (YYYY-MM-DD), instead of time_period_days
+            end_date: Last day of the window (YYYY-MM-DD, inclusive)
+            windows: Comma-separated extra windows ('7,30' or 'YYYY-MM-DD..YYYY-MM-DD')
             
         Returns:
             Trend analysis report as JSON string
         """
         try:
-            db_path = Path("precision_agronomist/disease_tracking.db")
-            
-            if not db_path.exists():
+            if not self._db_path.exists():
                 return json.dumps({
                     "status": "no_data",
                     "message": "No historical data available yet. Run detection sessions to build trend history.",
                     "suggestion": "Continue monitoring to establish baseline data for trend analysis."
                 })
             
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Calculate date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=time_period_days)
-            
-            # Get overall statistics
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_detections,
-                    COUNT(DISTINCT session_id) as total_sessions,
-                    COUNT(DISTINCT image_path) as total_images,
-                    COUNT(DISTINCT disease_class) as unique_diseases
-                FROM detections
-                WHERE timestamp >= ?
-            """, (start_date.isoformat(),))
+            self._migrate_database()
             
-            overall_stats = cursor.fetchone()
+            # Calculate date range: the last time_period_days whole days up to today (or
+            # end_date), or explicit days. Day-aligned so the rollup and raw paths agree.
+            now = datetime.now()
+            last_day = date.fromisoformat(end_date) if end_date else now.date()
+            end_timestamp = (last_day + timedelta(days=1)).isoformat() if end_date else None
+            if start_date:
+                start_timestamp = date.fromisoformat(start_date).isoformat()
+            else:
+                start_timestamp = (last_day - timedelta(days=time_period_days - 1)).isoformat()
+            first_day = date.fromisoformat(start_timestamp[:10])
+            if first_day > last_day:
+                raise ValueError(f"start_date {first_day} is after end_date {last_day}")
+            period = (last_day - first_day).days + 1 if start_date else time_period_days
+            extra_windows = _parse_windows(windows, last_day) if windows else []
             
-            # Get disease frequency
-            cursor.execute("""
-                SELECT 
-                    disease_class,
-                    COUNT(*) as frequency,
-                    AVG(confidence) as avg_confidence,
-                    COUNT(CASE WHEN severity = 'high' THEN 1 END) as high_severity_count
-                FROM detections
-                WHERE timestamp >= ?
-                GROUP BY disease_class
-                ORDER BY frequency DESC
-            """, (start_date.isoformat(),))
+            # Same window, focus and day as an earlier run on unchanged data: reuse its result
+            if self.use_cache:
+                cache_key = (
+                    str(self._db_path.resolve()), self.backend, time_period_days,
+                    disease_focus, distinct_images, forecast, farm_id, field_id, breakdown,
+                    start_date, end_date, windows, now.date().isoformat()
+                )
+                version = data_versions.version(self._db_path)
+                cached = trend_cache.get(cache_key, version)
+                if cached is not None:
+                    return cached
             
-            disease_frequency = cursor.fetchall()
+            # Overall stats, disease frequency, daily trends and severity distribution
+            with open_backend(self.backend, self._db_path) as backend:
+                aggregates = query_trend_aggregates(
+                    backend, start_timestamp, distinct_images,
+                    farm_id=farm_id, field_id=field_id, end_timestamp=end_timestamp
+                )
+                
+                # Farm or field totals from the per-field daily rollup
+                breakdown_rows = query_field_breakdown(
+                    backend, start_timestamp, farm_id, end_timestamp
+                ) if breakdown else None
+                
+                # Per-class totals of every extra window from the running totals
+                window_rows = query_window_totals(backend, extra_windows, farm_id, field_id, distinct_images)
+                
+                # Holt-Winters per class, updated incrementally from the cached fit
+                forecasts = forecast_outbreaks(backend, self._db_path, now.date()) if forecast else None
             
-            # Get weekly trends
-            cursor.execute("""
-                SELECT 
-                    date(timestamp) as detection_date,
-                    COUNT(*) as daily_detections,
-                    COUNT(DISTINCT disease_class) as diseases_per_day
-                FROM detections
-                WHERE timestamp >= ?
-                GROUP BY date(timestamp)
-                ORDER BY detection_date
-            """, (start_date.isoformat(),))
-            
-            daily_trends = cursor.fetchall()
+            # Analyze trends
+            analysis = self._generate_trend_analysis(
+                aggregates["overall_stats"],
+                aggregates["disease_frequency"],
+                aggregates["daily_trends"],
+                aggregates["severity_distribution"],
+                period,
+                aggregates["daily_class_trends"],
+                first_day,
+                last_day
+            )
+            analysis["analysis_period"].update(start_date=first_day.isoformat(), end_date=last_day.isoformat())
             
-            # Get severity distribution
-            cursor.execute("""
-                SELECT 
-                    severity,
-                    COUNT(*) as count
-                FROM detections
-                WHERE timestamp >= ?
-                GROUP BY severity
-            """, (start_date.isoformat(),))
+            if farm_id is not None or field_id is not None:
+                analysis["scope"] = {"farm_id": farm_id, "field_id": field_id}
             
-            severity_dist = cursor.fetchall()
+            if breakdown_rows is not None:
+                analysis["breakdown"] = [
+                    {
+                        "farm_id": row[0],
+                        **({"field_id": row[1]} if farm_id is not None else {}),
+                        "detections": row[2],
+                        "high_severity_count": row[3],
+                        "avg_confidence": round(row[4], 3),
+                        "active_days": row[5]
+                    }
+                    for row in breakdown_rows
+                ]
             
-            conn.close()
+            if extra_windows:
+                analysis["windows"] = [
+                    {
+                        "start_date": window_start,
+                        "end_date": window_end,
+                        "days": (date.fromisoformat(window_end) - date.fromisoformat(window_start)).days + 1,
+                        "total_detections": sum(row[1] for row in rows),
+                        "diseases": [
+                            {
+                                "disease": row[0],
+                                "detections": row[1],
+                                "avg_confidence": round(row[2] / row[1], 3),
+                                "high_severity_count": row[3],
+                                "moderate_severity_count": row[4],
+                                "low_severity_count": row[5]
+                            }
+                            for row in rows
+                        ]
+                    }
+                    for (window_start, window_end), rows in zip(extra_windows, window_rows)
+                ]
             
-            # Analyze trends
-            analysis = self._generate_trend_analysis(
-                overall_stats,
-                disease_frequency,
-                daily_trends,
-                severity_dist,
-                time_period_days
-            )
+            if forecasts is not None:
+                analysis["forecast"] = forecasts
             
-            return json.dumps(analysis, indent=2)
+            result = json.dumps(analysis, indent=2)
+            if self.use_cache:
+                trend_cache.put(cache_key, version, result)
+            return result
             
         except Exception as e:
             return json.dumps({
@@ -127,38 +239,47 @@ class TrendAnalysisTool(BaseTool):
                 "message": f"Trend analysis failed: {str(e)}"
             })
     
-    def _generate_trend_analysis(self, overall_stats, disease_freq, daily_trends, severity_dist, period):
+    def _generate_trend_analysis(
+        self, overall_stats, disease_freq, daily_trends, severity_dist, period,
+        daily_class_trends, start_date, end_date
+    ):
         """Generate comprehensive trend analysis"""
         
         total_detections, total_sessions, total_images, unique_diseases = overall_stats
         
+        # Per-class moving averages over a dense calendar (days without detections count as zero)
+        class_stats = {
+            record["disease_class"]: record
+            for record in class_trend_statistics(daily_class_trends, start_date, end_date)
+        }
+        
         # Calculate trends
-        disease_list = [
-            {
+        disease_list = []
+        for row in disease_freq:
+            stats = class_stats.get(row[0])
+            disease_list.append({
                 "disease": row[0],
                 "frequency": row[1],
                 "avg_confidence": round(row[2], 3),
-                "high_severity_count": row[3]
-            }
-            for row in disease_freq
-        ]
+                "high_severity_count": row[3],
+                "weekly_change_percent": _finite_or_none(stats["change_percent"]) if stats is not None else None,
+                "zscore": _finite_or_none(stats["zscore"]) if stats is not None else None
+            })
         
         # Identify most concerning disease
         most_frequent = disease_list[0] if disease_list else None
         
-        # Calculate detection rate trends
-        if len(daily_trends) > 7:
-            recent_week = daily_trends[-7:]
-            previous_week = daily_trends[-14:-7] if len(daily_trends) >= 14 else daily_trends[:7]
-            
-            recent_avg = sum(row[1] for row in recent_week) / len(recent_week)
-            previous_avg = sum(row[1] for row in previous_week) / len(previous_week) if previous_week else recent_avg
-            
-            trend_direction = "increasing" if recent_avg > previous_avg else "decreasing" if recent_avg < previous_avg else "stable"
-            change_percent = ((recent_avg - previous_avg) / previous_avg * 100) if previous_avg > 0 else 0
-        else:
+        # Calculate detection rate trends: last 7 calendar days against the 7 before
+        _, _, daily_counts = daily_matrix(
+            ((row[0], "all", row[1]) for row in daily_trends), start_date, end_date
+        )
+        recent_avg, previous_avg, delta, change = week_over_week(daily_counts.sum(axis=0))
+        if np.isnan(delta):
             trend_direction = "insufficient_data"
             change_percent = 0
+        else:
+            trend_direction = "increasing" if delta > 0 else "decreasing" if delta < 0 else "stable"
+            change_percent = float(change)
         
         # Generate insights
         insights = []
@@ -166,6 +287,13 @@ class TrendAnalysisTool(BaseTool):
         if most_frequent and 'healthy' not in most_frequent['disease'].lower():
             insights.append(f"⚠️ {most_frequent['disease']} is the most frequently detected disease ({most_frequent['frequency']} times)")
         
+        for disease in disease_list:
+            if 'healthy' not in disease['disease'].lower() and (disease['zscore'] or 0) >= SPIKE_ZSCORE:
+                insights.append(
+                    f"⚡ {disease['disease']} is spiking: its 7-day average is {disease['zscore']:.1f} "
+                    f"standard deviations above normal for this period"
+                )
+        
         if trend_direction == "increasing":
             insights.append(f"📈 Disease detections are INCREASING by {abs(change_percent):.1f}% (requires attention)")
         elif trend_direction == "decreasing":
@@ -214,3 +342,32 @@ class TrendAnalysisTool(BaseTool):
             "data_quality": "good" if total_sessions >= 10 else "building_baseline"
         }
 
+
+def _parse_windows(spec: str, last_day: date) -> list:
+    """
+    Parse a comma-separated window list into (first_day, last_day) ISO date pairs
+
+    Each item is either a number of days ending at last_day or an explicit
+    inclusive 'YYYY-MM-DD..YYYY-MM-DD' range.
+    """
+    windows = []
+    for item in (part.strip() for part in spec.split(",")):
+        if not item:
+            continue
+        if ".." in item:
+            first, last = (date.fromisoformat(bound.strip()) for bound in item.split("..", 1))
+        else:
+            days = int(item)
+            if days < 1:
+                raise ValueError(f"Window length must be at least one day, got {days}")
+            first, last = last_day - timedelta(days=days - 1), last_day
+        if first > last:
+            raise ValueError(f"Window {item} starts after it ends")
+        windows.append((first.isoformat(), last.isoformat()))
+    return windows
+
+
+def _finite_or_none(value):
+    """Round a statistic for the JSON report, mapping NaN to None"""
+    return round(float(value), 2) if np.isfinite(value) else None
+
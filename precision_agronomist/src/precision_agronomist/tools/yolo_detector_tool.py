@@ -5,6 +5,8 @@ import subprocess
 import json
 from pathlib import Path
 
+from precision_agronomist.models.serving import model_server
+
 
 class YOLODetectorInput(BaseModel):
     """Input schema for YOLODetector."""
@@ -30,7 +32,11 @@ class YOLODetectorTool(BaseTool):
         conf_threshold: float = 0.25
     ) -> str:
         """
-        Detect plant diseases using YOLOv8 via subprocess
+        Detect plant diseases using YOLOv8 via the warm model worker, or a subprocess
+        
+        The API keeps the model loaded in a worker process once it is
+        warm (see models.serving); until then, or if the worker fails,
+        each call runs the prediction script in its own process.
         
         Args:
             image_path: Path to input image (absolute path)
@@ -63,6 +69,13 @@ class YOLODetectorTool(BaseTool):
                     "status": "failed"
                 })
             
+            worker = model_server.worker("yolo")
+            if worker is not None:
+                try:
+                    return json.dumps(worker.predict({"image": image_path, "conf": conf_threshold}), indent=2)
+                except Exception as e:
+                    print(f"Warning: warm YOLO worker failed ({e}), running a one-off subprocess")
+            
             # Run detection in subprocess using ML environment Python
             # Use ml_env with Python 3.12 (TensorFlow/YOLO compatible)
             ml_python = project_root / "ml_env" / "Scripts" / "python.exe"
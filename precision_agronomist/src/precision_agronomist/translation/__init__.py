@@ -0,0 +1,32 @@
+from precision_agronomist.translation.backends import (
+    GoogleBackend,
+    MarianBackend,
+    PhrasebookBackend,
+    TRANSLATION_BACKENDS,
+    TranslationBackend,
+    get_translation_backend
+)
+from precision_agronomist.translation.glossary import Glossary, default_glossary
+from precision_agronomist.translation.memory import TranslationMemory, segment_hash, translation_memory
+from precision_agronomist.translation.pipeline import RateLimiter, translate_document, translation_rate_limiter
+from precision_agronomist.translation.segments import MAX_SEGMENT_CHARS, join_segments, split_segments
+
+__all__ = [
+    'GoogleBackend',
+    'MarianBackend',
+    'PhrasebookBackend',
+    'TRANSLATION_BACKENDS',
+    'TranslationBackend',
+    'get_translation_backend',
+    'Glossary',
+    'default_glossary',
+    'TranslationMemory',
+    'segment_hash',
+    'translation_memory',
+    'RateLimiter',
+    'translate_document',
+    'translation_rate_limiter',
+    'MAX_SEGMENT_CHARS',
+    'join_segments',
+    'split_segments'
+]
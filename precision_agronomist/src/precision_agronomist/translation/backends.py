@@ -0,0 +1,176 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import json
+import os
+import threading
+
+
+class TranslationBackend:
+    """
+    Interface of the machine translation providers used by TranslationTool
+
+    Backends translate batches of segments so providers with per-call
+    overhead (HTTP round trips, model invocations) can amortize it;
+    ``batch_size`` is how many segments the pipeline groups into one call.
+    A None result means the backend has no translation for that segment:
+    the segment stays in the source language and is not remembered.
+    """
+
+    name: str = "base"
+    batch_size: int = 1
+
+    def translate_batch(self, segments: Sequence[str], source_language: str, target_language: str) -> List[Optional[str]]:
+        """Translations of segments, in order"""
+        raise NotImplementedError
+
+    def translate(self, segment: str, source_language: str, target_language: str) -> Optional[str]:
+        return self.translate_batch([segment], source_language, target_language)[0]
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate through deep-translator (needs network access)"""
+
+    name = "google"
+    # One HTTP request per segment; the pipeline runs them concurrently instead
+    batch_size = 1
+
+    def translate_batch(self, segments, source_language, target_language):
+        from deep_translator import GoogleTranslator
+
+        translator = GoogleTranslator(source=source_language, target=target_language)
+        return [translator.translate(segment) or None for segment in segments]
+
+
+class PhrasebookBackend(TranslationBackend):
+    """
+    Deterministic offline backend backed by a phrasebook file
+
+    The phrasebook is JSON mapping target language -> {source phrase:
+    translation}; segments are looked up exactly, ignoring case and
+    surrounding whitespace. Anything not in it is left untranslated. Meant
+    for tests and air-gapped farms, where it serves a curated set of report
+    phrases without any network or model.
+    """
+
+    name = "offline"
+    batch_size = 256
+
+    def __init__(self, phrasebook_path=None):
+        """
+        Args:
+            phrasebook_path: JSON phrasebook (defaults to the TRANSLATION_PHRASEBOOK env var)
+        """
+        path = phrasebook_path or os.getenv("TRANSLATION_PHRASEBOOK")
+        self.phrases: Dict[str, Dict[str, str]] = {}
+        if path and Path(path).exists():
+            for language, phrases in json.loads(Path(path).read_text(encoding="utf-8")).items():
+                self.add_phrases(language, phrases)
+
+    def add_phrases(self, target_language: str, phrases: Dict[str, str]):
+        table = self.phrases.setdefault(target_language.lower(), {})
+        table.update({source.strip().lower(): translation for source, translation in phrases.items()})
+
+    def translate_batch(self, segments, source_language, target_language):
+        table = self.phrases.get(target_language.lower(), {})
+        return [table.get(segment.strip().lower()) for segment in segments]
+
+
+class MarianBackend(TranslationBackend):
+    """
+    Local neural translation with Helsinki-NLP MarianMT models (optional)
+
+    Requires the ``transformers`` and ``sentencepiece`` packages; models are
+    downloaded once per language pair (or read from TRANSLATION_MODEL_DIR)
+    and kept loaded. Each batch is a single padded generate() call. The
+    source language must be given, since the model is chosen per pair.
+    """
+
+    name = "marian"
+    batch_size = 16
+    # Source positions of the opus-mt models; longer input would be truncated
+    max_tokens = 512
+
+    def __init__(self, model_dir=None):
+        """
+        Args:
+            model_dir: Directory holding opus-mt-{source}-{target} models (defaults to TRANSLATION_MODEL_DIR)
+        """
+        try:
+            import transformers  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "The 'marian' translation backend needs transformers and sentencepiece. "
+                "Install them with: pip install transformers sentencepiece torch"
+            ) from e
+        self.model_dir = model_dir or os.getenv("TRANSLATION_MODEL_DIR")
+        self._models: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, source_language: str, target_language: str):
+        from transformers import MarianMTModel, MarianTokenizer
+
+        if source_language == "auto":
+            raise ValueError("The 'marian' backend needs an explicit source language")
+        pair = (source_language.lower(), target_language.lower())
+        with self._lock:
+            if pair not in self._models:
+                name = f"opus-mt-{pair[0]}-{pair[1]}"
+                location = str(Path(self.model_dir) / name) if self.model_dir else f"Helsinki-NLP/{name}"
+                self._models[pair] = (MarianTokenizer.from_pretrained(location), MarianMTModel.from_pretrained(location))
+            return self._models[pair]
+
+    def _fit(self, tokenizer, segment: str) -> List[str]:
+        """Split a segment between words into chunks that fit the model's input, end-of-sequence included"""
+        limit = min(self.max_tokens, tokenizer.model_max_length) - 1
+        if len(tokenizer.tokenize(segment)) <= limit:
+            return [segment]
+        chunks, words, used = [], [], 0
+        for word in segment.split():
+            cost = len(tokenizer.tokenize(word))
+            if words and used + cost > limit:
+                chunks.append(" ".join(words))
+                words, used = [], 0
+            words.append(word)
+            used += cost
+        if words:
+            chunks.append(" ".join(words))
+        return chunks
+
+    def translate_batch(self, segments, source_language, target_language):
+        tokenizer, model = self._model(source_language, target_language)
+        # Segments are cut by characters upstream; split the ones still over the token limit
+        chunked = [self._fit(tokenizer, segment) for segment in segments]
+        chunks = [chunk for parts in chunked for chunk in parts]
+        inputs = tokenizer(chunks, return_tensors="pt", padding=True, truncation=True)
+        outputs = iter(tokenizer.batch_decode(model.generate(**inputs), skip_special_tokens=True))
+        return [" ".join(next(outputs) for _ in parts) for parts in chunked]
+
+
+TRANSLATION_BACKENDS = {
+    "google": GoogleBackend,
+    "offline": PhrasebookBackend,
+    "marian": MarianBackend,
+}
+
+_backends: Dict[str, TranslationBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_translation_backend(name: str = None) -> TranslationBackend:
+    """
+    Shared translation backend by name, created on first use
+
+    Args:
+        name: 'google', 'offline' or 'marian' (defaults to the TRANSLATION_BACKEND env var, then 'google')
+
+    Returns:
+        The backend instance
+    """
+    name = (name or os.getenv("TRANSLATION_BACKEND", "google")).lower()
+    backend_cls = TRANSLATION_BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown translation backend '{name}'. Choose from: {', '.join(TRANSLATION_BACKENDS)}")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = backend_cls()
+        return _backends[name]
@@ -0,0 +1,95 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import json
+import os
+import re
+
+
+# Placeholder standing in for a protected term while a segment is translated
+PLACEHOLDER = "⟦{}⟧"
+_PLACEHOLDER = re.compile(r"⟦\s*(\d+)\s*⟧")
+
+
+class Glossary:
+    """
+    Terms kept out of machine translation
+
+    ``mask`` replaces every protected term in a segment with a numbered
+    placeholder, and ``restore`` puts the original spelling back into the
+    translation. Because masking happens before the translation memory is
+    consulted, sentences that differ only in the disease they name share
+    one translation. Matching is case-insensitive on word boundaries, and
+    longer terms win over terms they contain.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self.terms: List[str] = []
+        self._pattern: Optional[re.Pattern] = None
+        self.add_terms(terms)
+
+    def add_terms(self, terms: Iterable[str]):
+        known = {term.lower() for term in self.terms}
+        for term in terms:
+            term = term.strip()
+            if term and term.lower() not in known:
+                known.add(term.lower())
+                self.terms.append(term)
+        if self.terms:
+            alternatives = "|".join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+            self._pattern = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+    def mask(self, segment: str) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Replace protected terms with placeholders
+
+        Returns:
+            (masked segment, original terms by placeholder number)
+        """
+        if self._pattern is None:
+            return segment, ()
+        found: List[str] = []
+
+        def substitute(match):
+            found.append(match.group())
+            return PLACEHOLDER.format(len(found) - 1)
+
+        return self._pattern.sub(substitute, segment), tuple(found)
+
+    @staticmethod
+    def restore(translation: str, terms: Tuple[str, ...]) -> str:
+        """Put masked terms back into a translation (tolerates spaces the translator added)"""
+        if not terms:
+            return translation
+        return _PLACEHOLDER.sub(
+            lambda match: terms[int(match.group(1))] if int(match.group(1)) < len(terms) else match.group(),
+            translation
+        )
+
+    @staticmethod
+    def is_placeholder_only(masked: str) -> bool:
+        """Whether nothing but placeholders and punctuation is left to translate"""
+        return not re.search(r"[^\W\d_]", _PLACEHOLDER.sub("", masked))
+
+
+@lru_cache(maxsize=1)
+def default_glossary() -> Glossary:
+    """
+    Disease names protected by default, built once per process
+
+    Covers the detection classes that name a disease (healthy and generic
+    leaf classes such as "Tomato leaf" are ordinary prose), the chatbot
+    knowledge base diseases (both 'apple_scab' and 'Apple Scab' spellings)
+    and any terms listed in the JSON file named by TRANSLATION_GLOSSARY.
+    """
+    from precision_agronomist.chat.intents import disease_class_names, load_class_names
+    from precision_agronomist.chat.knowledge_base import disease_keys
+
+    terms = list(disease_class_names(load_class_names()))
+    for key in disease_keys():
+        terms.extend([key, key.replace("_", " ")])
+
+    extra = os.getenv("TRANSLATION_GLOSSARY")
+    if extra and Path(extra).exists():
+        terms.extend(json.loads(Path(extra).read_text(encoding="utf-8")))
+    return Glossary(terms)
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+# Default location of the translation memory, in the project directory whatever the working directory
+DEFAULT_MEMORY_PATH = Path(__file__).parents[3] / "translation_memory.db"
+
+# Segments looked up per SQLite statement (stays under the bound-parameter limit)
+LOOKUP_BATCH = 500
+
+
+def segment_hash(segment: str) -> str:
+    """Key of a source segment: SHA-256 of its text without surrounding whitespace"""
+    return hashlib.sha256(segment.strip().encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Translations of individual segments, persisted in SQLite
+
+    Keyed by segment hash, source language, target language and the backend
+    that produced the translation, so switching backends never serves
+    another backend's output. A bounded
+    in-process LRU holds recently used translations, so repeated headers and
+    recommendations are served without touching the database; the SQLite
+    table persists them across runs and is shared by every process using the
+    same file.
+    """
+
+    def __init__(self, db_path=DEFAULT_MEMORY_PATH, max_cached: int = 65536):
+        """
+        Args:
+            db_path: SQLite file holding the memory (created on first use)
+            max_cached: Translations kept in process
+        """
+        self.db_path = Path(db_path)
+        self.max_cached = max_cached
+        self.memory_hits = 0
+        self.stored_hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            key_columns = [
+                row[1] for row in sorted(conn.execute("PRAGMA table_info(translation_memory)"), key=lambda row: row[5])
+                if row[5]
+            ]
+            if key_columns and "backend" not in key_columns:
+                # Older layout keyed without the backend; rebuild it with the backend in the key
+                conn.execute("ALTER TABLE translation_memory RENAME TO translation_memory_old")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translation_memory (
+                    segment_hash TEXT NOT NULL,
+                    source_language TEXT NOT NULL,
+                    target_language TEXT NOT NULL,
+                    source_text TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    backend TEXT NOT NULL DEFAULT '',
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (segment_hash, source_language, target_language, backend)
+                ) WITHOUT ROWID
+            """)
+            if key_columns and "backend" not in key_columns:
+                conn.execute("""
+                    INSERT OR REPLACE INTO translation_memory
+                    SELECT segment_hash, source_language, target_language, source_text, translation,
+                           COALESCE(backend, ''), created_at
+                    FROM translation_memory_old
+                """)
+                conn.execute("DROP TABLE translation_memory_old")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def lookup(
+        self, segments: Iterable[str], source_language: str, target_language: str, backend: str = ""
+    ) -> Dict[str, str]:
+        """
+        Stored translations of segments
+
+        Args:
+            segments: Source segments
+            source_language: Source language code as requested ('auto' is its own key)
+            target_language: Target language code
+            backend: Name of the backend whose translations to reuse
+
+        Returns:
+            Segment -> translation for the segments found; the rest are misses
+        """
+        found: Dict[str, str] = {}
+        pending: Dict[str, list] = {}
+        with self._lock:
+            for segment in segments:
+                if segment in found:
+                    continue
+                digest = segment_hash(segment)
+                key = (digest, source_language, target_language, backend)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    found[segment] = cached
+                    self.memory_hits += 1
+                else:
+                    pending.setdefault(digest, []).append(segment)
+
+            if pending:
+                conn = self._connection()
+                digests = list(pending)
+                for start in range(0, len(digests), LOOKUP_BATCH):
+                    batch = digests[start:start + LOOKUP_BATCH]
+                    rows = conn.execute(f"""
+                        SELECT segment_hash, translation FROM translation_memory
+                        WHERE source_language = ? AND target_language = ? AND backend = ?
+                          AND segment_hash IN ({", ".join("?" * len(batch))})
+                    """, (source_language, target_language, backend, *batch)).fetchall()
+                    for digest, translation in rows:
+                        self._remember((digest, source_language, target_language, backend), translation)
+                        for segment in pending.pop(digest):
+                            found[segment] = translation
+                            self.stored_hits += 1
+                self.misses += sum(len(segments) for segments in pending.values())
+        return found
+
+    def store(self, translations: Dict[str, str], source_language: str, target_language: str, backend: str = ""):
+        """Remember newly translated segments, under the backend that produced them"""
+        if not translations:
+            return
+        backend = backend or ""
+        now = time.time()
+        rows = [
+            (segment_hash(segment), source_language, target_language, segment, translation, backend, now)
+            for segment, translation in translations.items()
+        ]
+        with self._lock:
+            for row in rows:
+                self._remember((row[0], source_language, target_language, backend), row[4])
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO translation_memory VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+
+    def _remember(self, key: tuple, translation: str):
+        self._cache[key] = translation
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss metrics; stored segments are counted only once the database is open"""
+        with self._lock:
+            hits = self.memory_hits + self.stored_hits
+            lookups = hits + self.misses
+            stored = None
+            if self._conn is not None:
+                stored = self._conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "stored_hits": self.stored_hits,
+                "misses": self.misses,
+                "cached_segments": len(self._cache),
+                "stored_segments": stored,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared by every TranslationTool in the process
+translation_memory = TranslationMemory(
+    os.getenv('TRANSLATION_MEMORY_DB', DEFAULT_MEMORY_PATH),
+    max_cached=int(os.getenv('TRANSLATION_MEMORY_CACHE_SIZE', '65536'))
+)
@@ -0,0 +1,167 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import os
+import sqlite3
+import threading
+import time
+
+from precision_agronomist.translation.backends import TranslationBackend
+from precision_agronomist.translation.glossary import Glossary
+from precision_agronomist.translation.memory import TranslationMemory, translation_memory
+from precision_agronomist.translation.segments import MAX_SEGMENT_CHARS, join_segments, split_segments
+
+
+# Concurrent translator requests per document
+DEFAULT_WORKERS = int(os.getenv('TRANSLATION_WORKERS', '8'))
+
+# Attempts per segment before it is left untranslated
+TRANSLATION_ATTEMPTS = 3
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread calling one provider
+
+    ``rate`` requests per second on average, with bursts of up to ``burst``
+    requests. A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Take the token now (possibly going into debt) so waiting threads queue up in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+# Limit on requests to the translation provider, shared by every document translated in the process
+translation_rate_limiter = RateLimiter(
+    rate=float(os.getenv('TRANSLATION_RATE_LIMIT', '20')),
+    burst=int(os.getenv('TRANSLATION_RATE_BURST', str(DEFAULT_WORKERS)))
+)
+
+
+def translate_document(
+    text: str,
+    backend: TranslationBackend,
+    source_language: str,
+    target_language: str,
+    glossary: Optional[Glossary] = None,
+    memory: Optional[TranslationMemory] = translation_memory,
+    max_workers: int = DEFAULT_WORKERS,
+    limiter: Optional[RateLimiter] = translation_rate_limiter,
+    max_chars: int = MAX_SEGMENT_CHARS
+) -> Dict:
+    """
+    Translate a Markdown document segment by segment
+
+    The document is split into segments (see split_segments) and protected
+    glossary terms are masked. Identical masked segments are translated
+    once, segments in the translation memory are reused, and the rest are
+    sent to the backend in batches of backend.batch_size, concurrently on a
+    bounded thread pool, each call passing the rate limiter first. A batch
+    that still fails after TRANSLATION_ATTEMPTS, or a segment the backend
+    has no translation for, is left in the source language.
+
+    Args:
+        text: Document to translate
+        backend: Translation provider
+        source_language: Source language code, as the memory key (with the target and backend name)
+        target_language: Target language code
+        glossary: Terms to keep untranslated (None to translate everything)
+        memory: Translation memory to consult and fill (None to skip it)
+        max_workers: Concurrent backend calls
+        limiter: Provider rate limit (None for unlimited)
+        max_chars: Longest segment sent to the backend
+
+    Returns:
+        Dict with translated_text and segment counts (total, protected - only
+        glossary terms, from_memory, translated, untranslated, failed) plus the
+        first error message if any batch failed
+    """
+    pieces = split_segments(text, max_chars)
+    segments = list(dict.fromkeys(piece for translate_piece, piece in pieces if translate_piece))
+
+    masked: Dict[str, tuple] = {}
+    for segment in segments:
+        masked[segment] = glossary.mask(segment) if glossary is not None else (segment, ())
+    # What is actually translated: masked text with something besides protected terms in it
+    sources = list(dict.fromkeys(
+        text for text, _ in masked.values() if not Glossary.is_placeholder_only(text)
+    ))
+
+    translations: Dict[str, str] = {}
+    if memory is not None and sources:
+        try:
+            translations = memory.lookup(sources, source_language, target_language, backend=backend.name)
+        except sqlite3.Error as e:
+            print(f"Warning: translation memory unavailable: {e}")
+    missing = [source for source in sources if source not in translations]
+
+    def work(batch: List[str]):
+        error = None
+        for attempt in range(TRANSLATION_ATTEMPTS):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                return batch, backend.translate_batch(batch, source_language, target_language), None
+            except Exception as e:
+                error = e
+                if attempt + 1 < TRANSLATION_ATTEMPTS:
+                    time.sleep(0.5 * 2 ** attempt)
+        return batch, None, error
+
+    translated: Dict[str, str] = {}
+    errors = []
+    failed = 0
+    if missing:
+        size = max(1, backend.batch_size)
+        batches = [missing[start:start + size] for start in range(0, len(missing), size)]
+        workers = max(1, min(max_workers, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate") as pool:
+            for batch, results, error in pool.map(work, batches):
+                if error is not None:
+                    errors.append(error)
+                    failed += len(batch)
+                    continue
+                translated.update((source, result) for source, result in zip(batch, results) if result)
+
+    if memory is not None and translated:
+        try:
+            memory.store(translated, source_language, target_language, backend=backend.name)
+        except sqlite3.Error as e:
+            print(f"Warning: translation memory unavailable: {e}")
+    translations.update(translated)
+
+    output: Dict[str, str] = {}
+    for segment, (source, terms) in masked.items():
+        if source in translations:
+            output[segment] = Glossary.restore(translations[source], terms)
+    from_memory = len(sources) - len(missing)
+
+    return {
+        "translated_text": join_segments(pieces, output),
+        "segments": {
+            "total": len(segments),
+            "protected": sum(Glossary.is_placeholder_only(source) for source, _ in masked.values()),
+            "from_memory": from_memory,
+            "translated": len(translated),
+            "untranslated": len(missing) - len(translated) - failed,
+            "failed": failed
+        },
+        "error": str(errors[0]) if errors else None
+    }
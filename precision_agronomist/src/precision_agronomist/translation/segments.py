@@ -0,0 +1,105 @@
+from typing import List, Sequence, Tuple
+import re
+
+
+# Longest segment sent to a translator; providers reject requests over ~5000 characters
+MAX_SEGMENT_CHARS = 4500
+
+# Markdown line prefixes kept out of segments so "1. Prune..." and "2. Prune..." share a translation
+_LINE = re.compile(r"^(\s*(?:#{1,6}\s+|[-*•]\s+|\d+[.)]\s+|>\s*)?)(.*?)(\s*)$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=\S)")
+_LETTER = re.compile(r"[^\W\d_]")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_TABLE_RULE = re.compile(r"^[\s|:-]+$")
+_CELL = re.compile(r"^(\s*)(.*?)(\s*)$")
+
+
+def split_segments(text: str, max_chars: int = MAX_SEGMENT_CHARS) -> List[Tuple[bool, str]]:
+    """
+    Split text into translatable segments and the layout between them
+
+    Each line is split into its Markdown prefix (heading, bullet, number),
+    its sentences and the whitespace between them. Fenced code blocks and
+    table rules are kept verbatim and table rows are split into cells.
+    Pieces without letters (numbers, emoji, separators) are kept as layout,
+    and sentences longer than max_chars are cut between words.
+
+    Args:
+        text: Text to translate
+        max_chars: Longest translatable piece
+
+    Returns:
+        (translate, piece) pairs; joining every piece gives back the text
+    """
+    pieces: List[Tuple[bool, str]] = []
+    in_code = False
+    for line in text.splitlines(keepends=True):
+        newline = line[len(line.rstrip("\r\n")):]
+        content = line[:len(line) - len(newline)]
+
+        if _FENCE.match(content):
+            in_code = not in_code
+            pieces.append((False, line))
+            continue
+        if in_code:
+            pieces.append((False, line))
+            continue
+
+        if content.lstrip().startswith("|"):
+            if _TABLE_RULE.match(content):
+                pieces.append((False, line))
+                continue
+            cells = content.split("|")
+            for i, cell in enumerate(cells):
+                if i:
+                    pieces.append((False, "|"))
+                lead, body, trail = _CELL.match(cell).groups()
+                if lead:
+                    pieces.append((False, lead))
+                _add_sentences(pieces, body, max_chars)
+                if trail:
+                    pieces.append((False, trail))
+            if newline:
+                pieces.append((False, newline))
+            continue
+
+        prefix, body, trailing = _LINE.match(content).groups()
+        if prefix:
+            pieces.append((False, prefix))
+        _add_sentences(pieces, body, max_chars)
+        if trailing + newline:
+            pieces.append((False, trailing + newline))
+    return pieces
+
+
+def _add_sentences(pieces: List[Tuple[bool, str]], body: str, max_chars: int):
+    position = 0
+    for gap in _SENTENCE_END.finditer(body):
+        _add_piece(pieces, body[position:gap.start()], max_chars)
+        pieces.append((False, gap.group()))
+        position = gap.end()
+    _add_piece(pieces, body[position:], max_chars)
+
+
+def _add_piece(pieces: List[Tuple[bool, str]], sentence: str, max_chars: int):
+    if not sentence:
+        return
+    if not _LETTER.search(sentence):
+        pieces.append((False, sentence))
+        return
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append((True, sentence[:cut]))
+        if sentence[cut:cut + 1] == " ":
+            pieces.append((False, " "))
+            cut += 1
+        sentence = sentence[cut:]
+    if sentence:
+        pieces.append((True, sentence))
+
+
+def join_segments(pieces: Sequence[Tuple[bool, str]], translations: dict) -> str:
+    """Reassemble split_segments output, replacing each translatable piece by its translation"""
+    return "".join(translations.get(piece, piece) if translate else piece for translate, piece in pieces)
@@ -0,0 +1,5 @@
+from precision_agronomist.utils.files import replace_file
+
+__all__ = [
+    'replace_file'
+]
@@ -0,0 +1,27 @@
+from pathlib import Path
+from typing import BinaryIO, Callable
+import os
+import tempfile
+
+
+def replace_file(path, write: Callable[[BinaryIO], object]):
+    """
+    Atomically replace path with what write(f) puts in a temporary file beside it
+
+    The temporary file gets a unique name, so concurrent writers (threads or
+    processes) never share one; readers see either the old or the new file.
+
+    Args:
+        path: File to replace (its directory must exist)
+        write: Called with the temporary file, opened for binary writing
+    """
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as f:
+        tmp = Path(f.name)
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            tmp.unlink(missing_ok=True)
+            raise
+    os.replace(tmp, path)
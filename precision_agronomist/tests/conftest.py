@@ -0,0 +1,12 @@
+import pytest
+
+from smtp_stub import LocalSMTPServer
+
+
+@pytest.fixture
+def smtp_server():
+    """In-process SMTP server counting sessions and messages; yields it with .port set"""
+    server = LocalSMTPServer()
+    server.port = server.start()
+    yield server
+    server.stop()
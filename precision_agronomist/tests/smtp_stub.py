@@ -0,0 +1,58 @@
+"""Local SMTP stand-in shared by the alert tests and benchmarks/bench_alert_delivery.py"""
+import socketserver
+import threading
+import time
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Just enough SMTP to accept mail; counts sessions and messages, optionally stalls each greeting"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay=0.0):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.handshake_delay = handshake_delay
+        self.sessions = 0
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.server_address[1]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        # Stands in for the TCP/TLS handshake and login of a real provider
+        time.sleep(server.handshake_delay)
+        self.reply("220 localhost ESMTP stand-in")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250 localhost")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
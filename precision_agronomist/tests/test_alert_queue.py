@@ -0,0 +1,157 @@
+from email.mime.text import MIMEText
+import threading
+import time
+
+import pytest
+
+from precision_agronomist.alerts.dispatcher import AlertDispatcher
+from precision_agronomist.alerts.mailer import SMTPMailer
+from precision_agronomist.alerts.queue import SEND_LEASE, AlertQueue
+
+
+class FailingMailer:
+    sender = "alerts@example.com"
+
+    def send(self, messages):
+        return [], {index: "connection refused" for index in range(len(messages))}
+
+
+class RecordingMailer:
+    sender = "alerts@example.com"
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, messages):
+        self.sent.extend(recipient for recipient, _ in messages)
+        return list(range(len(messages))), {}
+
+
+class CrashingMailer:
+    """Dies mid-send, like a process killed while holding the claim"""
+    sender = "alerts@example.com"
+
+    def send(self, messages):
+        raise KeyboardInterrupt
+
+
+class BlockingMailer(RecordingMailer):
+    """Holds every send until released, like a slow SMTP handshake"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def send(self, messages):
+        self.release.wait(10)
+        return super().send(messages)
+
+
+def enqueue(queue, now):
+    return queue.enqueue(
+        ["farmer@example.com"], ["tomato_early_blight"], "high",
+        "Early blight on 4 leaves", num_detections=4, affected_images=2, now=now
+    )
+
+
+def test_failed_delivery_does_not_suppress_the_next_alert(tmp_path):
+    queue = AlertQueue(tmp_path / "alerts.db", max_attempts=1)
+    assert enqueue(queue, now=1000.0)["queued"] == ["farmer@example.com"]
+
+    result = queue.flush(FailingMailer(), now=1000.0)
+    assert result["retrying"] == 0
+    assert queue.outbox_counts()["failed"] == 1
+
+    assert enqueue(queue, now=1100.0)["queued"] == ["farmer@example.com"]
+
+
+def test_failed_delivery_backs_off_exponentially_until_max_attempts(tmp_path):
+    queue = AlertQueue(tmp_path / "alerts.db", max_attempts=4, retry_base=30.0, retry_max=3600.0)
+    enqueue(queue, now=1000.0)
+    now = 1000.0
+    for attempt in (1, 2, 3):
+        before = time.time()
+        assert queue.flush(FailingMailer(), now=now)["retrying"] == 1
+        after = time.time()
+        delivery = queue.deliveries()[0]
+        assert (delivery["status"], delivery["attempts"]) == ("pending", attempt)
+        delay = 30.0 * 2 ** (attempt - 1)
+        assert before + delay <= delivery["next_attempt_at"] <= after + delay
+        # Not due before the backoff elapses
+        assert queue.flush(FailingMailer(), now=delivery["next_attempt_at"] - 1)["failed"] == {}
+        now = delivery["next_attempt_at"]
+
+    result = queue.flush(FailingMailer(), now=now)
+    assert result["retrying"] == 0
+    assert result["failed"] == {"farmer@example.com": "connection refused"}
+    assert queue.deliveries()[0]["status"] == "failed"
+    assert queue.deliveries()[0]["attempts"] == 4
+    assert queue.flush(FailingMailer(), now=now + 10 ** 6)["failed"] == {}
+
+
+def test_expired_sending_lease_is_redelivered(tmp_path):
+    queue = AlertQueue(tmp_path / "alerts.db")
+    enqueue(queue, now=1000.0)
+    with pytest.raises(KeyboardInterrupt):
+        queue.flush(CrashingMailer(), now=1000.0)
+    assert queue.outbox_counts()["sending"] == 1
+
+    mailer = RecordingMailer()
+    assert queue.flush(mailer, now=1000.0 + SEND_LEASE - 1)["digests_sent"] == 0
+    assert queue.flush(mailer, now=1000.0 + SEND_LEASE)["digests_sent"] == 1
+    assert mailer.sent == ["farmer@example.com"]
+    assert queue.outbox_counts()["sent"] == 1
+
+
+def test_dispatcher_wake_returns_before_the_send_completes(tmp_path):
+    queue = AlertQueue(tmp_path / "alerts.db")
+    mailer = BlockingMailer()
+    dispatcher = AlertDispatcher(queue, mailer_factory=lambda: mailer, poll_interval=60.0)
+    enqueue(queue, now=time.time())
+    try:
+        started = time.monotonic()
+        dispatcher.wake()
+        assert time.monotonic() - started < 1.0
+        assert mailer.sent == []
+    finally:
+        mailer.release.set()
+        dispatcher.close(timeout=10)
+
+    assert not dispatcher.running()
+    assert mailer.sent == ["farmer@example.com"]
+
+
+def test_delivered_alert_suppresses_repeats_within_window(tmp_path):
+    queue = AlertQueue(tmp_path / "alerts.db")
+    mailer = RecordingMailer()
+    enqueue(queue, now=1000.0)
+    queue.flush(mailer, now=1000.0)
+
+    assert mailer.sent == ["farmer@example.com"]
+    assert enqueue(queue, now=1100.0)["suppressed"] == ["farmer@example.com"]
+
+
+def test_flush_sends_every_digest_over_one_smtp_session(tmp_path, smtp_server):
+    queue = AlertQueue(tmp_path / "alerts.db")
+    recipients = [f"farmer{i}@example.com" for i in range(5)]
+    queue.enqueue(recipients, ["tomato_early_blight"], "high", "Early blight on 4 leaves", 4, 2, now=1000.0)
+    queue.enqueue(recipients, ["apple_scab"], "critical", "Scab on 6 leaves", 6, 3, now=1000.0)
+    mailer = SMTPMailer("127.0.0.1", smtp_server.port, "alerts@example.com", starttls=False)
+
+    result = queue.flush(mailer, force=True, now=1000.0)
+
+    assert (result["digests_sent"], result["alerts_sent"]) == (5, 10)
+    assert mailer.sessions == 1
+    assert (smtp_server.sessions, smtp_server.messages) == (1, 5)
+
+
+def test_smtp_connection_failure_fails_the_whole_batch(smtp_server):
+    port = smtp_server.port
+    smtp_server.stop()
+    mailer = SMTPMailer("127.0.0.1", port, "alerts@example.com", starttls=False, timeout=2)
+    message = MIMEText("body")
+
+    sent, errors = mailer.send([("a@example.com", message), ("b@example.com", message)])
+
+    assert sent == []
+    assert sorted(errors) == [0, 1]
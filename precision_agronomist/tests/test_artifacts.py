@@ -0,0 +1,92 @@
+import hashlib
+import http.server
+import json
+import threading
+
+import pytest
+
+from precision_agronomist.models.artifacts import ArtifactCache
+
+
+PAYLOAD = b"model weights " * 1000
+
+
+class NoLengthHandler(http.server.BaseHTTPRequestHandler):
+    """Serves PAYLOAD without Content-Length, answering ranges past the end with 416"""
+
+    protocol_version = "HTTP/1.0"
+    report_size = True
+
+    def do_GET(self):
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+        if start >= len(PAYLOAD):
+            self.send_response(416)
+            if self.report_size:
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+            self.end_headers()
+            return
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/*")
+        self.end_headers()
+        self.wfile.write(PAYLOAD[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), NoLengthHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    NoLengthHandler.report_size = True
+
+
+def leave_complete_part(cache, url, content=PAYLOAD):
+    """Simulate a run that received the whole body but stopped before installing it"""
+    partial_dir = cache.cache_dir / "partial"
+    partial_dir.mkdir(parents=True)
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    (partial_dir / f"{key}.part").write_bytes(content)
+    (partial_dir / f"{key}.json").write_text(json.dumps({"url": url, "total": None}))
+
+
+def test_complete_part_is_installed_when_resume_gets_416(tmp_path, server):
+    url = f"http://127.0.0.1:{server.server_port}/model.pt"
+    cache = ArtifactCache(tmp_path / "cache", retry_delay=0)
+    leave_complete_part(cache, url)
+    NoLengthHandler.report_size = False
+
+    result = cache.fetch(url, tmp_path / "model.pt", sha256=hashlib.sha256(PAYLOAD).hexdigest())
+
+    assert result["source"] == "download"
+    assert result["downloaded_bytes"] == 0
+    assert (tmp_path / "model.pt").read_bytes() == PAYLOAD
+
+
+def test_complete_part_without_checksum_is_accepted_on_reported_size(tmp_path, server):
+    url = f"http://127.0.0.1:{server.server_port}/model.pt"
+    cache = ArtifactCache(tmp_path / "cache", retry_delay=0)
+    leave_complete_part(cache, url)
+
+    cache.fetch(url, tmp_path / "model.pt")
+
+    assert (tmp_path / "model.pt").read_bytes() == PAYLOAD
+
+
+def test_unverifiable_part_is_downloaded_again(tmp_path, server):
+    url = f"http://127.0.0.1:{server.server_port}/model.pt"
+    cache = ArtifactCache(tmp_path / "cache", retry_delay=0)
+    leave_complete_part(cache, url, b"x" * len(PAYLOAD))
+    NoLengthHandler.report_size = False
+
+    result = cache.fetch(url, tmp_path / "model.pt", sha256=hashlib.sha256(PAYLOAD).hexdigest())
+
+    assert result["downloaded_bytes"] == len(PAYLOAD)
+    assert (tmp_path / "model.pt").read_bytes() == PAYLOAD
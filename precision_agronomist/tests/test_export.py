@@ -0,0 +1,109 @@
+import sqlite3
+
+import pyarrow.dataset as ds
+import pytest
+
+from precision_agronomist.storage.database import connect, init_database, insert_detections
+from precision_agronomist.storage.export import export_detections
+
+
+def seed(db_path, count):
+    init_database(db_path)
+    conn = connect(db_path)
+    with conn:
+        insert_detections(conn, [
+            ("s1", f"2024-05-0{1 + i % 3}T10:00:00", f"img_{i}.jpg", "Tomato_Early_blight",
+             0.9, None, None, None, None, "high", None, None, None)
+            for i in range(count)
+        ])
+    conn.close()
+
+
+def exported_rows(output_dir, file_format="parquet"):
+    return ds.dataset(str(output_dir), format=file_format, partitioning="hive").count_rows()
+
+
+def test_full_export_rerun_replaces_previous_export(tmp_path):
+    db_path = tmp_path / "detections.db"
+    output_dir = tmp_path / "exports"
+    seed(db_path, 30)
+
+    export_detections(db_path, output_dir)
+    export_detections(db_path, output_dir)
+
+    assert exported_rows(output_dir) == 30
+
+
+def test_incremental_export_only_appends_new_rows(tmp_path):
+    db_path = tmp_path / "detections.db"
+    output_dir = tmp_path / "exports"
+    seed(db_path, 10)
+    export_detections(db_path, output_dir, incremental=True)
+
+    seed(db_path, 5)
+    summary = export_detections(db_path, output_dir, incremental=True)
+
+    assert summary["rows_exported"] == 5
+    assert exported_rows(output_dir) == 15
+
+
+def test_arrow_export_uses_its_own_default_codec(tmp_path):
+    db_path = tmp_path / "detections.db"
+    seed(db_path, 3)
+
+    summary = export_detections(db_path, tmp_path / "exports", file_format="arrow")
+
+    assert summary["compression"] == "zstd"
+    assert exported_rows(tmp_path / "exports", "arrow") == 3
+
+
+def test_export_reads_legacy_database_without_migrating_it(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE detections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            image_path TEXT NOT NULL,
+            disease_class TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            bbox_x1 REAL, bbox_y1 REAL, bbox_x2 REAL, bbox_y2 REAL,
+            severity TEXT
+        )
+    """)
+    conn.execute(
+        "INSERT INTO detections (session_id, timestamp, image_path, disease_class, confidence) "
+        "VALUES ('s1', '2024-05-01T10:00:00', 'a.jpg', 'Apple Scab Leaf', 0.8)"
+    )
+    conn.commit()
+    conn.close()
+    schema_before = sqlite3.connect(db_path).execute("SELECT sql FROM sqlite_master").fetchall()
+
+    summary = export_detections(db_path, tmp_path / "exports")
+
+    assert summary["rows_exported"] == 1
+    assert sqlite3.connect(db_path).execute("SELECT sql FROM sqlite_master").fetchall() == schema_before
+
+
+def test_incremental_export_refuses_after_upsert_replaced_exported_rows(tmp_path):
+    db_path = tmp_path / "detections.db"
+    output_dir = tmp_path / "exports"
+    init_database(db_path)
+    row = ("s1", "2024-05-01T10:00:00", "a.jpg", "Apple Scab Leaf", 0.8,
+           None, None, None, None, "low", "hash-a", None, None)
+    conn = connect(db_path)
+    with conn:
+        insert_detections(conn, [row])
+    export_detections(db_path, output_dir, incremental=True)
+
+    with conn:
+        insert_detections(conn, [row[:4] + (0.95,) + row[5:]], on_duplicate="upsert")
+    conn.close()
+
+    with pytest.raises(ValueError, match="full export"):
+        export_detections(db_path, output_dir, incremental=True)
+    export_detections(db_path, output_dir)
+    export_detections(db_path, output_dir, incremental=True)
+
+    assert exported_rows(output_dir) == 1
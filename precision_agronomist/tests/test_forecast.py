@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from precision_agronomist.analytics import forecast as forecast_module
+from precision_agronomist.analytics.forecast import (
+    ForecastState, forecast_outbreaks, forecast_state_path, load_forecast_state, save_forecast_state
+)
+from precision_agronomist.storage.backends import SQLiteBackend
+from precision_agronomist.storage.database import connect, init_database, insert_detections
+
+
+def rows_on(day, count, disease_class="Tomato_Early_blight"):
+    return [
+        ("s1", f"{day.isoformat()}T10:00:00", f"img_{day}_{i}.jpg", disease_class,
+         0.9, None, None, None, None, "high", None, None, None)
+        for i in range(count)
+    ]
+
+
+def test_total_variance_accounts_for_shared_innovations():
+    state = ForecastState(date(2024, 1, 1))
+    state.update(np.array(["a"], dtype=object), np.array([[3.0, 5.0, 2.0, 7.0, 4.0]]), date(2024, 1, 2))
+    horizon = 14
+    result = state.forecast(horizon)
+
+    # Brute force: daily errors e = M eps, so Var(sum of the first h days) = sigma^2 * |1' M[:h, :h]|^2
+    alpha, beta, gamma = (state.params[name] for name in ("alpha", "beta", "gamma"))
+    m = state.params["season_length"]
+    c = lambda j: alpha * (1 + j * beta) + gamma * (1 - alpha) * (j % m == 0)
+    weights = np.array([[1.0 if h == k else c(h - k) if h > k else 0.0 for k in range(horizon)] for h in range(horizon)])
+    for h in range(1, horizon + 1):
+        expected = state.variance[0] * (weights[:h, :h].sum(axis=0) ** 2).sum()
+        assert result["cumulative_variance"][0, h - 1] == pytest.approx(expected)
+        assert result["variance"][0, h - 1] == pytest.approx(state.variance[0] * (weights[h - 1] ** 2).sum())
+    assert result["cumulative_variance"][0, -1] > result["variance"][0].sum()
+
+
+def test_back_dated_rows_refit_the_saved_state(tmp_path):
+    db_path = tmp_path / "history.db"
+    init_database(db_path)
+    today = date(2024, 3, 1)
+    conn = connect(db_path)
+    with conn:
+        for offset in range(1, 30):
+            insert_detections(conn, rows_on(today - timedelta(days=offset), offset % 4))
+
+    forecast_module._states.clear()
+    with SQLiteBackend(db_path) as backend:
+        forecast_outbreaks(backend, db_path, today, history_days=60)
+    fitted = load_forecast_state(db_path).folded_total
+
+    with conn:
+        insert_detections(conn, rows_on(today - timedelta(days=10), 25))
+    conn.close()
+
+    with SQLiteBackend(db_path) as backend:
+        forecast_outbreaks(backend, db_path, today, history_days=60)
+    assert load_forecast_state(db_path).folded_total == fitted + 25
+    forecast_module._states.clear()
+
+
+def test_concurrent_state_saves_never_share_a_temp_file(tmp_path):
+    source = tmp_path / "detections.db"
+    errors = []
+
+    def save(day):
+        try:
+            for _ in range(50):
+                save_forecast_state(source, ForecastState(date(2024, 1, day)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(day,)) for day in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [p.name for p in tmp_path.iterdir()] == [forecast_state_path(source).name]
+    saved = json.loads(forecast_state_path(source).read_text())
+    assert saved["last_date"] in {date(2024, 1, day).isoformat() for day in range(1, 5)}
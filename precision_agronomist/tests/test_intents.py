@@ -0,0 +1,18 @@
+from precision_agronomist.chat.intents import IntentMatcher
+from precision_agronomist.chat.knowledge_base import KNOWLEDGE_BASE
+
+
+def matcher():
+    return IntentMatcher(KNOWLEDGE_BASE)
+
+
+def test_grape_alone_does_not_select_black_rot():
+    match = matcher().match("How much water do my grapes need in summer?")
+    assert match.diseases == ()
+
+
+def test_grape_with_a_disease_term_selects_black_rot():
+    m = matcher()
+    assert m.match("How do I treat grape rot?").diseases == ("grape_black_rot",)
+    assert m.match("Black rot on my vines, what now?").diseases == ("grape_black_rot",)
+    assert m.match("grape leaf black rot").classes == ("grape leaf black rot",)
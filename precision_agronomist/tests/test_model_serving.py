@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from precision_agronomist.models.serving import MODEL_SPECS, ModelServer
+
+
+# Stand-in for predict_yolo.py --serve: ready at once, sleeps on {"sleep": seconds}
+# requests and prints {"chatter": text} to stdout before replying
+FAKE_SERVE_SCRIPT = """
+import json, sys, time
+print(json.dumps({"event": "ready", "load_seconds": 0.0, "warmup_seconds": 0.0}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    time.sleep(request.get("sleep", 0))
+    if "chatter" in request:
+        print(request["chatter"], flush=True)
+    print(json.dumps({"id": request["id"], "result": {"status": "success"}}), flush=True)
+"""
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.delenv(MODEL_SPECS["yolo"]["url_env"], raising=False)
+    (tmp_path / MODEL_SPECS["yolo"]["script"]).write_text(FAKE_SERVE_SCRIPT)
+    weights = tmp_path / MODEL_SPECS["yolo"]["weights"]
+    weights.parent.mkdir(parents=True)
+    weights.write_bytes(b"weights")
+
+    server = ModelServer(["yolo"], project_root=tmp_path, restart_backoff=0.05)
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_timed_out_worker_is_restarted(server):
+    assert wait_for(lambda: server.readiness()["ready"])
+    worker = server.worker("yolo")
+    assert worker.predict({"image": "leaf.jpg"})["status"] == "success"
+
+    with pytest.raises(TimeoutError):
+        worker.predict({"image": "leaf.jpg", "sleep": 5}, timeout=0.2)
+
+    assert wait_for(lambda: server.readiness()["ready"])
+    readiness = server.readiness()["models"]["yolo"]
+    assert readiness["restarts"] == 1
+    assert server.worker("yolo") is not worker
+    assert server.worker("yolo").predict({"image": "leaf.jpg"})["status"] == "success"
+
+
+def test_crashed_worker_is_restarted(server):
+    assert wait_for(lambda: server.readiness()["ready"])
+    first = server.worker("yolo")
+    first._process.kill()
+
+    assert wait_for(lambda: server.worker("yolo") not in (None, first))
+    assert server.readiness()["ready"]
+
+
+def test_stray_stdout_line_fails_the_worker_instead_of_desyncing_it(server):
+    assert wait_for(lambda: server.readiness()["ready"])
+    worker = server.worker("yolo")
+
+    with pytest.raises(RuntimeError, match="non-protocol line"):
+        worker.predict({"image": "leaf.jpg", "chatter": "Results saved to runs/predict"})
+
+    assert worker.state == "failed"
+    assert wait_for(lambda: server.worker("yolo") not in (None, worker))
+    assert server.worker("yolo").predict({"image": "leaf.jpg"})["status"] == "success"
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from precision_agronomist.analytics.outbreak import OutbreakDetector
+from precision_agronomist.storage.database import connect, init_database, insert_detections
+from precision_agronomist.storage.write_behind import WriteBehindWriter
+
+
+def rows_at(timestamp, count):
+    return [
+        ("s1", timestamp, f"img_{timestamp}_{i}.jpg", "Tomato_Early_blight",
+         0.9, None, None, None, None, "high", None, "farm-1", None)
+        for i in range(count)
+    ]
+
+
+def series_count(detector):
+    state = detector._series[(("disease_class",), ("Tomato_Early_blight",))]
+    return state.count
+
+
+def test_warm_start_before_insert_counts_each_batch_once(tmp_path):
+    db_path = tmp_path / "detections.db"
+    init_database(db_path)
+    conn = connect(db_path)
+    with conn:
+        insert_detections(conn, rows_at("2024-05-01T10:05:00", 3))
+
+    detector = OutbreakDetector()
+    detector.warm_start(db_path, now=datetime(2024, 5, 1, 10, 30))
+
+    batch = rows_at("2024-05-01T10:20:00", 4)
+    with conn:
+        insert_detections(conn, batch)
+    conn.close()
+    detector.observe(batch)
+
+    assert series_count(detector) == 7
+
+
+def test_write_behind_feeds_detector_after_commit(tmp_path):
+    db_path = tmp_path / "detections.db"
+    detector = OutbreakDetector()
+    writer = WriteBehindWriter(db_path, batch_size=10_000, flush_interval_ms=60_000)
+    writer.add_commit_listener(detector.observe)
+    try:
+        writer.submit(rows_at("2024-05-01T10:20:00", 5))
+        assert detector._series == {}
+        writer.flush(timeout=10)
+        assert series_count(detector) == 5
+    finally:
+        writer.close()
@@ -0,0 +1,59 @@
+import os
+
+from precision_agronomist.chat.cache import ResponseCache
+from precision_agronomist.chat.retrieval import KnowledgeIndex
+
+
+def test_key_ignores_case_and_punctuation():
+    assert ResponseCache.key("How do I treat Apple Scab?") == ResponseCache.key("how do i treat apple scab")
+    assert ResponseCache.key("How do I treat apple scab?", "es") != ResponseCache.key("How do I treat apple scab?")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "v1", "answer a")
+    cache.put("b", "v1", "answer b")
+    assert cache.get("a", "v1") == "answer a"
+
+    cache.put("c", "v1", "answer c")
+
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") == "answer a"
+    assert cache.get("c", "v1") == "answer c"
+    assert cache.stats()["entries"] == 2
+
+
+def test_shared_tier_answers_other_workers(tmp_path):
+    db_path = tmp_path / "responses.db"
+    first, second = ResponseCache(db_path=db_path), ResponseCache(db_path=db_path)
+    first.put("scab", "v1", "Spray captan")
+
+    assert second.get("scab", "v1") == "Spray captan"
+    assert second.get("scab", "v1") == "Spray captan"
+    stats = second.stats()
+    assert (stats["shared_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_knowledge_change_invalidates_both_tiers(tmp_path):
+    knowledge = tmp_path / "knowledge"
+    knowledge.mkdir()
+    source = knowledge / "scab.md"
+    source.write_text("Apple scab is controlled with captan sprays in early spring.")
+    index = KnowledgeIndex(knowledge, tmp_path / "index", knowledge_base={}, refresh_seconds=0)
+    db_path = tmp_path / "responses.db"
+    worker, other_worker = ResponseCache(db_path=db_path), ResponseCache(db_path=db_path)
+    key = ResponseCache.key("How do I control apple scab?")
+    old_version = index.version()
+    worker.put(key, old_version, "Spray captan in early spring")
+    assert worker.get(key, index.version()) == "Spray captan in early spring"
+
+    source.write_text("Apple scab is controlled with myclobutanil once leaves emerge.")
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_version = index.version()
+
+    assert new_version != old_version
+    assert worker.get(key, new_version) is None
+    assert worker.stats()["invalidations"] == 1
+    # The stale answer was dropped from the shared table too, not just hidden
+    assert other_worker.get(key, old_version) is None
@@ -0,0 +1,34 @@
+import threading
+
+from precision_agronomist.chat.retrieval import KnowledgeIndex
+
+
+def test_concurrent_saves_leave_a_loadable_index(tmp_path):
+    knowledge = tmp_path / "knowledge"
+    knowledge.mkdir()
+    (knowledge / "scab.md").write_text("Apple scab is controlled with captan sprays in early spring.")
+    index_dir = tmp_path / "index"
+    # Separate processes sharing one index directory each hold their own index
+    indexes = [KnowledgeIndex(knowledge, index_dir) for _ in range(4)]
+    for index in indexes:
+        index.refresh(force=True)
+
+    errors = []
+
+    def save(index):
+        try:
+            for _ in range(50):
+                index._save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(index,)) for index in indexes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(p.name for p in index_dir.iterdir()) == ["index.json", "matrix.npz"]
+    restored = KnowledgeIndex(knowledge, index_dir)
+    assert restored.search("captan")[0]["title"].startswith("Scab")
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from precision_agronomist.storage.database import init_database
+from precision_agronomist.storage.spatial import density_grid, find_overlapping
+
+
+def has_rtree():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING rtree(id, a, b)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+pytestmark = pytest.mark.skipif(not has_rtree(), reason="SQLite built without R*Tree")
+
+
+def insert_box(conn, image_path, disease_class="Tomato_Early_blight"):
+    conn.execute(
+        "INSERT INTO detections (session_id, timestamp, image_path, disease_class, confidence, "
+        "bbox_x1, bbox_y1, bbox_x2, bbox_y2, severity) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        ("s1", "2024-05-01T10:00:00", image_path, disease_class, 0.9, 10, 10, 20, 20, "moderate")
+    )
+
+
+def test_image_ids_beyond_float32_precision_join_to_their_own_image(tmp_path):
+    db_path = tmp_path / "spatial.db"
+    init_database(db_path)
+    conn = sqlite3.connect(db_path)
+    # 2^24 + 1 rounds to 2^24 as a float32 R*Tree coordinate
+    conn.execute("INSERT INTO images (id, image_path) VALUES (?, ?)", (2 ** 24, "a.jpg"))
+    conn.execute("INSERT INTO images (id, image_path) VALUES (?, ?)", (2 ** 24 + 1, "b.jpg"))
+    insert_box(conn, "a.jpg")
+    insert_box(conn, "b.jpg", "Tomato_Late_blight")
+    conn.commit()
+    conn.close()
+
+    cells = density_grid(cell_size=64, db_path=db_path)
+    assert {(c["image_path"], c["disease_class"]) for c in cells} == {
+        ("a.jpg", "Tomato_Early_blight"),
+        ("b.jpg", "Tomato_Late_blight"),
+    }
+
+    only_b = density_grid(cell_size=64, db_path=db_path, image_path="b.jpg")
+    assert [(c["image_path"], c["lesion_count"]) for c in only_b] == [("b.jpg", 1)]
+    overlapping = find_overlapping((0, 0, 50, 50), db_path=db_path, image_path="b.jpg")
+    assert [d["image_path"] for d in overlapping] == ["b.jpg"]
+
+
+def test_tree_without_image_id_is_rebuilt(tmp_path):
+    db_path = tmp_path / "old_tree.db"
+    init_database(db_path)
+    conn = sqlite3.connect(db_path)
+    for trigger in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER trg_detection_boxes_{trigger}")
+    conn.execute("DROP TABLE detection_boxes")
+    conn.execute("""
+        CREATE VIRTUAL TABLE detection_boxes USING rtree(
+            id, min_image, max_image, min_x, max_x, min_y, max_y, +disease_class
+        )
+    """)
+    insert_box(conn, "a.jpg")
+    conn.commit()
+    conn.close()
+
+    init_database(db_path)
+
+    cells = density_grid(cell_size=64, db_path=db_path)
+    assert [(c["image_path"], c["lesion_count"]) for c in cells] == [("a.jpg", 1)]
@@ -0,0 +1,80 @@
+import sqlite3
+
+from precision_agronomist.translation.backends import MarianBackend, PhrasebookBackend
+from precision_agronomist.translation.glossary import default_glossary
+from precision_agronomist.translation.memory import TranslationMemory
+from precision_agronomist.translation.pipeline import translate_document
+
+
+class WordTokenizer:
+    """One token per word, like a tiny sentencepiece model"""
+    model_max_length = 512
+
+    def tokenize(self, text):
+        return text.split()
+
+
+def test_memory_is_keyed_by_backend(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.db")
+    memory.store({"Remove infected leaves.": "Retire las hojas."}, "en", "es", backend="google")
+
+    assert memory.lookup(["Remove infected leaves."], "en", "es", backend="google") == {
+        "Remove infected leaves.": "Retire las hojas."
+    }
+    assert memory.lookup(["Remove infected leaves."], "en", "es", backend="offline") == {}
+
+
+def test_memory_migrates_table_keyed_without_backend(tmp_path):
+    db_path = tmp_path / "tm.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE translation_memory (
+            segment_hash TEXT NOT NULL, source_language TEXT NOT NULL, target_language TEXT NOT NULL,
+            source_text TEXT NOT NULL, translation TEXT NOT NULL, backend TEXT, created_at REAL NOT NULL,
+            PRIMARY KEY (segment_hash, source_language, target_language)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("INSERT INTO translation_memory VALUES ('h', 'en', 'es', 'Hi.', 'Hola.', 'google', 0)")
+    conn.commit()
+    conn.close()
+
+    memory = TranslationMemory(db_path)
+    memory.store({"Hi.": "Hola (offline)."}, "en", "es", backend="offline")
+    memory.close()
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT backend FROM translation_memory ORDER BY backend").fetchall()
+    assert rows == [("google",), ("offline",)]
+
+
+def test_offline_backend_without_phrases_reports_untranslated(tmp_path):
+    outcome = translate_document(
+        "Remove infected leaves.", PhrasebookBackend(phrasebook_path=tmp_path / "missing.json"),
+        "en", "es", memory=None, limiter=None
+    )
+
+    assert outcome["segments"]["untranslated"] == 1
+    assert outcome["segments"]["failed"] == 0
+
+
+def test_marian_splits_segments_over_the_token_limit():
+    backend = MarianBackend.__new__(MarianBackend)
+    backend.max_tokens = 4
+    segment = "one two three four five six seven"
+
+    chunks = backend._fit(WordTokenizer(), segment)
+
+    assert chunks == ["one two three", "four five six", "seven"]
+    assert backend._fit(WordTokenizer(), "short one") == ["short one"]
+
+
+def test_default_glossary_protects_disease_classes_but_not_generic_leaves(monkeypatch):
+    monkeypatch.delenv("TRANSLATION_GLOSSARY", raising=False)
+    default_glossary.cache_clear()
+    try:
+        masked, terms = default_glossary().mask("Inspect each cherry leaf and apple leaf for Apple Scab Leaf.")
+    finally:
+        default_glossary.cache_clear()
+
+    assert terms == ("Apple Scab Leaf",)
+    assert "cherry leaf" in masked and "apple leaf" in masked
@@ -0,0 +1,57 @@
+import os
+
+from precision_agronomist.analytics.cache import DataVersionTracker, TrendCache
+from precision_agronomist.storage.database import connect, init_database, insert_detections
+
+
+def rows_at(timestamp, count):
+    return [
+        ("s1", timestamp, f"img_{timestamp}_{i}.jpg", "Tomato_Early_blight",
+         0.9, None, None, None, None, "high", None, "farm-1", None)
+        for i in range(count)
+    ]
+
+
+def test_write_from_another_connection_invalidates_cached_result(tmp_path):
+    db_path = tmp_path / "detections.db"
+    init_database(db_path)
+    tracker = DataVersionTracker()
+    cache = TrendCache()
+    key = ("trend", "farm-1", 7)
+    try:
+        version = tracker.version(db_path)
+        cache.put(key, version, "cached trend")
+        # Nothing committed since: same version, served from the cache
+        assert tracker.version(db_path) == version
+        assert cache.get(key, tracker.version(db_path)) == "cached trend"
+
+        writer = connect(db_path)
+        with writer:
+            insert_detections(writer, rows_at("2024-05-01T10:05:00", 3))
+        writer.close()
+
+        new_version = tracker.version(db_path)
+        assert new_version != version
+        assert cache.get(key, new_version) is None
+        assert cache.stats()["invalidations"] == 1
+        assert cache.get(key, version) is None
+    finally:
+        tracker.close()
+
+
+def test_replaced_or_missing_database_changes_version(tmp_path):
+    db_path = tmp_path / "detections.db"
+    init_database(db_path)
+    tracker = DataVersionTracker()
+    try:
+        version = tracker.version(db_path)
+
+        replacement = tmp_path / "restored.db"
+        init_database(replacement)
+        os.replace(replacement, db_path)
+        assert tracker.version(db_path) != version
+
+        os.remove(db_path)
+        assert tracker.version(db_path) is None
+    finally:
+        tracker.close()
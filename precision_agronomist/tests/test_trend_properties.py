@@ -0,0 +1,150 @@
+"""Randomized checks of the fast trend paths against brute-force SQL over raw detections"""
+from datetime import date, timedelta
+import random
+
+import numpy as np
+import pytest
+
+from precision_agronomist.analytics.timeseries import daily_matrix, rolling_mean, week_over_week
+from precision_agronomist.analytics.trends import (
+    compute_trend_stats, query_daily_class_counts, query_trend_aggregates, query_window_totals
+)
+from precision_agronomist.storage.backends import SQLiteBackend
+from precision_agronomist.storage.database import connect, init_database, insert_detections
+
+
+CLASSES = ("Tomato_Early_blight", "Tomato_Late_blight", "Potato_healthy")
+SEVERITIES = ("high", "moderate", "low", None)
+FARMS = ("farm-1", "farm-2", None)
+FIELDS = ("north", "south", None)
+FIRST_DAY = date(2024, 1, 1)
+DAYS = 60
+
+
+def random_rows(rng, count, first_day=FIRST_DAY, days=DAYS):
+    rows = []
+    for _ in range(count):
+        day = first_day + timedelta(days=rng.randrange(days))
+        rows.append((
+            f"s{rng.randrange(5)}", f"{day.isoformat()}T{rng.randrange(24):02d}:00:00",
+            f"img_{rng.randrange(40)}.jpg", rng.choice(CLASSES), round(rng.uniform(0.3, 1.0), 3),
+            None, None, None, None, rng.choice(SEVERITIES), None,
+            rng.choice(FARMS), rng.choice(FIELDS)
+        ))
+    return rows
+
+
+@pytest.fixture(params=range(5))
+def history(request, tmp_path):
+    """A database filled in arrival order, with back-dated batches and deletes mixed in"""
+    rng = random.Random(request.param)
+    db_path = tmp_path / "history.db"
+    init_database(db_path)
+    conn = connect(db_path)
+    for batch in range(8):
+        # Live ingest moves forward in time; every other batch is back-dated into the past
+        if batch % 2:
+            rows = random_rows(rng, rng.randrange(5, 40))
+        else:
+            rows = random_rows(rng, rng.randrange(5, 40), FIRST_DAY + timedelta(days=batch * 7), 7)
+        with conn:
+            insert_detections(conn, rows, on_duplicate="upsert")
+        if batch == 5:
+            with conn:
+                conn.execute("DELETE FROM detections WHERE id % 7 = 0")
+    yield rng, db_path, conn
+    conn.close()
+
+
+def random_window(rng):
+    first = FIRST_DAY + timedelta(days=rng.randrange(-5, DAYS))
+    last = first + timedelta(days=rng.randrange(0, 30))
+    return first.isoformat(), last.isoformat()
+
+
+@pytest.mark.parametrize("farm_id, field_id", [(None, None), ("farm-1", None), ("farm-2", "north")])
+def test_window_totals_match_raw_aggregation(history, farm_id, field_id):
+    rng, db_path, conn = history
+    windows = [random_window(rng) for _ in range(20)]
+
+    with SQLiteBackend(db_path) as backend:
+        fast = query_window_totals(backend, windows, farm_id, field_id)
+
+    for (first, last), rows in zip(windows, fast):
+        expected = conn.execute("""
+            SELECT disease_class, COUNT(*), SUM(confidence),
+                   COUNT(CASE WHEN severity = 'high' THEN 1 END),
+                   COUNT(CASE WHEN severity = 'moderate' THEN 1 END),
+                   COUNT(CASE WHEN severity = 'low' THEN 1 END)
+            FROM detections
+            WHERE substr(timestamp, 1, 10) BETWEEN ? AND ?
+              AND (?3 IS NULL OR farm_id = ?3) AND (?4 IS NULL OR field_id = ?4)
+            GROUP BY disease_class
+        """, (first, last, farm_id, field_id)).fetchall()
+        got = {row[0]: row for row in rows}
+        assert set(got) == {row[0] for row in expected}
+        for row in expected:
+            assert got[row[0]][1] == row[1]
+            assert got[row[0]][2] == pytest.approx(row[2])
+            assert tuple(got[row[0]][3:]) == tuple(row[3:])
+
+
+def test_distinct_window_totals_count_each_image_once(history):
+    rng, db_path, conn = history
+    windows = [random_window(rng) for _ in range(10)]
+
+    with SQLiteBackend(db_path) as backend:
+        fast = query_window_totals(backend, windows, distinct_images=True)
+
+    for (first, last), rows in zip(windows, fast):
+        expected = dict(conn.execute("""
+            SELECT disease_class, COUNT(DISTINCT COALESCE(image_hash, image_path))
+            FROM detections
+            WHERE substr(timestamp, 1, 10) BETWEEN ? AND ?
+            GROUP BY disease_class
+        """, (first, last)).fetchall())
+        assert {row[0]: row[1] for row in rows} == expected
+
+
+def test_rollup_aggregates_match_single_scan(history):
+    rng, db_path, _ = history
+    for _ in range(5):
+        first, last = random_window(rng)
+        end = (date.fromisoformat(last) + timedelta(days=1)).isoformat()
+        for distinct in (False, True):
+            with SQLiteBackend(db_path) as backend:
+                fast = query_trend_aggregates(backend, first, distinct, use_rollups=True, end_timestamp=end)
+                raw = compute_trend_stats(backend, first, distinct, end_timestamp=end)
+            assert tuple(fast["overall_stats"]) == tuple(raw["overall_stats"])
+            assert sorted((r[0], r[1], r[3]) for r in fast["disease_frequency"]) == \
+                sorted((r[0], r[1], r[3]) for r in raw["disease_frequency"])
+            assert sorted(map(tuple, fast["daily_class_trends"])) == sorted(map(tuple, raw["daily_class_trends"]))
+            assert dict(fast["severity_distribution"]) == dict(raw["severity_distribution"])
+
+
+def test_moving_averages_match_brute_force(history):
+    rng, db_path, conn = history
+    last_day = FIRST_DAY + timedelta(days=DAYS - 1)
+    with SQLiteBackend(db_path) as backend:
+        rows = query_daily_class_counts(backend, FIRST_DAY.isoformat())
+    _, classes, counts = daily_matrix(rows, FIRST_DAY, last_day)
+    means = rolling_mean(counts, 7)
+    recent, previous, _, _ = week_over_week(counts, 7)
+
+    def window_mean(disease_class, end, days=7):
+        start = end - timedelta(days=days - 1)
+        total = conn.execute("""
+            SELECT COUNT(*) FROM detections
+            WHERE disease_class = ? AND substr(timestamp, 1, 10) BETWEEN ? AND ?
+        """, (disease_class, start.isoformat(), end.isoformat())).fetchone()[0]
+        return total / days
+
+    for _ in range(30):
+        row = rng.randrange(len(classes))
+        day = rng.randrange(6, DAYS)
+        expected = window_mean(classes[row], FIRST_DAY + timedelta(days=day))
+        assert means[row, day] == pytest.approx(expected)
+    for row, disease_class in enumerate(classes):
+        assert recent[row] == pytest.approx(window_mean(disease_class, last_day))
+        assert previous[row] == pytest.approx(window_mean(disease_class, last_day - timedelta(days=7)))
+    assert np.isnan(means[:, :6]).all()
@@ -0,0 +1,77 @@
+import sqlite3
+
+from precision_agronomist.analytics.trends import compute_trend_stats, query_trend_aggregates
+from precision_agronomist.storage.backends import SQLiteBackend
+from precision_agronomist.storage.database import ROLLUP_TABLES, init_database
+
+
+def create_legacy_database(db_path):
+    """A detections table from before farm/field columns and rollups existed"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE detections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            image_path TEXT NOT NULL,
+            disease_class TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            bbox_x1 REAL, bbox_y1 REAL, bbox_x2 REAL, bbox_y2 REAL,
+            severity TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO detections (session_id, timestamp, image_path, disease_class, confidence, severity) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [("s1", f"2024-05-0{1 + i % 3}T10:00:00", f"img_{i}.jpg", "Tomato_Early_blight", 0.8, "moderate")
+         for i in range(9)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migrated_legacy_database_serves_farm_queries_from_rollups(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    create_legacy_database(db_path)
+    init_database(db_path)
+
+    with SQLiteBackend(db_path) as backend:
+        assert backend.rollup_tables == set(ROLLUP_TABLES)
+        overall = query_trend_aggregates(backend, "2024-05-01", use_rollups=True)["overall_stats"]
+        farm = query_trend_aggregates(backend, "2024-05-01", farm_id="", use_rollups=True)["overall_stats"]
+
+    assert overall[0] == 9
+    assert farm[0] == 9
+
+
+def test_partial_rollups_fall_back_to_raw_rows_for_farm_scope(tmp_path):
+    db_path = tmp_path / "partial.db"
+    init_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO detections (session_id, timestamp, image_path, disease_class, confidence, severity, farm_id) "
+                 "VALUES ('s1', '2024-05-01T10:00:00', 'a.jpg', 'Tomato_Early_blight', 0.9, 'high', 'farm-1')")
+    conn.execute("DROP TABLE daily_field_class_stats")
+    conn.commit()
+    conn.close()
+
+    with SQLiteBackend(db_path) as backend:
+        assert backend.has_rollups
+        assert not backend.has_rollup("daily_field_class_stats", "daily_field_image_stats")
+        farm = query_trend_aggregates(backend, "2024-05-01", farm_id="farm-1")["overall_stats"]
+
+    assert farm[0] == 1
+
+
+def test_single_scan_works_without_materialized_hint(tmp_path):
+    db_path = tmp_path / "history.db"
+    create_legacy_database(db_path)
+    init_database(db_path)
+
+    with SQLiteBackend(db_path) as backend:
+        hinted = compute_trend_stats(backend, "2024-05-01")
+        backend.materialized_cte = False
+        plain = compute_trend_stats(backend, "2024-05-01")
+
+    assert plain == hinted
+    assert plain["overall_stats"][0] == 9
@@ -0,0 +1,197 @@
+from pathlib import Path
+import json
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from precision_agronomist.storage.database import connect
+from precision_agronomist.storage.write_behind import (
+    WriteBehindWriter, close_all, get_writer, release_writer
+)
+
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+def make_rows(count, session="s1", start=0):
+    return [
+        (session, f"2024-05-01T10:00:{i % 60:02d}", f"img_{start + i}.jpg", "Tomato_Early_blight",
+         0.9, None, None, None, None, "high", None, None, None)
+        for i in range(count)
+    ]
+
+
+def count_detections(db_path):
+    conn = connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield tmp_path / "detections.db"
+    close_all()
+
+
+def test_flush_commits_everything_submitted(db_path):
+    # Large batch and interval so nothing is written until flush() forces it
+    writer = WriteBehindWriter(db_path, batch_size=10_000, flush_interval_ms=60_000)
+    try:
+        for i in range(5):
+            writer.submit(make_rows(20, start=i * 20))
+        writer.flush(timeout=10)
+        assert count_detections(db_path) == 100
+        assert writer.pending() == 0
+    finally:
+        writer.close()
+
+
+def test_close_commits_pending_rows_and_removes_spill(db_path):
+    writer = WriteBehindWriter(db_path, batch_size=10_000, flush_interval_ms=60_000)
+    writer.submit(make_rows(50))
+    writer.close()
+
+    assert writer.closed
+    assert count_detections(db_path) == 50
+    assert not writer.spill_path.exists()
+    with pytest.raises(RuntimeError):
+        writer.submit(make_rows(1))
+
+
+def test_killed_process_rows_are_replayed_from_spill(db_path):
+    script = textwrap.dedent(f"""
+        import sys, time
+        from precision_agronomist.storage.write_behind import WriteBehindWriter
+        writer = WriteBehindWriter({str(db_path)!r}, batch_size=10_000, flush_interval_ms=600_000)
+        for i in range(3):
+            writer.submit([
+                ("s1", "2024-05-01T10:00:00", f"img_{{i}}_{{j}}.jpg", "Tomato_Early_blight",
+                 0.9, None, None, None, None, "high", None, None, None)
+                for j in range(40)
+            ])
+        print("queued", flush=True)
+        time.sleep(60)
+    """)
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    proc = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, env=env, text=True)
+    try:
+        assert proc.stdout.readline().strip() == "queued"
+    finally:
+        proc.send_signal(signal.SIGKILL)
+        proc.wait(timeout=10)
+
+    # Nothing reached the database before the kill; the spill holds all three batches
+    assert count_detections(db_path) == 0
+
+    writer = WriteBehindWriter(db_path)
+    writer.close()
+    assert count_detections(db_path) == 120
+
+    # A second start must not replay the same batches again
+    WriteBehindWriter(db_path).close()
+    assert count_detections(db_path) == 120
+
+
+def test_shared_writer_stays_open_until_last_release(db_path):
+    first = get_writer(db_path, batch_size=10_000, flush_interval_ms=60_000)
+    second = get_writer(db_path)
+    assert first is second
+
+    first.submit(make_rows(10))
+    release_writer(first)
+    assert not second.closed
+
+    second.submit(make_rows(10, start=10))
+    release_writer(second)
+    assert second.closed
+    assert count_detections(db_path) == 20
+
+
+def test_commit_listener_sees_only_committed_rows(db_path):
+    seen = []
+    writer = WriteBehindWriter(db_path, batch_size=10_000, flush_interval_ms=60_000)
+    writer.add_commit_listener(seen.extend)
+    writer.add_commit_listener(seen.extend)
+    try:
+        writer.submit(make_rows(7))
+        assert seen == []
+        writer.flush(timeout=10)
+        assert len(seen) == 7
+    finally:
+        writer.close()
+
+
+def test_commit_listener_skips_upsert_replacements(db_path):
+    seen = []
+    writer = WriteBehindWriter(db_path, on_duplicate="upsert")
+    writer.add_commit_listener(seen.extend)
+    analysis = [row[:10] + ("hash-a",) + row[11:] for row in make_rows(3)]
+    try:
+        writer.submit(analysis)
+        writer.flush(timeout=10)
+        writer.submit(analysis)
+        writer.flush(timeout=10)
+    finally:
+        writer.close()
+
+    assert len(seen) == 3
+    assert count_detections(db_path) == 3
+
+
+def test_submit_rejects_rows_sqlite_cannot_store(db_path):
+    writer = WriteBehindWriter(db_path)
+    bad = list(make_rows(1)[0])
+    bad[10] = ["not", "a", "hash"]
+
+    with pytest.raises(ValueError):
+        writer.submit([bad])
+    writer.submit(make_rows(2))
+    writer.close()
+
+    assert count_detections(db_path) == 2
+    assert not writer.spill_path.exists()
+
+
+def test_unexpected_commit_error_keeps_writer_alive(db_path, monkeypatch):
+    import precision_agronomist.storage.write_behind as write_behind
+
+    real_insert = write_behind.insert_detections
+    calls = {"n": 0}
+
+    def flaky_insert(*args):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise TypeError("boom")
+        return real_insert(*args)
+
+    monkeypatch.setattr(write_behind, "insert_detections", flaky_insert)
+    writer = WriteBehindWriter(db_path, flush_interval_ms=10)
+    writer.submit(make_rows(3))
+
+    with pytest.raises(RuntimeError, match="boom"):
+        writer.flush(timeout=5)
+    writer.flush(timeout=5)
+    writer.close(timeout=5)
+
+    assert count_detections(db_path) == 3
+
+
+def test_invalid_spilled_batch_is_skipped_on_replay(db_path, tmp_path):
+    spill = tmp_path / "detections.db.spill"
+    bad = list(make_rows(1)[0])
+    bad[10] = {"nested": True}
+    good = [list(row) for row in make_rows(2)]
+    spill.write_text(
+        json.dumps({"seq": 1, "rows": [bad]}) + "\n" + json.dumps({"seq": 2, "rows": good}) + "\n"
+    )
+
+    writer = WriteBehindWriter(db_path, spill_path=spill)
+    writer.close()
+
+    assert count_detections(db_path) == 2
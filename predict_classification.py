@@ -1,25 +1,52 @@
 """
 Standalone classification script - runs independently of CrewAI
 Avoids threading conflicts with TensorFlow
+
+Run with --serve to keep the model loaded and answer requests read as JSON
+lines on stdin (used by the API's warm model worker).
 """
+import os
 import sys
 import json
-import tensorflow as tf
+import time
 import numpy as np
 from pathlib import Path
-from tensorflow.keras.preprocessing import image as keras_image
-from tensorflow.keras.applications.resnet50 import preprocess_input
+
+
+def claim_protocol_stream():
+    """
+    Reserve stdout for protocol messages, sending everything else to stderr
+
+    Redirects at the file-descriptor level, so loggers and native libraries
+    that captured stdout when they were imported cannot write into the
+    protocol either. Must run before those libraries are imported.
+    """
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    return protocol
+
+
+# Serving: claim stdout before the ML imports below bind their log handlers to it
+PROTOCOL = claim_protocol_stream() if sys.argv[1:2] == ["--serve"] else None
+
+import tensorflow as tf  # noqa: E402
+from tensorflow.keras.preprocessing import image as keras_image  # noqa: E402
+from tensorflow.keras.applications.resnet50 import preprocess_input  # noqa: E402
 
 
 def classify_image(image_path, model_path, class_names_path):
-    """Classify a single image"""
+    """Classify a single image (model_path and class_names_path may also be a loaded model and list)"""
     try:
         # Load class names
-        with open(class_names_path, 'r') as f:
-            class_names = json.load(f)
+        if isinstance(class_names_path, list):
+            class_names = class_names_path
+        else:
+            with open(class_names_path, 'r') as f:
+                class_names = json.load(f)
         
         # Load model
-        model = tf.keras.models.load_model(model_path)
+        model = tf.keras.models.load_model(model_path) if isinstance(model_path, (str, Path)) else model_path
         
         # Load and preprocess image
         img = keras_image.load_img(image_path, target_size=(224, 224))
@@ -64,7 +91,46 @@ def classify_image(image_path, model_path, class_names_path):
         }
 
 
+def serve(model_path, class_names_path):
+    """
+    Load the model once, warm it up, then answer one JSON request per stdin line
+
+    Requests are {"id", "image"}; responses {"id", "result"} are written one
+    per line to stdout. Anything else printed while loading or predicting
+    goes to stderr so it cannot corrupt the protocol.
+    """
+    protocol = PROTOCOL or claim_protocol_stream()
+
+    def send(message):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    try:
+        started = time.perf_counter()
+        with open(class_names_path, 'r') as f:
+            class_names = json.load(f)
+        model = tf.keras.models.load_model(model_path)
+        loaded = time.perf_counter()
+        # Dummy forward pass at the input size builds the inference graph before real traffic
+        model.predict(np.zeros((1, 224, 224, 3), dtype=np.float32), verbose=0)
+        warmed = time.perf_counter()
+    except Exception as e:
+        send({"event": "error", "error": str(e)})
+        sys.exit(1)
+    send({"event": "ready", "load_seconds": loaded - started, "warmup_seconds": warmed - loaded})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        send({"id": request.get("id"), "result": classify_image(request["image"], model, class_names)})
+
+
 if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
     if len(sys.argv) != 4:
         print(json.dumps({"error": "Usage: python predict_classification.py <image_path> <model_path> <class_names_path>"}))
         sys.exit(1)
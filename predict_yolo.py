@@ -1,23 +1,49 @@
 """
 Standalone YOLO detection script - runs independently of CrewAI
 Avoids threading conflicts
+
+Run with --serve to keep the model loaded and answer requests read as JSON
+lines on stdin (used by the API's warm model worker).
 """
+import os
 import sys
 import json
-from ultralytics import YOLO
+import time
+import numpy as np
 from pathlib import Path
 
 
-def detect_diseases(image_path, model_path, conf_threshold=0.25, save_output=True):
-    """Detect diseases in image using YOLO"""
+def claim_protocol_stream():
+    """
+    Reserve stdout for protocol messages, sending everything else to stderr
+
+    Redirects at the file-descriptor level, so loggers and native libraries
+    that captured stdout when they were imported cannot write into the
+    protocol either. Must run before those libraries are imported.
+    """
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    return protocol
+
+
+# Serving: claim stdout before the ML imports below bind their log handlers to it
+PROTOCOL = claim_protocol_stream() if sys.argv[1:2] == ["--serve"] else None
+
+from ultralytics import YOLO  # noqa: E402
+
+
+def detect_diseases(image_path, model_path, conf_threshold=0.25, save_output=True, imgsz=640):
+    """Detect diseases in image using YOLO (model_path may also be a loaded YOLO model)"""
     try:
         # Load YOLO model
-        model = YOLO(model_path)
+        model = YOLO(model_path) if isinstance(model_path, (str, Path)) else model_path
         
         # Run detection
         results = model.predict(
             source=image_path,
             conf=conf_threshold,
+            imgsz=imgsz,
             save=save_output,
             project='artifacts/yolo_detection/predictions',
             name='crew_results',
@@ -66,7 +92,45 @@ def detect_diseases(image_path, model_path, conf_threshold=0.25, save_output=Tru
         }
 
 
+def serve(model_path, imgsz=640):
+    """
+    Load the model once, warm it up, then answer one JSON request per stdin line
+
+    Requests are {"id", "image", "conf"}; responses {"id", "result"} are
+    written one per line to stdout. Anything else printed while loading or
+    predicting goes to stderr so it cannot corrupt the protocol.
+    """
+    protocol = PROTOCOL or claim_protocol_stream()
+
+    def send(message):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    try:
+        started = time.perf_counter()
+        model = YOLO(model_path)
+        loaded = time.perf_counter()
+        # Dummy forward pass at the serving size builds the inference graph before real traffic
+        model.predict(source=np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, save=False, verbose=False)
+        warmed = time.perf_counter()
+    except Exception as e:
+        send({"event": "error", "error": str(e)})
+        sys.exit(1)
+    send({"event": "ready", "load_seconds": loaded - started, "warmup_seconds": warmed - loaded})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        result = detect_diseases(request["image"], model, request.get("conf", 0.25), imgsz=imgsz)
+        send({"id": request.get("id"), "result": result})
+
+
 if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 640)
+        sys.exit(0)
+
     if len(sys.argv) < 3:
         print(json.dumps({"error": "Usage: python predict_yolo.py <image_path> <model_path> [conf_threshold]"}))
         sys.exit(1)
@@ -4,6 +4,7 @@ import cv2
 from pathlib import Path
 from src.plant_detection.entity.config_entity import DataTransformationConfig
 from src.plant_detection import logger
+from src.plant_detection.utils.manifest import ValidationManifest
 from typing import Tuple, Optional
 import os
 
@@ -93,14 +94,33 @@ class DataTransformation:
         image_files = list(Path(source_dir).glob("*.jpg"))
         logger.info(f"Found {len(image_files)} images in {source_dir}")
         
+        # Images unchanged since they were transformed with these settings are skipped
+        manifest = ValidationManifest(self.config.manifest_file) if Path(self.config.manifest_file).exists() else None
+        stage_prefix = f"data_transformation:{Path(target_dir).as_posix()}:"
+        stage = (
+            f"{stage_prefix}{self.config.model_name}:"
+            f"{self.config.normalization_method}:{tuple(self.config.image_size)}"
+        )
+        if manifest:
+            manifest.prune_stages(stage_prefix, stage)
+        unchanged = manifest.unchanged(stage, image_files) if manifest else set()
+        
         transformed_images = []
+        processed_sources = []
+        skipped = 0
         
         for idx, img_path in enumerate(image_files):
             try:
-                transformed_img = self._load_and_preprocess_image(img_path)
                 output_path = Path(target_dir) / f"{img_path.stem}.npy"
+                if ValidationManifest.key(img_path) in unchanged and output_path.exists():
+                    transformed_images.append(str(output_path))
+                    skipped += 1
+                    continue
+                
+                transformed_img = self._load_and_preprocess_image(img_path)
                 np.save(output_path, transformed_img)
                 transformed_images.append(str(output_path))
+                processed_sources.append(img_path)
                 
                 if idx % 100 == 0:
                     logger.info(f"Transformed {idx}/{len(image_files)} images")
@@ -109,6 +129,11 @@ class DataTransformation:
                 logger.error(f"Error processing {img_path}: {e}")
                 continue
         
+        if manifest and processed_sources:
+            manifest.mark_processed(stage, processed_sources)
+        if skipped:
+            logger.info(f"Skipped {skipped} images unchanged since the last transformation")
+        
         annotations.to_csv(Path(target_dir) / "annotations.csv", index=False)
         logger.info(f"Saved annotations to {target_dir}/annotations.csv")
         
@@ -1,45 +1,314 @@
 from src.plant_detection.entity.config_entity import DataValidationConfig
 from pathlib import Path
 from src.plant_detection import logger
+from src.plant_detection.utils.manifest import ValidationManifest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from typing import Dict, List
+from PIL import Image
+import pandas as pd
+import hashlib
+import json
+import os
+import time
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+ANNOTATIONS_FILE = '_annotations.csv'
+
+# Images handed to one pool task; keeps the number of futures small on very large datasets
+BATCH_SIZE = 256
+
+# Longest list of file names kept per problem category in the JSON report (counts are always complete)
+MAX_LISTED = 1000
+
 
 class DataValidation:
     def __init__(self, config: DataValidationConfig):
         self.config = config
+        self.manifest = ValidationManifest(config.MANIFEST_FILE)
+
+    def _splits(self) -> Dict[str, Path]:
+        return {
+            'train': Path(self.config.train_data),
+            'test': Path(self.config.test_data),
+            'valid': Path(self.config.val_data)
+        }
+
+    def _scan_split(self, data_dir) -> Dict:
+        """List a split directory in one os.scandir pass: images, annotation CSVs and anything else"""
+        images = {}
+        annotations = []
+        other = 0
+        if not os.path.isdir(data_dir):
+            return {'images': images, 'annotations': annotations, 'other': other}
+
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                suffix = os.path.splitext(entry.name)[1].lower()
+                if suffix in IMAGE_EXTENSIONS:
+                    images[entry.name] = entry.path
+                elif suffix == '.csv':
+                    annotations.append(entry.path)
+                else:
+                    other += 1
+        return {'images': images, 'annotations': annotations, 'other': other}
 
     def _count_files(self, data_dir):
-        data_path = Path(data_dir)
-        image_count = 0
-        annotation_count = 0
+        scan = self._scan_split(data_dir)
+        return len(scan['images']), len(scan['annotations'])
 
-        for file in data_path.iterdir():
-            if file.suffix == '.jpg':
-                image_count += 1
-            elif file.suffix == '.csv':
-                annotation_count += 1
-        return image_count, annotation_count
+    @staticmethod
+    def _check_header(data: bytes, suffix: str):
+        """Reject files whose signature does not match their extension, or JPEGs cut short"""
+        if suffix in ('.jpg', '.jpeg'):
+            if not data.startswith(b'\xff\xd8\xff'):
+                return "not a JPEG file (bad signature)"
+            # Allow trailing padding some encoders append after the end-of-image marker
+            if b'\xff\xd9' not in data[-1024:]:
+                return "truncated JPEG (no end-of-image marker)"
+        elif suffix == '.png' and not data.startswith(b'\x89PNG\r\n\x1a\n'):
+            return "not a PNG file (bad signature)"
+        return None
 
-    def validate_files_present(self):
-        train_image_count, train_annotation_count = self._count_files(self.config.train_data)
-        test_image_count, test_annotation_count = self._count_files(self.config.test_data)
-        val_image_count, val_annotation_count = self._count_files(self.config.val_data)
+    def _check_image(self, path: str, stat: os.stat_result) -> Dict:
+        """Hash one image and check its header and, if configured, that it fully decodes"""
+        result = {
+            'path': ValidationManifest.key(path), 'file': os.path.basename(path),
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': None,
+            'width': None, 'height': None, 'valid': False, 'decoded': False, 'error': None
+        }
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            result['sha256'] = hashlib.sha256(data).hexdigest()
+            if not data:
+                result['error'] = "empty file"
+                return result
+            result['error'] = self._check_header(data, os.path.splitext(path)[1].lower())
+            if result['error']:
+                return result
+
+            with Image.open(BytesIO(data)) as image:
+                result['width'], result['height'] = image.size
+                if self.config.decode_images:
+                    # Decoding at reduced scale still reads every compressed block, so
+                    # corrupt data is caught at a fraction of the full decode cost
+                    image.draft(image.mode, (max(1, image.width // 8), max(1, image.height // 8)))
+                    image.load()
+                    result['decoded'] = True
+            result['valid'] = True
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+        return result
+
+    def _check_images(self, paths: List[str], known: Dict[str, dict]) -> List[Dict]:
+        """Check a batch of images, reusing manifest rows of files unchanged since they were checked"""
+        results = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                results.append({'path': ValidationManifest.key(path), 'file': os.path.basename(path),
+                                'valid': False, 'error': str(e), 'missing': True, 'reused': False})
+                continue
+            row = known.get(ValidationManifest.key(path))
+            if (
+                row and row['size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns
+                and (row['decoded'] or not self.config.decode_images or not row['valid'])
+            ):
+                results.append({**row, 'file': os.path.basename(path), 'valid': bool(row['valid']), 'reused': True})
+            else:
+                results.append({**self._check_image(path, stat), 'reused': False})
+        return results
+
+    @staticmethod
+    def _hash_file(path: str, stat: os.stat_result) -> Dict:
+        """Manifest row of a non-image file: just its hash"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return {
+            'path': ValidationManifest.key(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': digest.hexdigest(), 'width': None, 'height': None, 'valid': True, 'decoded': False, 'error': None
+        }
+
+    def _check_annotations(self, csv_paths: List[str], image_names) -> Dict:
+        """Cross-check annotation rows against the split's image files"""
+        annotations_path = next((p for p in csv_paths if os.path.basename(p) == ANNOTATIONS_FILE), None)
+        if annotations_path is None:
+            return {'file': None, 'error': f"{ANNOTATIONS_FILE} not found"}
+
+        try:
+            filenames = pd.read_csv(annotations_path, usecols=['filename'], dtype=str)['filename']
+        except ValueError as e:
+            return {'file': annotations_path, 'error': f"unreadable annotations: {e}"}
+
+        annotated = set(filenames.dropna())
+        images = set(image_names)
+        missing = annotated - images
+        return {
+            'file': annotations_path,
+            'error': None,
+            'rows': int(len(filenames)),
+            'rows_without_filename': int(filenames.isna().sum()),
+            'rows_with_missing_image': int(filenames.isin(missing).sum()),
+            'annotated_images': len(annotated & images),
+            'missing_images': sorted(missing),
+            'unannotated_images': sorted(images - annotated)
+        }
+
+    def _validate_split(self, name: str, data_dir: Path, executor: ThreadPoolExecutor) -> Dict:
+        started = time.perf_counter()
+        scan = self._scan_split(data_dir)
+        known = self.manifest.split_entries(name)
+        paths = list(scan['images'].values())
+        batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
 
+        corrupt = []
+        dimensions = {}
+        changed = []
+        reused = 0
+        for batch in executor.map(lambda batch: self._check_images(batch, known), batches):
+            for result in batch:
+                if result['reused']:
+                    reused += 1
+                elif not result.get('missing'):
+                    changed.append(result)
+                if result['valid']:
+                    key = f"{result['width']}x{result['height']}"
+                    dimensions[key] = dimensions.get(key, 0) + 1
+                else:
+                    corrupt.append({'file': result['file'], 'error': result['error']})
+
+        annotations = self._check_annotations(scan['annotations'], scan['images'])
+        for csv_path in scan['annotations']:
+            stat = os.stat(csv_path)
+            row = known.get(ValidationManifest.key(csv_path))
+            if not row or row['size'] != stat.st_size or row['mtime_ns'] != stat.st_mtime_ns:
+                changed.append(self._hash_file(csv_path, stat))
+        present = [ValidationManifest.key(path) for path in paths + scan['annotations']]
+        self.manifest.update_split(name, changed, present)
+
+        corrupt.sort(key=lambda item: item['file'])
+        problems = bool(corrupt) or annotations['error'] is not None or bool(annotations.get('missing_images'))
+        return {
+            'path': str(data_dir),
+            'exists': os.path.isdir(data_dir),
+            'valid': os.path.isdir(data_dir) and bool(paths) and not problems,
+            'images': len(paths),
+            'valid_images': len(paths) - len(corrupt),
+            'corrupt_images': len(corrupt),
+            'rechecked_files': len(changed),
+            'reused_from_manifest': reused,
+            'annotation_files': len(scan['annotations']),
+            'other_files': scan['other'],
+            'corrupt': corrupt[:MAX_LISTED],
+            'dimensions': dict(sorted(dimensions.items(), key=lambda item: -item[1])),
+            'annotations': {
+                **annotations,
+                'missing_images': annotations.get('missing_images', [])[:MAX_LISTED],
+                'unannotated_images': annotations.get('unannotated_images', [])[:MAX_LISTED],
+                'missing_image_count': len(annotations.get('missing_images', [])),
+                'unannotated_image_count': len(annotations.get('unannotated_images', []))
+            },
+            'duration_seconds': round(time.perf_counter() - started, 3)
+        }
+
+    def validate_dataset(self) -> Dict:
+        """
+        Check every split and write the JSON report and the status file
+
+        Splits are scanned concurrently and their images checked on a shared
+        thread pool of ``num_workers`` threads (image decoding releases the
+        GIL). Each image must have a signature matching its extension and,
+        with ``decode_images``, decode completely; each split's
+        _annotations.csv is cross-checked against the image files.
+
+        Results are kept in the manifest (MANIFEST_FILE); an image whose size
+        and mtime match its manifest row is not read again, so a repeat run
+        costs a stat per file plus the work on new or changed files.
+
+        Returns:
+            The report; ``valid`` is False if any split is missing, empty,
+            has corrupt images or annotations naming files that do not exist
+        """
+        started = time.perf_counter()
+        workers = self.config.num_workers or os.cpu_count() or 4
+        logger.info(f"Validating dataset with {workers} worker threads (decode_images={self.config.decode_images})")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor, ThreadPoolExecutor(max_workers=3) as split_executor:
+            futures = {
+                name: split_executor.submit(self._validate_split, name, data_dir, executor)
+                for name, data_dir in self._splits().items()
+            }
+            splits = {name: future.result() for name, future in futures.items()}
+
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            'valid': all(split['valid'] for split in splits.values()),
+            'decode_images': self.config.decode_images,
+            'workers': workers,
+            'duration_seconds': round(time.perf_counter() - started, 3),
+            'totals': {
+                'images': sum(split['images'] for split in splits.values()),
+                'corrupt_images': sum(split['corrupt_images'] for split in splits.values()),
+                'missing_images': sum(split['annotations']['missing_image_count'] for split in splits.values()),
+                'unannotated_images': sum(split['annotations']['unannotated_image_count'] for split in splits.values())
+            },
+            'splits': splits
+        }
+
+        report_path = Path(self.config.REPORT_FILE)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        self._write_status(splits)
+
+        for name, split in splits.items():
+            logger.info(
+                f"{name}: {split['images']} images, {split['corrupt_images']} corrupt, "
+                f"{split['annotations']['missing_image_count']} annotated but missing, "
+                f"{split['annotations']['unannotated_image_count']} unannotated ({split['duration_seconds']}s)"
+            )
+        logger.info(f"Data validation report written to {report_path.resolve()} in {report['duration_seconds']}s")
+        if not report['valid']:
+            message = f"Dataset validation found problems, see {report_path}"
+            if self.config.fail_on_error:
+                raise ValueError(message)
+            logger.warning(message)
+        return report
+
+    def _write_status(self, splits: Dict):
         # Ensure directory exists for status file
         status_path = Path(self.config.STATUS_FILE)
         status_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Write only counts to status file, not actual file names
+        sections = [('train', 'Training', 'train'), ('test', 'Test', 'test'), ('valid', 'Validation', 'validation')]
         with open(status_path, 'w') as f:
-            f.write(f">>>>>>>>>>>>>>> Training Image Data Counts <<<<<<<<<<<<<<<<\n")
-            f.write(f"Total train images: {train_image_count}\n")
-            f.write(f"Total train annotations: {train_annotation_count}\n\n")
-
-            f.write(f">>>>>>>>>>>>>>> Test Image Data Counts <<<<<<<<<<<<<<<<\n")
-            f.write(f"Total test images: {test_image_count}\n")
-            f.write(f"Total test annotations: {test_annotation_count}\n\n")
-
-            f.write(f">>>>>>>>>>>>>>> Validation Image Data Counts <<<<<<<<<<<<<<<<\n")
-            f.write(f"Total validation images: {val_image_count}\n")
-            f.write(f"Total validation annotations: {val_annotation_count}\n")
+            for name, title, label in sections:
+                split = splits[name]
+                f.write(f">>>>>>>>>>>>>>> {title} Image Data Counts <<<<<<<<<<<<<<<<\n")
+                f.write(f"Total {label} images: {split['images']}\n")
+                f.write(f"Total {label} annotations: {split['annotation_files']}\n")
+                if 'corrupt_images' in split:
+                    f.write(f"Corrupt {label} images: {split['corrupt_images']}\n")
+                    f.write(f"Annotated {label} images missing: {split['annotations']['missing_image_count']}\n")
+                if name != 'valid':
+                    f.write("\n")
 
         logger.info(f"Data validation status written to {status_path.resolve()}")
-        return any([train_image_count, train_annotation_count, test_image_count, test_annotation_count, val_image_count, val_annotation_count])
+
+    def validate_files_present(self):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            counts = dict(zip(self._splits(), executor.map(self._scan_split, self._splits().values())))
+        splits = {
+            name: {'images': len(scan['images']), 'annotation_files': len(scan['annotations'])}
+            for name, scan in counts.items()
+        }
+        self._write_status(splits)
+        return any(split['images'] or split['annotation_files'] for split in splits.values())
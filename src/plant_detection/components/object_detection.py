@@ -3,6 +3,8 @@ import pandas as pd
 from pathlib import Path
 from src.plant_detection.entity.config_entity import ModelTrainingConfig
 from src.plant_detection import logger
+from src.plant_detection.utils.manifest import ValidationManifest
+import hashlib
 import json
 import os
 import pandas as pd
@@ -67,7 +69,21 @@ class YOLODataConverter:
         unique_files = df['filename'].unique()
         print(f"Processing {len(unique_files)} images...")
         
+        # Images unchanged since they were converted with the same annotations and classes are skipped
+        manifest_file = Path(self.config_modelTrain.manifest_file)
+        manifest = ValidationManifest(manifest_file) if manifest_file.exists() else None
+        annotations_row = manifest.current([annotations_csv]).get(ValidationManifest.key(annotations_csv)) if manifest else None
+        unchanged = set()
+        if annotations_row:
+            classes_digest = hashlib.sha256("\n".join(map(str, self.class_names)).encode()).hexdigest()[:16]
+            stage_prefix = f"yolo_conversion:{output_path.as_posix()}:"
+            stage = f"{stage_prefix}{annotations_row['sha256'][:16]}:{classes_digest}"
+            manifest.prune_stages(stage_prefix, stage)
+            unchanged = manifest.unchanged(stage, [input_path / filename for filename in unique_files])
+        
         converted_count = 0
+        skipped_count = 0
+        converted_sources = []
         for filename in unique_files:
             # Get all annotations for this image
             image_annotations = df[df['filename'] == filename]
@@ -86,11 +102,15 @@ class YOLODataConverter:
             
             # Copy image to YOLO images directory
             dest_image = images_dir / source_image.name
+            label_file = labels_dir / f"{source_image.stem}.txt"
+            if ValidationManifest.key(source_image) in unchanged and dest_image.exists() and label_file.exists():
+                converted_count += 1
+                skipped_count += 1
+                continue
             shutil.copy2(source_image, dest_image)
+            converted_sources.append(source_image)
             
             # Create YOLO label file
-            label_file = labels_dir / f"{source_image.stem}.txt"
-            
             with open(label_file, 'w') as f:
                 for _, row in image_annotations.iterrows():
                     # Get image dimensions
@@ -120,7 +140,10 @@ class YOLODataConverter:
             if converted_count % 100 == 0:
                 print(f"  Converted {converted_count}/{len(unique_files)} images")
         
-        print(f"Converted {converted_count} images for {split}")
+        if annotations_row and converted_sources:
+            manifest.mark_processed(stage, converted_sources)
+        
+        print(f"Converted {converted_count} images for {split}" + (f" ({skipped_count} unchanged, skipped)" if skipped_count else ""))
         return converted_count
     
     def create_yaml_config(self, yaml_path: str):
@@ -24,9 +24,14 @@ class ConfigurationManager:
         data_validation_config = DataValidationConfig(
             root_dir=config.root_dir,
             STATUS_FILE=config.STATUS_FILE,
+            REPORT_FILE=config.REPORT_FILE,
+            MANIFEST_FILE=config.MANIFEST_FILE,
             train_data=config.train_data,
             test_data=config.test_data,
-            val_data=config.val_data
+            val_data=config.val_data,
+            num_workers=config.num_workers,
+            decode_images=config.decode_images,
+            fail_on_error=config.fail_on_error
         )
 
         return data_validation_config
@@ -58,6 +63,7 @@ class ConfigurationManager:
             train_data=Path(data_val_config.train_data),
             test_data=Path(data_val_config.test_data),
             val_data=Path(data_val_config.val_data),
+            manifest_file=Path(data_val_config.MANIFEST_FILE),
             image_size=tuple(config.image_size),
             normalization_method=config.normalization_method,
             model_name=config.model_name,
@@ -88,6 +94,7 @@ class ConfigurationManager:
             train_data=Path(config.train_data),
             test_data=Path(config.test_data),
             val_data=Path(config.val_data),
+            manifest_file=Path(self.config.data_validation.MANIFEST_FILE),
             model_name=config.model_name,
             image_size=tuple(config.image_size),
             num_classes=config.num_classes,
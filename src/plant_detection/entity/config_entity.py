@@ -5,9 +5,14 @@ from pathlib import Path
 class DataValidationConfig:
     root_dir: Path
     STATUS_FILE: str
+    REPORT_FILE: str
+    MANIFEST_FILE: str
     train_data: Path
     test_data: Path
     val_data: Path
+    num_workers: int  # 0 = one per CPU
+    decode_images: bool
+    fail_on_error: bool
 
 @dataclass(frozen=True)
 class DataTransformationConfig:
@@ -18,6 +23,7 @@ class DataTransformationConfig:
     train_data: Path  # source
     test_data: Path   # source
     val_data: Path    # source
+    manifest_file: Path  # data validation manifest, used to skip unchanged images
     image_size: tuple
     normalization_method: str
     model_name: str
@@ -36,6 +42,7 @@ class ModelTrainingConfig:
     train_data: Path  # Raw training data for YOLO
     test_data: Path   # Raw test data for YOLO
     val_data: Path    # Raw validation data for YOLO
+    manifest_file: Path  # data validation manifest, used to skip unchanged images
     model_name: str
     image_size: tuple
     num_classes: int
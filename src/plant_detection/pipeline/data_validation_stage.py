@@ -11,4 +11,4 @@ class DataValidationTrainingPipeline:
         config = ConfigurationManager()
         data_validation_config = config.get_data_validation_config()
         data_validation = DataValidation(config=data_validation_config)
-        data_validation.validate_files_present()
\ No newline at end of file
+        data_validation.validate_dataset()
\ No newline at end of file
@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        split TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        sha256 TEXT,
+        width INTEGER,
+        height INTEGER,
+        valid INTEGER NOT NULL,
+        decoded INTEGER NOT NULL,
+        error TEXT,
+        checked_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_files_split ON files(split)",
+    # Content hash each input had when a later stage last processed it
+    """CREATE TABLE IF NOT EXISTS processed (
+        stage TEXT NOT NULL,
+        path TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        processed_at REAL NOT NULL,
+        PRIMARY KEY (stage, path)
+    )""",
+)
+
+
+class ValidationManifest:
+    """
+    Per-file record of the dataset as last validated
+
+    Holds one row per image and annotation file: size, mtime, SHA-256,
+    decoded dimensions and whether it passed validation. DataValidation
+    reuses a row while the file's size and mtime are unchanged, so a repeat
+    run only rehashes and re-decodes new or modified files.
+
+    Later stages record the content hash each input had when they processed
+    it (``mark_processed``), and skip inputs whose hash has not changed since
+    (``unchanged``). The stage name should capture every setting the output
+    depends on, so changing one reprocesses everything; ``prune_stages``
+    then drops the rows recorded under the old settings.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect(write=True) as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    @staticmethod
+    def key(path) -> str:
+        """Manifest key of a path, the same however the path was spelled"""
+        return os.path.normpath(str(path))
+
+    @contextmanager
+    def _connect(self, write: bool = False):
+        """Connection for one call; writes run in a BEGIN IMMEDIATE transaction so concurrent splits queue up"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not write:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def split_entries(self, split: str) -> Dict[str, dict]:
+        """Rows for one split, keyed by path"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM files WHERE split = ?", (split,)).fetchall()
+        return {row['path']: dict(row) for row in rows}
+
+    def entry(self, path) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM files WHERE path = ?", (self.key(path),)).fetchone()
+        return dict(row) if row else None
+
+    def update_split(self, split: str, entries: Iterable[dict], present: Iterable[str]):
+        """Upsert new or changed rows and drop rows of files no longer in the split"""
+        present = set(present)
+        now = time.time()
+        with self._connect(write=True) as conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO files
+                   (path, split, size, mtime_ns, sha256, width, height, valid, decoded, error, checked_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (e['path'], split, e['size'], e['mtime_ns'], e['sha256'], e['width'], e['height'],
+                     int(e['valid']), int(e['decoded']), e['error'], now)
+                    for e in entries
+                ]
+            )
+            stale = [
+                (row[0],) for row in conn.execute("SELECT path FROM files WHERE split = ?", (split,))
+                if row[0] not in present
+            ]
+            conn.executemany("DELETE FROM files WHERE path = ?", stale)
+            conn.executemany("DELETE FROM processed WHERE path = ?", stale)
+
+    def current(self, paths: Iterable) -> Dict[str, dict]:
+        """Rows of the given files that still match the file on disk (size and mtime), keyed by path"""
+        rows = {}
+        with self._connect() as conn:
+            for path in paths:
+                key = self.key(path)
+                row = conn.execute("SELECT * FROM files WHERE path = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if row['size'] == stat.st_size and row['mtime_ns'] == stat.st_mtime_ns:
+                    rows[key] = dict(row)
+        return rows
+
+    def unchanged(self, stage: str, paths: Iterable) -> set:
+        """
+        Paths the stage already processed with their current content
+
+        Args:
+            stage: Stage name (including the settings its output depends on)
+            paths: Input files to check
+
+        Returns:
+            Manifest keys (see ``key``) of the inputs the stage can skip
+        """
+        rows = self.current(paths)
+        with self._connect() as conn:
+            processed = dict(conn.execute("SELECT path, sha256 FROM processed WHERE stage = ?", (stage,)).fetchall())
+        return {key for key, row in rows.items() if row['sha256'] and processed.get(key) == row['sha256']}
+
+    def mark_processed(self, stage: str, paths: Iterable):
+        """Record the current content hash of inputs the stage has processed"""
+        now = time.time()
+        rows = [(stage, key, row['sha256'], now) for key, row in self.current(paths).items() if row['sha256']]
+        with self._connect(write=True) as conn:
+            conn.executemany("INSERT OR REPLACE INTO processed (stage, path, sha256, processed_at) VALUES (?, ?, ?, ?)", rows)
+
+    def prune_stages(self, prefix: str, current: str) -> int:
+        """
+        Drop processed rows of stages sharing a prefix with the current one
+
+        Rows recorded under earlier settings of a stage can never be skipped
+        on again, and their outputs have since been overwritten.
+
+        Args:
+            prefix: Leading part of the stage name that stays the same across settings
+            current: Stage name of the settings in use, whose rows are kept
+
+        Returns:
+            Number of rows removed
+        """
+        with self._connect(write=True) as conn:
+            return conn.execute(
+                "DELETE FROM processed WHERE substr(stage, 1, ?) = ? AND stage != ?",
+                (len(prefix), prefix, current)
+            ).rowcount
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import the pipeline as src.plant_detection, the way main.py does from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.plant_detection.entity.config_entity import DataValidationConfig  # noqa: E402
+
+SPLITS = ('train', 'test', 'valid')
+ANNOTATION_HEADER = "filename,width,height,class,xmin,ymin,xmax,ymax\n"
+
+
+@pytest.fixture
+def write_image():
+    """Writes a small solid-colour image, in the format its extension names"""
+    Image = pytest.importorskip("PIL.Image")
+
+    def write(path, color=(40, 160, 60), size=(32, 24)):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", size, color).save(path)
+        return Path(path)
+    return write
+
+
+def write_annotations(split_dir, filenames, cls="Tomato leaf"):
+    """_annotations.csv with one box per file name"""
+    with open(Path(split_dir) / "_annotations.csv", 'w') as f:
+        f.write(ANNOTATION_HEADER)
+        for filename in filenames:
+            f.write(f"{filename},32,24,{cls},4,4,20,16\n")
+
+
+@pytest.fixture
+def dataset(tmp_path, write_image):
+    """Three splits of two annotated images each"""
+    root = tmp_path / "data"
+    for split in SPLITS:
+        for index in range(2):
+            write_image(root / split / f"leaf_{index}.jpg", color=(40, 100 + 50 * index, 60))
+        write_annotations(root / split, ["leaf_0.jpg", "leaf_1.jpg"])
+    return root
+
+
+@pytest.fixture
+def validation_config(tmp_path, dataset):
+    root_dir = tmp_path / "data_validation"
+    return DataValidationConfig(
+        root_dir=root_dir,
+        STATUS_FILE=str(root_dir / "status.txt"),
+        REPORT_FILE=str(root_dir / "validation_report.json"),
+        MANIFEST_FILE=str(root_dir / "manifest.db"),
+        train_data=dataset / "train",
+        test_data=dataset / "test",
+        val_data=dataset / "valid",
+        num_workers=2,
+        decode_images=True,
+        fail_on_error=False
+    )
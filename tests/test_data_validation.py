@@ -0,0 +1,90 @@
+import dataclasses
+import json
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from conftest import write_annotations  # noqa: E402
+from src.plant_detection.components.data_validation import DataValidation  # noqa: E402
+
+
+def validate(config):
+    return DataValidation(config).validate_dataset()
+
+
+def test_clean_dataset_report(validation_config):
+    report = validate(validation_config)
+
+    with open(validation_config.REPORT_FILE) as f:
+        written = json.load(f)
+    assert written == report
+    assert written['valid'] is True
+    assert written['totals'] == {'images': 6, 'corrupt_images': 0, 'missing_images': 0, 'unannotated_images': 0}
+    train = written['splits']['train']
+    assert (train['images'], train['valid_images'], train['annotation_files']) == (2, 2, 1)
+    assert train['dimensions'] == {'32x24': 2}
+    assert train['annotations']['rows'] == 2
+    assert train['annotations']['annotated_images'] == 2
+
+    with open(validation_config.STATUS_FILE) as f:
+        status = f.read()
+    assert "Total train images: 2" in status
+    assert "Corrupt validation images: 0" in status
+
+
+def test_bad_signature_and_truncated_jpeg_are_corrupt(validation_config, dataset):
+    train = dataset / "train"
+    (train / "renamed.jpg").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 64)
+    data = (train / "leaf_0.jpg").read_bytes()
+    (train / "truncated.jpg").write_bytes(data[:len(data) // 2])
+    write_annotations(train, ["leaf_0.jpg", "leaf_1.jpg", "renamed.jpg", "truncated.jpg"])
+
+    report = validate(validation_config)
+
+    split = report['splits']['train']
+    assert split['corrupt'] == [
+        {'file': 'renamed.jpg', 'error': "not a JPEG file (bad signature)"},
+        {'file': 'truncated.jpg', 'error': "truncated JPEG (no end-of-image marker)"}
+    ]
+    assert (split['images'], split['valid_images'], split['corrupt_images']) == (4, 2, 2)
+    assert split['valid'] is False
+    assert report['valid'] is False
+    assert report['splits']['test']['valid'] is True
+
+
+def test_annotation_naming_a_missing_file(validation_config, dataset):
+    write_annotations(dataset / "valid", ["leaf_0.jpg", "leaf_1.jpg", "gone.jpg"])
+
+    report = validate(validation_config)
+
+    annotations = report['splits']['valid']['annotations']
+    assert annotations['missing_images'] == ['gone.jpg']
+    assert annotations['missing_image_count'] == 1
+    assert annotations['rows_with_missing_image'] == 1
+    assert report['splits']['valid']['valid'] is False
+    assert report['totals']['missing_images'] == 1
+
+
+def test_unannotated_image_is_reported_but_not_an_error(validation_config, dataset, write_image):
+    write_image(dataset / "test" / "stray.jpg")
+
+    report = validate(validation_config)
+
+    annotations = report['splits']['test']['annotations']
+    assert annotations['unannotated_images'] == ['stray.jpg']
+    assert annotations['unannotated_image_count'] == 1
+    assert report['totals']['unannotated_images'] == 1
+    assert report['valid'] is True
+
+
+def test_fail_on_error_raises_after_writing_the_report(validation_config, dataset):
+    (dataset / "train" / "leaf_1.jpg").write_bytes(b"")
+    config = dataclasses.replace(validation_config, fail_on_error=True)
+
+    with pytest.raises(ValueError, match="Dataset validation found problems"):
+        validate(config)
+
+    with open(config.REPORT_FILE) as f:
+        report = json.load(f)
+    assert report['splits']['train']['corrupt'] == [{'file': 'leaf_1.jpg', 'error': "empty file"}]
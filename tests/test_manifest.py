@@ -0,0 +1,188 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+
+from conftest import write_annotations
+from src.plant_detection.entity.config_entity import DataTransformationConfig, ModelTrainingConfig
+from src.plant_detection.utils.manifest import ValidationManifest
+
+
+def record(manifest, split, paths):
+    """Manifest rows for files as they are now, as DataValidation writes them"""
+    entries = []
+    for path in paths:
+        stat = os.stat(path)
+        entries.append({
+            'path': ValidationManifest.key(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': hashlib.sha256(Path(path).read_bytes()).hexdigest(),
+            'width': None, 'height': None, 'valid': True, 'decoded': False, 'error': None
+        })
+    manifest.update_split(split, entries, [entry['path'] for entry in entries])
+
+
+def bump_mtime(path):
+    """Move a file's mtime a second ahead, so the change is seen whatever the filesystem's resolution"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def validate(config):
+    from src.plant_detection.components.data_validation import DataValidation
+    return DataValidation(config).validate_dataset()
+
+
+def test_unchanged_follows_stage_and_content(tmp_path):
+    manifest = ValidationManifest(tmp_path / "manifest.db")
+    first, second = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    first.write_bytes(b"first")
+    second.write_bytes(b"second")
+    record(manifest, 'train', [first, second])
+    manifest.mark_processed('stage:v1', [first, second])
+
+    keys = {ValidationManifest.key(first), ValidationManifest.key(second)}
+    assert manifest.unchanged('stage:v1', [first, second]) == keys
+    assert manifest.unchanged('stage:v2', [first, second]) == set()
+
+    # Changed on disk but not yet revalidated: the manifest row no longer applies
+    second.write_bytes(b"second, edited")
+    bump_mtime(second)
+    assert manifest.unchanged('stage:v1', [first, second]) == {ValidationManifest.key(first)}
+
+    # Revalidated with new content: still not what the stage processed
+    record(manifest, 'train', [first, second])
+    assert manifest.unchanged('stage:v1', [first, second]) == {ValidationManifest.key(first)}
+
+
+def test_prune_stages_keeps_only_current_settings(tmp_path):
+    manifest = ValidationManifest(tmp_path / "manifest.db")
+    image = tmp_path / "a.jpg"
+    image.write_bytes(b"image")
+    record(manifest, 'train', [image])
+    for stage in ('transform:out:224', 'transform:out:299', 'transform:other:224'):
+        manifest.mark_processed(stage, [image])
+
+    assert manifest.prune_stages('transform:out:', 'transform:out:299') == 1
+    assert manifest.unchanged('transform:out:224', [image]) == set()
+    assert manifest.unchanged('transform:out:299', [image]) == {ValidationManifest.key(image)}
+    assert manifest.unchanged('transform:other:224', [image]) == {ValidationManifest.key(image)}
+
+
+def test_second_validation_reuses_rows_and_rechecks_touched_files(validation_config, dataset):
+    first = validate(validation_config)
+    assert first['splits']['train']['rechecked_files'] == 3  # two images and the annotations
+
+    second = validate(validation_config)
+    for split in second['splits'].values():
+        assert (split['reused_from_manifest'], split['rechecked_files']) == (2, 0)
+    assert second['totals'] == first['totals']
+
+    touched = dataset / "train" / "leaf_0.jpg"
+    bump_mtime(touched)
+    third = validate(validation_config)
+    assert (third['splits']['train']['reused_from_manifest'], third['splits']['train']['rechecked_files']) == (1, 1)
+    assert third['splits']['test']['rechecked_files'] == 0
+    row = ValidationManifest(validation_config.MANIFEST_FILE).entry(touched)
+    assert row['mtime_ns'] == os.stat(touched).st_mtime_ns
+
+
+def test_transformation_skips_only_images_with_unchanged_hash(validation_config, dataset, tmp_path, write_image):
+    pytest.importorskip("cv2")
+    from src.plant_detection.components.data_transformation import DataTransformation
+
+    output = tmp_path / "data_transformation"
+    config = DataTransformationConfig(
+        root_dir=output,
+        transformed_train_data=output / "train",
+        transformed_test_data=output / "test",
+        transformed_val_data=output / "valid",
+        train_data=dataset / "train",
+        test_data=dataset / "test",
+        val_data=dataset / "valid",
+        manifest_file=Path(validation_config.MANIFEST_FILE),
+        image_size=(16, 16),
+        normalization_method="imagenet",
+        model_name="MobileNetV2",
+        color_mode="rgb",
+        data_format="npy"
+    )
+    transformation = DataTransformation(config)
+    loaded = []
+    load = transformation._load_and_preprocess_image
+    transformation._load_and_preprocess_image = lambda path: loaded.append(path.name) or load(path)
+
+    def transform():
+        loaded.clear()
+        assert transformation.transform_data(config.train_data, config.transformed_train_data) == 2
+        return sorted(loaded)
+
+    validate(validation_config)
+    assert transform() == ['leaf_0.jpg', 'leaf_1.jpg']
+    assert transform() == []
+
+    # Touched but identical: rehashed by validation, still skipped
+    bump_mtime(dataset / "train" / "leaf_0.jpg")
+    validate(validation_config)
+    assert transform() == []
+
+    write_image(dataset / "train" / "leaf_1.jpg", color=(200, 30, 30))
+    bump_mtime(dataset / "train" / "leaf_1.jpg")
+    validate(validation_config)
+    assert transform() == ['leaf_1.jpg']
+
+
+def test_yolo_conversion_skips_only_images_with_unchanged_hash(validation_config, dataset, tmp_path, write_image, monkeypatch):
+    pytest.importorskip("ultralytics")
+    from src.plant_detection.components import object_detection
+
+    config = ModelTrainingConfig(
+        root_dir=tmp_path / "model_training",
+        trained_model_path=tmp_path / "model_training" / "model.keras",
+        trained_model_weights=tmp_path / "model_training" / "weights.h5",
+        transformed_train_data=tmp_path / "data_transformation" / "train",
+        trained_model_yolo_path=tmp_path / "yolo_dataset",
+        transformed_test_data=tmp_path / "data_transformation" / "test",
+        transformed_val_data=tmp_path / "data_transformation" / "valid",
+        train_data=dataset / "train",
+        test_data=dataset / "test",
+        val_data=dataset / "valid",
+        manifest_file=Path(validation_config.MANIFEST_FILE),
+        model_name="yolov8n",
+        image_size=(32, 32),
+        num_classes=1,
+        epochs=1,
+        batch_size=1,
+        learning_rate=0.001,
+        early_stopping_patience=1,
+        reduce_lr_patience=1,
+        validation_split=0.0,
+        use_class_weights=False,
+        freeze_base_layers=False,
+        fine_tune_from_layer=0
+    )
+    copied = []
+    copy2 = object_detection.shutil.copy2
+    monkeypatch.setattr(object_detection.shutil, "copy2", lambda src, dst: copied.append(Path(src).name) or copy2(src, dst))
+    converter = object_detection.YOLODataConverter(config)
+
+    def convert():
+        copied.clear()
+        assert converter.convert_dataset('train') == 2
+        return sorted(copied)
+
+    validate(validation_config)
+    assert convert() == ['leaf_0.jpg', 'leaf_1.jpg']
+    assert convert() == []
+
+    write_image(dataset / "train" / "leaf_0.jpg", color=(200, 30, 30))
+    bump_mtime(dataset / "train" / "leaf_0.jpg")
+    validate(validation_config)
+    assert convert() == ['leaf_0.jpg']
+
+    # New annotations change every label file, so everything is converted again
+    write_annotations(dataset / "train", ["leaf_0.jpg", "leaf_1.jpg"], cls="Tomato leaf late blight")
+    bump_mtime(dataset / "train" / "_annotations.csv")
+    validate(validation_config)
+    converter.class_names = None
+    assert convert() == ['leaf_0.jpg', 'leaf_1.jpg']